@@ -299,6 +299,105 @@ class ASERClient(object):
             for e_encoded, r_encoded in msg
         ]
 
+    def fetch_predecessor_eventualities(self, data, top_k=None, senses=None):
+        """ Fetch predecessor eventualities (i.e., heads of relations whose tails are the given eventuality) of the given eventuality
+
+        :param data: the given eventuality or eid
+        :type data: Union[str, aser.eventuality.Eventuality]
+        :param top_k: how many predecessor eventualities with the heaviest relations to return, default `None` for all
+        :type top_k: Union[int, None] (default = None)
+        :param senses: only return eventualities connected by these relation senses, default `None` for all senses
+        :type senses: Union[List[str], None] (default = None)
+        :return: predecessor eventualities associated with corresponding relations
+        :rtype: List[Tuple[aser.eventuality.Eventuality, aser.relation.Relation]]
+        """
+
+        return self.fetch_batch_predecessor_eventualities([data], top_k, senses)[0]
+
+    def fetch_batch_predecessor_eventualities(self, data, top_k=None, senses=None):
+        """ Fetch predecessor eventualities of the given eventualities by one request
+
+        :param data: the given eventualities or eids
+        :type data: List[Union[str, aser.eventuality.Eventuality]]
+        :param top_k: how many predecessor eventualities with the heaviest relations to return for each eventuality, default `None` for all
+        :type top_k: Union[int, None] (default = None)
+        :param senses: only return eventualities connected by these relation senses, default `None` for all senses
+        :type senses: Union[List[str], None] (default = None)
+        :return: predecessor eventualities associated with corresponding relations of each eventuality
+        :rtype: List[List[Tuple[aser.eventuality.Eventuality, aser.relation.Relation]]]
+        """
+
+        eids = [x if isinstance(x, str) else x.eid for x in data]
+        data = json.dumps({"eids": eids, "top_k": top_k, "senses": senses}).encode("utf-8")
+        request_id = self._send(ASERCmd.fetch_predecessor_eventualities, data)
+        msg = self._recv(request_id)
+        return [
+            [
+                (Eventuality().decode(e_encoded, encoding=None), Relation().decode(r_encoded, encoding=None))
+                for e_encoded, r_encoded in predecessor_eventualities
+            ] for predecessor_eventualities in msg
+        ]
+
+    def find_eventuality_paths(self, eventuality1, eventuality2, max_hops=3, senses=None, k=1):
+        """ Find the top-k weighted shortest paths from one eventuality to the other by sending a DB retrieval request
+
+        :param eventuality1: the eventuality or eid as the start
+        :type eventuality1: Union[str, aser.eventuality.Eventuality]
+        :param eventuality2: the eventuality or eid as the end
+        :type eventuality2: Union[str, aser.eventuality.Eventuality]
+        :param max_hops: the maximum number of relations in a path
+        :type max_hops: int (default = 3)
+        :param senses: only follow relations with these senses and weight them by these senses, default `None` for all senses
+        :type senses: Union[List[str], None] (default = None)
+        :param k: how many paths to return
+        :type k: int (default = 1)
+        :return: the paths sorted by the total weight in a descending order, where each path is a relation chain
+        :rtype: List[List[aser.relation.Relation]]
+        """
+
+        eid1 = eventuality1 if isinstance(eventuality1, str) else eventuality1.eid
+        eid2 = eventuality2 if isinstance(eventuality2, str) else eventuality2.eid
+        data = json.dumps({"eid1": eid1, "eid2": eid2, "max_hops": max_hops, "senses": senses, "k": k}).encode("utf-8")
+        request_id = self._send(ASERCmd.find_eventuality_paths, data)
+        msg = self._recv(request_id)
+        return [[Relation().decode(r_encoded, encoding=None) for r_encoded in path] for path in msg]
+
+    def search_eventualities(self, query, top_n=10, patterns=None, match_all=False):
+        """ Search eventualities whose words contain the query terms by sending a DB retrieval request
+
+        :param query: the query terms connected by whitespaces, e.g., "umbrella rain"
+        :type query: str
+        :param top_n: how many eventualities to return, default `None` for all matched eventualities
+        :type top_n: Union[int, None] (default = 10)
+        :param patterns: only return eventualities of these patterns, default `None` for all patterns
+        :type patterns: Union[List[str], None] (default = None)
+        :param match_all: whether eventualities must contain all terms, otherwise any term
+        :type match_all: bool (default = False)
+        :return: the matched eventualities with scores, sorted by scores in a descending order
+        :rtype: List[Tuple[float, aser.eventuality.Eventuality]]
+        """
+
+        data = json.dumps({"query": query, "top_n": top_n, "patterns": patterns, "match_all": match_all}).encode("utf-8")
+        request_id = self._send(ASERCmd.search_eventualities, data)
+        msg = self._recv(request_id)
+        return [(score, Eventuality().decode(e_encoded, encoding=None)) for score, e_encoded in msg]
+
+    def complete_eventualities(self, prefix, top_n=10):
+        """ Complete a typed prefix by the most frequent eventualities by sending a DB retrieval request
+
+        :param prefix: the typed prefix, e.g., "i be hun"
+        :type prefix: str
+        :param top_n: how many eventualities to return, default `None` for all completed eventualities
+        :type top_n: Union[int, None] (default = 10)
+        :return: the completed eventualities, sorted by frequencies in a descending order
+        :rtype: List[aser.eventuality.Eventuality]
+        """
+
+        data = json.dumps({"prefix": prefix, "top_n": top_n}).encode("utf-8")
+        request_id = self._send(ASERCmd.complete_eventualities, data)
+        msg = self._recv(request_id)
+        return [Eventuality().decode(e_encoded, encoding=None) for e_encoded in msg]
+
     def exact_match_concept(self, data):
         """ Retrieve the extract match concept by sending a DB retrieval request
 
@@ -365,3 +464,42 @@ class ASERClient(object):
             (ASERConcept().decode(c_encoded, encoding=None), Relation().decode(r_encoded, encoding=None))
             for c_encoded, r_encoded in msg
         ]
+
+    def fetch_predecessor_concepts(self, data, top_k=None, senses=None):
+        """ Fetch predecessor concepts (i.e., heads of relations whose tails are the given concept) of the given concept
+
+        :param data: the given concept or cid
+        :type data: Union[str, aser.concept.ASERConcept]
+        :param top_k: how many predecessor concepts with the heaviest relations to return, default `None` for all
+        :type top_k: Union[int, None] (default = None)
+        :param senses: only return concepts connected by these relation senses, default `None` for all senses
+        :type senses: Union[List[str], None] (default = None)
+        :return: predecessor concepts associated with corresponding relations
+        :rtype: List[Tuple[aser.concept.ASERConcept, aser.relation.Relation]]
+        """
+
+        return self.fetch_batch_predecessor_concepts([data], top_k, senses)[0]
+
+    def fetch_batch_predecessor_concepts(self, data, top_k=None, senses=None):
+        """ Fetch predecessor concepts of the given concepts by one request
+
+        :param data: the given concepts or cids
+        :type data: List[Union[str, aser.concept.ASERConcept]]
+        :param top_k: how many predecessor concepts with the heaviest relations to return for each concept, default `None` for all
+        :type top_k: Union[int, None] (default = None)
+        :param senses: only return concepts connected by these relation senses, default `None` for all senses
+        :type senses: Union[List[str], None] (default = None)
+        :return: predecessor concepts associated with corresponding relations of each concept
+        :rtype: List[List[Tuple[aser.concept.ASERConcept, aser.relation.Relation]]]
+        """
+
+        cids = [x if isinstance(x, str) else x.cid for x in data]
+        data = json.dumps({"cids": cids, "top_k": top_k, "senses": senses}).encode("utf-8")
+        request_id = self._send(ASERCmd.fetch_predecessor_concepts, data)
+        msg = self._recv(request_id)
+        return [
+            [
+                (ASERConcept().decode(c_encoded, encoding=None), Relation().decode(r_encoded, encoding=None))
+                for c_encoded, r_encoded in predecessor_concepts
+            ] for predecessor_concepts in msg
+        ]
@@ -1,2 +1,6 @@
 from .db_connection import SqliteDBConnection, MongoDBConnection
 from .kg_connection import ASERKGConnection, ASERConceptConnection
+from .kg_writer import ASERKGWriter
+from .sharded_kg_connection import ShardedASERKGConnection
+from .traversal import ASERSubgraph
+from .snapshot import ASERKGSnapshot, ASERConceptSnapshot
@@ -0,0 +1,253 @@
+import sys
+from collections import OrderedDict
+
+
+def estimate_nbytes(x):
+    """ Estimate the memory size of an object recursively
+
+    :param x: an object
+    :type x: object
+    :return: the estimated size in bytes
+    :rtype: int
+    """
+
+    if isinstance(x, (str, bytes, int, float, bool)) or x is None:
+        return sys.getsizeof(x)
+    elif isinstance(x, (list, tuple, set)):
+        return sys.getsizeof(x) + sum(map(estimate_nbytes, x))
+    elif isinstance(x, dict):
+        return sys.getsizeof(x) + sum(estimate_nbytes(k) + estimate_nbytes(v) for k, v in x.items())
+    elif hasattr(x, "__dict__"):
+        return sys.getsizeof(x) + estimate_nbytes(x.__dict__)
+    else:
+        return sys.getsizeof(x)
+
+
+class BaseCache(object):
+    """ Base size-bounded cache that behaves like a dictionary
+
+    """
+    def __init__(self, max_size=None, size_by="entries"):
+        """
+
+        :param max_size: the maximum number of entries or estimated bytes, default `None` for unbounded
+        :type max_size: Union[int, None] (default = None)
+        :param size_by: how to measure the size, "entries" or "bytes"
+        :type size_by: str (default = "entries")
+        """
+
+        if size_by not in ["entries", "bytes"]:
+            raise ValueError("Error: only support entries/bytes sizes.")
+        self.max_size = max_size
+        self.size_by = size_by
+        self._data = OrderedDict()
+        self._nbytes = dict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __contains__(self, key):
+        # membership tests do not count as accesses
+        return key in self._data
+
+    def __getitem__(self, key):
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            raise
+        self.hits += 1
+        self._touch(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = value
+        if self.size_by == "bytes":
+            nbytes = estimate_nbytes(key) + estimate_nbytes(value)
+            self._nbytes[key] = nbytes
+            self.nbytes += nbytes
+        self._touch(key)
+        self._evict()
+
+    def __delitem__(self, key):
+        if key not in self._data:
+            raise KeyError(key)
+        self._remove(key)
+
+    def get(self, key, default=None):
+        """ Get the value of a key and count a hit or a miss
+
+        :param key: the key
+        :type key: object
+        :param default: the value to return if the key is missing
+        :type default: object (default = None)
+        :return: the cached value or the default value
+        :rtype: object
+        """
+
+        if key in self._data:
+            self.hits += 1
+            self._touch(key)
+            return self._data[key]
+        else:
+            self.misses += 1
+            return default
+
+    def peek(self, key, default=None):
+        """ Get the value of a key without counting or touching it
+
+        :param key: the key
+        :type key: object
+        :param default: the value to return if the key is missing
+        :type default: object (default = None)
+        :return: the cached value or the default value
+        :rtype: object
+        """
+
+        return self._data.get(key, default)
+
+    def pop(self, key, default=None):
+        if key in self._data:
+            value = self._data[key]
+            self._remove(key)
+            return value
+        return default
+
+    def keys(self):
+        return self._data.keys()
+
+    def values(self):
+        return self._data.values()
+
+    def items(self):
+        return self._data.items()
+
+    def clear(self):
+        self._data.clear()
+        self._nbytes.clear()
+        self.nbytes = 0
+
+    @property
+    def size(self):
+        return self.nbytes if self.size_by == "bytes" else len(self._data)
+
+    def get_stats(self):
+        """ Get the statistics of this cache
+
+        :return: a dictionary of hits, misses, hit_rate, evictions, entries, and nbytes (if sized by bytes)
+        :rtype: Dict[str, Union[int, float]]
+        """
+
+        n_accesses = self.hits + self.misses
+        stats = OrderedDict(
+            [
+                ("hits", self.hits),
+                ("misses", self.misses),
+                ("hit_rate", self.hits / n_accesses if n_accesses > 0 else 0.0),
+                ("evictions", self.evictions),
+                ("entries", len(self._data)),
+            ]
+        )
+        if self.size_by == "bytes":
+            stats["nbytes"] = self.nbytes
+        return stats
+
+    def reset_stats(self):
+        """ Reset the counters of hits, misses, and evictions
+
+        """
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _remove(self, key):
+        del self._data[key]
+        if self.size_by == "bytes":
+            self.nbytes -= self._nbytes.pop(key)
+
+    def _touch(self, key):
+        raise NotImplementedError
+
+    def _evict(self):
+        raise NotImplementedError
+
+
+class LRUCache(BaseCache):
+    """ Cache that evicts the least recently used entries
+
+    """
+    def _touch(self, key):
+        self._data.move_to_end(key)
+
+    def _evict(self):
+        if self.max_size is None:
+            return
+        # keep at least the newest entry
+        while self.size > self.max_size and len(self._data) > 1:
+            self._remove(next(iter(self._data)))
+            self.evictions += 1
+
+
+class CLOCKCache(BaseCache):
+    """ Cache that evicts entries by the CLOCK (second-chance) algorithm,
+    which avoids reordering entries on every access
+
+    """
+    def __init__(self, max_size=None, size_by="entries"):
+        super(CLOCKCache, self).__init__(max_size, size_by)
+        self._referenced = set()
+
+    def clear(self):
+        super(CLOCKCache, self).clear()
+        self._referenced.clear()
+
+    def _remove(self, key):
+        super(CLOCKCache, self)._remove(key)
+        self._referenced.discard(key)
+
+    def _touch(self, key):
+        self._referenced.add(key)
+
+    def _evict(self):
+        if self.max_size is None:
+            return
+        while self.size > self.max_size and len(self._data) > 1:
+            key = next(iter(self._data))
+            if key in self._referenced:
+                # give a second chance and move the hand forward
+                self._referenced.discard(key)
+                self._data.move_to_end(key)
+            else:
+                self._remove(key)
+                self.evictions += 1
+
+
+def build_cache(policy="lru", max_size=None, size_by="entries"):
+    """ Build a cache by the eviction policy
+
+    :param policy: the eviction policy, "lru" or "clock"
+    :type policy: str (default = "lru")
+    :param max_size: the maximum number of entries or estimated bytes, default `None` for unbounded
+    :type max_size: Union[int, None] (default = None)
+    :param size_by: how to measure the size, "entries" or "bytes"
+    :type size_by: str (default = "entries")
+    :return: the cache
+    :rtype: aser.database.cache.BaseCache
+    """
+
+    if policy == "lru":
+        return LRUCache(max_size, size_by)
+    elif policy == "clock":
+        return CLOCKCache(max_size, size_by)
+    else:
+        raise ValueError("Error: only support lru/clock policies.")
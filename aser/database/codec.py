@@ -0,0 +1,367 @@
+import json
+import struct
+import sys
+from collections import Counter
+from ..eventuality import Eventuality
+from ..relation import relation_senses
+
+# the first byte of the info BLOB is the format tag, and json always starts with "{"
+JSON_FORMAT_TAG = ord("{")
+BINARY_FORMAT_TAG = 0x01
+
+# string ids are uint16, and the maximum one represents None
+NONE_STRING_ID = 0xFFFF
+MENTION_KEYS = ("start", "end", "text", "ner", "link", "entity")
+
+# flags of optional fields
+NERS_FLAG = 0x01
+COMPACT_NERS_FLAG = 0x02
+MENTIONS_FLAG = 0x04
+COMPACT_MENTIONS_FLAG = 0x08
+
+# tag, flags, #bytes of the string table, #strings, #words, #dependencies, #verbs, #skeleton words,
+# #skeleton dependencies, #phrases, #mentions
+BINARY_HEADER = struct.Struct("<BBIHHHHHHHH")
+
+# sparse relation senses are packed as (sense id, weight) pairs sorted by sense ids
+SENSE_WEIGHT = struct.Struct("<Bd")
+
+
+def encode_eventuality_info(eventuality, info_format="binary"):
+    """ Encode the info of an eventuality into bytes
+
+    :param eventuality: the eventuality to encode
+    :type eventuality: aser.eventuality.Eventuality
+    :param info_format: "binary" for the compact binary format, or "json" for the readable format
+    :type info_format: str (default = "binary")
+    :return: the encoded bytes, whose first byte is the format tag
+    :rtype: bytes
+    """
+
+    if info_format == "json":
+        return eventuality.encode(minimum=True)
+    elif info_format == "binary":
+        info = _encode_binary_eventuality_info(eventuality)
+        if info is None:
+            # some contents cannot be represented, e.g., too many strings
+            return eventuality.encode(minimum=True)
+        return info
+    else:
+        raise ValueError("Error: only support binary/json info formats.")
+
+
+def decode_eventuality_info(info, eventuality=None):
+    """ Decode the info of an eventuality by the format tag
+
+    :param info: the encoded bytes
+    :type info: Union[bytes, str]
+    :param eventuality: the eventuality to fill, default `None` to create a new one
+    :type eventuality: Union[aser.eventuality.Eventuality, None] (default = None)
+    :return: the decoded eventuality
+    :rtype: aser.eventuality.Eventuality
+    """
+
+    if eventuality is None:
+        eventuality = Eventuality()
+    if isinstance(info, str):
+        info = info.encode("utf-8")
+    if len(info) > 0 and info[0] == BINARY_FORMAT_TAG:
+        return _decode_binary_eventuality_info(info, eventuality)
+    else:
+        return eventuality.decode(bytes(info))
+
+
+def get_eventuality_info_format(info):
+    """ Get the format of the info of an eventuality
+
+    :param info: the encoded bytes
+    :type info: Union[bytes, str]
+    :return: "binary" or "json"
+    :rtype: str
+    """
+
+    if not isinstance(info, str) and len(info) > 0 and info[0] == BINARY_FORMAT_TAG:
+        return "binary"
+    return "json"
+
+
+def _encode_binary_eventuality_info(eventuality):
+    strings = dict()
+
+    def get_string_id(x):
+        if x is None:
+            return NONE_STRING_ID
+        idx = strings.get(x, None)
+        if idx is None:
+            idx = strings[x] = len(strings)
+        return idx
+
+    words = [get_string_id(x) for x in eventuality.words]
+    pos_tags = [get_string_id(x) for x in eventuality.pos_tags]
+    dependencies = []
+    for governor, dep, dependent in eventuality._dependencies:
+        dependencies.extend([governor, get_string_id(dep), dependent])
+    if eventuality._phrase_segment_indices is not None:
+        phrases = [idx for segment in eventuality._phrase_segment_indices for idx in segment]
+    else:
+        phrases = [idx for segment in eventuality._phrase_segment() for idx in segment]
+
+    flags = 0
+    ners, ners_json = [], b""
+    if eventuality._ners is not None:
+        flags |= NERS_FLAG
+        if all([isinstance(x, str) for x in eventuality._ners]):
+            flags |= COMPACT_NERS_FLAG
+            ners = [get_string_id(x) for x in eventuality._ners]
+        else:
+            ners_json = json.dumps(eventuality._ners).encode("utf-8")
+    mentions, mentions_json = [], b""
+    if eventuality._mentions is not None:
+        flags |= MENTIONS_FLAG
+        if all(
+            [
+                tuple(v.keys()) == MENTION_KEYS and isinstance(v["start"], int) and isinstance(v["end"], int) and
+                all([v[key] is None or isinstance(v[key], str) for key in MENTION_KEYS[2:]])
+                for v in eventuality._mentions.values()
+            ]
+        ):
+            flags |= COMPACT_MENTIONS_FLAG
+            for v in eventuality._mentions.values():
+                mentions.extend([v["start"], v["end"]] + [get_string_id(v[key]) for key in MENTION_KEYS[2:]])
+        else:
+            mentions_json = json.dumps({str(k): v for k, v in eventuality._mentions.items()}).encode("utf-8")
+
+    if len(strings) >= NONE_STRING_ID or any(["\x00" in x for x in strings]):
+        return None
+    string_table = "\x00".join(strings.keys()).encode("utf-8")
+    body = words + pos_tags + dependencies + eventuality._verb_indices + eventuality._skeleton_indices + \
+        eventuality._skeleton_dependency_indices + phrases + ners + mentions
+    if any([x < 0 or x > NONE_STRING_ID for x in body]):
+        return None
+    header = BINARY_HEADER.pack(
+        BINARY_FORMAT_TAG, flags, len(string_table), len(strings), len(words), len(dependencies) // 3,
+        len(eventuality._verb_indices), len(eventuality._skeleton_indices),
+        len(eventuality._skeleton_dependency_indices), len(phrases) // 2, len(mentions) // 6
+    )
+    tail = b""
+    if ners_json:
+        tail += struct.pack("<I", len(ners_json)) + ners_json
+    if mentions_json:
+        tail += struct.pack("<I", len(mentions_json)) + mentions_json
+    return header + string_table + struct.pack("<%dH" % (len(body)), *body) + tail
+
+
+def _decode_binary_eventuality_info(info, eventuality):
+    (
+        _, flags, n_string_bytes, n_strings, n_words, n_dependencies, n_verbs, n_skeleton_words,
+        n_skeleton_dependencies, n_phrases, n_mentions
+    ) = BINARY_HEADER.unpack_from(info, 0)
+    offset = BINARY_HEADER.size
+    if n_strings > 0:
+        # interned strings are shared by eventualities in memory
+        strings = list(map(sys.intern, bytes(info[offset:offset + n_string_bytes]).decode("utf-8").split("\x00")))
+    else:
+        strings = []
+    offset += n_string_bytes
+    compact_ners = (flags & COMPACT_NERS_FLAG) != 0
+    compact_mentions = (flags & COMPACT_MENTIONS_FLAG) != 0
+    n_body = 2 * n_words + 3 * n_dependencies + n_verbs + n_skeleton_words + n_skeleton_dependencies + \
+        2 * n_phrases + (n_words if compact_ners else 0) + 6 * n_mentions
+    body = struct.unpack_from("<%dH" % (n_body), info, offset)
+    offset += 2 * n_body
+
+    get_string = lambda idx: None if idx == NONE_STRING_ID else strings[idx]
+    ptr = 0
+    get_strings = strings.__getitem__
+    eventuality.words = list(map(get_strings, body[ptr:ptr + n_words]))
+    ptr += n_words
+    eventuality.pos_tags = list(map(get_strings, body[ptr:ptr + n_words]))
+    ptr += n_words
+    eventuality._dependencies = [
+        (body[i], strings[body[i + 1]], body[i + 2]) for i in range(ptr, ptr + 3 * n_dependencies, 3)
+    ]
+    ptr += 3 * n_dependencies
+    eventuality._verb_indices = list(body[ptr:ptr + n_verbs])
+    ptr += n_verbs
+    eventuality._skeleton_indices = list(body[ptr:ptr + n_skeleton_words])
+    ptr += n_skeleton_words
+    eventuality._skeleton_dependency_indices = list(body[ptr:ptr + n_skeleton_dependencies])
+    ptr += n_skeleton_dependencies
+    eventuality._phrase_segment_indices = [(body[i], body[i + 1]) for i in range(ptr, ptr + 2 * n_phrases, 2)]
+    ptr += 2 * n_phrases
+
+    if (flags & NERS_FLAG) == 0:
+        eventuality._ners = None
+    elif compact_ners:
+        eventuality._ners = list(map(get_strings, body[ptr:ptr + n_words]))
+        ptr += n_words
+    else:
+        length = struct.unpack_from("<I", info, offset)[0]
+        eventuality._ners = [
+            x if isinstance(x, str) else Counter(x)
+            for x in json.loads(bytes(info[offset + 4:offset + 4 + length]).decode("utf-8"))
+        ]
+        offset += 4 + length
+
+    if (flags & MENTIONS_FLAG) == 0:
+        eventuality._mentions = None
+    elif compact_mentions:
+        eventuality._mentions = dict()
+        for i in range(ptr, ptr + 6 * n_mentions, 6):
+            mention = dict(zip(MENTION_KEYS, [body[i], body[i + 1]] + [get_string(idx) for idx in body[i + 2:i + 6]]))
+            eventuality._mentions[(body[i], body[i + 1])] = mention
+        ptr += 6 * n_mentions
+    else:
+        length = struct.unpack_from("<I", info, offset)[0]
+        mentions = json.loads(bytes(info[offset + 4:offset + 4 + length]).decode("utf-8"))
+        eventuality._mentions = {tuple(json.loads(k.replace("(", "[").replace(")", "]"))): v for k, v in mentions.items()}
+        offset += 4 + length
+    return eventuality
+
+
+class LazyEventuality(Eventuality):
+    """ Eventuality built from a database row, where eid, frequency, pattern, and words come from plain columns
+    and the info BLOB is decoded only when other contents (e.g., dependencies, ners, and mentions) are first accessed
+
+    """
+
+    LAZY_ATTRIBUTES = [
+        "_dependencies", "pos_tags", "_ners", "_mentions", "_skeleton_dependency_indices", "_skeleton_indices",
+        "_verb_indices", "_phrase_segment_indices"
+    ]
+
+    def __init__(self, row=None):
+        """
+
+        :param row: a row of the eventuality table that contains "_id", "frequency", "pattern", "words", and "info"
+        :type row: Union[Dict[str, object], None] (default = None)
+        """
+
+        self._lazy_values = dict()
+        self._info = None
+        self._materialized = True  # attributes set by the constructor are not lazy
+        super(LazyEventuality, self).__init__()
+        if row is not None:
+            self.eid = row["_id"]
+            self.frequency = row["frequency"]
+            self.pattern = row["pattern"]
+            self.words = [sys.intern(x) for x in row["words"].split(" ")]
+            self._info = row["info"]
+            self._materialized = False
+
+    @property
+    def is_materialized(self):
+        return self._materialized
+
+    def materialize(self):
+        """ Decode the info BLOB if it has not been decoded
+
+        :return: the eventuality itself
+        :rtype: aser.database.codec.LazyEventuality
+        """
+
+        if not self._materialized:
+            self._materialized = True
+            info, self._info = self._info, None
+            decode_eventuality_info(info, self)
+        return self
+
+    def decode(self, msg, encoding="utf-8", **kw):
+        # decoded contents override the row
+        self._materialized = True
+        self._info = None
+        return super(LazyEventuality, self).decode(msg, encoding, **kw)
+
+    def to_dict(self, **kw):
+        self.materialize()
+        if kw.get("minimum", False):
+            return super(LazyEventuality, self).to_dict(**kw)
+        d = {k: v for k, v in self.__dict__.items() if k not in ["_lazy_values", "_info", "_materialized"]}
+        d.update(self._lazy_values)
+        if d["_mentions"] is not None:
+            d["_mentions"] = {str(k): v for k, v in d["_mentions"].items()}  # key cannot be tuple
+        return d
+
+
+def _build_lazy_property(name):
+    def getter(self):
+        if not self._materialized:
+            self.materialize()
+        return self._lazy_values.get(name, None)
+
+    def setter(self, value):
+        self._lazy_values[name] = value
+
+    return property(getter, setter)
+
+
+for _name in LazyEventuality.LAZY_ATTRIBUTES:
+    setattr(LazyEventuality, _name, _build_lazy_property(_name))
+del _name
+
+
+def encode_relation_senses(relations, senses=relation_senses):
+    """ Encode the sense weights of a relation as packed (sense id, weight) pairs, where zero weights are omitted
+
+    :param relations: a dictionary from senses to weights
+    :type relations: Dict[str, float]
+    :param senses: all relation senses, whose indices are sense ids
+    :type senses: List[str] (default = relation_senses)
+    :return: the encoded bytes
+    :rtype: bytes
+    """
+
+    sense2idx = {r: idx for idx, r in enumerate(senses)}
+    pairs = sorted([(sense2idx[r], w) for r, w in relations.items() if r in sense2idx and w != 0.0])
+    return b"".join([SENSE_WEIGHT.pack(idx, w) for idx, w in pairs])
+
+
+def decode_relation_senses(info, senses=relation_senses):
+    """ Decode packed (sense id, weight) pairs
+
+    :param info: the encoded bytes
+    :type info: Union[bytes, None]
+    :param senses: all relation senses, whose indices are sense ids
+    :type senses: List[str] (default = relation_senses)
+    :return: a dictionary from senses to weights
+    :rtype: Dict[str, float]
+    """
+
+    if not info:
+        return dict()
+    return {senses[idx]: w for idx, w in SENSE_WEIGHT.iter_unpack(info)}
+
+
+def merge_relation_senses(info1, info2):
+    """ Add up two packed sense weights, which is registered as a SQL function for updates and upserts
+
+    :param info1: the encoded bytes
+    :type info1: Union[bytes, None]
+    :param info2: the encoded bytes
+    :type info2: Union[bytes, None]
+    :return: the encoded bytes of the sum
+    :rtype: bytes
+    """
+
+    weights = dict(SENSE_WEIGHT.iter_unpack(info1)) if info1 else dict()
+    if info2:
+        for idx, w in SENSE_WEIGHT.iter_unpack(info2):
+            weights[idx] = weights.get(idx, 0.0) + w
+    return b"".join([SENSE_WEIGHT.pack(idx, weights[idx]) for idx in sorted(weights) if weights[idx] != 0.0])
+
+
+def get_relation_weights(row, senses=relation_senses):
+    """ Get the sense weights of a relation row in either the dense or the sparse format
+
+    :param row: a row that contains sense columns or a "senses" column
+    :type row: Dict[str, object]
+    :param senses: the senses to return
+    :type senses: List[str] (default = relation_senses)
+    :return: the weights of senses
+    :rtype: List[float]
+    """
+
+    if "senses" in row:
+        relations = decode_relation_senses(row["senses"])
+        return [relations.get(r, 0.0) for r in senses]
+    return [row[r] for r in senses]
@@ -0,0 +1,1134 @@
+import hashlib
+import json
+import os
+import sys
+import numpy as np
+from array import array
+from collections import OrderedDict
+from ..relation import Relation
+from .codec import get_relation_weights
+from .index import IdSet, AdjacencyIndex, DIGEST_SIZE, DIGEST_DTYPE, get_temp_path
+
+KEY_HASH_SIZE = 8
+# the version of saved columns, which is checked when they are loaded
+COLUMNAR_FORMAT_VERSION = 1
+
+
+def hash_key(key):
+    """ Hash a key (e.g., a string of verbs) into a 64-bit unsigned integer
+
+    :param key: the key
+    :type key: str
+    :return: the hash value
+    :rtype: int
+    """
+
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=KEY_HASH_SIZE).digest(), "little")
+
+
+def _get_index_dtype(n):
+    return np.int32 if n < 2**31 else np.int64
+
+
+def _save_arrays(index_path, arrays, meta):
+    # the meta file is written at last so that incomplete saves cannot be loaded
+    for name, value in arrays.items():
+        with open(get_temp_path(index_path + "." + name + ".npy"), "wb") as f:
+            np.save(f, value)
+        os.replace(get_temp_path(index_path + "." + name + ".npy"), index_path + "." + name + ".npy")
+    with open(get_temp_path(index_path + ".json"), "w") as f:
+        json.dump(meta, f)
+    os.replace(get_temp_path(index_path + ".json"), index_path + ".json")
+
+
+def _load_arrays(index_path, names):
+    try:
+        with open(index_path + ".json", "r") as f:
+            meta = json.load(f)
+        if meta.get("version", None) != COLUMNAR_FORMAT_VERSION:
+            return None, None
+        # plain views of memory maps avoid the overhead of `numpy.memmap` slicing
+        arrays = {name: np.load(index_path + "." + name + ".npy", mmap_mode="r").view(np.ndarray) for name in names}
+    except (OSError, ValueError):
+        return None, None
+    return meta, arrays
+
+
+class ColumnarStrings(object):
+    """ Read-only list of strings, where UTF-8 bytes are concatenated and indexed by offsets
+    so that strings are only decoded when they are accessed
+
+    """
+    def __init__(self, offsets, data):
+        """
+
+        :param offsets: the offsets of strings
+        :type offsets: numpy.ndarray
+        :param data: the concatenated UTF-8 bytes
+        :type data: numpy.ndarray
+        """
+
+        self.offsets = offsets
+        self.data = data
+
+    @staticmethod
+    def build(strings):
+        """ Build ColumnarStrings from strings
+
+        :param strings: strings
+        :type strings: Iterable[str]
+        :return: the built ColumnarStrings
+        :rtype: aser.database.columnar.ColumnarStrings
+        """
+
+        offsets = array("q", [0])
+        data = bytearray()
+        for x in strings:
+            data += x.encode("utf-8")
+            offsets.append(len(data))
+        return ColumnarStrings(np.array(offsets, dtype=np.int64), np.frombuffer(bytes(data), dtype=np.uint8))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx):
+        return self.data[self.offsets[idx]:self.offsets[idx + 1]].tobytes().decode("utf-8")
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+
+class ColumnarRelations(object):
+    """ Read-only column-oriented relations, where relations are stored in a CSR adjacency index
+    and `Relation` objects are only built when they are accessed
+
+    """
+    def __init__(self, adjacency_index, edge_rids, rid_order=None, sorted_rid_digests=None):
+        """
+
+        :param adjacency_index: the CSR adjacency index of relations
+        :type adjacency_index: aser.database.index.AdjacencyIndex
+        :param edge_rids: the digests of rids in the order of outgoing edges
+        :type edge_rids: numpy.ndarray
+        :param rid_order: the positions of edges sorted by rids, default `None` to sort them
+        :type rid_order: Union[numpy.ndarray, None] (default = None)
+        :param sorted_rid_digests: the sorted digests of rids, default `None` to sort them
+        :type sorted_rid_digests: Union[numpy.ndarray, None] (default = None)
+        """
+
+        self.adjacency_index = adjacency_index
+        self.edge_rids = edge_rids
+        if rid_order is None:
+            rid_order = np.argsort(edge_rids, kind="stable").astype(_get_index_dtype(len(edge_rids)))
+        self.rid_order = rid_order
+        self.sorted_rid_digests = sorted_rid_digests if sorted_rid_digests is not None else edge_rids[rid_order]
+
+    @property
+    def n_relations(self):
+        return len(self.edge_rids)
+
+    @staticmethod
+    def _build_relations(relation_rows, senses):
+        hids, tids, rids, weights = [], [], [], []
+        for row in relation_rows:
+            hids.append(row["hid"])
+            tids.append(row["tid"])
+            digest = IdSet._to_digest(row["_id"])
+            if digest is None:
+                raise ValueError("Error: the columnar mode only supports SHA1 rids.")
+            rids.append(digest)
+            weights.append(get_relation_weights(row, senses))
+        adjacency_index, out_order = AdjacencyIndex.build(hids, tids, weights, senses, return_order=True)
+        edge_rids = np.frombuffer(b"".join(rids), dtype=DIGEST_DTYPE)[out_order]
+        return adjacency_index, edge_rids
+
+    def _get_relation_arrays(self):
+        return OrderedDict(
+            [("edge_rids", self.edge_rids), ("rid_order", self.rid_order), ("sorted_rid_digests", self.sorted_rid_digests)]
+        )
+
+    @staticmethod
+    def _search_digest(sorted_digests, order, _id):
+        digest = IdSet._to_digest(_id)
+        if digest is None:
+            return -1
+        idx = sorted_digests.searchsorted(digest)
+        # NumPy strips trailing null bytes of fixed-length bytes
+        if idx < len(sorted_digests) and sorted_digests[idx] == digest.rstrip(b"\x00"):
+            return int(order[idx]) if order is not None else int(idx)
+        return -1
+
+    def get_relation_position(self, rid):
+        """ Get the position of a relation in outgoing edges
+
+        :param rid: the rid
+        :type rid: str
+        :return: the position, or -1 if the relation does not exist
+        :rtype: int
+        """
+
+        return ColumnarRelations._search_digest(self.sorted_rid_digests, self.rid_order, rid)
+
+    def get_relation_rid(self, position):
+        return self.edge_rids[position].ljust(DIGEST_SIZE, b"\x00").hex()
+
+    def get_relation(self, position):
+        """ Build the relation of an outgoing edge
+
+        :param position: the position in outgoing edges
+        :type position: int
+        :return: the relation
+        :rtype: aser.relation.Relation
+        """
+
+        index = self.adjacency_index
+        head = int(index.out_offsets.searchsorted(position, side="right")) - 1
+        return Relation(
+            index._get_node_id(head), index._get_node_id(index.out_neighbors[position]),
+            {r: w for r, w in zip(index.senses, index.out_weights[position].tolist()) if w > 0.0}
+        )
+
+    def get_relation_positions(self, _id, direction="out"):
+        """ Get the positions of outgoing edges of relations whose heads (or tails) are the node
+
+        :param _id: the node id (i.e., eid or cid)
+        :type _id: str
+        :param direction: "out" for relations whose heads are the node, "in" for relations whose tails are it
+        :type direction: str (default = "out")
+        :return: the positions in outgoing edges
+        :rtype: numpy.ndarray
+        """
+
+        index = self.adjacency_index
+        idx = index._get_node_index(_id)
+        if idx == -1:
+            return None
+        if direction == "out":
+            return np.arange(index.out_offsets[idx], index.out_offsets[idx + 1])
+        elif direction == "in":
+            return index.in_edges[index.in_offsets[idx]:index.in_offsets[idx + 1]]
+        else:
+            raise ValueError("Error: only support out/in directions.")
+
+
+class ColumnarKG(ColumnarRelations):
+    """ Read-only column-oriented KG, where eventualities and relations are stored in NumPy arrays
+    and `Eventuality` and `Relation` objects are only built when they are accessed
+
+    """
+    def __init__(
+        self, eid_digests, frequencies, pattern_ids, patterns, vocab, tokens, info_offsets, info_data, key_indices,
+        adjacency_index, edge_rids, eid_order=None, sorted_eid_digests=None, rid_order=None, sorted_rid_digests=None
+    ):
+        """
+
+        :param eid_digests: the digests of eids in the row order
+        :type eid_digests: numpy.ndarray
+        :param frequencies: the frequencies of eventualities
+        :type frequencies: numpy.ndarray
+        :param pattern_ids: the pattern ids of eventualities
+        :type pattern_ids: numpy.ndarray
+        :param patterns: the interned patterns
+        :type patterns: List[str]
+        :param vocab: the interned tokens of words, verbs, and skeleton words
+        :type vocab: Union[List[str], aser.database.columnar.ColumnarStrings]
+        :param tokens: a dictionary from columns (e.g., "words") to (offsets, token ids)
+        :type tokens: Dict[str, Tuple[numpy.ndarray, numpy.ndarray]]
+        :param info_offsets: the offsets of info BLOBs
+        :type info_offsets: numpy.ndarray
+        :param info_data: the concatenated info BLOBs
+        :type info_data: numpy.ndarray
+        :param key_indices: a dictionary from columns (e.g., "verbs") to (sorted key hashes, positions of eventualities)
+        :type key_indices: Dict[str, Tuple[numpy.ndarray, numpy.ndarray]]
+        :param adjacency_index: the CSR adjacency index of relations
+        :type adjacency_index: aser.database.index.AdjacencyIndex
+        :param edge_rids: the digests of rids in the order of outgoing edges
+        :type edge_rids: numpy.ndarray
+        :param eid_order: the positions of eventualities sorted by eids, default `None` to sort them
+        :type eid_order: Union[numpy.ndarray, None] (default = None)
+        :param sorted_eid_digests: the sorted digests of eids, default `None` to sort them
+        :type sorted_eid_digests: Union[numpy.ndarray, None] (default = None)
+        :param rid_order: the positions of edges sorted by rids, default `None` to sort them
+        :type rid_order: Union[numpy.ndarray, None] (default = None)
+        :param sorted_rid_digests: the sorted digests of rids, default `None` to sort them
+        :type sorted_rid_digests: Union[numpy.ndarray, None] (default = None)
+        """
+
+        super(ColumnarKG, self).__init__(adjacency_index, edge_rids, rid_order, sorted_rid_digests)
+        self.eid_digests = eid_digests
+        if eid_order is None:
+            eid_order = np.argsort(eid_digests, kind="stable").astype(_get_index_dtype(len(eid_digests)))
+        self.eid_order = eid_order
+        self.sorted_eid_digests = sorted_eid_digests if sorted_eid_digests is not None else eid_digests[eid_order]
+        self.frequencies = frequencies
+        self.pattern_ids = pattern_ids
+        self.patterns = patterns
+        self.vocab = vocab
+        self.tokens = tokens
+        self.info_offsets = info_offsets
+        self.info_data = info_data
+        self.key_indices = key_indices
+        # built on the first token lookup so that snapshots can be opened without decoding the vocabulary
+        self._token2id = None
+
+    @property
+    def n_eventualities(self):
+        return len(self.eid_digests)
+
+    @staticmethod
+    def build(eventuality_rows, relation_rows, key_columns, senses):
+        """ Build a ColumnarKG from rows of eventualities and relations
+
+        :param eventuality_rows: rows that contain "_id", "frequency", "pattern", "words", "info", and key columns
+        :type eventuality_rows: Iterable[Dict[str, object]]
+        :param relation_rows: rows that contain "_id", "hid", "tid", and senses (or "senses" of sparse relations)
+        :type relation_rows: Iterable[Dict[str, object]]
+        :param key_columns: the columns to build key indices, e.g., ["verbs", "skeleton_words", "words"]
+        :type key_columns: List[str]
+        :param senses: the relation senses of weight columns
+        :type senses: List[str]
+        :return: the built ColumnarKG
+        :rtype: aser.database.columnar.ColumnarKG
+        """
+
+        digests = bytearray()
+        frequencies = array("d")
+        pattern_ids = array("i")
+        pattern2id = dict()
+        token2id = dict()
+        token_columns = ["words"] + [k for k in key_columns if k != "words"]
+        tokens = OrderedDict([(k, (array("q", [0]), array("i"))) for k in token_columns])
+        info_offsets = array("q", [0])
+        info_data = bytearray()
+        key_hashes = OrderedDict([(k, array("Q")) for k in key_columns])
+        for row in eventuality_rows:
+            digest = IdSet._to_digest(row["_id"])
+            if digest is None:
+                raise ValueError("Error: the columnar mode only supports SHA1 eids.")
+            digests += digest
+            frequencies.append(row["frequency"])
+            pattern_id = pattern2id.get(row["pattern"], None)
+            if pattern_id is None:
+                pattern_id = pattern2id[row["pattern"]] = len(pattern2id)
+            pattern_ids.append(pattern_id)
+            for k, (offsets, token_ids) in tokens.items():
+                for token in row[k].split(" "):
+                    token_id = token2id.get(token, None)
+                    if token_id is None:
+                        token_id = token2id[token] = len(token2id)
+                    token_ids.append(token_id)
+                offsets.append(len(token_ids))
+            info = row["info"]
+            info_data += info.encode("utf-8") if isinstance(info, str) else info
+            info_offsets.append(len(info_data))
+            for k, hashes in key_hashes.items():
+                hashes.append(hash_key(row[k]))
+
+        n_eventualities = len(frequencies)
+        index_dtype = _get_index_dtype(n_eventualities)
+        key_indices = dict()
+        for k, hashes in key_hashes.items():
+            hashes = np.frombuffer(hashes, dtype=np.uint64) if n_eventualities else np.zeros(0, dtype=np.uint64)
+            # eids of the same key keep the row order
+            order = np.argsort(hashes, kind="stable")
+            key_indices[k] = (hashes[order], order.astype(index_dtype))
+
+        adjacency_index, edge_rids = ColumnarRelations._build_relations(relation_rows, senses)
+
+        return ColumnarKG(
+            np.frombuffer(bytes(digests), dtype=DIGEST_DTYPE),
+            np.frombuffer(frequencies, dtype=np.float64) if n_eventualities else np.zeros(0, dtype=np.float64),
+            np.array(pattern_ids, dtype=np.int32),
+            [sys.intern(x) for x in pattern2id.keys()],
+            [sys.intern(x) for x in token2id.keys()],
+            {k: (np.array(offsets, dtype=np.int64), np.array(token_ids, dtype=np.int32))
+             for k, (offsets, token_ids) in tokens.items()},
+            np.array(info_offsets, dtype=np.int64),
+            np.frombuffer(bytes(info_data), dtype=np.uint8),
+            key_indices,
+            adjacency_index,
+            edge_rids
+        )
+
+    def get_eventuality_position(self, eid):
+        """ Get the row position of an eventuality
+
+        :param eid: the eid
+        :type eid: str
+        :return: the position, or -1 if the eventuality does not exist
+        :rtype: int
+        """
+
+        return ColumnarRelations._search_digest(self.sorted_eid_digests, self.eid_order, eid)
+
+    def get_eventuality_eid(self, position):
+        return self.eid_digests[position].ljust(DIGEST_SIZE, b"\x00").hex()
+
+    def _get_tokens(self, column, position):
+        offsets, token_ids = self.tokens[column]
+        return " ".join([self.vocab[x] for x in token_ids[offsets[position]:offsets[position + 1]].tolist()])
+
+    def get_eventuality_row(self, position):
+        """ Get the row of an eventuality that is enough to build an eventuality
+
+        :param position: the row position
+        :type position: int
+        :return: a row that contains "_id", "frequency", "pattern", "words", and "info"
+        :rtype: Dict[str, object]
+        """
+
+        row = OrderedDict()
+        row["_id"] = self.get_eventuality_eid(position)
+        row["frequency"] = float(self.frequencies[position])
+        row["pattern"] = self.patterns[self.pattern_ids[position]]
+        row["words"] = self._get_tokens("words", position)
+        row["info"] = self.info_data[self.info_offsets[position]:self.info_offsets[position + 1]].tobytes()
+        return row
+
+    def get_token_id(self, token):
+        """ Get the interned id of a token
+
+        :param token: the token
+        :type token: str
+        :return: the token id, or -1 if the token does not exist
+        :rtype: int
+        """
+
+        if self._token2id is None:
+            self._token2id = {x: i for i, x in enumerate(self.vocab)}
+        return self._token2id.get(token, -1)
+
+    def get_token_ids(self, tokens, ignore_tokens=None):
+        """ Get the ids of query tokens, where unknown tokens are assigned new ids beyond the vocabulary
+        so that they never match but are still counted in similarities
+
+        :param tokens: the tokens
+        :type tokens: List[str]
+        :param ignore_tokens: tokens to drop, e.g., `PRONOUN_SET`
+        :type ignore_tokens: Union[Set[str], None] (default = None)
+        :return: the token ids
+        :rtype: numpy.ndarray
+        """
+
+        unknown_ids = dict()
+        token_ids = []
+        for token in tokens:
+            if ignore_tokens and token in ignore_tokens:
+                continue
+            token_id = self.get_token_id(token)
+            if token_id == -1:
+                token_id = unknown_ids.setdefault(token, len(self.vocab) + len(unknown_ids))
+            token_ids.append(token_id)
+        return np.array(token_ids, dtype=np.int64)
+
+    def get_token_rows(self, column, positions, ignore_tokens=None):
+        """ Get the token ids of eventualities as a sparse token-id matrix in the CSR layout
+
+        :param column: the token column, e.g., "words"
+        :type column: str
+        :param positions: the row positions
+        :type positions: Union[List[int], numpy.ndarray]
+        :param ignore_tokens: tokens to drop, e.g., `PRONOUN_SET`
+        :type ignore_tokens: Union[Set[str], None] (default = None)
+        :return: the offsets and the token ids of the given rows
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray]
+        """
+
+        offsets, token_ids = self.tokens[column]
+        positions = np.asarray(positions, dtype=np.int64)
+        starts = offsets[positions]
+        lengths = offsets[positions + 1] - starts
+        row_offsets = np.zeros((len(positions) + 1, ), dtype=np.int64)
+        np.cumsum(lengths, out=row_offsets[1:])
+        # gather all slices at once: the i-th slice begins at starts[i] and is shifted to row_offsets[i]
+        gather = np.arange(row_offsets[-1], dtype=np.int64) + np.repeat(starts - row_offsets[:-1], lengths)
+        row_ids = token_ids[gather]
+        if ignore_tokens:
+            ignore_ids = [x for x in map(self.get_token_id, ignore_tokens) if x != -1]
+            kept = ~np.isin(row_ids, ignore_ids)
+            rows = np.repeat(np.arange(len(positions), dtype=np.int64), lengths)
+            np.cumsum(np.bincount(rows[kept], minlength=len(positions)), out=row_offsets[1:])
+            row_ids = row_ids[kept]
+        return row_offsets, row_ids
+
+    def get_key_positions(self, column, key):
+        """ Get the row positions of eventualities whose column values are the key
+
+        :param column: the key column, e.g., "verbs"
+        :type column: str
+        :param key: the key
+        :type key: str
+        :return: the row positions
+        :rtype: List[int]
+        """
+
+        hashes, positions = self.key_indices[column]
+        h = np.uint64(hash_key(key))
+        st, end = hashes.searchsorted(h, side="left"), hashes.searchsorted(h, side="right")
+        if st == end:
+            return []
+        # hash collisions are verified by token ids
+        key_ids = np.array([self.get_token_id(x) for x in key.split(" ")], dtype=np.int64)
+        if (key_ids < 0).any():
+            return []
+        positions = np.asarray(positions[st:end], dtype=np.int64)
+        row_offsets, row_ids = self.get_token_rows(column, positions)
+        matched = np.diff(row_offsets) == len(key_ids)
+        if matched.any():
+            row_ids = row_ids[np.repeat(matched, np.diff(row_offsets))].reshape(-1, len(key_ids))
+            matched[matched] = (row_ids == key_ids).all(axis=1)
+        return positions[matched].tolist()
+
+    def count_keys(self, column):
+        hashes = self.key_indices[column][0]
+        return int(np.count_nonzero(hashes[1:] != hashes[:-1])) + 1 if len(hashes) else 0
+
+    def save(self, index_path):
+        """ Save the ColumnarKG as `index_path`.*.npy, `index_path`.adjacency.*.npy, and `index_path`.json,
+        where arrays can be memory-mapped by `load` without building or sorting
+
+        :param index_path: the path prefix to save
+        :type index_path: str
+        """
+
+        vocab = self.vocab if isinstance(self.vocab, ColumnarStrings) else ColumnarStrings.build(self.vocab)
+        arrays = OrderedDict(
+            [
+                ("eid_digests", self.eid_digests), ("eid_order", self.eid_order),
+                ("sorted_eid_digests", self.sorted_eid_digests), ("frequencies", self.frequencies),
+                ("pattern_ids", self.pattern_ids), ("info_offsets", self.info_offsets), ("info_data", self.info_data),
+                ("vocab_offsets", vocab.offsets), ("vocab_data", vocab.data)
+            ]
+        )
+        for k, (offsets, token_ids) in self.tokens.items():
+            arrays["tokens." + k + ".offsets"] = offsets
+            arrays["tokens." + k + ".ids"] = token_ids
+        for k, (hashes, positions) in self.key_indices.items():
+            arrays["keys." + k + ".hashes"] = hashes
+            arrays["keys." + k + ".positions"] = positions
+        arrays.update(self._get_relation_arrays())
+        self.adjacency_index.save(index_path + ".adjacency")
+        meta = {
+            "version": COLUMNAR_FORMAT_VERSION,
+            "n_eventualities": self.n_eventualities,
+            "n_relations": self.n_relations,
+            "patterns": list(self.patterns),
+            "token_columns": list(self.tokens.keys()),
+            "key_columns": list(self.key_indices.keys())
+        }
+        _save_arrays(index_path, arrays, meta)
+
+    @staticmethod
+    def load(index_path):
+        """ Load a ColumnarKG from `index_path`.*.npy, `index_path`.adjacency.*.npy, and `index_path`.json
+        by memory mapping, so that processes that load the same files share pages
+
+        :param index_path: the path prefix to load
+        :type index_path: str
+        :return: the loaded ColumnarKG, or None if it does not exist or its version does not match
+        :rtype: Union[aser.database.columnar.ColumnarKG, None]
+        """
+
+        try:
+            with open(index_path + ".json", "r") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        names = [
+            "eid_digests", "eid_order", "sorted_eid_digests", "frequencies", "pattern_ids", "info_offsets", "info_data",
+            "vocab_offsets", "vocab_data", "edge_rids", "rid_order", "sorted_rid_digests"
+        ]
+        names.extend(["tokens." + k + ".offsets" for k in meta.get("token_columns", [])])
+        names.extend(["tokens." + k + ".ids" for k in meta.get("token_columns", [])])
+        names.extend(["keys." + k + ".hashes" for k in meta.get("key_columns", [])])
+        names.extend(["keys." + k + ".positions" for k in meta.get("key_columns", [])])
+        meta, arrays = _load_arrays(index_path, names)
+        adjacency_index = AdjacencyIndex.load(index_path + ".adjacency")
+        if meta is None or adjacency_index is None:
+            return None
+        columnar_kg = ColumnarKG(
+            arrays["eid_digests"],
+            arrays["frequencies"],
+            arrays["pattern_ids"],
+            [sys.intern(x) for x in meta["patterns"]],
+            ColumnarStrings(arrays["vocab_offsets"], arrays["vocab_data"]),
+            OrderedDict(
+                [(k, (arrays["tokens." + k + ".offsets"], arrays["tokens." + k + ".ids"])) for k in meta["token_columns"]]
+            ),
+            arrays["info_offsets"],
+            arrays["info_data"],
+            OrderedDict(
+                [(k, (arrays["keys." + k + ".hashes"], arrays["keys." + k + ".positions"])) for k in meta["key_columns"]]
+            ),
+            adjacency_index,
+            arrays["edge_rids"],
+            eid_order=arrays["eid_order"],
+            sorted_eid_digests=arrays["sorted_eid_digests"],
+            rid_order=arrays["rid_order"],
+            sorted_rid_digests=arrays["sorted_rid_digests"]
+        )
+        if columnar_kg.n_eventualities != meta["n_eventualities"] or columnar_kg.n_relations != meta["n_relations"] or \
+            adjacency_index.n_edges != meta["n_relations"]:
+            return None
+        return columnar_kg
+
+
+class ColumnarConceptKG(ColumnarRelations):
+    """ Read-only column-oriented concept KG, where concepts, concept-instance pairs, and relations
+    are stored in NumPy arrays and `ASERConcept` and `Relation` objects are only built when they are accessed
+
+    """
+    def __init__(
+        self, cid_digests, info_offsets, info_data, pair_cids, pair_eids, pair_pattern_ids, pair_scores, patterns,
+        eid_pairs, adjacency_index, edge_rids, cid_order=None, sorted_cid_digests=None, sorted_pair_eids=None,
+        instance_eids=None, rid_order=None, sorted_rid_digests=None
+    ):
+        """
+
+        :param cid_digests: the digests of cids in the row order
+        :type cid_digests: numpy.ndarray
+        :param info_offsets: the offsets of info BLOBs
+        :type info_offsets: numpy.ndarray
+        :param info_data: the concatenated info BLOBs
+        :type info_data: numpy.ndarray
+        :param pair_cids: the digests of cids of concept-instance pairs, sorted by cids
+        :type pair_cids: numpy.ndarray
+        :param pair_eids: the digests of eids of concept-instance pairs
+        :type pair_eids: numpy.ndarray
+        :param pair_pattern_ids: the pattern ids of concept-instance pairs
+        :type pair_pattern_ids: numpy.ndarray
+        :param pair_scores: the scores of concept-instance pairs
+        :type pair_scores: numpy.ndarray
+        :param patterns: the interned patterns
+        :type patterns: List[str]
+        :param eid_pairs: the positions of concept-instance pairs sorted by eids
+        :type eid_pairs: numpy.ndarray
+        :param adjacency_index: the CSR adjacency index of relations
+        :type adjacency_index: aser.database.index.AdjacencyIndex
+        :param edge_rids: the digests of rids in the order of outgoing edges
+        :type edge_rids: numpy.ndarray
+        :param cid_order: the positions of concepts sorted by cids, default `None` to sort them
+        :type cid_order: Union[numpy.ndarray, None] (default = None)
+        :param sorted_cid_digests: the sorted digests of cids, default `None` to sort them
+        :type sorted_cid_digests: Union[numpy.ndarray, None] (default = None)
+        :param sorted_pair_eids: the digests of eids of concept-instance pairs in the order of eid_pairs,
+            default `None` to sort them
+        :type sorted_pair_eids: Union[numpy.ndarray, None] (default = None)
+        :param instance_eids: the sorted unique digests of eids of concept-instance pairs, default `None` to compute them
+        :type instance_eids: Union[numpy.ndarray, None] (default = None)
+        :param rid_order: the positions of edges sorted by rids, default `None` to sort them
+        :type rid_order: Union[numpy.ndarray, None] (default = None)
+        :param sorted_rid_digests: the sorted digests of rids, default `None` to sort them
+        :type sorted_rid_digests: Union[numpy.ndarray, None] (default = None)
+        """
+
+        super(ColumnarConceptKG, self).__init__(adjacency_index, edge_rids, rid_order, sorted_rid_digests)
+        self.cid_digests = cid_digests
+        if cid_order is None:
+            cid_order = np.argsort(cid_digests, kind="stable").astype(_get_index_dtype(len(cid_digests)))
+        self.cid_order = cid_order
+        self.sorted_cid_digests = sorted_cid_digests if sorted_cid_digests is not None else cid_digests[cid_order]
+        self.info_offsets = info_offsets
+        self.info_data = info_data
+        self.pair_cids = pair_cids
+        self.pair_eids = pair_eids
+        self.pair_pattern_ids = pair_pattern_ids
+        self.pair_scores = pair_scores
+        self.patterns = patterns
+        self.eid_pairs = eid_pairs
+        self.sorted_pair_eids = sorted_pair_eids if sorted_pair_eids is not None else pair_eids[eid_pairs]
+        self.instance_eids = instance_eids if instance_eids is not None else np.unique(self.sorted_pair_eids)
+
+    @property
+    def n_concepts(self):
+        return len(self.cid_digests)
+
+    @property
+    def n_concept_instance_pairs(self):
+        return len(self.pair_cids)
+
+    @staticmethod
+    def build(concept_rows, concept_instance_pair_rows, relation_rows, senses):
+        """ Build a ColumnarConceptKG from rows of concepts, concept-instance pairs, and relations
+
+        :param concept_rows: rows that contain "_id" and "info"
+        :type concept_rows: Iterable[Dict[str, object]]
+        :param concept_instance_pair_rows: rows that contain "cid", "eid", "pattern", and "score"
+        :type concept_instance_pair_rows: Iterable[Dict[str, object]]
+        :param relation_rows: rows that contain "_id", "hid", "tid", and senses (or "senses" of sparse relations)
+        :type relation_rows: Iterable[Dict[str, object]]
+        :param senses: the relation senses of weight columns
+        :type senses: List[str]
+        :return: the built ColumnarConceptKG
+        :rtype: aser.database.columnar.ColumnarConceptKG
+        """
+
+        digests = bytearray()
+        info_offsets = array("q", [0])
+        info_data = bytearray()
+        for row in concept_rows:
+            digest = IdSet._to_digest(row["_id"])
+            if digest is None:
+                raise ValueError("Error: the columnar mode only supports SHA1 cids.")
+            digests += digest
+            info = row["info"]
+            info_data += info.encode("utf-8") if isinstance(info, str) else info
+            info_offsets.append(len(info_data))
+
+        pair_cids = bytearray()
+        pair_eids = bytearray()
+        pair_pattern_ids = array("i")
+        pair_scores = array("d")
+        pattern2id = dict()
+        for row in concept_instance_pair_rows:
+            cid_digest, eid_digest = IdSet._to_digest(row["cid"]), IdSet._to_digest(row["eid"])
+            if cid_digest is None or eid_digest is None:
+                raise ValueError("Error: the columnar mode only supports SHA1 cids and eids.")
+            pair_cids += cid_digest
+            pair_eids += eid_digest
+            pattern_id = pattern2id.get(row["pattern"], None)
+            if pattern_id is None:
+                pattern_id = pattern2id[row["pattern"]] = len(pattern2id)
+            pair_pattern_ids.append(pattern_id)
+            pair_scores.append(row["score"])
+        pair_cids = np.frombuffer(bytes(pair_cids), dtype=DIGEST_DTYPE)
+        pair_eids = np.frombuffer(bytes(pair_eids), dtype=DIGEST_DTYPE)
+        pair_pattern_ids = np.array(pair_pattern_ids, dtype=np.int32)
+        pair_scores = np.array(pair_scores, dtype=np.float64)
+        # pairs of the same cid keep the row order
+        order = np.argsort(pair_cids, kind="stable")
+        pair_cids, pair_eids = pair_cids[order], pair_eids[order]
+        pair_pattern_ids, pair_scores = pair_pattern_ids[order], pair_scores[order]
+        eid_pairs = np.argsort(pair_eids, kind="stable").astype(_get_index_dtype(len(pair_eids)))
+
+        adjacency_index, edge_rids = ColumnarRelations._build_relations(relation_rows, senses)
+
+        return ColumnarConceptKG(
+            np.frombuffer(bytes(digests), dtype=DIGEST_DTYPE),
+            np.array(info_offsets, dtype=np.int64),
+            np.frombuffer(bytes(info_data), dtype=np.uint8),
+            pair_cids,
+            pair_eids,
+            pair_pattern_ids,
+            pair_scores,
+            [sys.intern(x) for x in pattern2id.keys()],
+            eid_pairs,
+            adjacency_index,
+            edge_rids
+        )
+
+    def get_concept_position(self, cid):
+        """ Get the row position of a concept
+
+        :param cid: the cid
+        :type cid: str
+        :return: the position, or -1 if the concept does not exist
+        :rtype: int
+        """
+
+        return ColumnarRelations._search_digest(self.sorted_cid_digests, self.cid_order, cid)
+
+    def get_concept_cid(self, position):
+        return self.cid_digests[position].ljust(DIGEST_SIZE, b"\x00").hex()
+
+    def get_concept_row(self, position):
+        """ Get the row of a concept that is enough to build a concept
+
+        :param position: the row position
+        :type position: int
+        :return: a row that contains "_id" and "info"
+        :rtype: Dict[str, object]
+        """
+
+        row = OrderedDict()
+        row["_id"] = self.get_concept_cid(position)
+        row["info"] = self.info_data[self.info_offsets[position]:self.info_offsets[position + 1]].tobytes()
+        return row
+
+    def get_pair_positions(self, _id, by="cid"):
+        """ Get the positions of concept-instance pairs whose cids (or eids) are the id
+
+        :param _id: the cid or eid
+        :type _id: str
+        :param by: "cid" or "eid"
+        :type by: str (default = "cid")
+        :return: the positions of concept-instance pairs
+        :rtype: numpy.ndarray
+        """
+
+        if by == "cid":
+            sorted_digests, order = self.pair_cids, None
+        elif by == "eid":
+            sorted_digests, order = self.sorted_pair_eids, self.eid_pairs
+        else:
+            raise ValueError("Error: only support cid/eid.")
+        digest = IdSet._to_digest(_id)
+        if digest is None:
+            return np.zeros(0, dtype=np.int64)
+        digest = digest.rstrip(b"\x00")
+        st, end = sorted_digests.searchsorted(digest, side="left"), sorted_digests.searchsorted(digest, side="right")
+        return np.arange(st, end) if order is None else order[st:end]
+
+    def get_eid_pattern_scores(self, cid):
+        """ Get the (eid, pattern, score) of concept-instance pairs of a concept
+
+        :param cid: the cid
+        :type cid: str
+        :return: the (eid, pattern, score) tuples
+        :rtype: List[Tuple[str, str, float]]
+        """
+
+        positions = self.get_pair_positions(cid, "cid")
+        return [
+            (eid.ljust(DIGEST_SIZE, b"\x00").hex(), self.patterns[pattern_id], score) for eid, pattern_id, score in zip(
+                self.pair_eids[positions].tolist(), self.pair_pattern_ids[positions].tolist(),
+                self.pair_scores[positions].tolist()
+            )
+        ]
+
+    def get_cid_scores(self, eid):
+        """ Get the (cid, score) of concept-instance pairs of an eventuality
+
+        :param eid: the eid
+        :type eid: str
+        :return: the (cid, score) tuples
+        :rtype: List[Tuple[str, float]]
+        """
+
+        positions = self.get_pair_positions(eid, "eid")
+        return [
+            (cid.ljust(DIGEST_SIZE, b"\x00").hex(), score)
+            for cid, score in zip(self.pair_cids[positions].tolist(), self.pair_scores[positions].tolist())
+        ]
+
+    def save(self, index_path):
+        """ Save the ColumnarConceptKG as `index_path`.*.npy, `index_path`.adjacency.*.npy, and `index_path`.json,
+        where arrays can be memory-mapped by `load` without building or sorting
+
+        :param index_path: the path prefix to save
+        :type index_path: str
+        """
+
+        arrays = OrderedDict(
+            [
+                ("cid_digests", self.cid_digests), ("cid_order", self.cid_order),
+                ("sorted_cid_digests", self.sorted_cid_digests), ("info_offsets", self.info_offsets),
+                ("info_data", self.info_data), ("pair_cids", self.pair_cids), ("pair_eids", self.pair_eids),
+                ("pair_pattern_ids", self.pair_pattern_ids), ("pair_scores", self.pair_scores),
+                ("eid_pairs", self.eid_pairs), ("sorted_pair_eids", self.sorted_pair_eids),
+                ("instance_eids", self.instance_eids)
+            ]
+        )
+        arrays.update(self._get_relation_arrays())
+        self.adjacency_index.save(index_path + ".adjacency")
+        meta = {
+            "version": COLUMNAR_FORMAT_VERSION,
+            "n_concepts": self.n_concepts,
+            "n_concept_instance_pairs": self.n_concept_instance_pairs,
+            "n_relations": self.n_relations,
+            "patterns": list(self.patterns)
+        }
+        _save_arrays(index_path, arrays, meta)
+
+    @staticmethod
+    def load(index_path):
+        """ Load a ColumnarConceptKG from `index_path`.*.npy, `index_path`.adjacency.*.npy, and `index_path`.json
+        by memory mapping, so that processes that load the same files share pages
+
+        :param index_path: the path prefix to load
+        :type index_path: str
+        :return: the loaded ColumnarConceptKG, or None if it does not exist or its version does not match
+        :rtype: Union[aser.database.columnar.ColumnarConceptKG, None]
+        """
+
+        meta, arrays = _load_arrays(
+            index_path, [
+                "cid_digests", "cid_order", "sorted_cid_digests", "info_offsets", "info_data", "pair_cids", "pair_eids",
+                "pair_pattern_ids", "pair_scores", "eid_pairs", "sorted_pair_eids", "instance_eids", "edge_rids",
+                "rid_order", "sorted_rid_digests"
+            ]
+        )
+        adjacency_index = AdjacencyIndex.load(index_path + ".adjacency")
+        if meta is None or adjacency_index is None:
+            return None
+        columnar_concept_kg = ColumnarConceptKG(
+            arrays["cid_digests"],
+            arrays["info_offsets"],
+            arrays["info_data"],
+            arrays["pair_cids"],
+            arrays["pair_eids"],
+            arrays["pair_pattern_ids"],
+            arrays["pair_scores"],
+            [sys.intern(x) for x in meta["patterns"]],
+            arrays["eid_pairs"],
+            adjacency_index,
+            arrays["edge_rids"],
+            cid_order=arrays["cid_order"],
+            sorted_cid_digests=arrays["sorted_cid_digests"],
+            sorted_pair_eids=arrays["sorted_pair_eids"],
+            instance_eids=arrays["instance_eids"],
+            rid_order=arrays["rid_order"],
+            sorted_rid_digests=arrays["sorted_rid_digests"]
+        )
+        if columnar_concept_kg.n_concepts != meta["n_concepts"] or \
+            columnar_concept_kg.n_concept_instance_pairs != meta["n_concept_instance_pairs"] or \
+            columnar_concept_kg.n_relations != meta["n_relations"] or adjacency_index.n_edges != meta["n_relations"]:
+            return None
+        return columnar_concept_kg
+
+
+class ColumnarView(object):
+    """ Read-only dictionary-like view of a ColumnarKG, whose values are built when they are accessed
+
+    """
+    def __init__(self, store):
+        """
+
+        :param store: the column-oriented KG
+        :type store: aser.database.columnar.ColumnarKG
+        """
+
+        self.store = store
+
+    def _lookup(self, key):
+        raise NotImplementedError
+
+    def _iter_keys(self):
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def __iter__(self):
+        return self._iter_keys()
+
+    def __contains__(self, key):
+        return self._lookup(key) is not None
+
+    def __getitem__(self, key):
+        value = self._lookup(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        raise ValueError("Error: the columnar mode is read-only.")
+
+    def get(self, key, default=None):
+        value = self._lookup(key)
+        return default if value is None else value
+
+    def keys(self):
+        return self._iter_keys()
+
+    def values(self):
+        for key in self._iter_keys():
+            yield self._lookup(key)
+
+    def items(self):
+        for key in self._iter_keys():
+            yield key, self._lookup(key)
+
+    def clear(self):
+        self.store = None
+
+
+class ColumnarEventualityView(ColumnarView):
+    """ View from eids to eventualities
+
+    """
+    def __init__(self, store, convert):
+        """
+
+        :param store: the column-oriented KG
+        :type store: aser.database.columnar.ColumnarKG
+        :param convert: the function to build an eventuality from a row
+        :type convert: Callable[[Dict[str, object]], aser.eventuality.Eventuality]
+        """
+
+        super(ColumnarEventualityView, self).__init__(store)
+        self.convert = convert
+
+    def __len__(self):
+        return self.store.n_eventualities if self.store is not None else 0
+
+    def _lookup(self, eid):
+        if self.store is None:
+            return None
+        position = self.store.get_eventuality_position(eid)
+        if position == -1:
+            return None
+        return self.convert(self.store.get_eventuality_row(position))
+
+    def _iter_keys(self):
+        for position in range(len(self)):
+            yield self.store.get_eventuality_eid(position)
+
+
+class ColumnarKeyView(ColumnarView):
+    """ View from keys (e.g., verbs) to eids
+
+    """
+    def __init__(self, store, column):
+        """
+
+        :param store: the column-oriented KG
+        :type store: aser.database.columnar.ColumnarKG
+        :param column: the key column, e.g., "verbs"
+        :type column: str
+        """
+
+        super(ColumnarKeyView, self).__init__(store)
+        self.column = column
+
+    def __len__(self):
+        return self.store.count_keys(self.column) if self.store is not None else 0
+
+    def _lookup(self, key):
+        if self.store is None:
+            return None
+        positions = self.store.get_key_positions(self.column, key)
+        if len(positions) == 0:
+            return None
+        return [self.store.get_eventuality_eid(x) for x in positions]
+
+    def _iter_keys(self):
+        keys = set()
+        for position in range(self.store.n_eventualities if self.store is not None else 0):
+            key = self.store._get_tokens(self.column, position)
+            if key not in keys:
+                keys.add(key)
+                yield key
+
+
+class ColumnarRelationView(ColumnarView):
+    """ View from rids to relations
+
+    """
+    def __len__(self):
+        return self.store.n_relations if self.store is not None else 0
+
+    def _lookup(self, rid):
+        if self.store is None:
+            return None
+        position = self.store.get_relation_position(rid)
+        if position == -1:
+            return None
+        return self.store.get_relation(position)
+
+    def _iter_keys(self):
+        for position in range(len(self)):
+            yield self.store.get_relation_rid(position)
+
+
+class ColumnarEdgeView(ColumnarView):
+    """ View from eids to rids of relations whose heads (or tails) are the eventualities
+
+    """
+    def __init__(self, store, direction):
+        """
+
+        :param store: the column-oriented KG
+        :type store: aser.database.columnar.ColumnarKG
+        :param direction: "out" for heads (i.e., "hid"), "in" for tails (i.e., "tid")
+        :type direction: str
+        """
+
+        super(ColumnarEdgeView, self).__init__(store)
+        self.direction = direction
+
+    def __len__(self):
+        if self.store is None:
+            return 0
+        offsets = self.store.adjacency_index.out_offsets if self.direction == "out" else \
+            self.store.adjacency_index.in_offsets
+        return int(np.count_nonzero(offsets[1:] != offsets[:-1]))
+
+    def _lookup(self, eid):
+        if self.store is None:
+            return None
+        positions = self.store.get_relation_positions(eid, self.direction)
+        if positions is None or len(positions) == 0:
+            return None
+        return [x.ljust(DIGEST_SIZE, b"\x00").hex() for x in self.store.edge_rids[positions].tolist()]
+
+    def _iter_keys(self):
+        for idx in range(self.store.adjacency_index.n_nodes if self.store is not None else 0):
+            eid = self.store.adjacency_index._get_node_id(idx)
+            if self._lookup(eid) is not None:
+                yield eid
+
+
+class ColumnarConceptView(ColumnarView):
+    """ View from cids to concepts
+
+    """
+    def __init__(self, store, convert):
+        """
+
+        :param store: the column-oriented concept KG
+        :type store: aser.database.columnar.ColumnarConceptKG
+        :param convert: the function to build a concept from a row
+        :type convert: Callable[[Dict[str, object]], aser.concept.ASERConcept]
+        """
+
+        super(ColumnarConceptView, self).__init__(store)
+        self.convert = convert
+
+    def __len__(self):
+        return self.store.n_concepts if self.store is not None else 0
+
+    def _lookup(self, cid):
+        if self.store is None:
+            return None
+        position = self.store.get_concept_position(cid)
+        if position == -1:
+            return None
+        return self.convert(self.store.get_concept_row(position))
+
+    def _iter_keys(self):
+        for position in range(len(self)):
+            yield self.store.get_concept_cid(position)
+
+
+class ColumnarPairView(ColumnarView):
+    """ View from cids to (eid, pattern, score) or from eids to (cid, score) of concept-instance pairs
+
+    """
+    def __init__(self, store, by):
+        """
+
+        :param store: the column-oriented concept KG
+        :type store: aser.database.columnar.ColumnarConceptKG
+        :param by: "cid" for cid2eid_pattern_scores, "eid" for eid2cid_scores
+        :type by: str
+        """
+
+        super(ColumnarPairView, self).__init__(store)
+        self.by = by
+
+    def __len__(self):
+        if self.store is None:
+            return 0
+        digests = self.store.pair_cids if self.by == "cid" else self.store.instance_eids
+        return int(np.count_nonzero(digests[1:] != digests[:-1])) + 1 if len(digests) else 0
+
+    def _lookup(self, _id):
+        if self.store is None:
+            return None
+        if self.by == "cid":
+            values = self.store.get_eid_pattern_scores(_id)
+        else:
+            values = self.store.get_cid_scores(_id)
+        return values if len(values) else None
+
+    def _iter_keys(self):
+        if self.store is None:
+            return
+        digests = self.store.pair_cids if self.by == "cid" else self.store.instance_eids
+        last = None
+        for digest in digests.tolist():
+            if digest != last:
+                last = digest
+                yield digest.ljust(DIGEST_SIZE, b"\x00").hex()
@@ -1,6 +1,64 @@
 import os
+import re
 import json
+import math
+import numpy as np
 from collections import defaultdict, OrderedDict
+from urllib.request import pathname2url
+
+# hex ids of tables with integer surrogate keys are mapped to integers by this table
+ID_TABLE_NAME = "Ids"
+# rows of table scans are yielded as OrderedDicts, tuples, or NumPy record arrays of batches
+ROW_FORMATS = ["dict", "tuple", "numpy"]
+# read-only SQLite connections map up to 1 GiB of the file and cache up to 64 MiB of pages
+READ_MMAP_SIZE = 1 << 30
+READ_CACHE_SIZE = 1 << 26
+
+
+def enable_wal(db_path):
+    """ Switch a SQLite database into the write-ahead logging mode (which persists in the file)
+    so that readers in other processes are not blocked by a writer
+
+    :param db_path: database path
+    :type db_path: str
+    :return: whether the database is in the WAL mode (False if the database does not exist)
+    :rtype: bool
+    """
+
+    import sqlite3
+    # connecting to a wrong path would create an empty database
+    if not os.path.isfile(db_path):
+        return False
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("PRAGMA journal_mode=WAL;").fetchone()[0].lower() == "wal"
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        conn.close()
+
+
+def _to_record_batch(columns, rows):
+    """ Convert a batch of tuple rows into a NumPy record array
+
+    :param columns: the column names
+    :type columns: List[str]
+    :param rows: the tuple rows
+    :type rows: List[Tuple[object]]
+    :return: the record array, where text and binary columns are object arrays
+    :rtype: numpy.recarray
+    """
+
+    arrays = []
+    for values in zip(*rows) if rows else [[] for _ in columns]:
+        if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+            arrays.append(np.array(values))
+        else:
+            # fixed-length NumPy bytes would strip trailing null bytes of BLOBs
+            array = np.empty(len(values), dtype=object)
+            array[:] = values
+            arrays.append(array)
+    return np.rec.fromarrays(arrays, names=columns)
 
 
 class BaseDBConnection(object):
@@ -27,6 +85,40 @@ class BaseDBConnection(object):
     def __del__(self):
         self.close()
 
+    def begin(self):
+        """ Defer the commits of following write operations until `commit` is called
+        """
+        raise NotImplementedError
+
+    def commit(self):
+        """ Commit all deferred write operations and commit after each write operation again
+        """
+        raise NotImplementedError
+
+    def rollback(self):
+        """ Discard all deferred write operations and commit after each write operation again
+        """
+        raise NotImplementedError
+
+    def get_data_version(self):
+        """ Get a version that changes whenever other connections commit write operations
+
+        :return: the version, or None if the database cannot tell
+        :rtype: Union[int, None]
+        """
+        raise NotImplementedError
+
+    def has_table(self, table_name):
+        """ Check whether a table exists
+
+        :param table_name: the table name to check
+        :type table_name: str
+        :return: whether the table exists
+        :rtype: bool
+        """
+
+        raise NotImplementedError
+
     def create_table(self, table_name, columns, column_types):
         """ Create a table with given columns and types
 
@@ -40,6 +132,17 @@ class BaseDBConnection(object):
 
         raise NotImplementedError
 
+    def create_index(self, table_name, columns):
+        """ Create an index on given columns of a table if it does not exist
+
+        :param table_name: the table name to index
+        :type table_name: str
+        :param columns: the columns to index
+        :type columns: List[str]
+        """
+
+        raise NotImplementedError
+
     def get_columns(self, table_name, columns):
         """ Get column information from a table
 
@@ -53,6 +156,28 @@ class BaseDBConnection(object):
 
         raise NotImplementedError
 
+    def iter_columns(self, table_name, columns, where=None, params=None, batch_size=None, row_format="dict"):
+        """ Scan a table and yield rows batch by batch in bounded memory
+
+        :param table_name: the table name to scan
+        :type table_name: str
+        :param columns: the columns to retrieve
+        :type columns: List[str]
+        :param where: a filter of rows in the native syntax of the backend, i.e., a SQL expression for SQLite
+            (values of id columns are compared with stored values) and a query document for MongoDB
+        :type where: Union[str, Dict[str, object], None] (default = None)
+        :param params: the parameters of the SQL expression
+        :type params: Union[List[object], None] (default = None)
+        :param batch_size: how many rows to fetch each time, default `None` for the chunksize
+        :type batch_size: Union[int, None] (default = None)
+        :param row_format: "dict" for OrderedDicts, "tuple" for tuples, and "numpy" for record arrays of batches
+        :type row_format: str (default = "dict")
+        :return: a generator of rows (or record arrays)
+        :rtype: Generator[Union[Dict[str, object], Tuple[object], numpy.recarray], None, None]
+        """
+
+        raise NotImplementedError
+
     def select_row(self, table_name, _id, columns):
         """ Select a row from a table
 
@@ -83,6 +208,21 @@ class BaseDBConnection(object):
 
         raise NotImplementedError
 
+    def iter_select_rows(self, table_name, _ids, columns):
+        """ Select rows from a table and yield them one by one in the order of `_ids`
+
+        :param table_name: the table name to retrieve
+        :type table_name: str
+        :param _ids: the row ids
+        :type _ids: List[str]
+        :param columns: the columns to retrieve
+        :type columns: List[str]
+        :return: a generator of retrieved rows (`None` for missing rows)
+        :rtype: Generator[Union[Dict[str, object], None], None, None]
+        """
+
+        raise NotImplementedError
+
     def insert_row(self, table_name, row):
         """ Insert a row into a table
 
@@ -147,6 +287,33 @@ class BaseDBConnection(object):
 
         raise NotImplementedError
 
+    def get_upsert_op(self, update_columns, operator):
+        """ Get an upsert operator based on columns and a operator
+
+        :param update_columns: a list of columns to update when rows exist
+        :type update_columns: List[str]
+        :param operator: an operator that applies to the columns, including "+", "-", "*", "/", "="
+        :type operator: str
+        :return: an operator that suits the backend database
+        :rtype: object
+        """
+        raise NotImplementedError
+
+    def upsert_rows(self, table_name, rows, upsert_op, update_columns):
+        """ Insert rows into a table, or update the columns of rows that already exist
+
+        :param table_name: the table name to upsert
+        :type table_name: str
+        :param rows: new rows
+        :type rows: List[Dict[str, object]]
+        :param upsert_op: an operator that returned by `get_upsert_op`
+        :type upsert_op: object
+        :param update_columns: the columns to update when rows exist
+        :type update_columns: List[str]
+        """
+
+        raise NotImplementedError
+
     def get_rows_by_keys(self, table_name, bys, keys, columns, order_bys=None, reverse=False, top_n=None):
         """ Retrieve rows by specific keys in some order
 
@@ -169,29 +336,325 @@ class BaseDBConnection(object):
         """
         raise NotImplementedError
 
+    def get_rows_by_key_values(self, table_name, by, values, columns):
+        """ Retrieve rows whose `by` column matches any of the given values
+
+        :param table_name: the table name to retrieve
+        :type table_name: str
+        :param by: the given column to match
+        :type by: str
+        :param values: the given values to match
+        :type values: List[str]
+        :param columns: the given columns to retrieve
+        :type columns: List[str]
+        :return: retrieved rows
+        :rtype: List[Dict[str, object]]
+        """
+        raise NotImplementedError
+
+    def get_neighbors(
+        self, relation_table_name, table_name, hid, relation_columns, columns, weight_columns=None, top_n=None
+    ):
+        """ Retrieve relations from a given head together with their tail rows in one query
+
+        :param relation_table_name: the relation table name to retrieve
+        :type relation_table_name: str
+        :param table_name: the table name of tails to retrieve
+        :type table_name: str
+        :param hid: the given head id
+        :type hid: str
+        :param relation_columns: the given relation columns to retrieve
+        :type relation_columns: List[str]
+        :param columns: the given tail columns to retrieve
+        :type columns: List[str]
+        :param weight_columns: the relation columns whose sum is used to filter (positive) and sort (descending)
+            relations (ties are broken by tails), default `None` to keep all relations without sorting
+        :type weight_columns: Union[List[str], None]
+        :param top_n: how many relations to return, default `None` for all relations
+        :type top_n: int
+        :return: pairs of the retrieved relation row and the tail row (`None` for missing tails)
+        :rtype: List[Tuple[Dict[str, object], Union[Dict[str, object], None]]]
+        """
+        raise NotImplementedError
+
+    def has_fulltext_index(self, table_name, column):
+        """ Check whether a full-text index of a text column exists
+
+        :param table_name: the table name
+        :type table_name: str
+        :param column: the text column, e.g., "words"
+        :type column: str
+        :return: whether the full-text index exists
+        :rtype: bool
+        """
+        raise NotImplementedError
+
+    def create_fulltext_index(self, table_name, column):
+        """ Create a full-text index of a text column if it does not exist,
+        which is maintained incrementally when rows are inserted, updated, or deleted
+
+        :param table_name: the table name to index
+        :type table_name: str
+        :param column: the text column to index, e.g., "words"
+        :type column: str
+        :return: whether the index is newly created
+        :rtype: bool
+        """
+        raise NotImplementedError
+
+    def search_fulltext(
+        self, table_name, column, terms, columns, match_all=False, filters=None, prior_column=None, prior_weight=0.0,
+        top_n=None
+    ):
+        """ Retrieve rows whose text column matches the given terms, ranked by BM25
+
+        :param table_name: the table name to retrieve
+        :type table_name: str
+        :param column: the indexed text column, e.g., "words"
+        :type column: str
+        :param terms: the query terms
+        :type terms: List[str]
+        :param columns: the given columns to retrieve
+        :type columns: List[str]
+        :param match_all: whether rows must contain all terms, otherwise any term
+        :type match_all: bool (default = False)
+        :param filters: a dictionary from columns to allowed values, e.g., {"pattern": ["s-v-o"]}
+        :type filters: Union[Dict[str, List[object]], None] (default = None)
+        :param prior_column: a non-negative column (e.g., "frequency") added to scores as `prior_weight * ln(1 + value)`
+        :type prior_column: Union[str, None] (default = None)
+        :param prior_weight: the weight of the prior
+        :type prior_weight: float (default = 0.0)
+        :param top_n: how many rows to return, default `None` for all rows
+        :type top_n: int
+        :return: pairs of scores and retrieved rows, sorted by scores in a descending order
+        :rtype: List[Tuple[float, Dict[str, object]]]
+        """
+        raise NotImplementedError
+
 
 class SqliteDBConnection(BaseDBConnection):
     """ KG connection for SQLite database
 
     """
-    def __init__(self, db_path, chunksize):
+    def __init__(self, db_path, chunksize, read_only=False, immutable=False):
         """ Create an connection to SQLite database
 
         :param db_path: database path, e.g., /home/xliucr/ASER/KG.db
         :type db_path: str
         :param chunksize: the chunksize to load/write database
         :type chunksize: int
+        :param read_only: whether to open a read-only connection tuned for serving (query_only, mmap, and a larger page cache)
+        :type read_only: bool (default = False)
+        :param immutable: whether the file never changes while it is open so that locks and change detection are skipped (implies read_only)
+        :type immutable: bool (default = False)
         """
 
         import sqlite3
         super(SqliteDBConnection, self).__init__(db_path, chunksize)
-        self._conn = sqlite3.connect(db_path)
+        self.read_only = read_only or immutable
+        if self.read_only:
+            uri = "file:%s?mode=ro" % (pathname2url(os.path.abspath(db_path)))
+            if immutable:
+                uri += "&immutable=1"
+            self._conn = sqlite3.connect(uri, uri=True)
+            self._conn.execute("PRAGMA query_only=ON;")
+            self._conn.execute("PRAGMA mmap_size=%d;" % (READ_MMAP_SIZE))
+            # a negative cache size is measured in KiB
+            self._conn.execute("PRAGMA cache_size=%d;" % (-(READ_CACHE_SIZE >> 10)))
+        else:
+            self._conn = sqlite3.connect(db_path)
+        # bind a batch of ids as one json array if JSON1 is available, otherwise load them into a temp table
+        try:
+            self._conn.execute("SELECT value FROM json_each('[]');")
+            self._use_json_each = True
+        except sqlite3.OperationalError:
+            self._use_json_each = False
+        self._deferred = False
+        # table name -> columns stored as integer surrogate keys
+        self._id_columns = dict()
+        # names of user-defined SQL functions that can be used as update/upsert operators
+        self._functions = set()
 
     def close(self):
         """ Close the connection safely
         """
         if self._conn:
             self._conn.close()
+            self._conn = None
+
+    def begin(self):
+        """ Defer the commits of following write operations until `commit` is called
+        """
+        self._deferred = True
+
+    def commit(self):
+        """ Commit all deferred write operations and commit after each write operation again
+        """
+        self._conn.commit()
+        self._deferred = False
+
+    def rollback(self):
+        """ Discard all deferred write operations and commit after each write operation again
+        """
+        self._conn.rollback()
+        self._deferred = False
+
+    def _commit(self):
+        if not self._deferred:
+            self._conn.commit()
+
+    def get_pragma(self, name):
+        """ Get the value of a pragma, e.g., journal_mode and synchronous
+
+        :param name: the pragma name
+        :type name: str
+        :return: the pragma value
+        :rtype: object
+        """
+
+        result = list(self._conn.execute("PRAGMA %s;" % (name)))
+        return result[0][0] if len(result) > 0 else None
+
+    def set_pragma(self, name, value):
+        """ Set the value of a pragma, e.g., journal_mode and synchronous
+
+        :param name: the pragma name
+        :type name: str
+        :param value: the pragma value
+        :type value: object
+        :return: the pragma value after setting
+        :rtype: object
+        """
+
+        self._conn.execute("PRAGMA %s=%s;" % (name, value))
+        return self.get_pragma(name)
+
+    def get_data_version(self):
+        """ Get a version that changes whenever other connections commit write operations,
+        which is cheap because no table is read
+
+        :return: the version
+        :rtype: int
+        """
+
+        return self.get_pragma("data_version")
+
+    def has_table(self, table_name):
+        """ Check whether a table exists
+
+        :param table_name: the table name to check
+        :type table_name: str
+        :return: whether the table exists
+        :rtype: bool
+        """
+
+        result = list(self._conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?;", [table_name]))
+        return len(result) > 0
+
+    def get_table_columns(self, table_name):
+        """ Get the column names of a table
+
+        :param table_name: the table name
+        :type table_name: str
+        :return: the column names
+        :rtype: List[str]
+        """
+
+        return [x[1] for x in self._conn.execute("PRAGMA table_info(%s);" % (table_name))]
+
+    def create_function(self, name, n_args, func):
+        """ Register a Python function as a SQL function, which can be used as an update/upsert operator
+        that merges the old value and the new value, e.g., `col=name(col,?)`
+
+        :param name: the function name
+        :type name: str
+        :param n_args: the number of arguments
+        :type n_args: int
+        :param func: the Python function
+        :type func: Callable
+        """
+
+        self._conn.create_function(name, n_args, func, deterministic=True)
+        self._functions.add(name)
+
+    def set_id_columns(self, table_name, columns):
+        """ Store the given columns of a table as integer surrogate keys (e.g., "INTEGER PRIMARY KEY" for "_id"),
+        which refer to a shared id table that maps hex ids to integers
+        (note: all other methods still take and return hex ids)
+
+        :param table_name: the table name
+        :type table_name: str
+        :param columns: the columns of ids, e.g., ["_id", "hid", "tid"]
+        :type columns: List[str]
+        """
+
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS %s (_id INTEGER PRIMARY KEY, key BLOB NOT NULL UNIQUE);" % (ID_TABLE_NAME)
+        )
+        self._conn.commit()
+        self._id_columns[table_name] = list(columns)
+
+    @staticmethod
+    def _to_key(_id):
+        # SHA1 hex ids are stored as 20-byte BLOBs, and other ids are stored as TEXT
+        try:
+            key = bytes.fromhex(_id)
+        except (ValueError, TypeError):
+            return _id
+        return key if len(key) == 20 and key.hex() == _id else _id
+
+    @staticmethod
+    def _from_key(key):
+        return key.hex() if isinstance(key, bytes) else key
+
+    def _encode_ids(self, ids, create=False):
+        """ Map hex ids to integer surrogate keys
+
+        :param ids: the hex ids
+        :type ids: Iterable[str]
+        :param create: whether to assign keys to new ids
+        :type create: bool (default = False)
+        :return: a dictionary from hex ids to keys (`None` for missing ids)
+        :rtype: Dict[str, Union[int, None]]
+        """
+
+        id2key = dict()
+        for _id in ids:
+            if _id not in id2key:
+                id2key[_id] = SqliteDBConnection._to_key(_id)
+        keys = list(id2key.values())
+        if create:
+            self._conn.executemany("INSERT OR IGNORE INTO %s (key) VALUES (?);" % (ID_TABLE_NAME), [[k] for k in keys])
+        key2rowid = dict()
+        # old SQLite versions only support 999 host parameters, and JSON cannot carry BLOBs
+        for idx in range(0, len(keys), 999):
+            chunk_keys = keys[idx:idx + 999]
+            select_ids = "SELECT _id, key FROM %s WHERE key IN (%s);" % (ID_TABLE_NAME, ",".join(["?"] * len(chunk_keys)))
+            for rowid, key in self._conn.execute(select_ids, chunk_keys):
+                key2rowid[key] = rowid
+        return {_id: key2rowid.get(key, None) for _id, key in id2key.items()}
+
+    def _get_select_columns(self, table_name, columns, alias="_t"):
+        id_columns = self._id_columns.get(table_name, [])
+        return ",".join(
+            [
+                "(SELECT key FROM %s WHERE %s._id=%s.%s)" % (ID_TABLE_NAME, ID_TABLE_NAME, alias, c)
+                if c in id_columns else "%s.%s" % (alias, c) for c in columns
+            ]
+        )
+
+    def _decode_row(self, table_name, columns, x):
+        id_columns = self._id_columns.get(table_name, None)
+        if not id_columns:
+            return x
+        return [SqliteDBConnection._from_key(v) if c in id_columns else v for c, v in zip(columns, x)]
+
+    def _encode_row_values(self, table_name, rows, columns, create=False):
+        id_columns = [c for c in columns if c in self._id_columns.get(table_name, [])]
+        if not id_columns:
+            return [[row[c] for c in columns] for row in rows]
+        id2rowid = self._encode_ids([row[c] for row in rows for c in id_columns], create)
+        return [[id2rowid[row[c]] if c in id_columns else row[c] for c in columns] for row in rows]
 
     def create_table(self, table_name, columns, column_types):
         """ Create a table with given columns and types
@@ -210,6 +673,21 @@ class SqliteDBConnection(BaseDBConnection):
         self._conn.execute(create_table)
         self._conn.commit()
 
+    def create_index(self, table_name, columns):
+        """ Create an index on given columns of a table if it does not exist
+
+        :param table_name: the table name to index
+        :type table_name: str
+        :param columns: the columns to index
+        :type columns: List[str]
+        """
+
+        create_index = "CREATE INDEX IF NOT EXISTS %s_%s_index ON %s (%s);" % (
+            table_name, "_".join(columns), table_name, ",".join(columns)
+        )
+        self._conn.execute(create_index)
+        self._conn.commit()
+
     def get_columns(self, table_name, columns):
         """ Get column information from a table
 
@@ -221,9 +699,54 @@ class SqliteDBConnection(BaseDBConnection):
         :rtype: List[Dict[str, object]]
         """
 
-        select_table = "SELECT %s FROM %s;" % (",".join(columns), table_name)
-        result = list(map(lambda x: OrderedDict(zip(columns, x)), self._conn.execute(select_table)))
-        return result
+        return list(self.iter_columns(table_name, columns))
+
+    def iter_columns(self, table_name, columns, where=None, params=None, batch_size=None, row_format="dict"):
+        """ Scan a table and yield rows batch by batch in bounded memory
+
+        :param table_name: the table name to scan
+        :type table_name: str
+        :param columns: the columns to retrieve
+        :type columns: List[str]
+        :param where: a filter of rows in the native syntax of the backend, i.e., a SQL expression for SQLite
+            (values of id columns are compared with stored values) and a query document for MongoDB
+        :type where: Union[str, Dict[str, object], None] (default = None)
+        :param params: the parameters of the SQL expression
+        :type params: Union[List[object], None] (default = None)
+        :param batch_size: how many rows to fetch each time, default `None` for the chunksize
+        :type batch_size: Union[int, None] (default = None)
+        :param row_format: "dict" for OrderedDicts, "tuple" for tuples, and "numpy" for record arrays of batches
+        :type row_format: str (default = "dict")
+        :return: a generator of rows (or record arrays)
+        :rtype: Generator[Union[Dict[str, object], Tuple[object], numpy.recarray], None, None]
+        """
+
+        if row_format not in ROW_FORMATS:
+            raise ValueError("Error: row_format should be one of %s." % (ROW_FORMATS))
+        select_table = "SELECT %s FROM %s AS _t" % (self._get_select_columns(table_name, columns), table_name)
+        if where:
+            select_table += " WHERE %s" % (where)
+        select_table += ";"
+        batch_size = batch_size or self.chunksize
+        # a dedicated cursor keeps the scan alive while the connection serves other statements
+        cursor = self._conn.cursor()
+        try:
+            cursor.execute(select_table, params or [])
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                if self._id_columns.get(table_name, None):
+                    rows = [tuple(self._decode_row(table_name, columns, x)) for x in rows]
+                if row_format == "dict":
+                    for x in rows:
+                        yield OrderedDict(zip(columns, x))
+                elif row_format == "tuple":
+                    yield from rows
+                else:
+                    yield _to_record_batch(columns, rows)
+        finally:
+            cursor.close()
 
     def select_row(self, table_name, _id, columns):
         """ Select a row from a table
@@ -239,12 +762,19 @@ class SqliteDBConnection(BaseDBConnection):
         :rtype: Dict[str, object]
         """
 
-        select_table = "SELECT %s FROM %s WHERE _id=?;" % (",".join(columns), table_name)
+        if table_name in self._id_columns:
+            condition = "_id=(SELECT _id FROM %s WHERE key=?)" % (ID_TABLE_NAME)
+            _id = SqliteDBConnection._to_key(_id)
+        else:
+            condition = "_id=?"
+        select_table = "SELECT %s FROM %s AS _t WHERE %s;" % (
+            self._get_select_columns(table_name, columns), table_name, condition
+        )
         result = list(self._conn.execute(select_table, [_id]))
         if len(result) == 0:
             return None
         else:
-            return OrderedDict(zip(columns, result[0]))
+            return OrderedDict(zip(columns, self._decode_row(table_name, columns, result[0])))
 
     def select_rows(self, table_name, _ids, columns):
         """ Select rows from a table
@@ -259,23 +789,71 @@ class SqliteDBConnection(BaseDBConnection):
         :rtype: List[Dict[str, object]]
         """
 
-        if len(_ids) > 0:
-            row_cache = dict()
-            result = []
-            for idx in range(0, len(_ids), self.chunksize):
-                select_table = "SELECT %s FROM %s WHERE _id IN ('%s');" % (
-                    ",".join(columns), table_name, "','".join(_ids[idx:idx + self.chunksize])
-                )
-                result.extend(list(self._conn.execute(select_table)))
-            for x in result:
-                exact_match_row = OrderedDict(zip(columns, x))
-                row_cache[exact_match_row["_id"]] = exact_match_row
-            exact_match_rows = []
-            for _id in _ids:
-                exact_match_rows.append(row_cache.get(_id, None))
-            return exact_match_rows
+        return list(self.iter_select_rows(table_name, _ids, columns))
+
+    def _select_rows_by_chunk(self, table_name, _ids, columns):
+        if table_name in self._id_columns:
+            return self._select_rows_by_keys(table_name, _ids, columns)
+        # the first column is always _id to restore the order
+        select_columns = self._get_select_columns(table_name, ["_id"] + columns)
+        # sorted ids make the primary key lookups sequential
+        return self._select_rows_by_sorted_ids(table_name, sorted(set(_ids)), select_columns)
+
+    def _select_rows_by_keys(self, table_name, _ids, columns):
+        # ids are mapped to keys by joining the id table
+        select_columns = self._get_select_columns(table_name, columns)
+        keys = sorted(set([SqliteDBConnection._to_key(_id) for _id in _ids]), key=lambda x: (isinstance(x, str), x))
+        # old SQLite versions only support 999 host parameters, and JSON cannot carry BLOBs
+        for idx in range(0, len(keys), 999):
+            chunk_keys = keys[idx:idx + 999]
+            select_table = "SELECT _k.key,%s FROM %s AS _k JOIN %s AS _t ON _t._id=_k._id WHERE _k.key IN (%s);" % (
+                select_columns, ID_TABLE_NAME, table_name, ",".join(["?"] * len(chunk_keys))
+            )
+            for x in self._conn.execute(select_table, chunk_keys):
+                yield self._decode_row(table_name, ["_id"] + columns, x)
+
+    def _select_rows_by_sorted_ids(self, table_name, _ids, select_columns):
+        if self._use_json_each:
+            select_table = "SELECT %s FROM json_each(?) AS _ids JOIN %s AS _t ON _t._id=_ids.value;" % (
+                select_columns, table_name
+            )
+            return self._conn.execute(select_table, [json.dumps(_ids)])
         else:
-            return []
+            # bound parameters instead of a temp table so that query_only connections can read as well
+            return self._select_rows_by_bound_ids(table_name, _ids, select_columns)
+
+    def _select_rows_by_bound_ids(self, table_name, _ids, select_columns):
+        # old SQLite versions only support 999 host parameters
+        for idx in range(0, len(_ids), 999):
+            chunk_ids = _ids[idx:idx + 999]
+            select_table = "SELECT %s FROM %s AS _t WHERE _t._id IN (%s);" % (
+                select_columns, table_name, ",".join(["?"] * len(chunk_ids))
+            )
+            for x in self._conn.execute(select_table, chunk_ids):
+                yield x
+
+    def iter_select_rows(self, table_name, _ids, columns):
+        """ Select rows from a table and yield them one by one in the order of `_ids`
+
+        :param table_name: the table name to retrieve
+        :type table_name: str
+        :param _ids: the row ids
+        :type _ids: List[str]
+        :param columns: the columns to retrieve
+        :type columns: List[str]
+        :return: a generator of retrieved rows (`None` for missing rows)
+        :rtype: Generator[Union[Dict[str, object], None], None, None]
+        """
+
+        for idx in range(0, len(_ids), self.chunksize):
+            chunk_ids = _ids[idx:idx + self.chunksize]
+            row_cache = {x[0]: x for x in self._select_rows_by_chunk(table_name, chunk_ids, columns)}
+            for _id in chunk_ids:
+                x = row_cache.get(_id, None)
+                if x is None:
+                    yield None
+                else:
+                    yield dict(zip(columns, x[1:]))
 
     def insert_row(self, table_name, row):
         """ Insert a row into a table
@@ -288,8 +866,8 @@ class SqliteDBConnection(BaseDBConnection):
         """
 
         insert_table = "INSERT INTO %s VALUES (%s)" % (table_name, ",".join(['?'] * (len(row))))
-        self._conn.execute(insert_table, list(row.values()))
-        self._conn.commit()
+        self._conn.execute(insert_table, self._encode_row_values(table_name, [row], list(row.keys()), create=True)[0])
+        self._commit()
 
     def insert_rows(self, table_name, rows):
         """ Insert several rows into a table
@@ -301,22 +879,29 @@ class SqliteDBConnection(BaseDBConnection):
         """
 
         if len(rows) > 0:
-            insert_table = "INSERT INTO %s VALUES (%s)" % (table_name, ",".join(['?'] * (len(next(iter(rows))))))
-            self._conn.executemany(insert_table, [list(row.values()) for row in rows])
-            self._conn.commit()
+            columns = list(next(iter(rows)).keys())
+            insert_table = "INSERT INTO %s VALUES (%s)" % (table_name, ",".join(['?'] * (len(columns))))
+            self._conn.executemany(insert_table, self._encode_row_values(table_name, rows, columns, create=True))
+            self._commit()
 
     def get_update_op(self, update_columns, operator):
         """ Get an update operator based on columns and a operator
 
         :param update_columns: a list of columns to update
         :type update_columns: List[str]
-        :param operator: an operator that applies to the columns, including "+", "-", "*", "/", "="
+        :param operator: an operator that applies to the columns, including "+", "-", "*", "/", "=",
+            and functions registered by `create_function`
         :type operator: str
         :return: an operator that suits the backend database
         :rtype: str
         """
 
-        if operator in "+-*/":
+        if operator in self._functions:
+            update_ops = []
+            for update_column in update_columns:
+                update_ops.append(update_column + "=" + operator + "(" + update_column + ",?)")
+            return ",".join(update_ops)
+        elif operator in "+-*/":
             update_ops = []
             for update_column in update_columns:
                 update_ops.append(update_column + "=" + update_column + operator + "?")
@@ -329,20 +914,6 @@ class SqliteDBConnection(BaseDBConnection):
         else:
             raise NotImplementedError
 
-    def _update_update_op(self, row, update_op, update_columns):
-        update_op_sp = update_op.split('?')
-        while len(update_op_sp) >= 0 and update_op_sp[-1] == '':
-            update_op_sp.pop()
-        assert len(update_op_sp) == len(update_columns)
-        new_update_op = []
-        for i in range(len(update_op_sp)):
-            new_update_op.append(update_op_sp[i])
-            if isinstance(row[update_columns[i]], str):
-                new_update_op.append("'" + row[update_columns[i]].replace("'", "''") + "'")
-            else:
-                new_update_op.append(str(row[update_columns[i]]))
-        return ''.join(new_update_op)
-
     def update_row(self, table_name, row, update_op, update_columns):
         """ Update a row that exists in a table
         (suggestion: consider to use `update_rows` if you want to update multiple rows)
@@ -358,8 +929,8 @@ class SqliteDBConnection(BaseDBConnection):
         """
 
         update_table = "UPDATE %s SET %s WHERE _id=?" % (table_name, update_op)
-        self._conn.execute(update_table, [row[k] for k in update_columns] + [row["_id"]])
-        self._conn.commit()
+        self._conn.execute(update_table, self._encode_row_values(table_name, [row], update_columns + ["_id"])[0])
+        self._commit()
 
     def update_rows(self, table_name, rows, update_ops, update_columns):
         """ Update rows that exist in a table
@@ -375,37 +946,112 @@ class SqliteDBConnection(BaseDBConnection):
         """
 
         if len(rows) > 0:
-            if isinstance(update_ops, (tuple, list)):  # +-*/
+            if isinstance(update_ops, (tuple, list)):
                 assert len(rows) == len(update_ops)
-                # group rows by op to speed up
-                update_op_collections = defaultdict(list)  # key: _update_update_op
-                for i, row in enumerate(rows):
-                    # self.update_row(row, table_name, update_ops[i], update_columns)
-                    new_update_op = self._update_update_op(row, update_ops[i], update_columns)
-                    update_op_collections[new_update_op].append(row)
-                for new_update_op, op_rows in update_op_collections.items():
-                    _ids = [row["_id"] for row in op_rows]
-                    for idx in range(0, len(_ids), self.chunksize):
-                        update_table = "UPDATE %s SET %s WHERE _id IN ('%s');" % (
-                            table_name, new_update_op, "','".join(_ids[idx:idx + self.chunksize])
-                        )
-                        self._conn.execute(update_table)
-            else:  # =
-                update_op = update_ops
-                # group rows by new values to speed up
-                value_collections = defaultdict(list)  # key: values of new values
-                for row in rows:
-                    # self.update_row(row, table_name, update_op, update_columns)
-                    value_collections[json.dumps([row[k] for k in update_columns])].append(row)
-                for new_update_op, op_rows in value_collections.items():
-                    new_update_op = self._update_update_op(op_rows[0], update_op, update_columns)
-                    _ids = [row["_id"] for row in op_rows]
-                    for idx in range(0, len(_ids), self.chunksize):
-                        update_table = "UPDATE %s SET %s WHERE _id IN ('%s');" % (
-                            table_name, new_update_op, "','".join(_ids[idx:idx + self.chunksize])
+                # group rows by op so that each statement is prepared only once
+                update_op_collections = defaultdict(list)
+                for row, update_op in zip(rows, update_ops):
+                    update_op_collections[update_op].append(row)
+            else:
+                update_op_collections = {update_ops: rows}
+            for update_op, op_rows in update_op_collections.items():
+                update_table = "UPDATE %s SET %s WHERE _id=?;" % (table_name, update_op)
+                for idx in range(0, len(op_rows), self.chunksize):
+                    # sorted ids make the primary key lookups sequential
+                    self._conn.executemany(
+                        update_table,
+                        sorted(
+                            [
+                                x for x in self._encode_row_values(
+                                    table_name, op_rows[idx:idx + self.chunksize], update_columns + ["_id"]
+                                ) if x[-1] is not None
+                            ],
+                            key=lambda x: x[-1]
                         )
-                        self._conn.execute(update_table)
-            self._conn.commit()
+                    )
+            self._commit()
+
+    def get_upsert_op(self, update_columns, operator):
+        """ Get an upsert operator based on columns and a operator
+
+        :param update_columns: a list of columns to update when rows exist
+        :type update_columns: List[str]
+        :param operator: an operator that applies to the columns, including "+", "-", "*", "/", "=",
+            and functions registered by `create_function`
+        :type operator: str
+        :return: an operator that suits the backend database
+        :rtype: str
+        """
+
+        if operator in self._functions:
+            upsert_ops = []
+            for update_column in update_columns:
+                upsert_ops.append(
+                    update_column + "=" + operator + "(" + update_column + ",excluded." + update_column + ")"
+                )
+            return ",".join(upsert_ops)
+        elif operator in "+-*/":
+            upsert_ops = []
+            for update_column in update_columns:
+                upsert_ops.append(update_column + "=" + update_column + operator + "excluded." + update_column)
+            return ",".join(upsert_ops)
+        elif operator == "=":
+            upsert_ops = []
+            for update_column in update_columns:
+                upsert_ops.append(update_column + "=excluded." + update_column)
+            return ",".join(upsert_ops)
+        else:
+            raise NotImplementedError
+
+    def upsert_rows(self, table_name, rows, upsert_op, update_columns):
+        """ Insert rows into a table, or update the columns of rows that already exist
+        (note: SQLite >= 3.24.0 resolves conflicts in one statement, older versions fall back to select+insert+update)
+
+        :param table_name: the table name to upsert
+        :type table_name: str
+        :param rows: new rows
+        :type rows: List[Dict[str, object]]
+        :param upsert_op: an operator that returned by `get_upsert_op`
+        :type upsert_op: str
+        :param update_columns: the columns to update when rows exist
+        :type update_columns: List[str]
+        """
+
+        import sqlite3
+        if len(rows) == 0:
+            return
+        columns = list(next(iter(rows)).keys())
+        if sqlite3.sqlite_version_info >= (3, 24, 0):
+            upsert_table = "INSERT INTO %s (%s) VALUES (%s) ON CONFLICT(_id) DO UPDATE SET %s;" % (
+                table_name, ",".join(columns), ",".join(["?"] * len(columns)), upsert_op
+            )
+            for idx in range(0, len(rows), self.chunksize):
+                # sorted ids make the primary key lookups sequential
+                self._conn.executemany(
+                    upsert_table,
+                    sorted(
+                        self._encode_row_values(table_name, rows[idx:idx + self.chunksize], columns, create=True),
+                        key=lambda x: x[0]
+                    )
+                )
+            self._commit()
+        else:
+            # ids may be duplicate in rows so that new rows are inserted one by one
+            update_op = re.sub(r"excluded\.\w+", "?", upsert_op)
+            for idx in range(0, len(rows), self.chunksize):
+                chunk_rows = rows[idx:idx + self.chunksize]
+                existing_ids = set(
+                    x[0] for x in self._select_rows_by_chunk(table_name, [row["_id"] for row in chunk_rows], ["_id"])
+                )
+                new_rows, existing_rows = [], []
+                for row in chunk_rows:
+                    if row["_id"] in existing_ids:
+                        existing_rows.append(row)
+                    else:
+                        existing_ids.add(row["_id"])
+                        new_rows.append(row)
+                self.insert_rows(table_name, new_rows)
+                self.update_rows(table_name, existing_rows, update_op, update_columns)
 
     def get_rows_by_keys(self, table_name, bys, keys, columns, order_bys=None, reverse=False, top_n=None):
         """ Retrieve rows by specific keys in some order
@@ -429,19 +1075,255 @@ class SqliteDBConnection(BaseDBConnection):
         """
 
         key_match_events = []
-        select_table = "SELECT %s FROM %s WHERE %s" % (
-            ",".join(columns), table_name, " AND ".join(["%s=?" % (by) for by in bys])
+        id_columns = self._id_columns.get(table_name, [])
+        # ids are mapped to keys in the same statement
+        conditions = [
+            "%s=(SELECT _id FROM %s WHERE key=?)" % (by, ID_TABLE_NAME) if by in id_columns else "%s=?" % (by)
+            for by in bys
+        ]
+        keys = [SqliteDBConnection._to_key(key) if by in id_columns else key for by, key in zip(bys, keys)]
+        select_table = "SELECT %s FROM %s AS _t WHERE %s" % (
+            self._get_select_columns(table_name, columns), table_name, " AND ".join(conditions)
         )
         if order_bys:
-            select_table += " ORDER BY %s %s" % (",".join(order_bys), "DESC" if reverse else "ASC")
+            # ties are broken by ids in an ascending order
+            select_table += " ORDER BY %s,%s ASC" % (
+                ",".join(["%s %s" % (c, "DESC" if reverse else "ASC") for c in order_bys]),
+                self._get_select_columns(table_name, ["_id"])
+            )
         if top_n:
             select_table += " LIMIT %d" % (top_n)
         select_table += ";"
         for x in self._conn.execute(select_table, keys):
-            key_match_event = OrderedDict(zip(columns, x))
+            key_match_event = OrderedDict(zip(columns, self._decode_row(table_name, columns, x)))
             key_match_events.append(key_match_event)
         return key_match_events
 
+    def get_rows_by_key_values(self, table_name, by, values, columns):
+        """ Retrieve rows whose `by` column matches any of the given values
+
+        :param table_name: the table name to retrieve
+        :type table_name: str
+        :param by: the given column to match
+        :type by: str
+        :param values: the given values to match
+        :type values: List[str]
+        :param columns: the given columns to retrieve
+        :type columns: List[str]
+        :return: retrieved rows
+        :rtype: List[Dict[str, object]]
+        """
+
+        key_match_rows = []
+        if by in self._id_columns.get(table_name, []):
+            values = [x for x in self._encode_ids(values).values() if x is not None]
+        values = sorted(set(values))
+        # old SQLite versions only support 999 host parameters
+        chunksize = self.chunksize if self._use_json_each else 999
+        for idx in range(0, len(values), chunksize):
+            chunk_values = values[idx:idx + chunksize]
+            if self._use_json_each:
+                select_table = "SELECT %s FROM %s AS _t WHERE %s IN (SELECT value FROM json_each(?));" % (
+                    self._get_select_columns(table_name, columns), table_name, by
+                )
+                cursor = self._conn.execute(select_table, [json.dumps(chunk_values)])
+            else:
+                select_table = "SELECT %s FROM %s AS _t WHERE %s IN (%s);" % (
+                    self._get_select_columns(table_name, columns), table_name, by, ",".join(["?"] * len(chunk_values))
+                )
+                cursor = self._conn.execute(select_table, chunk_values)
+            for x in cursor:
+                key_match_rows.append(OrderedDict(zip(columns, self._decode_row(table_name, columns, x))))
+        return key_match_rows
+
+    def get_neighbors(
+        self, relation_table_name, table_name, hid, relation_columns, columns, weight_columns=None, top_n=None
+    ):
+        """ Retrieve relations from a given head together with their tail rows in one query
+
+        :param relation_table_name: the relation table name to retrieve
+        :type relation_table_name: str
+        :param table_name: the table name of tails to retrieve
+        :type table_name: str
+        :param hid: the given head id
+        :type hid: str
+        :param relation_columns: the given relation columns to retrieve
+        :type relation_columns: List[str]
+        :param columns: the given tail columns to retrieve
+        :type columns: List[str]
+        :param weight_columns: the relation columns whose sum is used to filter (positive) and sort (descending)
+            relations (ties are broken by tails), default `None` to keep all relations without sorting
+        :type weight_columns: Union[List[str], None]
+        :param top_n: how many relations to return, default `None` for all relations
+        :type top_n: int
+        :return: pairs of the retrieved relation row and the tail row (`None` for missing tails)
+        :rtype: List[Tuple[Dict[str, object], Union[Dict[str, object], None]]]
+        """
+
+        if "hid" in self._id_columns.get(relation_table_name, []):
+            condition = "_r.hid=(SELECT _id FROM %s WHERE key=?)" % (ID_TABLE_NAME)
+            hid = SqliteDBConnection._to_key(hid)
+        else:
+            condition = "_r.hid=?"
+        # _id is always selected to tell missing tails from the LEFT JOIN
+        tail_columns = ["_id"] + [c for c in columns if c != "_id"]
+        select_table = "SELECT %s,%s FROM %s AS _r LEFT JOIN %s AS _t ON _t._id=_r.tid WHERE %s" % (
+            self._get_select_columns(relation_table_name, relation_columns, alias="_r"),
+            self._get_select_columns(table_name, tail_columns, alias="_t"), relation_table_name, table_name, condition
+        )
+        if weight_columns is not None:
+            if len(weight_columns) == 0:
+                return []
+            weight = "+".join(["_r.%s" % (c) for c in weight_columns])
+            # ties are broken by tails in an ascending order, which is the same as `_sort_related_pairs`
+            select_table += " AND %s>0 ORDER BY %s DESC,%s ASC" % (
+                weight, weight, self._get_select_columns(relation_table_name, ["tid"], alias="_r")
+            )
+        if top_n:
+            select_table += " LIMIT %d" % (top_n)
+        select_table += ";"
+        neighbors = []
+        n_relation_columns = len(relation_columns)
+        for x in self._conn.execute(select_table, [hid]):
+            relation_row = OrderedDict(
+                zip(relation_columns, self._decode_row(relation_table_name, relation_columns, x[:n_relation_columns]))
+            )
+            if x[n_relation_columns] is None:
+                neighbors.append((relation_row, None))
+            else:
+                tail_row = dict(
+                    zip(tail_columns, self._decode_row(table_name, tail_columns, x[n_relation_columns:]))
+                )
+                neighbors.append((relation_row, OrderedDict([(c, tail_row[c]) for c in columns])))
+        return neighbors
+
+    @staticmethod
+    def _get_fulltext_table_name(table_name, column):
+        return "%s_%s_fts" % (table_name, column)
+
+    def has_fulltext_index(self, table_name, column):
+        """ Check whether a full-text index of a text column exists
+
+        :param table_name: the table name
+        :type table_name: str
+        :param column: the text column, e.g., "words"
+        :type column: str
+        :return: whether the full-text index exists
+        :rtype: bool
+        """
+
+        return self.has_table(SqliteDBConnection._get_fulltext_table_name(table_name, column))
+
+    def create_fulltext_index(self, table_name, column):
+        """ Create an FTS5 index of a text column if it does not exist, which refers to rows by rowids
+        and is maintained incrementally by triggers when rows are inserted, updated, or deleted
+
+        :param table_name: the table name to index
+        :type table_name: str
+        :param column: the text column to index, e.g., "words"
+        :type column: str
+        :return: whether the index is newly created
+        :rtype: bool
+        """
+
+        import sqlite3
+        fts_table_name = SqliteDBConnection._get_fulltext_table_name(table_name, column)
+        if self.has_table(fts_table_name):
+            return False
+        try:
+            # an external-content table stores the inverted index only, and texts are read from the table
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE %s USING fts5(%s, content='%s', content_rowid='rowid');" %
+                (fts_table_name, column, table_name)
+            )
+        except sqlite3.OperationalError:
+            raise ValueError("Error: full-text indices require the FTS5 extension of SQLite.")
+        insert_op = "INSERT INTO %s(rowid,%s) VALUES (new.rowid,new.%s);" % (fts_table_name, column, column)
+        delete_op = "INSERT INTO %s(%s,rowid,%s) VALUES ('delete',old.rowid,old.%s);" % (
+            fts_table_name, fts_table_name, column, column
+        )
+        self._conn.execute(
+            "CREATE TRIGGER %s_insert AFTER INSERT ON %s BEGIN %s END;" % (fts_table_name, table_name, insert_op)
+        )
+        self._conn.execute(
+            "CREATE TRIGGER %s_delete AFTER DELETE ON %s BEGIN %s END;" % (fts_table_name, table_name, delete_op)
+        )
+        self._conn.execute(
+            "CREATE TRIGGER %s_update AFTER UPDATE OF %s ON %s BEGIN %s %s END;" %
+            (fts_table_name, column, table_name, delete_op, insert_op)
+        )
+        # index existing rows
+        self._conn.execute("INSERT INTO %s(%s) VALUES ('rebuild');" % (fts_table_name, fts_table_name))
+        self._conn.commit()
+        return True
+
+    def search_fulltext(
+        self, table_name, column, terms, columns, match_all=False, filters=None, prior_column=None, prior_weight=0.0,
+        top_n=None
+    ):
+        """ Retrieve rows whose text column matches the given terms, ranked by the BM25 of FTS5
+
+        :param table_name: the table name to retrieve
+        :type table_name: str
+        :param column: the indexed text column, e.g., "words"
+        :type column: str
+        :param terms: the query terms
+        :type terms: List[str]
+        :param columns: the given columns to retrieve
+        :type columns: List[str]
+        :param match_all: whether rows must contain all terms, otherwise any term
+        :type match_all: bool (default = False)
+        :param filters: a dictionary from columns to allowed values, e.g., {"pattern": ["s-v-o"]}
+        :type filters: Union[Dict[str, List[object]], None] (default = None)
+        :param prior_column: a non-negative column (e.g., "frequency") added to scores as `prior_weight * ln(1 + value)`
+        :type prior_column: Union[str, None] (default = None)
+        :param prior_weight: the weight of the prior
+        :type prior_weight: float (default = 0.0)
+        :param top_n: how many rows to return, default `None` for all rows
+        :type top_n: int
+        :return: pairs of scores and retrieved rows, sorted by scores in a descending order
+        :rtype: List[Tuple[float, Dict[str, object]]]
+        """
+
+        import sqlite3
+        fts_table_name = SqliteDBConnection._get_fulltext_table_name(table_name, column)
+        # terms are quoted as strings so that FTS5 operators in queries are not interpreted
+        terms = ['"%s"' % (term.replace('"', '""')) for term in terms if term.strip()]
+        if len(terms) == 0:
+            return []
+        # bm25() is negative, and better matches are more negative
+        score = "-bm25(%s)" % (fts_table_name)
+        params = [(" AND " if match_all else " OR ").join(terms)]
+        if prior_column and prior_weight:
+            score += "+%r*ln(1.0+_t.%s)" % (float(prior_weight), prior_column)
+            if "ln" not in self._functions:
+                try:
+                    self._conn.execute("SELECT ln(1.0);")
+                except sqlite3.OperationalError:
+                    # SQLite is not built with math functions
+                    self.create_function("ln", 1, math.log)
+                self._functions.add("ln")
+        conditions = ["%s MATCH ?" % (fts_table_name)]
+        for by, values in (filters or dict()).items():
+            conditions.append("_t.%s IN (%s)" % (by, ",".join(["?"] * len(values))))
+            params.extend(values)
+        if (prior_column and prior_weight) or filters:
+            match_table = "%s JOIN %s AS _t ON _t.rowid=%s.rowid" % (fts_table_name, table_name, fts_table_name)
+        else:
+            match_table = fts_table_name
+        # matches are ranked by rowids and scores only, and columns are retrieved for the top_n rows
+        rank_table = "SELECT %s.rowid AS _rowid,%s AS _score FROM %s WHERE %s ORDER BY _score DESC,_rowid" % (
+            fts_table_name, score, match_table, " AND ".join(conditions)
+        )
+        if top_n:
+            rank_table += " LIMIT %d" % (top_n)
+        select_table = "SELECT _s._score,%s FROM (%s) AS _s JOIN %s AS _t ON _t.rowid=_s._rowid " \
+            "ORDER BY _s._score DESC,_s._rowid;" % (self._get_select_columns(table_name, columns), rank_table, table_name)
+        return [
+            (x[0], OrderedDict(zip(columns, self._decode_row(table_name, columns, x[1:]))))
+            for x in self._conn.execute(select_table, params)
+        ]
+
 
 class MongoDBConnection(BaseDBConnection):
     """ KG connection for MongoDB
@@ -467,14 +1349,63 @@ class MongoDBConnection(BaseDBConnection):
         """
         self._client.close()
 
-    def create_table(self, table_name):
+    def begin(self):
+        """ Nothing to do because MongoDB acknowledges each write operation
+        """
+        pass
+
+    def commit(self):
+        """ Nothing to do because MongoDB acknowledges each write operation
+        """
+        pass
+
+    def rollback(self):
+        """ Nothing to do because MongoDB acknowledges each write operation (i.e., acknowledged writes are kept)
+        """
+        pass
+
+    def get_data_version(self):
+        """ MongoDB does not track writes of other connections
+
+        :return: None
+        :rtype: None
+        """
+        return None
+
+    def has_table(self, table_name):
+        """ Check whether a table (i.e., collection) exists
+
+        :param table_name: the table name to check
+        :type table_name: str
+        :return: whether the table exists
+        :rtype: bool
+        """
+
+        return table_name in self._conn.list_collection_names()
+
+    def create_table(self, table_name, columns=None, column_types=None):
         """ Create a table without the necessary to provide column information
 
         :param table_name: the table name to create
         :type table_name: str
+        :param columns: unused for MongoDB
+        :type columns: Union[List[str], None] (default = None)
+        :param column_types: unused for MongoDB
+        :type column_types: Union[List[str], None] (default = None)
         """
         self._conn[table_name]
 
+    def create_index(self, table_name, columns):
+        """ Create an index on given columns of a table if it does not exist
+
+        :param table_name: the table name to index
+        :type table_name: str
+        :param columns: the columns to index
+        :type columns: List[str]
+        """
+
+        self._conn[table_name].create_index([(k, 1) for k in columns])
+
     def __get_projection(self, columns):
         projection = {"_id": 0}
         for k in columns:
@@ -492,9 +1423,51 @@ class MongoDBConnection(BaseDBConnection):
         :rtype: List[Dict[str, object]]
         """
 
+        return list(self.iter_columns(table_name, columns))
+
+    def iter_columns(self, table_name, columns, where=None, params=None, batch_size=None, row_format="dict"):
+        """ Scan a table and yield rows batch by batch in bounded memory
+
+        :param table_name: the table name to scan
+        :type table_name: str
+        :param columns: the columns to retrieve
+        :type columns: List[str]
+        :param where: a filter of rows in the native syntax of the backend, i.e., a SQL expression for SQLite
+            (values of id columns are compared with stored values) and a query document for MongoDB
+        :type where: Union[str, Dict[str, object], None] (default = None)
+        :param params: the parameters of the SQL expression
+        :type params: Union[List[object], None] (default = None)
+        :param batch_size: how many rows to fetch each time, default `None` for the chunksize
+        :type batch_size: Union[int, None] (default = None)
+        :param row_format: "dict" for OrderedDicts, "tuple" for tuples, and "numpy" for record arrays of batches
+        :type row_format: str (default = "dict")
+        :return: a generator of rows (or record arrays)
+        :rtype: Generator[Union[Dict[str, object], Tuple[object], numpy.recarray], None, None]
+        """
+
+        if row_format not in ROW_FORMATS:
+            raise ValueError("Error: row_format should be one of %s." % (ROW_FORMATS))
         projection = self.__get_projection(columns)
-        results = list(self._conn[table_name].find({}, projection))
-        return results
+        batch_size = batch_size or self.chunksize
+        # the server-side cursor returns a batch per round trip
+        cursor = self._conn[table_name].find(where or {}, projection, batch_size=batch_size)
+        try:
+            if row_format == "dict":
+                yield from cursor
+            elif row_format == "tuple":
+                for x in cursor:
+                    yield tuple(x.get(c, None) for c in columns)
+            else:
+                rows = []
+                for x in cursor:
+                    rows.append(tuple(x.get(c, None) for c in columns))
+                    if len(rows) >= batch_size:
+                        yield _to_record_batch(columns, rows)
+                        rows = []
+                if rows:
+                    yield _to_record_batch(columns, rows)
+        finally:
+            cursor.close()
 
     def select_row(self, table_name, _id, columns):
         """ Select a row from a table
@@ -526,15 +1499,33 @@ class MongoDBConnection(BaseDBConnection):
         :rtype: List[Dict[str, object]]
         """
 
+        return list(self.iter_select_rows(table_name, _ids, columns))
+
+    def iter_select_rows(self, table_name, _ids, columns):
+        """ Select rows from a table and yield them one by one in the order of `_ids`
+
+        :param table_name: the table name to retrieve
+        :type table_name: str
+        :param _ids: the row ids
+        :type _ids: List[str]
+        :param columns: the columns to retrieve
+        :type columns: List[str]
+        :return: a generator of retrieved rows (`None` for missing rows)
+        :rtype: Generator[Union[Dict[str, object], None], None, None]
+        """
+
         table = self._conn[table_name]
-        exact_match_rows = []
         projection = self.__get_projection(columns)
+        # _id is necessary to restore the order
+        projection.pop("_id")
         for idx in range(0, len(_ids), self.chunksize):
             query = {"_id": {'$in': _ids[idx:idx + self.chunksize]}}
-            exact_match_rows.extend(table.find(query, projection))
-        row_cache = {x["_id"]: x for x in exact_match_rows}
-        exact_match_rows = [row_cache.get(_id, None) for _id in _ids]
-        return exact_match_rows
+            row_cache = {x["_id"]: x for x in table.find(query, projection)}
+            for _id in _ids[idx:idx + self.chunksize]:
+                x = row_cache.get(_id, None)
+                if x is not None and "_id" not in columns:
+                    x.pop("_id")
+                yield x
 
     def insert_row(self, table_name, row):
         """ Insert a row into a table
@@ -685,6 +1676,61 @@ class MongoDBConnection(BaseDBConnection):
                         query = {"_id": {'$in': _ids[idx:idx + self.chunksize]}}
                         self._conn[table_name].update_many(query, new_update_op)
 
+    def get_upsert_op(self, update_columns, operator):
+        """ Get an upsert operator based on columns and a operator
+
+        :param update_columns: a list of columns to update when rows exist
+        :type update_columns: List[str]
+        :param operator: an operator that applies to the columns, including "+", "="
+        :type operator: str
+        :return: an operator that suits the backend database
+        :rtype: Dict[str, Dict[str, float]]
+        """
+
+        # $inc and $set keep the values of new rows, but $mul on a missing field results in 0
+        if operator == "+":
+            update_ops = {}
+            for update_column in update_columns:
+                update_ops[update_column] = 1  # placeholder
+            return {"$inc": update_ops}
+        elif operator == "=":
+            update_ops = {}
+            for update_column in update_columns:
+                update_ops[update_column] = 1  # placeholder
+            return {"$set": update_ops}
+        else:
+            raise NotImplementedError
+
+    def upsert_rows(self, table_name, rows, upsert_op, update_columns):
+        """ Insert rows into a table, or update the columns of rows that already exist
+
+        :param table_name: the table name to upsert
+        :type table_name: str
+        :param rows: new rows
+        :type rows: List[Dict[str, object]]
+        :param upsert_op: an operator that returned by `get_upsert_op`
+        :type upsert_op: Dict[str, Dict[str, float]]
+        :param update_columns: the columns to update when rows exist
+        :type update_columns: List[str]
+        """
+
+        from pymongo import UpdateOne
+        if len(rows) == 0:
+            return
+        op_name = next(iter(upsert_op.keys()))
+        update_column_set = set(update_columns)
+        for idx in range(0, len(rows), self.chunksize):
+            requests = []
+            for row in rows[idx:idx + self.chunksize]:
+                new_upsert_op = {op_name: OrderedDict([(k, row[k]) for k in update_columns])}
+                set_on_insert = OrderedDict(
+                    [(k, v) for k, v in row.items() if k != "_id" and k not in update_column_set]
+                )
+                if len(set_on_insert) > 0:
+                    new_upsert_op["$setOnInsert"] = set_on_insert
+                requests.append(UpdateOne({"_id": row["_id"]}, new_upsert_op, upsert=True))
+            self._conn[table_name].bulk_write(requests, ordered=False)
+
     def get_rows_by_keys(self, table_name, bys, keys, columns, order_bys=None, reverse=False, top_n=None):
         """ Retrieve rows by specific keys in some order
 
@@ -711,7 +1757,8 @@ class MongoDBConnection(BaseDBConnection):
         cursor = self._conn[table_name].find(query, projection)
         if order_bys:
             direction = -1 if reverse else 1
-            cursor = cursor.sort([(k, direction) for k in order_bys])
+            # ties are broken by ids in an ascending order
+            cursor = cursor.sort([(k, direction) for k in order_bys] + [("_id", 1)])
         if top_n:
             result = []
             for x in cursor:
@@ -721,3 +1768,80 @@ class MongoDBConnection(BaseDBConnection):
             return result
         else:
             return list(cursor)
+
+    def get_rows_by_key_values(self, table_name, by, values, columns):
+        """ Retrieve rows whose `by` column matches any of the given values
+
+        :param table_name: the table name to retrieve
+        :type table_name: str
+        :param by: the given column to match
+        :type by: str
+        :param values: the given values to match
+        :type values: List[str]
+        :param columns: the given columns to retrieve
+        :type columns: List[str]
+        :return: retrieved rows
+        :rtype: List[Dict[str, object]]
+        """
+
+        table = self._conn[table_name]
+        projection = self.__get_projection(columns)
+        key_match_rows = []
+        values = sorted(set(values))
+        for idx in range(0, len(values), self.chunksize):
+            key_match_rows.extend(table.find({by: {"$in": values[idx:idx + self.chunksize]}}, projection))
+        return key_match_rows
+
+    def get_neighbors(
+        self, relation_table_name, table_name, hid, relation_columns, columns, weight_columns=None, top_n=None
+    ):
+        """ Retrieve relations from a given head together with their tail rows in one query
+
+        :param relation_table_name: the relation table name to retrieve
+        :type relation_table_name: str
+        :param table_name: the table name of tails to retrieve
+        :type table_name: str
+        :param hid: the given head id
+        :type hid: str
+        :param relation_columns: the given relation columns to retrieve
+        :type relation_columns: List[str]
+        :param columns: the given tail columns to retrieve
+        :type columns: List[str]
+        :param weight_columns: the relation columns whose sum is used to filter (positive) and sort (descending)
+            relations (ties are broken by tails), default `None` to keep all relations without sorting
+        :type weight_columns: Union[List[str], None]
+        :param top_n: how many relations to return, default `None` for all relations
+        :type top_n: int
+        :return: pairs of the retrieved relation row and the tail row (`None` for missing tails)
+        :rtype: List[Tuple[Dict[str, object], Union[Dict[str, object], None]]]
+        """
+
+        pipeline = [{"$match": {"hid": hid}}]
+        if weight_columns is not None:
+            if len(weight_columns) == 0:
+                return []
+            pipeline.append({"$addFields": {"_weight": {"$add": ["$" + c for c in weight_columns]}}})
+            pipeline.append({"$match": {"_weight": {"$gt": 0}}})
+            pipeline.append({"$sort": OrderedDict([("_weight", -1), ("tid", 1)])})
+        if top_n:
+            pipeline.append({"$limit": top_n})
+        # tails are joined after the limit so that only kept relations look up their tails
+        pipeline.append(
+            {
+                "$lookup": {
+                    "from": table_name,
+                    "localField": "tid",
+                    "foreignField": "_id",
+                    "as": "_tails"
+                }
+            }
+        )
+        neighbors = []
+        for x in self._conn[relation_table_name].aggregate(pipeline):
+            relation_row = OrderedDict([(c, x.get(c, None)) for c in relation_columns])
+            if len(x["_tails"]) == 0:
+                neighbors.append((relation_row, None))
+            else:
+                tail = x["_tails"][0]
+                neighbors.append((relation_row, OrderedDict([(c, tail.get(c, None)) for c in columns])))
+        return neighbors
@@ -0,0 +1,672 @@
+import os
+import json
+import numpy as np
+from ..database.codec import get_relation_weights
+from ..database.db_connection import SqliteDBConnection
+
+DIGEST_SIZE = 20
+DIGEST_DTYPE = "S%d" % (DIGEST_SIZE)
+MERGE_SIZE = 65536
+
+
+def get_temp_path(path):
+    """ Get the temporary path to write a file before it replaces `path`,
+    which is unique for each process so that processes saving the same file do not write the same temporary file
+
+    :param path: the path to replace
+    :type path: str
+    :return: the temporary path
+    :rtype: str
+    """
+
+    return "%s.%d.tmp" % (path, os.getpid())
+
+
+class IdSet(object):
+    """ Compact set of SHA1 hex ids (e.g., eids, rids, and cids),
+    where ids are stored as sorted 20-byte digests in a NumPy array and searched by binary search
+
+    """
+    def __init__(self, digests=None):
+        """
+
+        :param digests: sorted unique digests
+        :type digests: Union[numpy.ndarray, None] (default = None)
+        """
+
+        self._digests = digests if digests is not None else np.zeros(0, dtype=DIGEST_DTYPE)
+        # newly added ids are merged into digests in batches
+        self._pending = set()
+        # ids that are not SHA1 hex strings
+        self._others = set()
+        self._bloom = None
+        self._bloom_nbits = 0
+        self._bloom_nhashes = 0
+        self.modified = False
+        # the table signature that the ids were loaded or built with, and the number of ids at that time
+        self.signature = None
+        self.signed_size = 0
+
+    @staticmethod
+    def from_ids(ids):
+        """ Build an IdSet from hex ids
+
+        :param ids: hex ids
+        :type ids: Iterable[str]
+        :return: the built IdSet
+        :rtype: aser.database.index.IdSet
+        """
+
+        id_set = IdSet()
+        digests = []
+        for _id in ids:
+            digest = IdSet._to_digest(_id)
+            if digest is None:
+                id_set._others.add(_id)
+            else:
+                digests.append(digest)
+        if len(digests) > 0:
+            id_set._digests = np.unique(np.frombuffer(b"".join(digests), dtype=DIGEST_DTYPE))
+        id_set.modified = True
+        return id_set
+
+    @staticmethod
+    def _to_digest(_id):
+        try:
+            digest = bytes.fromhex(_id)
+        except (ValueError, TypeError):
+            return None
+        return digest if len(digest) == DIGEST_SIZE else None
+
+    def __len__(self):
+        return len(self._digests) + len(self._pending) + len(self._others)
+
+    def __iter__(self):
+        for idx in range(0, len(self._digests), MERGE_SIZE):
+            buf = self._digests[idx:idx + MERGE_SIZE].tobytes()
+            for i in range(0, len(buf), DIGEST_SIZE):
+                yield buf[i:i + DIGEST_SIZE].hex()
+        for _id in list(self._pending):
+            yield _id
+        for _id in list(self._others):
+            yield _id
+
+    def __contains__(self, _id):
+        if _id in self._pending:
+            return True
+        digest = IdSet._to_digest(_id)
+        if digest is None:
+            return _id in self._others
+        return self._contains_digest(digest)
+
+    def _contains_digest(self, digest):
+        if self._bloom is not None and not self._bloom_contains(digest):
+            return False
+        idx = self._digests.searchsorted(digest)
+        # NumPy strips trailing null bytes of fixed-length bytes
+        return idx < len(self._digests) and self._digests[idx] == digest.rstrip(b"\x00")
+
+    def add(self, _id):
+        """ Add an id
+
+        :param _id: a hex id
+        :type _id: str
+        """
+
+        if _id in self:
+            return
+        self.modified = True
+        digest = IdSet._to_digest(_id)
+        if digest is None:
+            self._others.add(_id)
+            return
+        self._pending.add(_id)
+        if self._bloom is not None:
+            self._bloom_add(np.frombuffer(digest, dtype=DIGEST_DTYPE))
+        if len(self._pending) >= max(MERGE_SIZE, len(self._digests) >> 3):
+            self.merge()
+
+    def update(self, ids):
+        """ Add ids
+
+        :param ids: hex ids
+        :type ids: Iterable[str]
+        """
+
+        for _id in ids:
+            self.add(_id)
+
+    def difference_update(self, ids):
+        """ Remove ids (note: the Bloom filter keeps their bits, which only adds false positives)
+
+        :param ids: hex ids
+        :type ids: Iterable[str]
+        """
+
+        digests = []
+        for _id in ids:
+            if _id in self._pending:
+                self._pending.discard(_id)
+            elif _id in self._others:
+                self._others.discard(_id)
+            else:
+                digest = IdSet._to_digest(_id)
+                if digest is not None:
+                    digests.append(digest)
+        if len(digests) > 0:
+            removed = np.frombuffer(b"".join(digests), dtype=DIGEST_DTYPE)
+            self._digests = self._digests[~np.isin(self._digests, removed)]
+        self.modified = True
+
+    def merge(self):
+        """ Merge pending ids into the sorted digests
+
+        """
+
+        if len(self._pending) > 0:
+            pending = np.frombuffer(b"".join(map(bytes.fromhex, self._pending)), dtype=DIGEST_DTYPE)
+            self._digests = np.sort(np.concatenate([self._digests, pending]))
+            self._pending.clear()
+
+    def clear(self):
+        self._digests = np.zeros(0, dtype=DIGEST_DTYPE)
+        self._pending.clear()
+        self._others.clear()
+        if self._bloom is not None:
+            self._bloom[:] = 0
+        self.modified = True
+
+    """
+    Bloom filter
+    """
+
+    def enable_bloom_filter(self, bits_per_id=10):
+        """ Front the binary search with a Bloom filter so that most missing ids are rejected without searching
+
+        :param bits_per_id: the number of bits for each id, 10 bits result in about 1% false positives
+        :type bits_per_id: int (default = 10)
+        """
+
+        self.merge()
+        self._bloom_nbits = max(64, int(bits_per_id * max(len(self._digests), MERGE_SIZE)))
+        self._bloom_nhashes = max(1, int(round(0.6931 * bits_per_id)))
+        self._bloom = np.zeros((self._bloom_nbits + 7) // 8, dtype=np.uint8)
+        for idx in range(0, len(self._digests), MERGE_SIZE):
+            self._bloom_add(self._digests[idx:idx + MERGE_SIZE])
+
+    def disable_bloom_filter(self):
+        self._bloom = None
+        self._bloom_nbits = 0
+        self._bloom_nhashes = 0
+
+    def _bloom_positions(self, digests):
+        # digests are uniformly distributed so that double hashing on their first 16 bytes is enough
+        words = np.ascontiguousarray(digests).view(np.uint8).reshape(-1, DIGEST_SIZE)[:, :16].copy().view(np.uint64)
+        h1, h2 = words[:, 0], words[:, 1] | np.uint64(1)
+        return [(h1 + np.uint64(i) * h2) % np.uint64(self._bloom_nbits) for i in range(self._bloom_nhashes)]
+
+    def _bloom_add(self, digests):
+        for positions in self._bloom_positions(digests):
+            np.bitwise_or.at(self._bloom, positions >> np.uint64(3), (1 << (positions & np.uint64(7))).astype(np.uint8))
+
+    def _bloom_contains(self, digest):
+        for positions in self._bloom_positions(np.frombuffer(digest, dtype=DIGEST_DTYPE)):
+            position = int(positions[0])
+            if not self._bloom[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    """
+    Persistence
+    """
+
+    def save(self, index_path, meta=None):
+        """ Save the IdSet as `index_path`.npy and `index_path`.json
+
+        :param index_path: the path prefix to save
+        :type index_path: str
+        :param meta: other information to save, e.g., the database signature
+        :type meta: Union[Dict[str, object], None] (default = None)
+        """
+
+        self.merge()
+        if self.modified or not os.path.exists(index_path + ".npy"):
+            with open(get_temp_path(index_path + ".npy"), "wb") as f:
+                np.save(f, self._digests)
+            os.replace(get_temp_path(index_path + ".npy"), index_path + ".npy")
+        meta = dict(meta) if meta else dict()
+        meta["size"] = len(self._digests)
+        meta["others"] = sorted(self._others)
+        with open(get_temp_path(index_path + ".json"), "w") as f:
+            json.dump(meta, f)
+        os.replace(get_temp_path(index_path + ".json"), index_path + ".json")
+        self.modified = False
+
+    @staticmethod
+    def load(index_path, meta=None):
+        """ Load an IdSet from `index_path`.npy and `index_path`.json by memory mapping
+
+        :param index_path: the path prefix to load
+        :type index_path: str
+        :param meta: the information that must match the saved one, e.g., the database signature
+        :type meta: Union[Dict[str, object], None] (default = None)
+        :return: the loaded IdSet, or None if it does not exist or does not match
+        :rtype: Union[aser.database.index.IdSet, None]
+        """
+
+        try:
+            with open(index_path + ".json", "r") as f:
+                saved_meta = json.load(f)
+            if meta:
+                for k, v in meta.items():
+                    if saved_meta.get(k, None) != v:
+                        return None
+            digests = np.load(index_path + ".npy", mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        if digests.dtype != np.dtype(DIGEST_DTYPE) or len(digests) != saved_meta.get("size", -1):
+            return None
+        id_set = IdSet(digests)
+        id_set._others.update(saved_meta.get("others", []))
+        return id_set
+
+
+def get_table_signature(conn, table_name):
+    """ Get the signature of a SQLite table to validate persisted indices,
+    which changes whenever rows are inserted because ASER never deletes rows
+    (the row count is only counted for integer keys, whose rowids may be assigned before rows are inserted)
+
+    :param conn: the database connection
+    :type conn: aser.database.db_connection.BaseDBConnection
+    :param table_name: the table name
+    :type table_name: str
+    :return: the signature, or None for other databases
+    :rtype: Union[Dict[str, object], None]
+    """
+
+    if not isinstance(conn, SqliteDBConnection):
+        return None
+    if table_name in conn._id_columns:
+        max_rowid, n_rows = list(conn._conn.execute("SELECT MAX(rowid), COUNT(*) FROM %s;" % (table_name)))[0]
+        return {"table_name": table_name, "max_rowid": max_rowid, "n_rows": n_rows}
+    # other rowids are always assigned by inserts so that the max rowid is enough (and it costs constant time)
+    max_rowid = list(conn._conn.execute("SELECT MAX(rowid) FROM %s;" % (table_name)))[0][0]
+    return {"table_name": table_name, "max_rowid": max_rowid}
+
+
+def load_id_set(conn, db_path, table_name, column, index_name):
+    """ Load an IdSet persisted next to a SQLite database, or build it from the table
+
+    :param conn: the database connection
+    :type conn: aser.database.db_connection.BaseDBConnection
+    :param db_path: the SQLite database path, or None for other databases
+    :type db_path: Union[str, None]
+    :param table_name: the table name to read ids
+    :type table_name: str
+    :param column: the column name of ids
+    :type column: str
+    :param index_name: the index name, e.g., "eids", which is saved as `db_path`.`index_name`.npy
+    :type index_name: str
+    :return: the IdSet
+    :rtype: aser.database.index.IdSet
+    """
+
+    # the signature is taken in advance so that rows inserted later by other writers are never covered by it
+    signature = get_table_signature(conn, table_name) if db_path else None
+    id_set = None
+    if signature:
+        id_set = IdSet.load(db_path + "." + index_name, signature)
+    if id_set is None:
+        id_set = IdSet.from_ids(x[0] for x in conn.iter_columns(table_name, [column], row_format="tuple"))
+    id_set.signature = signature
+    id_set.signed_size = len(id_set)
+    return id_set
+
+
+def save_id_set(id_set, conn, db_path, table_name, index_name):
+    """ Save a modified IdSet loaded by `load_id_set` next to a SQLite database so that it can be loaded quickly,
+    where ids added later are only saved if no other writer has inserted rows since the set was loaded
+    (note: the connection must be open)
+
+    :param id_set: the IdSet
+    :type id_set: aser.database.index.IdSet
+    :param conn: the database connection
+    :type conn: aser.database.db_connection.BaseDBConnection
+    :param db_path: the SQLite database path, or None for other databases
+    :type db_path: Union[str, None]
+    :param table_name: the table name of ids
+    :type table_name: str
+    :param index_name: the index name, e.g., "eids", which is saved as `db_path`.`index_name`.npy
+    :type index_name: str
+    """
+
+    # unmodified sets are persisted already
+    if not db_path or not id_set.modified or not id_set.signature:
+        return
+    signature = id_set.signature
+    n_added = len(id_set) - id_set.signed_size
+    if n_added != 0:
+        # the set is consistent with the current table only if all inserted rows are its added ids
+        current_signature = get_table_signature(conn, table_name)
+        if "n_rows" in signature:
+            if current_signature["n_rows"] != signature["n_rows"] + n_added:
+                return
+        elif current_signature["max_rowid"] != (signature["max_rowid"] or 0) + n_added:
+            return
+        signature = current_signature
+    try:
+        id_set.save(db_path + "." + index_name, signature)
+    except OSError:
+        return  # e.g., read-only directories
+    id_set.signature = signature
+    id_set.signed_size = len(id_set)
+
+
+def get_file_signature(db_path):
+    """ Get the signature of a SQLite database file to validate persisted indices,
+    which changes whenever rows are inserted or updated
+
+    :param db_path: the SQLite database path
+    :type db_path: str
+    :return: the signature, or None if it cannot be trusted (e.g., the database does not exist or has a pending WAL)
+    :rtype: Union[Dict[str, int], None]
+    """
+
+    if not db_path or not os.path.isfile(db_path):
+        return None
+    if os.path.exists(db_path + "-wal") and os.path.getsize(db_path + "-wal") > 0:
+        return None
+    stat = os.stat(db_path)
+    return {"db_mtime_ns": stat.st_mtime_ns, "db_size": stat.st_size}
+
+
+class AdjacencyIndex(object):
+    """ CSR adjacency index of relations, where the outgoing (or incoming) edges of a node are a slice
+    pre-sorted by the total weight in a descending order
+
+    """
+
+    ARRAY_NAMES = ["nodes", "out_offsets", "out_neighbors", "out_weights", "in_offsets", "in_neighbors", "in_edges"]
+
+    def __init__(
+        self, senses, nodes, out_offsets, out_neighbors, out_weights, in_offsets, in_neighbors, in_edges
+    ):
+        """
+
+        :param senses: the relation senses of weight columns
+        :type senses: List[str]
+        :param nodes: sorted unique digests of heads and tails
+        :type nodes: numpy.ndarray
+        :param out_offsets: the offsets of outgoing edges of each node
+        :type out_offsets: numpy.ndarray
+        :param out_neighbors: the tail node indices of outgoing edges
+        :type out_neighbors: numpy.ndarray
+        :param out_weights: the sense weights of outgoing edges
+        :type out_weights: numpy.ndarray
+        :param in_offsets: the offsets of incoming edges of each node
+        :type in_offsets: numpy.ndarray
+        :param in_neighbors: the head node indices of incoming edges
+        :type in_neighbors: numpy.ndarray
+        :param in_edges: the positions of incoming edges in outgoing arrays
+        :type in_edges: numpy.ndarray
+        """
+
+        self.senses = list(senses)
+        self.sense2idx = {r: idx for idx, r in enumerate(self.senses)}
+        self.nodes = nodes
+        self.out_offsets = out_offsets
+        self.out_neighbors = out_neighbors
+        self.out_weights = out_weights
+        self.in_offsets = in_offsets
+        self.in_neighbors = in_neighbors
+        self.in_edges = in_edges
+
+    @property
+    def n_nodes(self):
+        return len(self.nodes)
+
+    @property
+    def n_edges(self):
+        return len(self.out_neighbors)
+
+    @staticmethod
+    def build(hids, tids, weights, senses, return_order=False):
+        """ Build an AdjacencyIndex from edges
+
+        :param hids: the head ids
+        :type hids: List[str]
+        :param tids: the tail ids
+        :type tids: List[str]
+        :param weights: the sense weights of edges, whose shape is (#edges, #senses)
+        :type weights: Union[numpy.ndarray, List[List[float]]]
+        :param senses: the relation senses of weight columns
+        :type senses: List[str]
+        :param return_order: whether to also return the positions of input edges in outgoing arrays
+        :type return_order: bool (default = False)
+        :return: the built AdjacencyIndex (and the input edge of each position in outgoing arrays)
+        :rtype: Union[aser.database.index.AdjacencyIndex, Tuple[aser.database.index.AdjacencyIndex, numpy.ndarray]]
+        """
+
+        h = np.frombuffer(b"".join(map(bytes.fromhex, hids)), dtype=DIGEST_DTYPE)
+        t = np.frombuffer(b"".join(map(bytes.fromhex, tids)), dtype=DIGEST_DTYPE)
+        weights = np.asarray(weights, dtype=np.float64).reshape(len(h), len(senses))
+        nodes = np.unique(np.concatenate([h, t]))
+        index_dtype = np.int32 if len(nodes) < 2**31 else np.int64
+        h_idx = nodes.searchsorted(h).astype(index_dtype)
+        t_idx = nodes.searchsorted(t).astype(index_dtype)
+        total_weights = weights.sum(axis=1)
+
+        # sort by heads, and then by total weights in a descending order (ties are broken by tails)
+        out_order = np.lexsort((t_idx, -total_weights, h_idx))
+        out_offsets = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(h_idx, minlength=len(nodes)), out=out_offsets[1:])
+        out_neighbors = t_idx[out_order]
+        out_weights = weights[out_order]
+        out_heads = h_idx[out_order]
+
+        # sort by tails, and then by total weights in a descending order (ties are broken by heads)
+        in_edges = np.lexsort((out_heads, -total_weights[out_order], out_neighbors))
+        in_offsets = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(t_idx, minlength=len(nodes)), out=in_offsets[1:])
+        in_neighbors = out_heads[in_edges]
+
+        index = AdjacencyIndex(
+            senses, nodes, out_offsets, out_neighbors, out_weights, in_offsets, in_neighbors,
+            in_edges.astype(np.int64)
+        )
+        if return_order:
+            return index, out_order
+        return index
+
+    def _get_node_index(self, _id):
+        digest = IdSet._to_digest(_id)
+        if digest is None:
+            return -1
+        idx = self.nodes.searchsorted(digest)
+        if idx < len(self.nodes) and self.nodes[idx] == digest.rstrip(b"\x00"):
+            return int(idx)
+        return -1
+
+    def _get_node_id(self, idx):
+        return self.nodes[idx].ljust(DIGEST_SIZE, b"\x00").hex()
+
+    def get_neighbors(self, _id, direction="out", top_k=None, senses=None):
+        """ Get the neighbors of a node sorted by the total weight in a descending order
+
+        :param _id: the node id (i.e., eid or cid)
+        :type _id: str
+        :param direction: "out" for tails of outgoing edges, "in" for heads of incoming edges
+        :type direction: str (default = "out")
+        :param top_k: how many neighbors to return, default `None` for all neighbors
+        :type top_k: Union[int, None] (default = None)
+        :param senses: only consider edges with these relation senses and sort them by the weights of these senses,
+            default `None` for all senses
+        :type senses: Union[List[str], None] (default = None)
+        :return: a list of (neighbor id, relation senses with weights)
+        :rtype: List[Tuple[str, Dict[str, float]]]
+        """
+
+        idx = self._get_node_index(_id)
+        if idx == -1:
+            return []
+        if direction == "out":
+            st, end = self.out_offsets[idx], self.out_offsets[idx + 1]
+            neighbors = self.out_neighbors[st:end]
+            weights = self.out_weights[st:end]
+        elif direction == "in":
+            st, end = self.in_offsets[idx], self.in_offsets[idx + 1]
+            neighbors = self.in_neighbors[st:end]
+            weights = self.out_weights[self.in_edges[st:end]]
+        else:
+            raise ValueError("Error: only support out/in directions.")
+
+        if senses is not None:
+            sense_indices = [self.sense2idx[r] for r in senses if r in self.sense2idx]
+            selected_weights = weights[:, sense_indices]
+            # edges are re-sorted by the total weight of selected senses
+            total_weights = selected_weights.sum(axis=1)
+            mask = total_weights > 0
+            order = np.argsort(-total_weights[mask], kind="stable")
+            neighbors = neighbors[mask][order]
+            weights = weights[mask][order]
+        if top_k is not None:
+            neighbors = neighbors[:max(top_k, 0)]
+            weights = weights[:max(top_k, 0)]
+
+        results = []
+        for neighbor, weight in zip(neighbors.tolist(), weights.tolist()):
+            results.append((self._get_node_id(neighbor), {r: w for r, w in zip(self.senses, weight) if w > 0.0}))
+        return results
+
+    def get_edges(self, ids, direction="out"):
+        """ Get all edges of multiple nodes by slicing, which is used to expand a frontier in bulk
+
+        :param ids: the node ids (i.e., eids or cids)
+        :type ids: List[str]
+        :param direction: "out" for outgoing edges, "in" for incoming edges
+        :type direction: str (default = "out")
+        :return: positions of source nodes in `ids`, ids of neighbors, and sense weights of edges
+        :rtype: Tuple[numpy.ndarray, List[str], numpy.ndarray]
+        """
+
+        if direction == "out":
+            offsets, neighbors = self.out_offsets, self.out_neighbors
+        elif direction == "in":
+            offsets, neighbors = self.in_offsets, self.in_neighbors
+        else:
+            raise ValueError("Error: only support out/in directions.")
+        node_indices = np.array([self._get_node_index(_id) for _id in ids], dtype=np.int64)
+        valid_positions = np.nonzero(node_indices != -1)[0]
+        node_indices = node_indices[valid_positions]
+        st, end = offsets[node_indices], offsets[node_indices + 1]
+        counts = end - st
+        n_edges = int(counts.sum())
+        # positions of edges of each node are contiguous
+        edge_positions = np.repeat(st - np.cumsum(counts) + counts, counts) + np.arange(n_edges, dtype=np.int64)
+        sources = np.repeat(valid_positions, counts)
+        neighbor_ids = [x.ljust(DIGEST_SIZE, b"\x00").hex() for x in self.nodes[neighbors[edge_positions]].tolist()]
+        if direction == "out":
+            weights = self.out_weights[edge_positions]
+        else:
+            weights = self.out_weights[self.in_edges[edge_positions]]
+        return sources, neighbor_ids, np.asarray(weights)
+
+    def save(self, index_path, meta=None):
+        """ Save the AdjacencyIndex as `index_path`.*.npy and `index_path`.json
+
+        :param index_path: the path prefix to save
+        :type index_path: str
+        :param meta: other information to save, e.g., the database signature
+        :type meta: Union[Dict[str, object], None] (default = None)
+        """
+
+        for name in AdjacencyIndex.ARRAY_NAMES:
+            with open(get_temp_path(index_path + "." + name + ".npy"), "wb") as f:
+                np.save(f, getattr(self, name))
+            os.replace(get_temp_path(index_path + "." + name + ".npy"), index_path + "." + name + ".npy")
+        meta = dict(meta) if meta else dict()
+        meta["senses"] = self.senses
+        meta["n_nodes"] = self.n_nodes
+        meta["n_edges"] = self.n_edges
+        with open(get_temp_path(index_path + ".json"), "w") as f:
+            json.dump(meta, f)
+        os.replace(get_temp_path(index_path + ".json"), index_path + ".json")
+
+    @staticmethod
+    def load(index_path, meta=None):
+        """ Load an AdjacencyIndex from `index_path`.*.npy and `index_path`.json by memory mapping
+
+        :param index_path: the path prefix to load
+        :type index_path: str
+        :param meta: the information that must match the saved one, e.g., the database signature
+        :type meta: Union[Dict[str, object], None] (default = None)
+        :return: the loaded AdjacencyIndex, or None if it does not exist or does not match
+        :rtype: Union[aser.database.index.AdjacencyIndex, None]
+        """
+
+        try:
+            with open(index_path + ".json", "r") as f:
+                saved_meta = json.load(f)
+            if meta:
+                for k, v in meta.items():
+                    if saved_meta.get(k, None) != v:
+                        return None
+            arrays = [np.load(index_path + "." + name + ".npy", mmap_mode="r") for name in AdjacencyIndex.ARRAY_NAMES]
+        except (OSError, ValueError):
+            return None
+        adjacency_index = AdjacencyIndex(saved_meta["senses"], *arrays)
+        if adjacency_index.n_nodes != saved_meta["n_nodes"] or adjacency_index.n_edges != saved_meta["n_edges"]:
+            return None
+        return adjacency_index
+
+
+def build_adjacency_index(conn, db_path, table_name, senses, index_name="adjacency", weight_columns=None):
+    """ Build an AdjacencyIndex from a relation table and save it next to a SQLite database
+
+    :param conn: the database connection
+    :type conn: aser.database.db_connection.BaseDBConnection
+    :param db_path: the SQLite database path, or None for other databases
+    :type db_path: Union[str, None]
+    :param table_name: the relation table name
+    :type table_name: str
+    :param senses: the relation senses
+    :type senses: List[str]
+    :param index_name: the index name, which is saved as `db_path`.`index_name`.*.npy
+    :type index_name: str (default = "adjacency")
+    :param weight_columns: the columns of sense weights, e.g., ["senses"] for sparse relations, default `None` for senses
+    :type weight_columns: Union[List[str], None] (default = None)
+    :return: the AdjacencyIndex
+    :rtype: aser.database.index.AdjacencyIndex
+    """
+
+    hids, tids, weights = [], [], []
+    for row in conn.iter_columns(table_name, ["hid", "tid"] + (weight_columns or senses)):
+        hids.append(row["hid"])
+        tids.append(row["tid"])
+        weights.append(get_relation_weights(row, senses))
+    adjacency_index = AdjacencyIndex.build(hids, tids, weights, senses)
+    del hids, tids, weights
+    signature = get_file_signature(db_path)
+    if signature:
+        try:
+            adjacency_index.save(db_path + "." + index_name, signature)
+        except OSError:
+            pass  # e.g., read-only directories
+    return adjacency_index
+
+
+def load_adjacency_index(db_path, index_name="adjacency"):
+    """ Load an AdjacencyIndex saved next to a SQLite database if it is up to date
+
+    :param db_path: the SQLite database path, or None for other databases
+    :type db_path: Union[str, None]
+    :param index_name: the index name, which is saved as `db_path`.`index_name`.*.npy
+    :type index_name: str (default = "adjacency")
+    :return: the AdjacencyIndex, or None if it does not exist or is out of date
+    :rtype: Union[aser.database.index.AdjacencyIndex, None]
+    """
+
+    signature = get_file_signature(db_path)
+    if signature:
+        return AdjacencyIndex.load(db_path + "." + index_name, signature)
+    return None
@@ -1,37 +1,180 @@
-import heapq
 import operator
 import random
+import numpy as np
 from collections import OrderedDict
 from ..concept import ASERConcept, ASERConceptInstancePair
 from ..eventuality import Eventuality
+from ..extract.utils import PRONOUN_SET
 from ..relation import Relation, relation_senses
 from ..database.db_connection import SqliteDBConnection, MongoDBConnection
-from ..database.utils import compute_overlap
+from ..database.cache import BaseCache, build_cache
+from ..database.codec import encode_eventuality_info, decode_eventuality_info, LazyEventuality
+from ..database.codec import encode_relation_senses, decode_relation_senses, merge_relation_senses, \
+    get_relation_weights
+from ..database.columnar import ColumnarKG, ColumnarEventualityView, ColumnarKeyView, ColumnarRelationView, \
+    ColumnarEdgeView
+from ..database.index import IdSet, load_id_set, save_id_set, build_adjacency_index, load_adjacency_index
+from ..database.ranking import RANKING_SIZE, load_ranking_sizes, load_ranking, build_rankings, update_rankings
+from ..database.search import build_similarity_index, load_similarity_index, get_search_tokens
+from ..database.search import build_prefix_index, load_prefix_index
+from ..database.traversal import expand, find_paths, MAX_DEGREE
+from ..database.utils import compute_overlaps, batch_compute_overlap, rank_top_k
 
 CHUNKSIZE = 32768
+# SQLite databases with integer surrogate keys are marked by `PRAGMA user_version`
+INTEGER_KEY_SCHEMA_VERSION = 2
 
 EVENTUALITY_TABLE_NAME = "Eventualities"
 EVENTUALITY_COLUMNS = ["_id", "frequency", "pattern", "verbs", "skeleton_words", "words", "info"]
 EVENTUALITY_COLUMN_TYPES = ["PRIMARY KEY", "REAL", "TEXT", "TEXT", "TEXT", "TEXT", "BLOB"]
+EVENTUALITY_INDICES = [["verbs"], ["skeleton_words"], ["words"]]
+EVENTUALITY_ID_COLUMNS = ["_id"]
+
+# scores of full-text search are BM25 + FULLTEXT_FREQUENCY_WEIGHT * ln(1 + frequency)
+FULLTEXT_FREQUENCY_WEIGHT = 0.1
+# eventualities are ranked by frequencies within keys, and tails are ranked by total weights within heads
+EVENTUALITY_RANKING_COLUMNS = ["verbs", "skeleton_words"]
+RELATION_RANKING_COLUMNS = ["hid"]
 
 CONCEPT_TABLE_NAME = "Concepts"
 CONCEPT_COLUMNS = ["_id", "pattern", "info"]
 CONCEPT_COLUMN_TYPES = ["PRIMARY KEY", "TEXT", "BLOB"]
+CONCEPT_INDICES = []
+CONCEPT_ID_COLUMNS = ["_id"]
 
 RELATION_TABLE_NAME = "Relations"
 RELATION_COLUMNS = ["_id", "hid", "tid"] + relation_senses
 RELATION_COLUMN_TYPES = ["PRIMARY KEY", "TEXT", "TEXT"] + ["REAL"] * len(relation_senses)
+RELATION_INDICES = [["hid"], ["tid"]]
+RELATION_ID_COLUMNS = ["_id", "hid", "tid"]
+# sense weights of sparse relations are packed into one BLOB, and heavy relations are found by index range scans
+SPARSE_RELATION_COLUMNS = ["_id", "hid", "tid", "total_weight", "senses"]
+SPARSE_RELATION_COLUMN_TYPES = ["PRIMARY KEY", "TEXT", "TEXT", "REAL", "BLOB"]
+SPARSE_RELATION_INDICES = [["hid", "total_weight"], ["tid", "total_weight"]]
+MERGE_RELATION_SENSES_FUNCTION = "merge_relation_senses"
 
 CONCEPTINSTANCEPAIR_TABLE_NAME = "ConceptInstancePairs"
 CONCEPTINSTANCEPAIR_COLUMNS = ["_id", "cid", "eid", "pattern", "score"]
 CONCEPTINSTANCEPAIR_COLUMN_TYPES = ["PRIMARY KEY", "TEXT", "TEXT", "TEXT", "REAL"]
+CONCEPTINSTANCEPAIR_INDICES = [["cid"], ["eid"]]
+CONCEPTINSTANCEPAIR_ID_COLUMNS = ["_id", "cid", "eid"]
+
+
+def _init_key_format(conn, key_format, table_names):
+    """ Resolve the key format of a database, where existing databases keep their own formats
+
+    :param conn: the database connection
+    :type conn: aser.database.db_connection.BaseDBConnection
+    :param key_format: the requested key format, "text", "integer", or `None` to follow the database
+    :type key_format: Union[str, None]
+    :param table_names: the tables of the database
+    :type table_names: List[str]
+    :return: the key format of the database
+    :rtype: str
+    """
+
+    if not isinstance(conn, SqliteDBConnection):
+        if key_format == "integer":
+            raise ValueError("Error: integer keys are only supported by SQLite.")
+        return "text"
+    if conn.get_pragma("user_version") == INTEGER_KEY_SCHEMA_VERSION:
+        stored_key_format = "integer"
+    elif any([conn.has_table(table_name) for table_name in table_names]):
+        stored_key_format = "text"
+    else:
+        # a new database
+        stored_key_format = key_format or "text"
+        if stored_key_format == "integer":
+            conn.set_pragma("user_version", INTEGER_KEY_SCHEMA_VERSION)
+    if key_format is not None and key_format != stored_key_format:
+        raise ValueError("Error: the database uses %s keys rather than %s keys." % (stored_key_format, key_format))
+    return stored_key_format
+
+
+def _init_relation_format(conn, relation_format, table_name):
+    """ Resolve the relation format of a database, where existing relation tables keep their own formats
+
+    :param conn: the database connection
+    :type conn: aser.database.db_connection.BaseDBConnection
+    :param relation_format: the requested relation format, "dense", "sparse", or `None` to follow the database
+    :type relation_format: Union[str, None]
+    :param table_name: the relation table name
+    :type table_name: str
+    :return: the relation format of the database
+    :rtype: str
+    """
+
+    if not isinstance(conn, SqliteDBConnection):
+        if relation_format == "sparse":
+            raise ValueError("Error: sparse relations are only supported by SQLite.")
+        return "dense"
+    if conn.has_table(table_name):
+        stored_relation_format = "sparse" if "senses" in conn.get_table_columns(table_name) else "dense"
+    else:
+        stored_relation_format = relation_format or "dense"
+    if relation_format is not None and relation_format != stored_relation_format:
+        raise ValueError(
+            "Error: the database uses %s relations rather than %s relations." % (stored_relation_format, relation_format)
+        )
+    if stored_relation_format == "sparse":
+        conn.create_function(MERGE_RELATION_SENSES_FUNCTION, 2, merge_relation_senses)
+    return stored_relation_format
+
+
+def _get_sparse_relation_update_op(conn, upsert=False):
+    get_op = conn.get_upsert_op if upsert else conn.get_update_op
+    update_op = ",".join([get_op(["total_weight"], "+"), get_op(["senses"], MERGE_RELATION_SENSES_FUNCTION)])
+    return update_op, ["total_weight", "senses"]
+
+
+def _get_integer_key_column_types(columns, column_types, id_columns):
+    return [
+        ("INTEGER PRIMARY KEY" if "PRIMARY KEY" in t else "INTEGER") if c in id_columns else t
+        for c, t in zip(columns, column_types)
+    ]
+
+
+def _sort_related_pairs(pairs, top_k=None, senses=None):
+    """ Sort (node, relation) pairs by the total weight in an ascending order,
+    keep the pairs with given senses, and keep the `top_k` heaviest pairs
+    """
+
+    if senses is not None:
+        key = lambda x: sum(x[1].relations.get(r, 0.0) for r in senses)
+        pairs = [x for x in pairs if key(x) > 0.0]
+    else:
+        key = lambda x: sum(x[1].relations.values())
+    # the heaviest pairs are at the end so that ties are broken by (hid, tid) in a descending order,
+    # i.e., the reversed pairs are sorted by node ids in an ascending order, which is the same as rankings
+    pairs = sorted(pairs, key=lambda x: (x[1].hid, x[1].tid), reverse=True)
+    pairs.sort(key=key)
+    if top_k is not None:
+        pairs = pairs[max(len(pairs) - top_k, 0):] if top_k > 0 else []
+    return pairs
 
 
 class ASERKGConnection(object):
     """ KG connection for ASER (including eventualities and relations)
 
     """
-    def __init__(self, db_path, db="sqlite", mode="cache", grain=None, chunksize=CHUNKSIZE):
+    def __init__(
+        self,
+        db_path,
+        db="sqlite",
+        mode="cache",
+        grain=None,
+        chunksize=CHUNKSIZE,
+        cache_policy="lru",
+        object_cache_size=None,
+        partial_cache_size=None,
+        cache_size_by="entries",
+        info_format="binary",
+        lazy=True,
+        key_format=None,
+        relation_format=None,
+        read_only=False,
+        fulltext=False
+    ):
         """
 
         :param db_path: database path
@@ -40,8 +183,10 @@ class ASERKGConnection(object):
         :type db: str (default = "sqlite")
         :param mode: the mode to use the connection.
             "insert": this connection is only used to insert/update rows;
+            "upsert": this connection is only used to insert/update rows by upserts without loading eids and rids;
             "cache": this connection caches some contents that have been retrieved;
             "memory": this connection loads all contents in memory;
+            "columnar": this connection loads all contents in read-only NumPy columns, where eventualities and relations are built when they are accessed;
         :type mode: str (default = "cache")
         :param grain: the grain to build cache
             "words": cache is built on "verbs", "skeleton_words", and "words"
@@ -51,75 +196,175 @@ class ASERKGConnection(object):
         :type grain: Union[str, None] (default = None)
         :param chunksize: the chunksize to load/write database
         :type chunksize: int (default = 32768)
+        :param cache_policy: the eviction policy of caches in the "cache" mode, "lru" or "clock"
+        :type cache_policy: str (default = "lru")
+        :param object_cache_size: the budget of each object cache (e.g., eid2eventuality_cache) in the "cache" mode, default `None` for unbounded
+        :type object_cache_size: Union[int, None] (default = None)
+        :param partial_cache_size: the budget of each partial-key cache (e.g., partial2rids_cache["hid"]) in the "cache" mode, default `None` for unbounded
+        :type partial_cache_size: Union[int, None] (default = None)
+        :param cache_size_by: how to measure budgets, "entries" or estimated "bytes"
+        :type cache_size_by: str (default = "entries")
+        :param info_format: the format to write eventuality info, "binary" or "json" (both formats can be read)
+        :type info_format: str (default = "binary")
+        :param lazy: whether to decode the info of retrieved eventualities only when it is first accessed
+        :type lazy: bool (default = True)
+        :param key_format: the format of keys in SQLite, "text" for hex ids, "integer" for integer surrogate keys
+            (where an id table maps hex ids to integers), or `None` to follow the database ("text" for new databases)
+        :type key_format: Union[str, None] (default = None)
+        :param relation_format: the format of relation senses in SQLite, "dense" for one column per sense,
+            "sparse" for packed (sense id, weight) pairs with an indexed total weight, or `None` to follow the database
+            ("dense" for new databases)
+        :type relation_format: Union[str, None] (default = None)
+        :param read_only: whether to open a read-only SQLite connection tuned for serving,
+            which allows several processes to serve the same database in parallel,
+            or "immutable" to also skip locks when no process writes the database
+        :type read_only: Union[bool, str] (default = False)
+        :param fulltext: whether to maintain the full-text index of eventualities for `search_eventualities`,
+            which is created at the first open and then updated by inserts of all connections
+        :type fulltext: bool (default = False)
         """
 
         if db == "sqlite":
-            self._conn = SqliteDBConnection(db_path, chunksize)
+            self._conn = SqliteDBConnection(
+                db_path, chunksize, read_only=bool(read_only), immutable=read_only == "immutable"
+            )
         elif db == "mongodb":
             self._conn = MongoDBConnection(db_path, chunksize)
         else:
             raise ValueError("Error: %s database is not supported!" % (db))
+        # id sets are persisted next to SQLite databases
+        self._db_path = db_path if db == "sqlite" else None
         self.mode = mode
-        if self.mode not in ["insert", "cache", "memory"]:
-            raise ValueError("only support insert/cache/memory modes.")
+        if self.mode not in ["insert", "upsert", "cache", "memory", "columnar"]:
+            raise ValueError("only support insert/upsert/cache/memory/columnar modes.")
+        if read_only and self.mode in ["insert", "upsert"]:
+            raise ValueError("Error: read-only connections do not support insert/upsert modes.")
+        if read_only and fulltext:
+            raise ValueError("Error: read-only connections cannot create full-text indices.")
+        self.read_only = bool(read_only)
+        self.fulltext = fulltext
 
         if grain not in [None, "verbs", "skeleton_words", "words"]:
             raise ValueError("Error: only support None/verbs/skeleton_words/words grain.")
         self.grain = grain  # None, verbs, skeleton_words, words
+        if info_format not in ["binary", "json"]:
+            raise ValueError("Error: only support binary/json info formats.")
+        self.info_format = info_format
+        self.lazy = lazy
+        if key_format not in [None, "text", "integer"]:
+            raise ValueError("Error: only support text/integer key formats.")
+        self.key_format = key_format
+        if relation_format not in [None, "dense", "sparse"]:
+            raise ValueError("Error: only support dense/sparse relation formats.")
+        self.relation_format = relation_format
+
+        if self.mode == "cache":
+            build_object_cache = lambda: build_cache(cache_policy, object_cache_size, cache_size_by)
+            build_partial_cache = lambda: build_cache(cache_policy, partial_cache_size, cache_size_by)
+        else:
+            build_object_cache = build_partial_cache = dict
+        self._init_attributes(build_object_cache, build_partial_cache)
+
+        self.init()
+
+    def _init_attributes(self, build_object_cache=dict, build_partial_cache=dict):
+        """ Initialize table schemas, id sets, caches, and indices by defaults
+        (note: `grain` must be set in advance)
+
+        :param build_object_cache: the function to build an object cache
+        :type build_object_cache: Callable
+        :param build_partial_cache: the function to build a partial-key cache
+        :type build_partial_cache: Callable
+        """
 
         self.eventuality_table_name = EVENTUALITY_TABLE_NAME
         self.eventuality_columns = EVENTUALITY_COLUMNS
         self.eventuality_column_types = EVENTUALITY_COLUMN_TYPES
+        self.eventuality_indices = EVENTUALITY_INDICES
         self.relation_table_name = RELATION_TABLE_NAME
         self.relation_columns = RELATION_COLUMNS
         self.relation_column_types = RELATION_COLUMN_TYPES
+        self.relation_indices = RELATION_INDICES
 
-        self.eids = set()
-        self.rids = set()
-        self.eid2eventuality_cache = dict()
-        self.rid2relation_cache = dict()
+        self.eids = IdSet()
+        self.rids = IdSet()
+        self.eid2eventuality_cache = build_object_cache()
+        self.rid2relation_cache = build_object_cache()
         if self.grain == "words":
-            self.partial2eids_cache = {"verbs": dict(), "skeleton_words": dict(), "words": dict()}
+            self.partial2eids_cache = {
+                "verbs": build_partial_cache(),
+                "skeleton_words": build_partial_cache(),
+                "words": build_partial_cache()
+            }
         elif self.grain == "skeleton_words":
-            self.partial2eids_cache = {"verbs": dict(), "skeleton_words": dict()}
+            self.partial2eids_cache = {"verbs": build_partial_cache(), "skeleton_words": build_partial_cache()}
         elif self.grain == "verbs":
-            self.partial2eids_cache = {"verbs": dict()}
+            self.partial2eids_cache = {"verbs": build_partial_cache()}
         else:
             self.partial2eids_cache = dict()
-        self.partial2rids_cache = {"hid": dict()}
-
-        self.init()
+        self.partial2rids_cache = {"hid": build_partial_cache(), "tid": build_partial_cache()}
+        self.adjacency_index = None
+        self.similarity_index = None
+        self.prefix_index = None
+        self.columnar_kg = None
+        self.ranking_sizes = dict()
+        self._ranking_data_version = None
 
     def init(self):
         """ Initialize the ASERKGConnection, including creating tables, loading eids and rids, and building cache
 
         """
-        for table_name, columns, column_types in zip(
+        self.relation_format = _init_relation_format(self._conn, self.relation_format, self.relation_table_name)
+        if self.relation_format == "sparse":
+            self.relation_columns = SPARSE_RELATION_COLUMNS
+            self.relation_column_types = SPARSE_RELATION_COLUMN_TYPES
+            self.relation_indices = SPARSE_RELATION_INDICES
+        self.relation_weight_columns = ["senses"] if self.relation_format == "sparse" else relation_senses
+        self.key_format = _init_key_format(
+            self._conn, self.key_format, [self.eventuality_table_name, self.relation_table_name]
+        )
+        if self.key_format == "integer":
+            self.eventuality_column_types = _get_integer_key_column_types(
+                self.eventuality_columns, self.eventuality_column_types, EVENTUALITY_ID_COLUMNS
+            )
+            self.relation_column_types = _get_integer_key_column_types(
+                self.relation_columns, self.relation_column_types, RELATION_ID_COLUMNS
+            )
+            self._conn.set_id_columns(self.eventuality_table_name, EVENTUALITY_ID_COLUMNS)
+            self._conn.set_id_columns(self.relation_table_name, RELATION_ID_COLUMNS)
+
+        for table_name, columns, column_types, indices in zip(
             [self.eventuality_table_name, self.relation_table_name], [self.eventuality_columns, self.relation_columns],
-            [self.eventuality_column_types, self.relation_column_types]
+            [self.eventuality_column_types, self.relation_column_types],
+            [self.eventuality_indices, self.relation_indices]
         ):
             if len(columns) == 0 or len(column_types) == 0:
                 raise ValueError("Error: %s_columns and %s_column_types must be defined" % (table_name, table_name))
             try:
                 self._conn.create_table(table_name, columns, column_types)
             except:
-                pass
+                continue
+            # indices are only built with new tables, use `create_indices` to backfill existing databases
+            for index_columns in indices:
+                self._conn.create_index(table_name, index_columns)
+        if self.fulltext:
+            self._conn.create_fulltext_index(self.eventuality_table_name, "words")
+        self._load_ranking_sizes()
 
         if self.mode == "memory":
-            for e in map(
-                self._convert_row_to_eventuality,
-                self._conn.get_columns(self.eventuality_table_name, self.eventuality_columns)
-            ):
+            for row in self._conn.iter_columns(self.eventuality_table_name, self.eventuality_columns):
+                e = self._convert_row_to_eventuality(row)
                 self.eids.add(e.eid)
                 self.eid2eventuality_cache[e.eid] = e
                 # handle another cache
+                # (keys come from columns so that lazy eventualities are not decoded)
                 for k, v in self.partial2eids_cache.items():
-                    if " ".join(getattr(e, k)) not in v:
-                        v[" ".join(getattr(e, k))] = [e.eid]
+                    if row[k] not in v:
+                        v[row[k]] = [e.eid]
                     else:
-                        v[" ".join(getattr(e, k))].append(e.eid)
+                        v[row[k]].append(e.eid)
             for r in map(
-                self._convert_row_to_relation, self._conn.get_columns(self.relation_table_name, self.relation_columns)
+                self._convert_row_to_relation, self._conn.iter_columns(self.relation_table_name, self.relation_columns)
             ):
                 self.rids.add(r.rid)
                 self.rid2relation_cache[r.rid] = r
@@ -129,18 +374,219 @@ class ASERKGConnection(object):
                         v[getattr(r, k)] = [r.rid]
                     else:
                         v[getattr(r, k)].append(r.rid)
+        elif self.mode == "columnar":
+            self.columnar_kg = ColumnarKG.build(
+                self._conn.iter_columns(
+                    self.eventuality_table_name,
+                    ["_id", "frequency", "pattern", "info"] + ["words"] +
+                    [k for k in self.partial2eids_cache if k != "words"]
+                ), self._conn.iter_columns(self.relation_table_name, self.relation_columns),
+                list(self.partial2eids_cache.keys()), relation_senses
+            )
+            self._init_columnar_caches()
+        elif self.mode == "upsert":
+            # conflicts are resolved by the database so that eids and rids are not necessary
+            pass
         else:
-            for e in self._conn.get_columns(self.eventuality_table_name, ["_id"]):
-                self.eids.add(e["_id"])
-            for r in self._conn.get_columns(self.relation_table_name, ["_id"]):
-                self.rids.add(r["_id"])
+            self.eids = load_id_set(self._conn, self._db_path, self.eventuality_table_name, "_id", "eids")
+            self.rids = load_id_set(self._conn, self._db_path, self.relation_table_name, "_id", "rids")
+            # read-only connections never write files next to the database
+            if not self.read_only:
+                save_id_set(self.eids, self._conn, self._db_path, self.eventuality_table_name, "eids")
+                save_id_set(self.rids, self._conn, self._db_path, self.relation_table_name, "rids")
+        if self.mode in ["cache", "memory"]:
+            self.adjacency_index = load_adjacency_index(self._db_path)
+        if self.mode in ["cache", "memory", "columnar"]:
+            self.similarity_index = load_similarity_index(self._db_path)
+            self.prefix_index = load_prefix_index(self._db_path)
+
+    def _init_columnar_caches(self):
+        # caches are views of columns
+        self.eids = IdSet(self.columnar_kg.sorted_eid_digests)
+        self.rids = IdSet(self.columnar_kg.sorted_rid_digests)
+        self.eid2eventuality_cache = ColumnarEventualityView(self.columnar_kg, self._convert_row_to_eventuality)
+        self.rid2relation_cache = ColumnarRelationView(self.columnar_kg)
+        for k in self.partial2eids_cache:
+            self.partial2eids_cache[k] = ColumnarKeyView(self.columnar_kg, k)
+        self.partial2rids_cache["hid"] = ColumnarEdgeView(self.columnar_kg, "out")
+        self.partial2rids_cache["tid"] = ColumnarEdgeView(self.columnar_kg, "in")
+        self.adjacency_index = self.columnar_kg.adjacency_index
+
+    def create_indices(self):
+        """ Create the secondary indices of eventualities and relations if they do not exist
+        (suggestion: it is necessary to call this method once for databases built by old versions)
+
+        """
+
+        for table_name, indices in zip(
+            [self.eventuality_table_name, self.relation_table_name], [self.eventuality_indices, self.relation_indices]
+        ):
+            for index_columns in indices:
+                self._conn.create_index(table_name, index_columns)
+
+    def build_adjacency_index(self):
+        """ Build the CSR adjacency index of relations for `get_related_eventualities`,
+        which is saved next to the SQLite database and memory-mapped by later connections
+        (suggestion: it is necessary to rebuild the index after relations are inserted/updated)
+
+        :return: the adjacency index
+        :rtype: aser.database.index.AdjacencyIndex
+        """
+
+        self.adjacency_index = build_adjacency_index(
+            self._conn, self._db_path, self.relation_table_name, relation_senses,
+            weight_columns=self.relation_weight_columns
+        )
+        return self.adjacency_index
+
+    def build_rankings(self, size=RANKING_SIZE):
+        """ Build the materialized rankings of the top-size eventualities by frequencies for each verbs/skeleton_words
+        and the top-size tails by total weights for each head, which are refreshed by later inserts of any connection
+        so that `get_eventualities_by_keys` ordered by frequencies and `get_related_eventualities` slice rankings
+        (suggestion: it is necessary to rebuild rankings after the database is written without rankings)
+
+        :param size: the ranking size, i.e., the largest top_n/top_k served by rankings
+        :type size: int (default = 100)
+        :return: the number of rankings of each key column
+        :rtype: Dict[str, int]
+        """
+
+        if self.read_only or self.mode == "columnar":
+            raise ValueError("Error: read-only connections cannot build rankings.")
+        n_rankings = build_rankings(
+            self._conn,
+            self._conn.iter_columns(self.eventuality_table_name, ["_id", "frequency"] + EVENTUALITY_RANKING_COLUMNS),
+            EVENTUALITY_RANKING_COLUMNS, "_id", lambda row: row["frequency"], size
+        )
+        n_rankings.update(
+            build_rankings(
+                self._conn,
+                self._conn.iter_columns(self.relation_table_name, ["hid", "tid"] + self.relation_weight_columns),
+                RELATION_RANKING_COLUMNS, "tid", lambda row: sum(get_relation_weights(row)), size
+            )
+        )
+        self.ranking_sizes = {c: size for c in n_rankings}
+        return n_rankings
+
+    def _load_ranking_sizes(self):
+        # the data version changes when other connections commit, e.g., after they build rankings
+        self._ranking_data_version = self._conn.get_data_version()
+        self.ranking_sizes = load_ranking_sizes(self._conn, EVENTUALITY_RANKING_COLUMNS + RELATION_RANKING_COLUMNS)
+
+    def _get_ranking_sizes(self):
+        """ Get the sizes of rankings that have been built, which are only reloaded after other connections commit
+        """
+
+        data_version = self._conn.get_data_version()
+        if data_version is None or data_version != self._ranking_data_version:
+            self._load_ranking_sizes()
+        return self.ranking_sizes
+
+    def _get_ranking(self, column, key, top_n=None):
+        """ Get the top_n (score, id) pairs of a key from its ranking,
+        or None if rankings are not built or the ranking is too short to serve top_n
+        """
+
+        # memory and columnar connections answer queries from memory without the database
+        if self.mode in ["memory", "columnar"]:
+            return None
+        size = self._get_ranking_sizes().get(column, None)
+        if size is None:
+            return None
+        ranking = load_ranking(self._conn, column, key)
+        if not top_n or top_n > size:
+            # only complete rankings contain all ids of the key
+            return ranking if len(ranking) < size else None
+        return ranking[:top_n]
+
+    def _get_ranked_relations(self, hid, top_k=None, senses=None):
+        """ Get the top_k relations of a head from its ranking in an ascending order of total weights,
+        or None if the ranking cannot serve the query
+        """
+
+        if senses is not None or top_k == 0:
+            return None
+        ranking = self._get_ranking("hid", hid, top_k)
+        if ranking is None:
+            return None
+        related_relations = self.get_exact_match_relations([Relation.generate_rid(hid, tid) for _, tid in ranking])
+        return [x for x in reversed(related_relations) if x is not None]
+
+    def _get_ranked_eventualities(self, bys, keys, order_bys=None, reverse=False, top_n=None):
+        """ Get the most frequent eventualities of a key from its ranking in a descending order of frequencies,
+        or None if the ranking cannot serve the query
+        """
+
+        if len(bys) != 1 or not reverse or order_bys is None or list(order_bys) != ["frequency"]:
+            return None
+        ranking = self._get_ranking(bys[0], keys[0], top_n)
+        if ranking is None:
+            return None
+        return [e for e in self.get_exact_match_eventualities([eid for _, eid in ranking]) if e is not None]
+
+    def _update_eventuality_rankings(self, eids):
+        if len(eids) == 0:
+            return
+        ranking_sizes = {c: s for c, s in self._get_ranking_sizes().items() if c in EVENTUALITY_RANKING_COLUMNS}
+        if len(ranking_sizes) == 0:
+            return
+        rows = self._conn.get_rows_by_key_values(
+            self.eventuality_table_name, "_id", list(set(eids)), ["_id", "frequency"] + EVENTUALITY_RANKING_COLUMNS
+        )
+        update_rankings(
+            self._conn, rows, [c for c in EVENTUALITY_RANKING_COLUMNS if c in ranking_sizes], "_id",
+            lambda row: row["frequency"], ranking_sizes
+        )
+
+    def _update_relation_rankings(self, rids):
+        if len(rids) == 0:
+            return
+        ranking_sizes = {c: s for c, s in self._get_ranking_sizes().items() if c in RELATION_RANKING_COLUMNS}
+        if len(ranking_sizes) == 0:
+            return
+        rows = self._conn.get_rows_by_key_values(
+            self.relation_table_name, "_id", list(set(rids)), ["hid", "tid"] + self.relation_weight_columns
+        )
+        update_rankings(
+            self._conn, rows, RELATION_RANKING_COLUMNS, "tid", lambda row: sum(get_relation_weights(row)),
+            ranking_sizes
+        )
+
+    def get_cache_stats(self):
+        """ Get the hit/miss/eviction statistics of caches in the "cache" mode
+
+        :return: a dictionary from cache names to statistics
+        :rtype: Dict[str, Dict[str, Union[int, float]]]
+        """
+
+        caches = [("eid2eventuality_cache", self.eid2eventuality_cache), ("rid2relation_cache", self.rid2relation_cache)]
+        caches.extend([("partial2eids_cache." + k, v) for k, v in self.partial2eids_cache.items()])
+        caches.extend([("partial2rids_cache." + k, v) for k, v in self.partial2rids_cache.items()])
+        return OrderedDict([(name, cache.get_stats()) for name, cache in caches if isinstance(cache, BaseCache)])
+
+    def reset_cache_stats(self):
+        """ Reset the hit/miss/eviction statistics of caches in the "cache" mode
+
+        """
+
+        for cache in [self.eid2eventuality_cache, self.rid2relation_cache] + \
+            list(self.partial2eids_cache.values()) + list(self.partial2rids_cache.values()):
+            if isinstance(cache, BaseCache):
+                cache.reset_stats()
 
     def close(self):
         """ Close the ASERKGConnection safely
 
         """
 
+        if self.mode in ["insert", "cache"] and not self.read_only:
+            save_id_set(self.eids, self._conn, self._db_path, self.eventuality_table_name, "eids")
+            save_id_set(self.rids, self._conn, self._db_path, self.relation_table_name, "rids")
         self._conn.close()
+        self.adjacency_index = None
+        self.similarity_index = None
+        self.prefix_index = None
+        self.columnar_kg = None
         self.eids.clear()
         self.rids.clear()
         self.eid2eventuality_cache.clear()
@@ -163,11 +609,13 @@ class ASERKGConnection(object):
                 row[c] = " ".join(d)
             else:
                 row[c] = d
-        row["info"] = eventuality.encode(minimum=True)
+        row["info"] = encode_eventuality_info(eventuality, self.info_format)
         return row
 
     def _convert_row_to_eventuality(self, row):
-        eventuality = Eventuality().decode(row["info"])
+        if self.lazy:
+            return LazyEventuality(row)
+        eventuality = decode_eventuality_info(row["info"])
         eventuality.eid = row["_id"]
         eventuality.frequency = row["frequency"]
         eventuality.pattern = row["pattern"]
@@ -192,16 +640,17 @@ class ASERKGConnection(object):
             self.eids.add(eventuality.eid)
             self.eid2eventuality_cache[eventuality.eid] = eventuality
             for k, v in self.partial2eids_cache.items():
-                if eventuality.get(k) in v:
-                    v[eventuality.get(k)].append(eventuality.eid)
+                key_cache = v.peek(" ".join(getattr(eventuality, k)))
+                if key_cache is not None:
+                    key_cache.append(eventuality.eid)
         elif self.mode == "memory":
             self.eids.add(eventuality.eid)
             self.eid2eventuality_cache[eventuality.eid] = eventuality
             for k, v in self.partial2eids_cache.items():
-                if eventuality.get(k) not in v:
-                    v[eventuality.get(k)] = [eventuality.eid]
+                if " ".join(getattr(eventuality, k)) not in v:
+                    v[" ".join(getattr(eventuality, k))] = [eventuality.eid]
                 else:
-                    v[eventuality.get(k)].append(eventuality.eid)
+                    v[" ".join(getattr(eventuality, k))].append(eventuality.eid)
         return eventuality
 
     def _insert_eventualities(self, eventualities):
@@ -215,29 +664,28 @@ class ASERKGConnection(object):
                 self.eids.add(eventuality.eid)
                 self.eid2eventuality_cache[eventuality.eid] = eventuality
                 for k, v in self.partial2eids_cache.items():
-                    if eventuality.get(k) in v:
-                        v[eventuality.get(k)].append(eventuality.eid)
+                    key_cache = v.peek(" ".join(getattr(eventuality, k)))
+                    if key_cache is not None:
+                        key_cache.append(eventuality.eid)
         elif self.mode == "memory":
             for eventuality in eventualities:
                 self.eids.add(eventuality.eid)
                 self.eid2eventuality_cache[eventuality.eid] = eventuality
                 for k, v in self.partial2eids_cache.items():
-                    if eventuality.get(k) not in v:
-                        v[eventuality.get(k)] = [eventuality.eid]
+                    if " ".join(getattr(eventuality, k)) not in v:
+                        v[" ".join(getattr(eventuality, k))] = [eventuality.eid]
                     else:
-                        v[eventuality.get(k)].append(eventuality.eid)
+                        v[" ".join(getattr(eventuality, k))].append(eventuality.eid)
         return eventualities
 
     def _get_eventuality_and_store_in_cache(self, eid):
         return self._get_eventualities_and_store_in_cache([eid])[0]
 
     def _get_eventualities_and_store_in_cache(self, eids):
-        eventualities = list(
-            map(
-                self._convert_row_to_eventuality,
-                self._conn.select_rows(self.eventuality_table_name, eids, self.eventuality_columns)
-            )
-        )
+        eventualities = [
+            self._convert_row_to_eventuality(row) if row else None
+            for row in self._conn.iter_select_rows(self.eventuality_table_name, eids, self.eventuality_columns)
+        ]
         for eventuality in eventualities:
             if eventuality:
                 self.eid2eventuality_cache[eventuality.eid] = eventuality
@@ -297,6 +745,19 @@ class ASERKGConnection(object):
             updated_eventualities[missed_indices[idx]] = updated_eventuality
         return updated_eventualities
 
+    def _upsert_eventualities(self, eventualities):
+        # merge duplicate eventualities before writing
+        rows = OrderedDict()
+        for eventuality in eventualities:
+            row = rows.get(eventuality.eid, None)
+            if row:
+                row["frequency"] += eventuality.frequency
+            else:
+                rows[eventuality.eid] = self._convert_eventuality_to_row(eventuality)
+        upsert_op = self._conn.get_upsert_op(["frequency"], "+")
+        self._conn.upsert_rows(self.eventuality_table_name, list(rows.values()), upsert_op, ["frequency"])
+        return [None] * len(eventualities)  # don"t care
+
     def insert_eventuality(self, eventuality):
         """ Insert/Update an eventuality into ASER
         (suggestion: consider to use `insert_eventualities` if you want to insert multiple eventualities)
@@ -307,10 +768,18 @@ class ASERKGConnection(object):
         :rtype: aser.eventuality.Eventuality
         """
 
-        if eventuality.eid not in self.eids:
-            return self._insert_eventuality(eventuality)
+        if self.mode == "columnar":
+            raise ValueError("Error: the columnar mode is read-only.")
+        self.similarity_index = None  # out of date
+        self.prefix_index = None  # out of date
+        if self.mode == "upsert":
+            result = self._upsert_eventualities([eventuality])[0]
+        elif eventuality.eid not in self.eids:
+            result = self._insert_eventuality(eventuality)
         else:
-            return self._update_eventuality(eventuality)
+            result = self._update_eventuality(eventuality)
+        self._update_eventuality_rankings([eventuality.eid])
+        return result
 
     def insert_eventualities(self, eventualities):
         """ Insert/Update eventualities into ASER
@@ -321,6 +790,14 @@ class ASERKGConnection(object):
         :rtype: List[aser.eventuality.Eventuality]
         """
 
+        if self.mode == "columnar":
+            raise ValueError("Error: the columnar mode is read-only.")
+        self.similarity_index = None  # out of date
+        self.prefix_index = None  # out of date
+        if self.mode == "upsert":
+            results = self._upsert_eventualities(eventualities)
+            self._update_eventuality_rankings([eventuality.eid for eventuality in eventualities])
+            return results
         results = []
         new_eventualities = []
         existing_indices = []
@@ -338,6 +815,7 @@ class ASERKGConnection(object):
         if len(existing_eventualities):
             for idx, updated_eventuality in enumerate(self._update_eventualities(existing_eventualities)):
                 results[existing_indices[idx]] = updated_eventuality
+        self._update_eventuality_rankings([eventuality.eid for eventuality in eventualities])
         return results
 
     def get_exact_match_eventuality(self, eventuality):
@@ -366,13 +844,15 @@ class ASERKGConnection(object):
             exact_match_eventuality = self._get_eventuality_and_store_in_cache(eid)
         return exact_match_eventuality
 
-    def get_exact_match_eventualities(self, eventualities):
+    def get_exact_match_eventualities(self, eventualities, columns=None):
         """ Retrieve multiple exact matched eventualities from ASER
 
         :param eventualities: eventualities
         :type eventualities: Union[List[aser.eventuality.Eventuality], List[Dict[str, object]], List[str]]
-        :return: the exact matched eventualities
-        :rtype: List[aser.eventuality.Eventuality]
+        :param columns: the columns to retrieve as rows without building eventualities, default `None` for eventualities
+        :type columns: Union[List[str], None] (default = None)
+        :return: the exact matched eventualities (or rows if columns are given)
+        :rtype: Union[List[aser.eventuality.Eventuality], List[Dict[str, object]]]
         """
 
         exact_match_eventualities = []
@@ -386,11 +866,14 @@ class ASERKGConnection(object):
             else:
                 raise ValueError("Error: eventualities should instances of Eventuality, dictionaries, or eids.")
 
+            if columns is not None:
+                return list(self._conn.iter_select_rows(self.eventuality_table_name, eids, columns))
             missed_indices = []
             missed_eids = []
             for idx, eid in enumerate(eids):
                 if eid not in self.eids:
                     exact_match_eventualities.append(None)
+                    continue
                 exact_match_eventuality = self.eid2eventuality_cache.get(eid, None)
                 exact_match_eventualities.append(exact_match_eventuality)
                 if not exact_match_eventuality:
@@ -400,7 +883,7 @@ class ASERKGConnection(object):
                 exact_match_eventualities[missed_indices[idx]] = exact_match_eventuality
         return exact_match_eventualities
 
-    def get_eventualities_by_keys(self, bys, keys, order_bys=None, reverse=False, top_n=None):
+    def get_eventualities_by_keys(self, bys, keys, order_bys=None, reverse=False, top_n=None, columns=None):
         """ Retrieve multiple partial matched eventualities by keys and values from ASER
 
         :param bys: the given columns to match
@@ -413,8 +896,10 @@ class ASERKGConnection(object):
         :type reverse: bool
         :param top_n: how many eventualities to return, default `None` for all eventualities
         :type top_n: int
-        :return: the partial matched eventualities
-        :rtype: List[aser.eventuality.Eventuality]
+        :param columns: the columns to retrieve as rows without building eventualities, default `None` for eventualities
+        :type columns: Union[List[str], None] (default = None)
+        :return: the partial matched eventualities (or rows if columns are given)
+        :rtype: Union[List[aser.eventuality.Eventuality], List[Dict[str, object]]]
         """
 
         assert len(bys) == len(keys)
@@ -424,6 +909,10 @@ class ASERKGConnection(object):
                 keys.pop(i)
         if len(bys) == 0:
             return []
+        if columns is not None:
+            return self._conn.get_rows_by_keys(
+                self.eventuality_table_name, bys, keys, columns, order_bys=order_bys, reverse=reverse, top_n=top_n
+            )
         cache = None
         by_index = -1
         for k in ["words", "skeleton_words", "verbs"]:
@@ -431,12 +920,18 @@ class ASERKGConnection(object):
                 cache = self.partial2eids_cache[k]
                 by_index = bys.index(k)
                 break
-        if cache:
-            if keys[by_index] in cache:
-                key_match_eventualities = [self.eid2eventuality_cache[eid] for eid in cache[keys[by_index]]]
+        if cache is not None:
+            key_cache = cache.get(keys[by_index], None)
+            if key_cache is not None:
+                # objects may have been evicted from the cache
+                key_match_eventualities = self.get_exact_match_eventualities(key_cache)
             else:
-                if self.mode == "memory":
+                if self.mode in ["memory", "columnar"]:
                     return []
+                # the most frequent eventualities are sliced from the ranking without filling the cache
+                ranked_eventualities = self._get_ranked_eventualities(bys, keys, order_bys, reverse, top_n)
+                if ranked_eventualities is not None:
+                    return ranked_eventualities
                 key_cache = []
                 key_match_eventualities = list(
                     map(
@@ -456,10 +951,15 @@ class ASERKGConnection(object):
                     continue
                 key_match_eventualities = list(filter(lambda x: x[bys[i]] == keys[i], key_match_eventualities))
             if order_bys:
-                key_match_eventualities.sort(key=operator.itemgetter(*order_bys), reverse=reverse)
+                # ties are broken by eids in an ascending order, which is the same as rankings and SQL
+                key_match_eventualities.sort(key=operator.attrgetter("eid"))
+                key_match_eventualities.sort(key=operator.attrgetter(*order_bys), reverse=reverse)
             if top_n:
                 key_match_eventualities = key_match_eventualities[:top_n]
             return key_match_eventualities
+        ranked_eventualities = self._get_ranked_eventualities(bys, keys, order_bys, reverse, top_n)
+        if ranked_eventualities is not None:
+            return ranked_eventualities
         return list(
             map(
                 self._convert_row_to_eventuality,
@@ -495,6 +995,29 @@ class ASERKGConnection(object):
         assert self.grain is not None
         # exact match by skeleton_words, skeleton_words_clean or verbs, and compute similarity according type
         for by in bys:
+            if self.mode == "columnar" and by in self.columnar_kg.key_indices and \
+                self.grain in self.columnar_kg.tokens:
+                # score token columns directly and only build the returned eventualities
+                positions = self.columnar_kg.get_key_positions(by, " ".join(getattr(eventuality, by)))
+                if len(positions) == 0:
+                    continue
+                if not sort:
+                    if top_n and len(positions) > top_n:
+                        positions = random.sample(positions, top_n)
+                    return self.get_exact_match_eventualities(
+                        [self.columnar_kg.get_eventuality_eid(x) for x in positions]
+                    )
+                row_offsets, row_ids = self.columnar_kg.get_token_rows(self.grain, positions, PRONOUN_SET)
+                similarities = batch_compute_overlap(
+                    self.columnar_kg.get_token_ids(getattr(eventuality, self.grain), PRONOUN_SET), row_offsets, row_ids
+                )
+                positions = np.array(positions, dtype=np.int64)
+                indices = rank_top_k(similarities, self.columnar_kg.frequencies[positions], top_n, threshold)
+                key_match_eventualities = self.get_exact_match_eventualities(
+                    [self.columnar_kg.get_eventuality_eid(x) for x in positions[indices].tolist()]
+                )
+                return list(zip(similarities[indices].tolist(), key_match_eventualities))
+
             key_match_eventualities = self.get_eventualities_by_keys([by], [" ".join(getattr(eventuality, by))])
             if len(key_match_eventualities) == 0:
                 continue
@@ -504,26 +1027,11 @@ class ASERKGConnection(object):
                 else:
                     return key_match_eventualities
             # sort by (similarity, frequency, idx)
-            queue = []
-            queue_len = 0
-            for idx, key_match_eventuality in enumerate(key_match_eventualities):
-                similarity = compute_overlap(
-                    getattr(eventuality, self.grain), getattr(key_match_eventuality, self.grain)
-                )
-                if similarity >= threshold:
-                    if not top_n or queue_len < top_n:
-                        heapq.heappush(queue, (similarity, key_match_eventuality.frequency, idx, key_match_eventuality))
-                        queue_len += 1
-                    else:
-                        heapq.heappushpop(
-                            queue, (similarity, key_match_eventuality.frequency, idx, key_match_eventuality)
-                        )
-            key_match_results = []
-            while len(queue) > 0:
-                x = heapq.heappop(queue)
-                key_match_results.append((x[0], x[-1]))
-            key_match_results.reverse()
-            return key_match_results
+            similarities = compute_overlaps(
+                getattr(eventuality, self.grain), [getattr(x, self.grain) for x in key_match_eventualities]
+            )
+            indices = rank_top_k(similarities, [x.frequency for x in key_match_eventualities], top_n, threshold)
+            return list(zip(similarities[indices].tolist(), [key_match_eventualities[idx] for idx in indices]))
         return []
 
     """
@@ -532,6 +1040,12 @@ class ASERKGConnection(object):
 
     def _convert_relation_to_row(self, relation):
         row = OrderedDict({"_id": relation.rid})
+        if self.relation_format == "sparse":
+            row["hid"] = relation.hid
+            row["tid"] = relation.tid
+            row["total_weight"] = sum(relation.relations.values())
+            row["senses"] = encode_relation_senses(relation.relations)
+            return row
         for c in self.relation_columns[1:-len(relation_senses)]:
             row[c] = getattr(relation, c)
         for r in relation_senses:
@@ -539,6 +1053,8 @@ class ASERKGConnection(object):
         return row
 
     def _convert_row_to_relation(self, row):
+        if "senses" in row:
+            return Relation(row["hid"], row["tid"], decode_relation_senses(row["senses"]))
         return Relation(
             row["hid"], row["tid"], {r: cnt
                                      for r, cnt in row.items() if isinstance(cnt, float) and cnt > 0.0}
@@ -563,16 +1079,17 @@ class ASERKGConnection(object):
             self.rids.add(relation.rid)
             self.rid2relation_cache[relation.rid] = relation
             for k, v in self.partial2rids_cache.items():
-                if relation.get(k) in v:
-                    v[relation.get(k)].append(relation.rid)
+                key_cache = v.peek(getattr(relation, k))
+                if key_cache is not None:
+                    key_cache.append(relation.rid)
         elif self.mode == "memory":
             self.rids.add(relation.rid)
             self.rid2relation_cache[relation.rid] = relation
             for k, v in self.partial2rids_cache.items():
-                if relation.get(k) not in v:
-                    v[relation.get(k)] = [relation.rid]
+                if getattr(relation, k) not in v:
+                    v[getattr(relation, k)] = [relation.rid]
                 else:
-                    v[relation.get(k)].append(relation.rid)
+                    v[getattr(relation, k)].append(relation.rid)
         return relation
 
     def _insert_relations(self, relations):
@@ -586,29 +1103,28 @@ class ASERKGConnection(object):
                 self.rids.add(relation.rid)
                 self.rid2relation_cache[relation.rid] = relation
                 for k, v in self.partial2rids_cache.items():
-                    if relation.get(k) in v:
-                        v[relation.get(k)].append(relation.rid)
+                    key_cache = v.peek(getattr(relation, k))
+                    if key_cache is not None:
+                        key_cache.append(relation.rid)
         elif self.mode == "memory":
             for relation in relations:
                 self.rids.add(relation.rid)
                 self.rid2relation_cache[relation.rid] = relation
                 for k, v in self.partial2rids_cache.items():
-                    if relation.get(k) not in v:
-                        v[relation.get(k)] = [relation.rid]
+                    if getattr(relation, k) not in v:
+                        v[getattr(relation, k)] = [relation.rid]
                     else:
-                        v[relation.get(k)].append(relation.rid)
+                        v[getattr(relation, k)].append(relation.rid)
         return relations
 
     def _get_relation_and_store_in_cache(self, rid):
         return self._get_relations_and_store_in_cache([rid])[0]
 
     def _get_relations_and_store_in_cache(self, rids):
-        relations = list(
-            map(
-                self._convert_row_to_relation,
-                self._conn.select_rows(self.relation_table_name, rids, self.relation_columns)
-            )
-        )
+        relations = [
+            self._convert_row_to_relation(row) if row else None
+            for row in self._conn.iter_select_rows(self.relation_table_name, rids, self.relation_columns)
+        ]
         for relation in relations:
             if relation:
                 self.rid2relation_cache[relation.rid] = relation
@@ -616,32 +1132,40 @@ class ASERKGConnection(object):
 
     def _update_relation(self, relation):
         # find new relation frequencies
-        update_columns = []
-        for r in relation_senses:
-            if relation.relations.get(r, 0.0) > 0.0:
-                update_columns.append(r)
+        if self.relation_format == "sparse":
+            update_op, update_columns = _get_sparse_relation_update_op(self._conn)
+        else:
+            update_columns = []
+            for r in relation_senses:
+                if relation.relations.get(r, 0.0) > 0.0:
+                    update_columns.append(r)
+            update_op = self._conn.get_update_op(update_columns, "+")
 
         # update db
-        update_op = self._conn.get_update_op(update_columns, "+")
         row = self._convert_relation_to_row(relation)
         self._conn.update_row(self.relation_table_name, row, update_op, update_columns)
 
         # update cache
         updated_relation = self.rid2relation_cache.get(relation.rid, None)
         if updated_relation:
-            for r in update_columns:
-                updated_relation.relation[r] += relation.relation[r]
+            for r, cnt in relation.relations.items():
+                updated_relation.relations[r] = updated_relation.relations.get(r, 0.0) + cnt
         else:
             updated_relation = self._get_relation_and_store_in_cache(relation.rid)
         return updated_relation
 
     def _update_relations(self, relations):
         # update db
-        update_op = self._conn.get_update_op(relation_senses, "+")
+        if self.relation_format == "sparse":
+            update_op, update_columns = _get_sparse_relation_update_op(self._conn)
+        else:
+            update_op, update_columns = self._conn.get_update_op(relation_senses, "+"), relation_senses
         rows = list(map(self._convert_relation_to_row, relations))
-        self._conn.update_rows(self.relation_table_name, rows, update_op, relation_senses)
+        self._conn.update_rows(self.relation_table_name, rows, update_op, update_columns)
 
         # update cache
+        if self.mode == "insert":
+            return [None] * len(relations)  # don"t care
         updated_relations = []
         missed_indices = []
         missed_rids = []
@@ -650,11 +1174,10 @@ class ASERKGConnection(object):
                 updated_relations.append(None)
             else:
                 updated_relation = self.rid2relation_cache.get(relation.rid, None)
-                updated_relations.append(updated_relations)
+                updated_relations.append(updated_relation)
                 if updated_relation:
-                    for r in relation_senses:
-                        if updated_relation.relations.get(r, 0.0) > 0.0:
-                            updated_relation.relations[r] += relation.relations[r]
+                    for r, cnt in relation.relations.items():
+                        updated_relation.relations[r] = updated_relation.relations.get(r, 0.0) + cnt
                 else:
                     missed_indices.append(idx)
                     missed_rids.append(relation.rid)
@@ -662,6 +1185,26 @@ class ASERKGConnection(object):
             updated_relations[missed_indices[idx]] = updated_relation
         return updated_relations
 
+    def _upsert_relations(self, relations):
+        # merge duplicate relations before writing
+        rows = OrderedDict()
+        for relation in relations:
+            row = rows.get(relation.rid, None)
+            if row and self.relation_format == "sparse":
+                row["total_weight"] += sum(relation.relations.values())
+                row["senses"] = merge_relation_senses(row["senses"], encode_relation_senses(relation.relations))
+            elif row:
+                for r, cnt in relation.relations.items():
+                    row[r] += cnt
+            else:
+                rows[relation.rid] = self._convert_relation_to_row(relation)
+        if self.relation_format == "sparse":
+            upsert_op, update_columns = _get_sparse_relation_update_op(self._conn, upsert=True)
+        else:
+            upsert_op, update_columns = self._conn.get_upsert_op(relation_senses, "+"), relation_senses
+        self._conn.upsert_rows(self.relation_table_name, list(rows.values()), upsert_op, update_columns)
+        return [None] * len(relations)  # don"t care
+
     def insert_relation(self, relation):
         """ Insert/Update a relation into ASER
         (suggestion: consider to use `insert_relations` if you want to insert multiple relations)
@@ -672,10 +1215,17 @@ class ASERKGConnection(object):
         :rtype: aser.relation.Relation
         """
 
-        if relation.rid not in self.rid2relation_cache:
-            return self._insert_relation(relation)
+        if self.mode == "columnar":
+            raise ValueError("Error: the columnar mode is read-only.")
+        self.adjacency_index = None  # out of date
+        if self.mode == "upsert":
+            result = self._upsert_relations([relation])[0]
+        elif relation.rid not in self.rids:
+            result = self._insert_relation(relation)
         else:
-            return self._update_relation(relation)
+            result = self._update_relation(relation)
+        self._update_relation_rankings([relation.rid])
+        return result
 
     def insert_relations(self, relations):
         """ Insert/Update relations into ASER
@@ -686,6 +1236,13 @@ class ASERKGConnection(object):
         :rtype: List[aser.relation.Relation]
         """
 
+        if self.mode == "columnar":
+            raise ValueError("Error: the columnar mode is read-only.")
+        self.adjacency_index = None  # out of date
+        if self.mode == "upsert":
+            results = self._upsert_relations(relations)
+            self._update_relation_rankings([relation.rid for relation in relations])
+            return results
         results = []
         new_relations = []
         existing_indices = []
@@ -703,6 +1260,7 @@ class ASERKGConnection(object):
         if len(existing_relations):
             for idx, updated_relation in enumerate(self._update_relations(existing_relations)):
                 results[existing_indices[idx]] = updated_relation
+        self._update_relation_rankings([relation.rid for relation in relations])
         return results
 
     def get_exact_match_relation(self, relation):
@@ -779,6 +1337,7 @@ class ASERKGConnection(object):
             for idx, rid in enumerate(rids):
                 if rid not in self.rids:
                     exact_match_relations.append(None)
+                    continue
                 exact_match_relation = self.rid2relation_cache.get(rid, None)
                 exact_match_relations.append(exact_match_relation)
                 if not exact_match_relation:
@@ -819,11 +1378,13 @@ class ASERKGConnection(object):
                 cache = self.partial2rids_cache[k]
                 by_index = bys.index(k)
                 break
-        if cache:
-            if keys[by_index] in cache:
-                key_match_relations = [self.rid2relation_cache[rid] for rid in cache[keys[by_index]]]
+        if cache is not None:
+            key_cache = cache.get(keys[by_index], None)
+            if key_cache is not None:
+                # objects may have been evicted from the cache
+                key_match_relations = self.get_exact_match_relations(key_cache)
             else:
-                if self.mode == "memory":
+                if self.mode in ["memory", "columnar"]:
                     return []
                 key_cache = []
                 key_match_relations = list(
@@ -867,16 +1428,64 @@ class ASERKGConnection(object):
     Additional APIs
     """
 
-    def get_related_eventualities(self, eventuality):
+    def _get_neighbors(self, eid, top_k=None, senses=None):
+        """ Retrieve related eventualities and relations from the database in one query, and cache them
+
+        :param eid: the head eid
+        :type eid: str
+        :param top_k: how many related eventualities with the heaviest relations to return, default `None` for all
+        :type top_k: Union[int, None] (default = None)
+        :param senses: only return eventualities connected by these relation senses, default `None` for all senses
+        :type senses: Union[List[str], None] (default = None)
+        :return: the related eventualities, the relations, and whether all relations of the head are retrieved
+        :rtype: Tuple[List[aser.eventuality.Eventuality], List[aser.relation.Relation], bool]
+        """
+
+        if senses is None:
+            if top_k is None:
+                weight_columns = None
+            elif self.relation_format == "sparse":
+                weight_columns = ["total_weight"]
+            else:
+                weight_columns = relation_senses
+        elif self.relation_format == "sparse":
+            # weights of given senses are packed in blobs so that they are filtered after retrieval
+            weight_columns, top_k = None, None
+        else:
+            weight_columns = [r for r in senses if r in relation_senses]
+        neighbors = self._conn.get_neighbors(
+            self.relation_table_name, self.eventuality_table_name, eid, self.relation_columns, self.eventuality_columns,
+            weight_columns, top_k
+        )
+        t_eventualities, related_relations = [], []
+        for relation_row, eventuality_row in neighbors:
+            relation = self._convert_row_to_relation(relation_row)
+            if relation.rid not in self.rid2relation_cache:
+                self.rid2relation_cache[relation.rid] = relation
+            if eventuality_row is None:
+                eventuality = None
+            else:
+                eventuality = self._convert_row_to_eventuality(eventuality_row)
+                if eventuality.eid not in self.eid2eventuality_cache:
+                    self.eid2eventuality_cache[eventuality.eid] = eventuality
+            t_eventualities.append(eventuality)
+            related_relations.append(relation)
+        return t_eventualities, related_relations, weight_columns is None
+
+    def get_related_eventualities(self, eventuality, top_k=None, senses=None):
         """ Retrieve related (connected) eventualities from ASER
 
         :param eventuality: an eventuality that contains the eid
         :type eventuality: Union[aser.eventuality.Eventuality, Dict[str, object], str]
-        :return: the related eventualities
+        :param top_k: how many related eventualities with the heaviest relations to return, default `None` for all
+        :type top_k: Union[int, None] (default = None)
+        :param senses: only return eventualities connected by these relation senses, default `None` for all senses
+        :type senses: Union[List[str], None] (default = None)
+        :return: the related eventualities, sorted by the total weight of relations in an ascending order
         :rtype: List[Tuple[aser.eventuality.Eventuality, aser.relation.Relation]]
         """
 
-        if self.mode == "insert":
+        if self.mode in ["insert", "upsert"]:
             return []
         if isinstance(eventuality, Eventuality):
             eid = eventuality.eid
@@ -887,8 +1496,26 @@ class ASERKGConnection(object):
         else:
             raise ValueError("Error: eventuality should a instance of Eventuality, or eid.")
 
+        if self.adjacency_index is not None:
+            # neighbors are sliced from the index and sorted in a descending order
+            related_relations = [
+                Relation(eid, tid, relations)
+                for tid, relations in self.adjacency_index.get_neighbors(eid, "out", top_k, senses)
+            ]
+            related_relations.reverse()
+            tids = [x.tid for x in related_relations]
+            t_eventualities = self.get_exact_match_eventualities(tids)
+            return list(zip(t_eventualities, related_relations))
+
+        # rankings are only consulted on cache misses, while memory and columnar connections never read the database
+        if self.mode == "cache" and eid not in self.partial2rids_cache.get("hid", ()):
+            related_relations = self._get_ranked_relations(eid, top_k, senses)
+            if related_relations is not None:
+                t_eventualities = self.get_exact_match_eventualities([x.tid for x in related_relations])
+                return list(zip(t_eventualities, related_relations))
+
         # eid == hid
-        if self.mode == "memory":
+        if self.mode in ["memory", "columnar"]:
             if "hid" in self.partial2rids_cache:
                 related_rids = self.partial2rids_cache["hid"].get(eid, list())
                 related_relations = self.get_exact_match_relations(related_rids)
@@ -898,30 +1525,342 @@ class ASERKGConnection(object):
             t_eventualities = self.get_exact_match_eventualities(tids)
         elif self.mode == "cache":
             if "hid" in self.partial2rids_cache:
-                if eid in self.partial2rids_cache["hid"]:  # hit
-                    related_rids = self.partial2rids_cache["hid"].get(eid, list())
+                related_rids = self.partial2rids_cache["hid"].get(eid, None)
+                if related_rids is not None:  # hit
                     related_relations = self.get_exact_match_relations(related_rids)
                     tids = [x.tid for x in related_relations]
                     t_eventualities = self.get_exact_match_eventualities(tids)
                 else:  # miss
-                    related_relations = self.get_relations_by_keys(bys=["hid"], keys=[eid])
-                    tids = [x.tid for x in related_relations]
-                    t_eventualities = self.get_exact_match_eventualities(tids)
-                    # update cache
-                    self.partial2rids_cache["hid"][eid] = [relation.rid for relation in related_relations]
+                    t_eventualities, related_relations, complete = self._get_neighbors(eid, top_k, senses)
+                    # update cache only when all relations are retrieved
+                    if complete:
+                        self.partial2rids_cache["hid"][eid] = [relation.rid for relation in related_relations]
             else:
                 related_relations = self.get_relations_by_keys(bys=["hid"], keys=[eid])
                 tids = [x.tid for x in related_relations]
                 t_eventualities = self.get_exact_match_eventualities(tids)
 
-        return sorted(zip(t_eventualities, related_relations), key=lambda x: sum(x[1].relations.values()))
+        return _sort_related_pairs(zip(t_eventualities, related_relations), top_k, senses)
+
+    def get_predecessor_eventualities(self, eventuality, top_k=None, senses=None):
+        """ Retrieve predecessor eventualities (i.e., heads of relations whose tails are the given eventuality) from ASER
+        (suggestion: consider to use `get_batch_predecessor_eventualities` if you want to retrieve predecessors of multiple eventualities)
+
+        :param eventuality: an eventuality that contains the eid
+        :type eventuality: Union[aser.eventuality.Eventuality, Dict[str, object], str]
+        :param top_k: how many predecessor eventualities with the heaviest relations to return, default `None` for all
+        :type top_k: Union[int, None] (default = None)
+        :param senses: only return eventualities connected by these relation senses, default `None` for all senses
+        :type senses: Union[List[str], None] (default = None)
+        :return: the predecessor eventualities, sorted by the total weight of relations in an ascending order
+        :rtype: List[Tuple[aser.eventuality.Eventuality, aser.relation.Relation]]
+        """
+
+        return self.get_batch_predecessor_eventualities([eventuality], top_k, senses)[0]
+
+    def get_batch_predecessor_eventualities(self, eventualities, top_k=None, senses=None):
+        """ Retrieve predecessor eventualities of multiple eventualities from ASER
+
+        :param eventualities: eventualities that contain eids
+        :type eventualities: List[Union[aser.eventuality.Eventuality, Dict[str, object], str]]
+        :param top_k: how many predecessor eventualities with the heaviest relations to return for each eventuality, default `None` for all
+        :type top_k: Union[int, None] (default = None)
+        :param senses: only return eventualities connected by these relation senses, default `None` for all senses
+        :type senses: Union[List[str], None] (default = None)
+        :return: the predecessor eventualities of each eventuality, sorted by the total weight of relations in an ascending order
+        :rtype: List[List[Tuple[aser.eventuality.Eventuality, aser.relation.Relation]]]
+        """
+
+        if self.mode in ["insert", "upsert"]:
+            return [[] for _ in range(len(eventualities))]
+        eids = []
+        for eventuality in eventualities:
+            if isinstance(eventuality, Eventuality):
+                eids.append(eventuality.eid)
+            elif isinstance(eventuality, dict):
+                eids.append(eventuality["eid"])
+            elif isinstance(eventuality, str):
+                eids.append(eventuality)
+            else:
+                raise ValueError("Error: eventuality should a instance of Eventuality, or eid.")
+
+        # eid == tid
+        eid2relations = dict()
+        if self.adjacency_index is not None:
+            for eid in set(eids):
+                eid2relations[eid] = [
+                    Relation(hid, eid, relations)
+                    for hid, relations in self.adjacency_index.get_neighbors(eid, "in", top_k, senses)
+                ]
+        else:
+            cache = self.partial2rids_cache.get("tid", None)
+            missed_eids = []
+            for eid in set(eids):
+                related_rids = cache.get(eid, None) if cache is not None else None
+                if related_rids is not None:  # hit
+                    eid2relations[eid] = self.get_exact_match_relations(related_rids)
+                else:  # miss
+                    eid2relations[eid] = []
+                    # all relations are loaded in the memory/columnar modes
+                    if self.mode not in ["memory", "columnar"]:
+                        missed_eids.append(eid)
+            if len(missed_eids) > 0:
+                for relation in map(
+                    self._convert_row_to_relation,
+                    self._conn.get_rows_by_key_values(
+                        self.relation_table_name, "tid", missed_eids, self.relation_columns
+                    )
+                ):
+                    eid2relations[relation.tid].append(relation)
+                    if relation.rid not in self.rid2relation_cache:
+                        self.rid2relation_cache[relation.rid] = relation
+                # update cache
+                if cache is not None:
+                    for eid in missed_eids:
+                        cache[eid] = [relation.rid for relation in eid2relations[eid]]
+
+        hids = list(set([relation.hid for related_relations in eid2relations.values() for relation in related_relations]))
+        hid2eventuality = dict(zip(hids, self.get_exact_match_eventualities(hids)))
+        return [
+            _sort_related_pairs(
+                [(hid2eventuality[relation.hid], relation) for relation in eid2relations[eid]], top_k, senses
+            ) for eid in eids
+        ]
+
+    def expand(self, seeds, hops=1, senses=None, top_k_per_hop=None, min_weight=0.0, direction="out"):
+        """ Expand multi-hop neighborhoods of eventualities, where each hop fetches relations of the whole frontier
+        by one adjacency-index slice or one bulk query
+
+        :param seeds: eventualities that contain eids
+        :type seeds: List[Union[aser.eventuality.Eventuality, Dict[str, object], str]]
+        :param hops: the number of hops to expand
+        :type hops: int (default = 1)
+        :param senses: only follow relations with these senses and weight them by these senses, default `None` for all senses
+        :type senses: Union[List[str], None] (default = None)
+        :param top_k_per_hop: how many heaviest relations of each frontier eventuality to follow at each hop, default `None` for all
+        :type top_k_per_hop: Union[int, None] (default = None)
+        :param min_weight: relations whose weights are less than this value are pruned
+        :type min_weight: float (default = 0.0)
+        :param direction: "out" to follow heads to tails, "in" to follow tails to heads, "both" for both
+        :type direction: str (default = "out")
+        :return: the expanded subgraph, whose ids are eids
+        :rtype: aser.database.traversal.ASERSubgraph
+        """
+
+        eids = []
+        for eventuality in seeds:
+            if isinstance(eventuality, Eventuality):
+                eids.append(eventuality.eid)
+            elif isinstance(eventuality, dict):
+                eids.append(eventuality["eid"])
+            elif isinstance(eventuality, str):
+                eids.append(eventuality)
+            else:
+                raise ValueError("Error: eventuality should a instance of Eventuality, or eid.")
+        if self.mode in ["insert", "upsert"]:
+            hops = 0
+        return expand(self, eids, hops, senses, top_k_per_hop, min_weight, direction)
+
+    def find_paths(self, eventuality1, eventuality2, max_hops=3, senses=None, k=1, max_degree=MAX_DEGREE):
+        """ Find the top-k weighted shortest paths from one eventuality to the other by bidirectional search,
+        where each step expands a whole frontier by one adjacency-index slice or one bulk query
+
+        :param eventuality1: the eventuality or eid as the start
+        :type eventuality1: Union[aser.eventuality.Eventuality, Dict[str, object], str]
+        :param eventuality2: the eventuality or eid as the end
+        :type eventuality2: Union[aser.eventuality.Eventuality, Dict[str, object], str]
+        :param max_hops: the maximum number of relations in a path
+        :type max_hops: int (default = 3)
+        :param senses: only follow relations with these senses and weight them by these senses, default `None` for all senses
+        :type senses: Union[List[str], None] (default = None)
+        :param k: how many paths to return
+        :type k: int (default = 1)
+        :param max_degree: how many heaviest relations of each eventuality to follow, which bounds the memory on hub eventualities
+        :type max_degree: Union[int, None] (default = 256)
+        :return: the paths sorted by the total weight in a descending order, where each path is a relation chain
+        :rtype: List[List[aser.relation.Relation]]
+        """
+
+        if self.mode in ["insert", "upsert"]:
+            return []
+        eids = []
+        for eventuality in [eventuality1, eventuality2]:
+            if isinstance(eventuality, Eventuality):
+                eids.append(eventuality.eid)
+            elif isinstance(eventuality, dict):
+                eids.append(eventuality["eid"])
+            elif isinstance(eventuality, str):
+                eids.append(eventuality)
+            else:
+                raise ValueError("Error: eventuality should a instance of Eventuality, or eid.")
+        return find_paths(self, eids[0], eids[1], max_hops, senses, k, max_degree)
+
+    def build_similarity_index(self, num_perm=0, bands=0):
+        """ Build the token-level inverted index of eventualities for `search_similar_eventualities`,
+        which is saved next to the SQLite database and memory-mapped by later connections
+        (suggestion: it is necessary to rebuild the index after eventualities are inserted)
+
+        :param num_perm: the number of MinHash permutations for approximate search, 0 for no MinHash signatures
+        :type num_perm: int (default = 0)
+        :param bands: the number of LSH bands, which must divide num_perm
+        :type bands: int (default = 0)
+        :return: the similarity index
+        :rtype: aser.database.search.SimilarityIndex
+        """
+
+        self.similarity_index = build_similarity_index(
+            self._conn, self._db_path, self.eventuality_table_name, "words", num_perm, bands
+        )
+        return self.similarity_index
+
+    def search_similar_eventualities(self, eventuality, threshold=0.8, top_n=None, approximate=False):
+        """ Retrieve eventualities whose words are similar to the given eventuality by the Jaccard similarity
+        (except pronouns), where keys of eventualities are not necessary to be the same
+        (note: the similarity index is built at the first call if it does not exist or is out of date,
+        while read-only connections require an index built by a writable connection)
+
+        :param eventuality: the given eventuality, or words connected by " "
+        :type eventuality: Union[aser.eventuality.Eventuality, Dict[str, object], str]
+        :param threshold: the minimum similarity
+        :type threshold: float (default = 0.8)
+        :param top_n: how many eventualities to return, default `None` for all eventualities
+        :type top_n: Union[int, None] (default = None)
+        :param approximate: whether to find candidates by MinHash LSH, which may miss some eventualities
+            (it requires the index built with `num_perm`)
+        :type approximate: bool (default = False)
+        :return: the similar eventualities with similarities, sorted by similarities in a descending order
+        :rtype: List[Tuple[float, aser.eventuality.Eventuality]]
+        """
+
+        if self.mode in ["insert", "upsert"]:
+            return []
+        if isinstance(eventuality, Eventuality):
+            words = eventuality.words
+        elif isinstance(eventuality, dict):
+            words = eventuality["words"]
+        elif isinstance(eventuality, str):
+            words = eventuality
+        else:
+            raise ValueError("Error: eventuality should be an instance of Eventuality, a dictionary, or words.")
+        if self.similarity_index is None:
+            if self.read_only:
+                raise ValueError(
+                    "Error: the similarity index does not exist or is out of date, "
+                    "please build it by a writable connection."
+                )
+            self.build_similarity_index()
+        positions, similarities = self.similarity_index.search(words, threshold, top_n, approximate)
+        eids = [self.similarity_index.get_eid(x) for x in positions.tolist()]
+        return list(zip(similarities.tolist(), self.get_exact_match_eventualities(eids)))
+
+    def build_prefix_index(self):
+        """ Build the sorted-string index of words and skeleton_words for `complete_eventualities`,
+        which is saved next to the SQLite database and memory-mapped by later connections
+        (suggestion: it is necessary to rebuild the index after eventualities are inserted/updated)
+
+        :return: the prefix index
+        :rtype: aser.database.search.PrefixIndex
+        """
+
+        self.prefix_index = build_prefix_index(self._conn, self._db_path, self.eventuality_table_name)
+        return self.prefix_index
+
+    def complete_eventualities(self, prefix, top_n=10):
+        """ Retrieve the most frequent eventualities whose words or skeleton_words start with a typed prefix
+        (note: the prefix index is built at the first call if it does not exist or is out of date,
+        while read-only connections require an index built by a writable connection)
+
+        :param prefix: the typed prefix, e.g., "i be hun"
+        :type prefix: str
+        :param top_n: how many eventualities to return, default `None` for all completed eventualities
+        :type top_n: Union[int, None] (default = 10)
+        :return: the completed eventualities, sorted by frequencies when the index was built in a descending order
+        :rtype: List[aser.eventuality.Eventuality]
+        """
+
+        if self.mode in ["insert", "upsert"]:
+            return []
+        if self.prefix_index is None:
+            if self.read_only:
+                raise ValueError(
+                    "Error: the prefix index does not exist or is out of date, "
+                    "please build it by a writable connection."
+                )
+            self.build_prefix_index()
+        positions, _ = self.prefix_index.complete(prefix, top_n)
+        eids = [self.prefix_index.get_eid(x) for x in positions.tolist()]
+        return [e for e in self.get_exact_match_eventualities(eids) if e is not None]
+
+    def build_fulltext_index(self):
+        """ Build the full-text (FTS5) index of eventuality words for `search_eventualities`,
+        which is stored in the SQLite database and updated by later inserts of all connections
+
+        :return: whether the index is newly built
+        :rtype: bool
+        """
+
+        return self._conn.create_fulltext_index(self.eventuality_table_name, "words")
+
+    def search_eventualities(
+        self, query, top_n=10, patterns=None, match_all=False, frequency_weight=FULLTEXT_FREQUENCY_WEIGHT
+    ):
+        """ Retrieve eventualities whose words contain the query terms (except pronouns if there are other terms),
+        ranked by BM25 with a frequency prior `frequency_weight * ln(1 + frequency)`
+        (note: the full-text index is built at the first call if it does not exist)
+
+        :param query: the query terms, or terms connected by whitespaces, e.g., "umbrella rain"
+        :type query: Union[str, List[str]]
+        :param top_n: how many eventualities to return, default `None` for all matched eventualities
+        :type top_n: Union[int, None] (default = 10)
+        :param patterns: only return eventualities of these patterns, default `None` for all patterns
+        :type patterns: Union[List[str], None] (default = None)
+        :param match_all: whether eventualities must contain all terms, otherwise any term
+        :type match_all: bool (default = False)
+        :param frequency_weight: the weight of the frequency prior, 0.0 for the pure BM25
+        :type frequency_weight: float (default = 0.1)
+        :return: the matched eventualities with scores, sorted by scores in a descending order
+        :rtype: List[Tuple[float, aser.eventuality.Eventuality]]
+        """
+
+        terms = query.split() if isinstance(query, str) else list(query)
+        # pronouns match most eventualities but hardly affect BM25, so they are only kept in pronoun-only queries
+        terms = get_search_tokens(terms) or terms
+        if not self._conn.has_fulltext_index(self.eventuality_table_name, "words"):
+            if self.read_only:
+                raise ValueError("Error: the full-text index does not exist, please build it by a writable connection.")
+            self.build_fulltext_index()
+        results = self._conn.search_fulltext(
+            self.eventuality_table_name,
+            "words",
+            terms,
+            self.eventuality_columns,
+            match_all=match_all,
+            filters={"pattern": patterns} if patterns is not None else None,
+            prior_column="frequency",
+            prior_weight=frequency_weight,
+            top_n=top_n
+        )
+        return [(score, self._convert_row_to_eventuality(row)) for score, row in results]
 
 
 class ASERConceptConnection(object):
     """ Concept connection for ASER (including concepts, concept_instance_pairs, and relations)
 
     """
-    def __init__(self, db_path, db="sqlite", mode='cache', chunksize=CHUNKSIZE):
+    def __init__(
+        self,
+        db_path,
+        db="sqlite",
+        mode='cache',
+        chunksize=CHUNKSIZE,
+        cache_policy="lru",
+        object_cache_size=None,
+        partial_cache_size=None,
+        cache_size_by="entries",
+        key_format=None,
+        relation_format=None,
+        read_only=False
+    ):
         """
 
         :param db_path: database path
@@ -935,50 +1874,128 @@ class ASERConceptConnection(object):
         :type mode: str (default = "cache")
         :param chunksize: the chunksize to load/write database
         :type chunksize: int (default = 32768)
+        :param cache_policy: the eviction policy of caches in the "cache" mode, "lru" or "clock"
+        :type cache_policy: str (default = "lru")
+        :param object_cache_size: the budget of each object cache (e.g., cid2concept_cache) in the "cache" mode, default `None` for unbounded
+        :type object_cache_size: Union[int, None] (default = None)
+        :param partial_cache_size: the budget of each partial-key cache (e.g., eid2cid_scores) in the "cache" mode, default `None` for unbounded
+        :type partial_cache_size: Union[int, None] (default = None)
+        :param cache_size_by: how to measure budgets, "entries" or estimated "bytes"
+        :type cache_size_by: str (default = "entries")
+        :param key_format: the format of keys in SQLite, "text" for hex ids, "integer" for integer surrogate keys
+            (where an id table maps hex ids to integers), or `None` to follow the database ("text" for new databases)
+        :type key_format: Union[str, None] (default = None)
+        :param relation_format: the format of relation senses in SQLite, "dense" for one column per sense,
+            "sparse" for packed (sense id, weight) pairs with an indexed total weight, or `None` to follow the database
+            ("dense" for new databases)
+        :type relation_format: Union[str, None] (default = None)
+        :param read_only: whether to open a read-only SQLite connection tuned for serving,
+            which allows several processes to serve the same database in parallel,
+            or "immutable" to also skip locks when no process writes the database
+        :type read_only: Union[bool, str] (default = False)
         """
 
         if db == "sqlite":
-            self._conn = SqliteDBConnection(db_path, chunksize)
+            self._conn = SqliteDBConnection(
+                db_path, chunksize, read_only=bool(read_only), immutable=read_only == "immutable"
+            )
         elif db == "mongodb":
             self._conn = MongoDBConnection(db_path, chunksize)
         else:
             raise NotImplementedError("Error: %s database is not supported!" % (db))
+        # id sets are persisted next to SQLite databases
+        self._db_path = db_path if db == "sqlite" else None
         self.mode = mode
         if self.mode not in ["insert", "cache", "memory"]:
             raise NotImplementedError("Error: only support insert/cache/memory modes.")
+        if read_only and self.mode == "insert":
+            raise NotImplementedError("Error: read-only connections do not support the insert mode.")
+        self.read_only = bool(read_only)
+        if key_format not in [None, "text", "integer"]:
+            raise NotImplementedError("Error: only support text/integer key formats.")
+        self.key_format = key_format
+        if relation_format not in [None, "dense", "sparse"]:
+            raise NotImplementedError("Error: only support dense/sparse relation formats.")
+        self.relation_format = relation_format
+
+        if self.mode == "cache":
+            build_object_cache = lambda: build_cache(cache_policy, object_cache_size, cache_size_by)
+            build_partial_cache = lambda: build_cache(cache_policy, partial_cache_size, cache_size_by)
+        else:
+            build_object_cache = build_partial_cache = dict
+        self._init_attributes(build_object_cache, build_partial_cache)
+
+        self.init()
+
+    def _init_attributes(self, build_object_cache=dict, build_partial_cache=dict):
+        """ Initialize table schemas, id sets, caches, and indices by defaults
+
+        :param build_object_cache: the function to build an object cache
+        :type build_object_cache: Callable
+        :param build_partial_cache: the function to build a partial-key cache
+        :type build_partial_cache: Callable
+        """
 
         self.concept_table_name = CONCEPT_TABLE_NAME
         self.concept_columns = CONCEPT_COLUMNS
         self.concept_column_types = CONCEPT_COLUMN_TYPES
+        self.concept_indices = CONCEPT_INDICES
         self.concept_instance_pair_table_name = CONCEPTINSTANCEPAIR_TABLE_NAME
         self.concept_instance_pair_columns = CONCEPTINSTANCEPAIR_COLUMNS
         self.concept_instance_pair_column_types = CONCEPTINSTANCEPAIR_COLUMN_TYPES
+        self.concept_instance_pair_indices = CONCEPTINSTANCEPAIR_INDICES
         self.relation_table_name = RELATION_TABLE_NAME
         self.relation_columns = RELATION_COLUMNS
         self.relation_column_types = RELATION_COLUMN_TYPES
+        self.relation_indices = RELATION_INDICES
 
-        self.cids = set()
-        self.eids = set()
-        self.rids = set()
+        self.cids = IdSet()
+        self.eids = IdSet()
+        self.rids = IdSet()
 
-        self.cid2concept_cache = dict()
-        self.cid2eid_pattern_scores = dict()
-        self.rid2relation_cache = dict()
-        self.eid2cid_scores = dict()
+        self.cid2concept_cache = build_object_cache()
+        self.cid2eid_pattern_scores = build_partial_cache()
+        self.rid2relation_cache = build_object_cache()
+        self.eid2cid_scores = build_partial_cache()
         self.partial2cids_cache = dict()
-        self.partial2rids_cache = {"hid": dict()}
-
-        self.init()
+        self.partial2rids_cache = {"hid": build_partial_cache(), "tid": build_partial_cache()}
+        self.adjacency_index = None
 
     def init(self):
         """ Initialize the ASERConceptConnection, including creating tables, loading cids, eids, rids, and building cache
 
         """
 
-        for table_name, columns, column_types in zip(
+        self.relation_format = _init_relation_format(self._conn, self.relation_format, self.relation_table_name)
+        if self.relation_format == "sparse":
+            self.relation_columns = SPARSE_RELATION_COLUMNS
+            self.relation_column_types = SPARSE_RELATION_COLUMN_TYPES
+            self.relation_indices = SPARSE_RELATION_INDICES
+        self.relation_weight_columns = ["senses"] if self.relation_format == "sparse" else relation_senses
+        self.key_format = _init_key_format(
+            self._conn, self.key_format,
+            [self.concept_table_name, self.concept_instance_pair_table_name, self.relation_table_name]
+        )
+        if self.key_format == "integer":
+            self.concept_column_types = _get_integer_key_column_types(
+                self.concept_columns, self.concept_column_types, CONCEPT_ID_COLUMNS
+            )
+            self.concept_instance_pair_column_types = _get_integer_key_column_types(
+                self.concept_instance_pair_columns, self.concept_instance_pair_column_types,
+                CONCEPTINSTANCEPAIR_ID_COLUMNS
+            )
+            self.relation_column_types = _get_integer_key_column_types(
+                self.relation_columns, self.relation_column_types, RELATION_ID_COLUMNS
+            )
+            self._conn.set_id_columns(self.concept_table_name, CONCEPT_ID_COLUMNS)
+            self._conn.set_id_columns(self.concept_instance_pair_table_name, CONCEPTINSTANCEPAIR_ID_COLUMNS)
+            self._conn.set_id_columns(self.relation_table_name, RELATION_ID_COLUMNS)
+
+        for table_name, columns, column_types, indices in zip(
             [self.concept_table_name, self.concept_instance_pair_table_name, self.relation_table_name],
             [self.concept_columns, self.concept_instance_pair_columns, self.relation_columns],
-            [self.concept_column_types, self.concept_instance_pair_column_types, self.relation_column_types]
+            [self.concept_column_types, self.concept_instance_pair_column_types, self.relation_column_types],
+            [self.concept_indices, self.concept_instance_pair_indices, self.relation_indices]
         ):
             if len(columns) == 0 or len(column_types) == 0:
                 raise NotImplementedError(
@@ -987,11 +2004,14 @@ class ASERConceptConnection(object):
             try:
                 self._conn.create_table(table_name, columns, column_types)
             except:
-                pass
+                continue
+            # indices are only built with new tables, use `create_indices` to backfill existing databases
+            for index_columns in indices:
+                self._conn.create_index(table_name, index_columns)
 
         if self.mode == 'memory':
             for c in map(
-                self._convert_row_to_concept, self._conn.get_columns(self.concept_table_name, self.concept_columns)
+                self._convert_row_to_concept, self._conn.iter_columns(self.concept_table_name, self.concept_columns)
             ):
                 self.cids.add(c.cid)
                 self.cid2concept_cache[c.cid] = c
@@ -1003,7 +2023,7 @@ class ASERConceptConnection(object):
                         v[getattr(c, k)].append(c.cid)
             for p in map(
                 self._convert_row_to_concept_instance_pair,
-                self._conn.get_columns(self.concept_instance_pair_table_name, self.concept_instance_pair_columns)
+                self._conn.iter_columns(self.concept_instance_pair_table_name, self.concept_instance_pair_columns)
             ):
                 self.eids.add(p.eid)
                 # handle another cache
@@ -1016,7 +2036,7 @@ class ASERConceptConnection(object):
                 else:
                     self.eid2cid_scores[p.eid].append((p.cid, p.score))
             for r in map(
-                self._convert_row_to_relation, self._conn.get_columns(self.relation_table_name, self.relation_columns)
+                self._convert_row_to_relation, self._conn.iter_columns(self.relation_table_name, self.relation_columns)
             ):
                 self.rids.add(r.rid)
                 self.rid2relation_cache[r.rid] = r
@@ -1027,19 +2047,80 @@ class ASERConceptConnection(object):
                     else:
                         v[getattr(r, k)].append(r.rid)
         else:
-            for x in self._conn.get_columns(self.concept_table_name, ["_id"]):
-                self.cids.add(x["_id"])
-            for x in self._conn.get_columns(self.concept_instance_pair_table_name, ["eid"]):
-                self.eids.add(x["eid"])
-            for x in self._conn.get_columns(self.relation_table_name, ["_id"]):
-                self.rids.add(x["_id"])
+            self.cids = load_id_set(self._conn, self._db_path, self.concept_table_name, "_id", "cids")
+            self.eids = load_id_set(self._conn, self._db_path, self.concept_instance_pair_table_name, "eid", "eids")
+            self.rids = load_id_set(self._conn, self._db_path, self.relation_table_name, "_id", "rids")
+            if not self.read_only:
+                save_id_set(self.cids, self._conn, self._db_path, self.concept_table_name, "cids")
+                save_id_set(self.eids, self._conn, self._db_path, self.concept_instance_pair_table_name, "eids")
+                save_id_set(self.rids, self._conn, self._db_path, self.relation_table_name, "rids")
+        if self.mode in ["cache", "memory"]:
+            self.adjacency_index = load_adjacency_index(self._db_path)
+
+    def create_indices(self):
+        """ Create the secondary indices of concepts, concept-instance pairs, and relations if they do not exist
+        (suggestion: it is necessary to call this method once for databases built by old versions)
+
+        """
+
+        for table_name, indices in zip(
+            [self.concept_table_name, self.concept_instance_pair_table_name, self.relation_table_name],
+            [self.concept_indices, self.concept_instance_pair_indices, self.relation_indices]
+        ):
+            for index_columns in indices:
+                self._conn.create_index(table_name, index_columns)
+
+    def build_adjacency_index(self):
+        """ Build the CSR adjacency index of relations for `get_related_concepts`,
+        which is saved next to the SQLite database and memory-mapped by later connections
+        (suggestion: it is necessary to rebuild the index after relations are inserted/updated)
+
+        :return: the adjacency index
+        :rtype: aser.database.index.AdjacencyIndex
+        """
+
+        self.adjacency_index = build_adjacency_index(
+            self._conn, self._db_path, self.relation_table_name, relation_senses,
+            weight_columns=self.relation_weight_columns
+        )
+        return self.adjacency_index
+
+    def get_cache_stats(self):
+        """ Get the hit/miss/eviction statistics of caches in the "cache" mode
+
+        :return: a dictionary from cache names to statistics
+        :rtype: Dict[str, Dict[str, Union[int, float]]]
+        """
+
+        caches = [
+            ("cid2concept_cache", self.cid2concept_cache), ("rid2relation_cache", self.rid2relation_cache),
+            ("cid2eid_pattern_scores", self.cid2eid_pattern_scores), ("eid2cid_scores", self.eid2cid_scores)
+        ]
+        caches.extend([("partial2cids_cache." + k, v) for k, v in self.partial2cids_cache.items()])
+        caches.extend([("partial2rids_cache." + k, v) for k, v in self.partial2rids_cache.items()])
+        return OrderedDict([(name, cache.get_stats()) for name, cache in caches if isinstance(cache, BaseCache)])
+
+    def reset_cache_stats(self):
+        """ Reset the hit/miss/eviction statistics of caches in the "cache" mode
+
+        """
+
+        for cache in [self.cid2concept_cache, self.rid2relation_cache, self.cid2eid_pattern_scores, self.eid2cid_scores] + \
+            list(self.partial2cids_cache.values()) + list(self.partial2rids_cache.values()):
+            if isinstance(cache, BaseCache):
+                cache.reset_stats()
 
     def close(self):
         """ Close the ASERConceptConnection safely
 
         """
 
+        if self.mode in ["insert", "cache"] and not self.read_only:
+            save_id_set(self.cids, self._conn, self._db_path, self.concept_table_name, "cids")
+            save_id_set(self.eids, self._conn, self._db_path, self.concept_instance_pair_table_name, "eids")
+            save_id_set(self.rids, self._conn, self._db_path, self.relation_table_name, "rids")
         self._conn.close()
+        self.adjacency_index = None
         self.cids.clear()
         self.eids.clear()
         self.rids.clear()
@@ -1125,12 +2206,10 @@ class ASERConceptConnection(object):
         return self._get_concepts_and_store_in_cache([cid])[0]
 
     def _get_concepts_and_store_in_cache(self, cids):
-        concepts = list(
-            map(
-                self._convert_row_to_concept,
-                self._conn.select_rows(self.concept_table_name, cids, self.concept_columns)
-            )
-        )
+        concepts = [
+            self._convert_row_to_concept(row) if row else None
+            for row in self._conn.iter_select_rows(self.concept_table_name, cids, self.concept_columns)
+        ]
         for concept in concepts:
             if concept:
                 self.cid2concept_cache[concept.cid] = concept
@@ -1191,13 +2270,10 @@ class ASERConceptConnection(object):
                     missed_indices.append(idx)
                     missed_cids.append(concept.cid)
         if self.mode == "insert":
-            for idx, updated_concept in enumerate(
-                map(
-                    self._convert_row_to_concept,
-                    self._conn.select_rows(self.concept_table_name, missed_cids, self.concept_columns)
-                )
+            for idx, row in enumerate(
+                self._conn.iter_select_rows(self.concept_table_name, missed_cids, self.concept_columns)
             ):
-                updated_concepts[missed_indices[idx]] = updated_concept
+                updated_concepts[missed_indices[idx]] = self._convert_row_to_concept(row) if row else None
         else:
             for idx, updated_concept in enumerate(self._get_concepts_and_store_in_cache(missed_cids)):
                 updated_concepts[missed_indices[idx]] = updated_concept
@@ -1322,6 +2398,7 @@ class ASERConceptConnection(object):
             for idx, cid in enumerate(cids):
                 if cid not in self.cids:
                     exact_match_concepts.append(None)
+                    continue
                 exact_match_concept = self.cid2concept_cache.get(cid, None)
                 exact_match_concepts.append(exact_match_concept)
                 if not exact_match_concept:
@@ -1400,6 +2477,12 @@ class ASERConceptConnection(object):
 
     def _convert_relation_to_row(self, relation):
         row = OrderedDict({"_id": relation.rid})
+        if self.relation_format == "sparse":
+            row["hid"] = relation.hid
+            row["tid"] = relation.tid
+            row["total_weight"] = sum(relation.relations.values())
+            row["senses"] = encode_relation_senses(relation.relations)
+            return row
         for c in self.relation_columns[1:-len(relation_senses)]:
             row[c] = getattr(relation, c)
         for r in relation_senses:
@@ -1407,6 +2490,8 @@ class ASERConceptConnection(object):
         return row
 
     def _convert_row_to_relation(self, row):
+        if "senses" in row:
+            return Relation(row["hid"], row["tid"], decode_relation_senses(row["senses"]))
         return Relation(
             row["hid"], row["tid"], {r: cnt
                                      for r, cnt in row.items() if isinstance(cnt, float) and cnt > 0.0}
@@ -1471,12 +2556,10 @@ class ASERConceptConnection(object):
         return self._get_relations_and_store_in_cache([rid])[0]
 
     def _get_relations_and_store_in_cache(self, rids):
-        relations = list(
-            map(
-                self._convert_row_to_relation,
-                self._conn.select_rows(self.relation_table_name, rids, self.relation_columns)
-            )
-        )
+        relations = [
+            self._convert_row_to_relation(row) if row else None
+            for row in self._conn.iter_select_rows(self.relation_table_name, rids, self.relation_columns)
+        ]
         for relation in relations:
             if relation:
                 self.rid2relation_cache[relation.rid] = relation
@@ -1484,47 +2567,55 @@ class ASERConceptConnection(object):
 
     def _update_relation(self, relation):
         # find new relation frequencies
-        update_columns = []
-        for r in relation_senses:
-            if relation.relations.get(r, 0.0) > 0.0:
-                update_columns.append(r)
+        if self.relation_format == "sparse":
+            update_op, update_columns = _get_sparse_relation_update_op(self._conn)
+        else:
+            update_columns = []
+            for r in relation_senses:
+                if relation.relations.get(r, 0.0) > 0.0:
+                    update_columns.append(r)
+            update_op = self._conn.get_update_op(update_columns, "+")
 
         # update db
-        update_op = self._conn.get_update_op(update_columns, "+")
         row = self._convert_relation_to_row(relation)
         self._conn.update_row(self.relation_table_name, row, update_op, update_columns)
 
         # update cache
         updated_relation = self.rid2relation_cache.get(relation.rid, None)
         if updated_relation:
-            for r in update_columns:
-                updated_relation.relation[r] += relation.relation[r]
+            for r, cnt in relation.relations.items():
+                updated_relation.relations[r] = updated_relation.relations.get(r, 0.0) + cnt
         else:
             updated_relation = self._get_relation_and_store_in_cache(relation.rid)
         return updated_relation
 
     def _update_relations(self, relations):
         # update db
-        update_op = self._conn.get_update_op(relation_senses, "+")
+        if self.relation_format == "sparse":
+            update_op, update_columns = _get_sparse_relation_update_op(self._conn)
+        else:
+            update_op, update_columns = self._conn.get_update_op(relation_senses, "+"), relation_senses
         rows = list(map(self._convert_relation_to_row, relations))
-        self._conn.update_rows(self.relation_table_name, rows, update_op, relation_senses)
+        self._conn.update_rows(self.relation_table_name, rows, update_op, update_columns)
 
         # update cache
+        if self.mode == "insert":
+            return [None] * len(relations)  # don"t care
         updated_relations = []
         missed_indices = []
         missed_rids = []
         for idx, relation in enumerate(relations):
             if relation.rid not in self.rids:
                 updated_relations.append(None)
-            updated_relation = self.rid2relation_cache.get(relation.rid, None)
-            updated_relations.append(updated_relations)
-            if updated_relation:
-                for r in relation_senses:
-                    if updated_relation.relations.get(r, 0.0) > 0.0:
-                        updated_relation.relations[r] += relation.relations[r]
             else:
-                missed_indices.append(idx)
-                missed_rids.append(relation.rid)
+                updated_relation = self.rid2relation_cache.get(relation.rid, None)
+                updated_relations.append(updated_relation)
+                if updated_relation:
+                    for r, cnt in relation.relations.items():
+                        updated_relation.relations[r] = updated_relation.relations.get(r, 0.0) + cnt
+                else:
+                    missed_indices.append(idx)
+                    missed_rids.append(relation.rid)
         for idx, updated_relation in enumerate(self._get_relations_and_store_in_cache(missed_rids)):
             updated_relations[missed_indices[idx]] = updated_relation
         return updated_relations
@@ -1539,7 +2630,8 @@ class ASERConceptConnection(object):
         :rtype: aser.relation.Relation
         """
 
-        if relation.rid not in self.rid2relation_cache:
+        self.adjacency_index = None  # out of date
+        if relation.rid not in self.rids:
             return self._insert_relation(relation)
         else:
             return self._update_relation(relation)
@@ -1553,6 +2645,7 @@ class ASERConceptConnection(object):
         :rtype: List[aser.relation.Relation]
         """
 
+        self.adjacency_index = None  # out of date
         results = []
         new_relations = []
         existing_indices = []
@@ -1646,6 +2739,7 @@ class ASERConceptConnection(object):
             for idx, rid in enumerate(rids):
                 if rid not in self.rids:
                     exact_match_relations.append(None)
+                    continue
                 exact_match_relation = self.rid2relation_cache.get(rid, None)
                 exact_match_relations.append(exact_match_relation)
                 if not exact_match_relation:
@@ -1686,9 +2780,11 @@ class ASERConceptConnection(object):
                 cache = self.partial2rids_cache[k]
                 by_index = bys.index(k)
                 break
-        if cache:
-            if keys[by_index] in cache:
-                key_match_relations = [self.rid2relation_cache[rid] for rid in cache[keys[by_index]]]
+        if cache is not None:
+            key_cache = cache.get(keys[by_index], None)
+            if key_cache is not None:
+                # objects may have been evicted from the cache
+                key_match_relations = self.get_exact_match_relations(key_cache)
             else:
                 if self.mode == "memory":
                     return []
@@ -1778,14 +2874,14 @@ class ASERConceptConnection(object):
             self.eids.add(concept_instance_pair.eid)
         elif self.mode == "cache":
             self.eids.add(concept_instance_pair.eid)
-            if concept_instance_pair.cid in self.cid2eid_pattern_scores:
-                self.cid2eid_pattern_scores[concept_instance_pair.cid].append(
+            cached_eid_pattern_scores = self.cid2eid_pattern_scores.peek(concept_instance_pair.cid)
+            if cached_eid_pattern_scores is not None:
+                cached_eid_pattern_scores.append(
                     (concept_instance_pair.eid, concept_instance_pair.pattern, concept_instance_pair.score)
                 )
-            if concept_instance_pair.eid in self.eid2cid_scores:
-                self.eid2cid_scores[concept_instance_pair.eid].append(
-                    (concept_instance_pair.cid, concept_instance_pair.score)
-                )
+            cached_cid_scores = self.eid2cid_scores.peek(concept_instance_pair.eid)
+            if cached_cid_scores is not None:
+                cached_cid_scores.append((concept_instance_pair.cid, concept_instance_pair.score))
         elif self.mode != "memory":
             self.eids.add(concept_instance_pair.eid)
             if concept_instance_pair.cid not in self.cid2eid_pattern_scores:
@@ -1815,14 +2911,14 @@ class ASERConceptConnection(object):
         elif self.mode == "cache":
             for concept_instance_pair in concept_instance_pairs:
                 self.eids.add(concept_instance_pair.eid)
-                if concept_instance_pair.cid in self.cid2eid_pattern_scores:
-                    self.cid2eid_pattern_scores[concept_instance_pair.cid].append(
+                cached_eid_pattern_scores = self.cid2eid_pattern_scores.peek(concept_instance_pair.cid)
+                if cached_eid_pattern_scores is not None:
+                    cached_eid_pattern_scores.append(
                         (concept_instance_pair.eid, concept_instance_pair.pattern, concept_instance_pair.score)
                     )
-                if concept_instance_pair.eid in self.eid2cid_scores:
-                    self.eid2cid_scores[concept_instance_pair.eid].append(
-                        (concept_instance_pair.cid, concept_instance_pair.score)
-                    )
+                cached_cid_scores = self.eid2cid_scores.peek(concept_instance_pair.eid)
+                if cached_cid_scores is not None:
+                    cached_cid_scores.append((concept_instance_pair.cid, concept_instance_pair.score))
         elif self.mode == "memory":
             for concept_instance_pair in concept_instance_pairs:
                 self.eids.add(concept_instance_pair.eid)
@@ -2042,12 +3138,60 @@ class ASERConceptConnection(object):
     Additional APIs
     """
 
-    def get_related_concepts(self, concept):
+    def _get_neighbors(self, cid, top_k=None, senses=None):
+        """ Retrieve related concepts and relations from the database in one query, and cache them
+
+        :param cid: the head cid
+        :type cid: str
+        :param top_k: how many related concepts with the heaviest relations to return, default `None` for all
+        :type top_k: Union[int, None] (default = None)
+        :param senses: only return concepts connected by these relation senses, default `None` for all senses
+        :type senses: Union[List[str], None] (default = None)
+        :return: the related concepts, the relations, and whether all relations of the head are retrieved
+        :rtype: Tuple[List[aser.concept.ASERConcept], List[aser.relation.Relation], bool]
+        """
+
+        if senses is None:
+            if top_k is None:
+                weight_columns = None
+            elif self.relation_format == "sparse":
+                weight_columns = ["total_weight"]
+            else:
+                weight_columns = relation_senses
+        elif self.relation_format == "sparse":
+            # weights of given senses are packed in blobs so that they are filtered after retrieval
+            weight_columns, top_k = None, None
+        else:
+            weight_columns = [r for r in senses if r in relation_senses]
+        neighbors = self._conn.get_neighbors(
+            self.relation_table_name, self.concept_table_name, cid, self.relation_columns, self.concept_columns,
+            weight_columns, top_k
+        )
+        t_concepts, related_relations = [], []
+        for relation_row, concept_row in neighbors:
+            relation = self._convert_row_to_relation(relation_row)
+            if relation.rid not in self.rid2relation_cache:
+                self.rid2relation_cache[relation.rid] = relation
+            if concept_row is None:
+                concept = None
+            else:
+                concept = self._convert_row_to_concept(concept_row)
+                if concept.cid not in self.cid2concept_cache:
+                    self.cid2concept_cache[concept.cid] = concept
+            t_concepts.append(concept)
+            related_relations.append(relation)
+        return t_concepts, related_relations, weight_columns is None
+
+    def get_related_concepts(self, concept, top_k=None, senses=None):
         """ Retrieve related (connected) concepts from ASER
 
         :param eventuality: a concept that contains the eid
         :type concept: Union[aser.concept.ASERConcept, Dict[str, object], str]
-        :return: the related concepts
+        :param top_k: how many related concepts with the heaviest relations to return, default `None` for all
+        :type top_k: Union[int, None] (default = None)
+        :param senses: only return concepts connected by these relation senses, default `None` for all senses
+        :type senses: Union[List[str], None] (default = None)
+        :return: the related concepts, sorted by the total weight of relations in an ascending order
         :rtype: List[Tuple[aser.concept.ASERConcept, aser.relation.Relation]]
         """
 
@@ -2062,6 +3206,17 @@ class ASERConceptConnection(object):
         else:
             raise ValueError("Error: conceptualize should be an instance of ASERConcept, a dictionary, or a cid.")
 
+        if self.adjacency_index is not None:
+            # neighbors are sliced from the index and sorted in a descending order
+            related_relations = [
+                Relation(cid, tid, relations)
+                for tid, relations in self.adjacency_index.get_neighbors(cid, "out", top_k, senses)
+            ]
+            related_relations.reverse()
+            tids = [x.tid for x in related_relations]
+            t_concepts = self.get_exact_match_concepts(tids)
+            return list(zip(t_concepts, related_relations))
+
         # cid == hid
         results = []
         if self.mode == "memory":
@@ -2074,19 +3229,137 @@ class ASERConceptConnection(object):
             t_concepts = self.get_exact_match_concepts(tids)
         elif self.mode == "cache":
             if "hid" in self.partial2rids_cache:
-                if cid in self.partial2rids_cache["hid"]:  # hit
-                    related_rids = self.partial2rids_cache["hid"].get(cid, list())
+                related_rids = self.partial2rids_cache["hid"].get(cid, None)
+                if related_rids is not None:  # hit
                     related_relations = self.get_exact_match_relations(related_rids)
                     tids = [x.tid for x in related_relations]
                     t_concepts = self.get_exact_match_concepts(tids)
                 else:  # miss
-                    related_relations = self.get_relations_by_keys(bys=["hid"], keys=[cid])
-                    tids = [x.tid for x in related_relations]
-                    t_concepts = self.get_exact_match_concepts(tids)
-                    # update cache
-                    self.partial2rids_cache["hid"][cid] = [relation.rid for relation in related_relations]
+                    t_concepts, related_relations, complete = self._get_neighbors(cid, top_k, senses)
+                    # update cache only when all relations are retrieved
+                    if complete:
+                        self.partial2rids_cache["hid"][cid] = [relation.rid for relation in related_relations]
             else:
                 related_relations = self.get_relations_by_keys(bys=["hid"], keys=[cid])
                 tids = [x.tid for x in related_relations]
                 t_concepts = self.get_exact_match_concepts(tids)
-        return sorted(zip(t_concepts, related_relations), key=lambda x: sum(x[1].relations.values()))
+        return _sort_related_pairs(zip(t_concepts, related_relations), top_k, senses)
+
+    def get_predecessor_concepts(self, concept, top_k=None, senses=None):
+        """ Retrieve predecessor concepts (i.e., heads of relations whose tails are the given concept) from ASER
+        (suggestion: consider to use `get_batch_predecessor_concepts` if you want to retrieve predecessors of multiple concepts)
+
+        :param concept: a concept that contains the cid
+        :type concept: Union[aser.concept.ASERConcept, Dict[str, object], str]
+        :param top_k: how many predecessor concepts with the heaviest relations to return, default `None` for all
+        :type top_k: Union[int, None] (default = None)
+        :param senses: only return concepts connected by these relation senses, default `None` for all senses
+        :type senses: Union[List[str], None] (default = None)
+        :return: the predecessor concepts, sorted by the total weight of relations in an ascending order
+        :rtype: List[Tuple[aser.concept.ASERConcept, aser.relation.Relation]]
+        """
+
+        return self.get_batch_predecessor_concepts([concept], top_k, senses)[0]
+
+    def get_batch_predecessor_concepts(self, concepts, top_k=None, senses=None):
+        """ Retrieve predecessor concepts of multiple concepts from ASER
+
+        :param concepts: concepts that contain cids
+        :type concepts: List[Union[aser.concept.ASERConcept, Dict[str, object], str]]
+        :param top_k: how many predecessor concepts with the heaviest relations to return for each concept, default `None` for all
+        :type top_k: Union[int, None] (default = None)
+        :param senses: only return concepts connected by these relation senses, default `None` for all senses
+        :type senses: Union[List[str], None] (default = None)
+        :return: the predecessor concepts of each concept, sorted by the total weight of relations in an ascending order
+        :rtype: List[List[Tuple[aser.concept.ASERConcept, aser.relation.Relation]]]
+        """
+
+        if self.mode == "insert":
+            return [[] for _ in range(len(concepts))]
+        cids = []
+        for concept in concepts:
+            if isinstance(concept, ASERConcept):
+                cids.append(concept.cid)
+            elif isinstance(concept, dict):
+                cids.append(concept["cid"])
+            elif isinstance(concept, str):
+                cids.append(concept)
+            else:
+                raise ValueError("Error: conceptualize should be an instance of ASERConcept, a dictionary, or a cid.")
+
+        # cid == tid
+        cid2relations = dict()
+        if self.adjacency_index is not None:
+            for cid in set(cids):
+                cid2relations[cid] = [
+                    Relation(hid, cid, relations)
+                    for hid, relations in self.adjacency_index.get_neighbors(cid, "in", top_k, senses)
+                ]
+        else:
+            cache = self.partial2rids_cache.get("tid", None)
+            missed_cids = []
+            for cid in set(cids):
+                related_rids = cache.get(cid, None) if cache is not None else None
+                if related_rids is not None:  # hit
+                    cid2relations[cid] = self.get_exact_match_relations(related_rids)
+                else:  # miss
+                    cid2relations[cid] = []
+                    # all relations are loaded in the memory mode
+                    if self.mode != "memory":
+                        missed_cids.append(cid)
+            if len(missed_cids) > 0:
+                for relation in map(
+                    self._convert_row_to_relation,
+                    self._conn.get_rows_by_key_values(
+                        self.relation_table_name, "tid", missed_cids, self.relation_columns
+                    )
+                ):
+                    cid2relations[relation.tid].append(relation)
+                    if relation.rid not in self.rid2relation_cache:
+                        self.rid2relation_cache[relation.rid] = relation
+                # update cache
+                if cache is not None:
+                    for cid in missed_cids:
+                        cache[cid] = [relation.rid for relation in cid2relations[cid]]
+
+        hids = list(set([relation.hid for related_relations in cid2relations.values() for relation in related_relations]))
+        hid2concept = dict(zip(hids, self.get_exact_match_concepts(hids)))
+        return [
+            _sort_related_pairs(
+                [(hid2concept[relation.hid], relation) for relation in cid2relations[cid]], top_k, senses
+            ) for cid in cids
+        ]
+
+    def expand(self, seeds, hops=1, senses=None, top_k_per_hop=None, min_weight=0.0, direction="out"):
+        """ Expand multi-hop neighborhoods of concepts, where each hop fetches relations of the whole frontier
+        by one adjacency-index slice or one bulk query
+
+        :param seeds: concepts that contain cids
+        :type seeds: List[Union[aser.concept.ASERConcept, Dict[str, object], str]]
+        :param hops: the number of hops to expand
+        :type hops: int (default = 1)
+        :param senses: only follow relations with these senses and weight them by these senses, default `None` for all senses
+        :type senses: Union[List[str], None] (default = None)
+        :param top_k_per_hop: how many heaviest relations of each frontier concept to follow at each hop, default `None` for all
+        :type top_k_per_hop: Union[int, None] (default = None)
+        :param min_weight: relations whose weights are less than this value are pruned
+        :type min_weight: float (default = 0.0)
+        :param direction: "out" to follow heads to tails, "in" to follow tails to heads, "both" for both
+        :type direction: str (default = "out")
+        :return: the expanded subgraph, whose ids are cids
+        :rtype: aser.database.traversal.ASERSubgraph
+        """
+
+        cids = []
+        for concept in seeds:
+            if isinstance(concept, ASERConcept):
+                cids.append(concept.cid)
+            elif isinstance(concept, dict):
+                cids.append(concept["cid"])
+            elif isinstance(concept, str):
+                cids.append(concept)
+            else:
+                raise ValueError("Error: conceptualize should be an instance of ASERConcept, a dictionary, or a cid.")
+        if self.mode == "insert":
+            hops = 0
+        return expand(self, cids, hops, senses, top_k_per_hop, min_weight, direction)
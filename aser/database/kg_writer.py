@@ -0,0 +1,265 @@
+import time
+from collections import OrderedDict
+from ..concept import ASERConceptInstancePair
+from ..database.db_connection import SqliteDBConnection
+from ..database.kg_connection import ASERKGConnection, ASERConceptConnection
+
+BUILD_PRAGMAS = OrderedDict([("journal_mode", "WAL"), ("synchronous", "NORMAL")])
+
+
+class ASERKGWriter(object):
+    """ Buffered writer for ASER, which merges duplicates in memory and writes them in large transactions
+
+    """
+    def __init__(self, conn, max_rows=131072, max_bytes=268435456, max_seconds=60.0, pragmas=BUILD_PRAGMAS):
+        """
+
+        :param conn: a connection in the "insert" or "upsert" mode
+        :type conn: Union[aser.database.kg_connection.ASERKGConnection, aser.database.kg_connection.ASERConceptConnection]
+        :param max_rows: flush when the number of buffered objects reaches this value
+        :type max_rows: int (default = 131072)
+        :param max_bytes: flush when the estimated size of buffered objects reaches this value
+        :type max_bytes: int (default = 268435456)
+        :param max_seconds: flush when the last flush is older than this value
+        :type max_seconds: float (default = 60.0)
+        :param pragmas: the SQLite pragmas to use when writing, which are restored when the writer is closed
+        :type pragmas: Union[Dict[str, object], None] (default = {"journal_mode": "WAL", "synchronous": "NORMAL"})
+        """
+
+        if conn.mode not in ["insert", "upsert"]:
+            raise ValueError("Error: only support connections in insert/upsert modes.")
+        self.conn = conn
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+
+        self.eid2eventuality = OrderedDict()
+        self.rid2relation = OrderedDict()
+        self.cid2concept = OrderedDict()
+        self.pid2concept_instance_pair = OrderedDict()
+        self.n_bytes = 0
+        self.last_flush_time = time.time()
+
+        self.old_pragmas = OrderedDict()
+        if pragmas and isinstance(self.conn._conn, SqliteDBConnection):
+            for k, v in pragmas.items():
+                self.old_pragmas[k] = self.conn._conn.get_pragma(k)
+                self.conn._conn.set_pragma(k, v)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self.eid2eventuality) + len(self.rid2relation) + \
+            len(self.cid2concept) + len(self.pid2concept_instance_pair)
+
+    def close(self):
+        """ Flush buffered objects and restore pragmas (the connection is not closed)
+
+        """
+
+        self.flush()
+        if isinstance(self.conn._conn, SqliteDBConnection):
+            for k, v in self.old_pragmas.items():
+                self.conn._conn.set_pragma(k, v)
+        self.old_pragmas.clear()
+
+    def _get_new_ids(self):
+        # ids that the connection learns from this flush, which must be forgotten if the transaction is rolled back
+        if self.conn.mode != "insert":
+            return dict()
+        if isinstance(self.conn, ASERKGConnection):
+            id2buffer = {"eids": self.eid2eventuality.keys(), "rids": self.rid2relation.keys()}
+        else:
+            id2buffer = {
+                "cids": self.cid2concept.keys(),
+                "eids": [x.eid for x in self.pid2concept_instance_pair.values()],
+                "rids": self.rid2relation.keys()
+            }
+        return {k: [_id for _id in ids if _id not in getattr(self.conn, k)] for k, ids in id2buffer.items()}
+
+    def flush(self):
+        """ Write all buffered objects in one transaction,
+        which is rolled back if any write fails so that buffered objects can be flushed again
+
+        """
+
+        if len(self) > 0:
+            new_ids = self._get_new_ids()
+            self.conn._conn.begin()
+            try:
+                if len(self.eid2eventuality) > 0:
+                    self.conn.insert_eventualities(list(self.eid2eventuality.values()))
+                if len(self.cid2concept) > 0:
+                    self.conn.insert_concepts(list(self.cid2concept.values()))
+                if len(self.pid2concept_instance_pair) > 0:
+                    self.conn.insert_concept_instance_pairs(list(self.pid2concept_instance_pair.values()))
+                if len(self.rid2relation) > 0:
+                    self.conn.insert_relations(list(self.rid2relation.values()))
+                self.conn._conn.commit()
+            except BaseException:
+                self.conn._conn.rollback()
+                for k, ids in new_ids.items():
+                    getattr(self.conn, k).difference_update(ids)
+                raise
+            self.eid2eventuality.clear()
+            self.rid2relation.clear()
+            self.cid2concept.clear()
+            self.pid2concept_instance_pair.clear()
+        self.n_bytes = 0
+        self.last_flush_time = time.time()
+
+    def _check_flush(self):
+        if len(self) >= self.max_rows or self.n_bytes >= self.max_bytes or \
+            time.time() - self.last_flush_time >= self.max_seconds:
+            self.flush()
+
+    """
+    KG (Eventualities)
+    """
+
+    def insert_eventuality(self, eventuality):
+        """ Buffer an eventuality, which is merged into the buffered one with the same eid
+        (note: the first buffered eventuality is updated in place)
+
+        :param eventuality: an eventuality to insert/update
+        :type eventuality: aser.eventuality.Eventuality
+        """
+
+        if not isinstance(self.conn, ASERKGConnection):
+            raise ValueError("Error: eventualities can only be written into an ASERKGConnection.")
+        buffered_eventuality = self.eid2eventuality.get(eventuality.eid, None)
+        if buffered_eventuality:
+            buffered_eventuality.update(eventuality)
+        else:
+            self.eid2eventuality[eventuality.eid] = eventuality
+            # words, pos_tags, ners, and dependencies dominate the encoded info
+            self.n_bytes += 128 + 64 * len(eventuality.words)
+        self._check_flush()
+
+    def insert_eventualities(self, eventualities):
+        """ Buffer eventualities, which are merged into the buffered ones with the same eids
+
+        :param eventualities: eventualities to insert/update
+        :type eventualities: List[aser.eventuality.Eventuality]
+        """
+
+        for eventuality in eventualities:
+            self.insert_eventuality(eventuality)
+
+    """
+    KG (Concepts)
+    """
+
+    def insert_concept(self, concept):
+        """ Buffer a concept, whose instances are merged into the buffered one with the same cid
+        (note: the first buffered concept is updated in place)
+
+        :param concept: a concept to insert/update
+        :type concept: aser.concept.ASERConcept
+        """
+
+        if not isinstance(self.conn, ASERConceptConnection):
+            raise ValueError("Error: concepts can only be written into an ASERConceptConnection.")
+        buffered_concept = self.cid2concept.get(concept.cid, None)
+        if buffered_concept:
+            eid2idx = {y[0]: idx for idx, y in enumerate(buffered_concept.instances)}
+            for x in concept.instances:
+                idx = eid2idx.get(x[0], None)
+                if idx is None:
+                    eid2idx[x[0]] = len(buffered_concept.instances)
+                    buffered_concept.instances.append(x)
+                    self.n_bytes += 64
+                else:
+                    y = buffered_concept.instances[idx]
+                    buffered_concept.instances[idx] = [y[0], y[1], y[2] + x[2]]
+        else:
+            self.cid2concept[concept.cid] = concept
+            self.n_bytes += 128 + 64 * len(concept.instances)
+        self._check_flush()
+
+    def insert_concepts(self, concepts):
+        """ Buffer concepts, whose instances are merged into the buffered ones with the same cids
+
+        :param concepts: concepts to insert/update
+        :type concepts: List[aser.concept.ASERConcept]
+        """
+
+        for concept in concepts:
+            self.insert_concept(concept)
+
+    """
+    KG (Relations)
+    """
+
+    def insert_relation(self, relation):
+        """ Buffer a relation, which is merged into the buffered one with the same rid
+        (note: the first buffered relation is updated in place)
+
+        :param relation: a relation to insert/update
+        :type relation: aser.relation.Relation
+        """
+
+        buffered_relation = self.rid2relation.get(relation.rid, None)
+        if buffered_relation:
+            buffered_relation.update(relation)
+        else:
+            self.rid2relation[relation.rid] = relation
+            self.n_bytes += 256
+        self._check_flush()
+
+    def insert_relations(self, relations):
+        """ Buffer relations, which are merged into the buffered ones with the same rids
+
+        :param relations: relations to insert/update
+        :type relations: List[aser.relation.Relation]
+        """
+
+        for relation in relations:
+            self.insert_relation(relation)
+
+    """
+    KG (ConceptInstancePairs)
+    """
+
+    def insert_concept_instance_pair(self, concept_instance_pair):
+        """ Buffer a concept-instance pair, whose score is added to the buffered one with the same pid
+
+        :param concept_instance_pair: a concept-instance pair to insert/update
+        :type concept_instance_pair: Union[aser.concept.ASERConceptInstancePair, Tuple[aser.concept.ASERConcpet, aser.event.Eventuality, float]]
+        """
+
+        if not isinstance(self.conn, ASERConceptConnection):
+            raise ValueError("Error: concept-instance pairs can only be written into an ASERConceptConnection.")
+        if not isinstance(concept_instance_pair, ASERConceptInstancePair):
+            concept_instance_pair = ASERConceptInstancePair(
+                concept_instance_pair[0].cid,
+                concept_instance_pair[1].eid,
+                concept_instance_pair[1].pattern,
+                concept_instance_pair[2]
+            )
+        buffered_concept_instance_pair = self.pid2concept_instance_pair.get(concept_instance_pair.pid, None)
+        if buffered_concept_instance_pair:
+            buffered_concept_instance_pair.score += concept_instance_pair.score
+        else:
+            self.pid2concept_instance_pair[concept_instance_pair.pid] = ASERConceptInstancePair(
+                concept_instance_pair.cid,
+                concept_instance_pair.eid,
+                concept_instance_pair.pattern,
+                concept_instance_pair.score
+            )
+            self.n_bytes += 192
+        self._check_flush()
+
+    def insert_concept_instance_pairs(self, concept_instance_pairs):
+        """ Buffer concept-instance pairs, whose scores are added to the buffered ones with the same pids
+
+        :param concept_instance_pairs: concept-instance pairs to insert/update
+        :type concept_instance_pairs: Union[List[aser.concept.ASERConceptInstancePair], List[Tuple[aser.concept.ASERConcpet, aser.event.Eventuality, float]]]
+        """
+
+        for concept_instance_pair in concept_instance_pairs:
+            self.insert_concept_instance_pair(concept_instance_pair)
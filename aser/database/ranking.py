@@ -0,0 +1,206 @@
+import heapq
+import numpy as np
+from collections import defaultdict, OrderedDict
+
+RANKING_TABLE_NAME = "Rankings"
+RANKING_COLUMNS = ["_id", "ids", "scores"]
+RANKING_COLUMN_TYPES = ["PRIMARY KEY", "TEXT", "BLOB"]
+RANKING_SIZE = 100
+
+
+def get_ranking_key(item):
+    """ Get the sort key of a (score, id) pair, where pairs are sorted by scores in a descending order
+    and ties are broken by ids in an ascending order, which is the same as other retrieval paths
+
+    :param item: a (score, id) pair
+    :type item: Tuple[float, str]
+    :return: the sort key
+    :rtype: Tuple[float, str]
+    """
+
+    return -item[0], item[1]
+
+
+def get_ranking_id(column, key):
+    """ Get the row id of the ranking of a key, where the row of a column itself records the ranking size
+
+    :param column: the key column, e.g., "verbs"
+    :type column: str
+    :param key: the key
+    :type key: str
+    :return: the row id
+    :rtype: str
+    """
+
+    return column + ":" + key
+
+
+def encode_ranking(ranking_id, ranking):
+    """ Encode a ranking as a row of the ranking table
+
+    :param ranking_id: the row id returned by `get_ranking_id`
+    :type ranking_id: str
+    :param ranking: (score, id) pairs sorted by `get_ranking_key`
+    :type ranking: List[Tuple[float, str]]
+    :return: the row
+    :rtype: Dict[str, object]
+    """
+
+    return OrderedDict(
+        [
+            ("_id", ranking_id),
+            ("ids", " ".join([x for s, x in ranking])),
+            ("scores", np.array([s for s, x in ranking], dtype=np.float64).tobytes()),
+        ]
+    )
+
+
+def decode_ranking(row):
+    """ Decode a row of the ranking table
+
+    :param row: the row, or None for an empty ranking
+    :type row: Union[Dict[str, object], None]
+    :return: (score, id) pairs sorted by `get_ranking_key`
+    :rtype: List[Tuple[float, str]]
+    """
+
+    if row is None or not row["ids"]:
+        return []
+    return list(zip(np.frombuffer(row["scores"], dtype=np.float64).tolist(), row["ids"].split(" ")))
+
+
+def merge_ranking(ranking, updates, size):
+    """ Merge new scores into a ranking, which is exact because scores (frequencies and weights) never decrease
+    so that ids out of the ranking can only enter it by their own updates
+
+    :param ranking: (score, id) pairs sorted by `get_ranking_key`
+    :type ranking: List[Tuple[float, str]]
+    :param updates: a dictionary from ids to their current scores
+    :type updates: Dict[str, float]
+    :param size: the ranking size
+    :type size: int
+    :return: the top-size (score, id) pairs sorted by `get_ranking_key`
+    :rtype: List[Tuple[float, str]]
+    """
+
+    scores = {x: s for s, x in ranking}
+    scores.update(updates)
+    return heapq.nsmallest(size, [(s, x) for x, s in scores.items()], key=get_ranking_key)
+
+
+def load_ranking_sizes(conn, columns):
+    """ Load the sizes of rankings that have been built
+
+    :param conn: the database connection
+    :type conn: aser.database.db_connection.BaseDBConnection
+    :param columns: the key columns, e.g., ["verbs", "skeleton_words", "hid"]
+    :type columns: List[str]
+    :return: a dictionary from built columns to ranking sizes
+    :rtype: Dict[str, int]
+    """
+
+    if not conn.has_table(RANKING_TABLE_NAME):
+        return dict()
+    return {
+        row["_id"]: int(np.frombuffer(row["scores"], dtype=np.float64)[0])
+        for row in conn.get_rows_by_key_values(RANKING_TABLE_NAME, "_id", columns, RANKING_COLUMNS)
+    }
+
+
+def load_ranking(conn, column, key):
+    """ Load the ranking of a key, where rankings of the column must have been built
+
+    :param conn: the database connection
+    :type conn: aser.database.db_connection.BaseDBConnection
+    :param column: the key column, e.g., "verbs"
+    :type column: str
+    :param key: the key
+    :type key: str
+    :return: (score, id) pairs sorted by `get_ranking_key`
+    :rtype: List[Tuple[float, str]]
+    """
+
+    rows = conn.get_rows_by_key_values(RANKING_TABLE_NAME, "_id", [get_ranking_id(column, key)], RANKING_COLUMNS)
+    return decode_ranking(rows[0] if len(rows) > 0 else None)
+
+
+def build_rankings(conn, rows, key_columns, id_column, get_score, size=RANKING_SIZE):
+    """ Build the top-size rankings of all keys by one scan and write them into the ranking table
+
+    :param conn: the database connection
+    :type conn: aser.database.db_connection.BaseDBConnection
+    :param rows: the rows to rank, e.g., eventuality rows
+    :type rows: Iterable[Dict[str, object]]
+    :param key_columns: the key columns, e.g., ["verbs", "skeleton_words"]
+    :type key_columns: List[str]
+    :param id_column: the column of ranked ids, e.g., "_id" for eventualities and "tid" for relations
+    :type id_column: str
+    :param get_score: a function that computes the score of a row, e.g., the frequency
+    :type get_score: Callable
+    :param size: the ranking size
+    :type size: int (default = 100)
+    :return: the number of rankings of each column
+    :rtype: Dict[str, int]
+    """
+
+    if not conn.has_table(RANKING_TABLE_NAME):
+        conn.create_table(RANKING_TABLE_NAME, RANKING_COLUMNS, RANKING_COLUMN_TYPES)
+    candidates = {c: dict() for c in key_columns}
+    for row in rows:
+        item = (get_score(row), row[id_column])
+        for c in key_columns:
+            key_candidates = candidates[c].get(row[c], None)
+            if key_candidates is None:
+                candidates[c][row[c]] = [item]
+            else:
+                key_candidates.append(item)
+                # candidates are pruned in batches so that each row costs amortized O(log(size))
+                if len(key_candidates) >= 2 * size:
+                    candidates[c][row[c]] = heapq.nsmallest(size, key_candidates, key=get_ranking_key)
+
+    upsert_op = conn.get_upsert_op(["ids", "scores"], "=")
+    for c in key_columns:
+        ranking_rows = [
+            encode_ranking(get_ranking_id(c, key), heapq.nsmallest(size, key_candidates, key=get_ranking_key))
+            for key, key_candidates in candidates[c].items()
+        ]
+        ranking_rows.append(encode_ranking(c, [(float(size), "")]))
+        conn.upsert_rows(RANKING_TABLE_NAME, ranking_rows, upsert_op, ["ids", "scores"])
+    return {c: len(candidates[c]) for c in key_columns}
+
+
+def update_rankings(conn, rows, key_columns, id_column, get_score, sizes):
+    """ Merge the current scores of inserted/updated rows into the rankings of their keys
+
+    :param conn: the database connection
+    :type conn: aser.database.db_connection.BaseDBConnection
+    :param rows: the inserted/updated rows with current scores
+    :type rows: Iterable[Dict[str, object]]
+    :param key_columns: the key columns, e.g., ["verbs", "skeleton_words"]
+    :type key_columns: List[str]
+    :param id_column: the column of ranked ids, e.g., "_id" for eventualities and "tid" for relations
+    :type id_column: str
+    :param get_score: a function that computes the score of a row, e.g., the frequency
+    :type get_score: Callable
+    :param sizes: a dictionary from key columns to ranking sizes
+    :type sizes: Dict[str, int]
+    """
+
+    updates = defaultdict(dict)
+    for row in rows:
+        score = get_score(row)
+        for c in key_columns:
+            updates[(c, row[c])][row[id_column]] = score
+    if len(updates) == 0:
+        return
+    ranking_ids = [get_ranking_id(c, key) for c, key in updates]
+    rankings = {
+        row["_id"]: decode_ranking(row)
+        for row in conn.get_rows_by_key_values(RANKING_TABLE_NAME, "_id", ranking_ids, RANKING_COLUMNS)
+    }
+    ranking_rows = []
+    for ranking_id, ((c, key), key_updates) in zip(ranking_ids, updates.items()):
+        ranking_rows.append(
+            encode_ranking(ranking_id, merge_ranking(rankings.get(ranking_id, []), key_updates, sizes[c]))
+        )
+    conn.upsert_rows(RANKING_TABLE_NAME, ranking_rows, conn.get_upsert_op(["ids", "scores"], "="), ["ids", "scores"])
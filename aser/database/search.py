@@ -0,0 +1,741 @@
+import math
+import numpy as np
+from array import array
+from collections import OrderedDict
+from ..extract.utils import PRONOUN_SET
+from .columnar import ColumnarStrings, COLUMNAR_FORMAT_VERSION, hash_key, _get_index_dtype, _save_arrays, _load_arrays
+from .index import IdSet, get_file_signature, DIGEST_SIZE, DIGEST_DTYPE
+from .utils import batch_compute_overlap
+
+# MinHash permutations are (a * x + b) mod MINHASH_PRIME over 32-bit token hashes
+MINHASH_PRIME = (1 << 31) - 1
+MINHASH_SEED = 1
+# a tiny margin so that size filters do not drop candidates because of floating-point errors
+SIZE_FILTER_EPS = 1e-9
+# the columns of surface strings that are completed by prefixes
+PREFIX_COLUMNS = ["words", "skeleton_words"]
+# the number of entries whose maximum frequency is kept to find the most frequent completions
+PREFIX_BLOCK_SIZE = 64
+
+
+def get_search_tokens(words):
+    """ Get the tokens of a word list that are used to compute similarities,
+    which are consistent with `aser.database.utils.compute_overlap`
+
+    :param words: a word list or words connected by " "
+    :type words: Union[List[str], str]
+    :return: the unique tokens except pronouns
+    :rtype: List[str]
+    """
+
+    if isinstance(words, str):
+        words = words.split(" ")
+    return list(OrderedDict.fromkeys([w for w in words if w and w not in PRONOUN_SET]))
+
+
+def _get_minhash_params(num_perm):
+    rng = np.random.RandomState(MINHASH_SEED)
+    a = rng.randint(1, MINHASH_PRIME, size=num_perm).astype(np.uint64)
+    b = rng.randint(0, MINHASH_PRIME, size=num_perm).astype(np.uint64)
+    return a, b
+
+
+def _compute_minhash(token_hashes, offsets, num_perm):
+    # signatures of empty documents are MINHASH_PRIME, which never equal to hash values
+    a, b = _get_minhash_params(num_perm)
+    x = (np.asarray(token_hashes, dtype=np.uint64) & np.uint64(0xffffffff))
+    signatures = np.full((len(offsets) - 1, num_perm), MINHASH_PRIME, dtype=np.uint32)
+    nonempty = np.flatnonzero(offsets[1:] > offsets[:-1])
+    if len(x) == 0:
+        return signatures
+    for i in range(num_perm):
+        h = ((a[i] * x + b[i]) % np.uint64(MINHASH_PRIME)).astype(np.uint32)
+        signatures[nonempty, i] = np.minimum.reduceat(h, offsets[nonempty])
+    return signatures
+
+
+def _compute_band_hashes(signatures, bands):
+    rows = signatures.shape[1] // bands
+    band_hashes = np.zeros((bands, signatures.shape[0]), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for band in range(bands):
+            h = np.full(signatures.shape[0], band + 1, dtype=np.uint64)
+            for j in range(band * rows, (band + 1) * rows):
+                h = h * np.uint64(1000003) + signatures[:, j].astype(np.uint64)
+            band_hashes[band] = h
+    return band_hashes
+
+
+class SimilarityIndex(object):
+    """ Token-level inverted index of eventualities for fuzzy search by Jaccard similarity,
+    where candidates are generated by shared rare tokens (i.e., prefix filtering) or by MinHash LSH buckets,
+    and then pruned by sizes and verified by exact Jaccard similarities
+
+    """
+
+    ARRAY_NAMES = [
+        "nodes", "doc_offsets", "doc_tokens", "posting_offsets", "postings", "token_hashes", "token_hash_ids",
+        "vocab_offsets", "vocab_data"
+    ]
+    LSH_ARRAY_NAMES = ["lsh_hashes", "lsh_docs"]
+
+    def __init__(
+        self, column, nodes, doc_offsets, doc_tokens, posting_offsets, postings, token_hashes, token_hash_ids, vocab,
+        num_perm=0, bands=0, lsh_hashes=None, lsh_docs=None
+    ):
+        """
+
+        :param column: the column of tokens, e.g., "words"
+        :type column: str
+        :param nodes: the digests of eids of documents
+        :type nodes: numpy.ndarray
+        :param doc_offsets: the offsets of tokens of each document
+        :type doc_offsets: numpy.ndarray
+        :param doc_tokens: the sorted token ids of documents, where rare tokens have small ids
+        :type doc_tokens: numpy.ndarray
+        :param posting_offsets: the offsets of postings of each token
+        :type posting_offsets: numpy.ndarray
+        :param postings: the sorted document ids of each token
+        :type postings: numpy.ndarray
+        :param token_hashes: the sorted hashes of tokens
+        :type token_hashes: numpy.ndarray
+        :param token_hash_ids: the token ids in the order of token_hashes
+        :type token_hash_ids: numpy.ndarray
+        :param vocab: the tokens
+        :type vocab: aser.database.columnar.ColumnarStrings
+        :param num_perm: the number of MinHash permutations, 0 for no LSH
+        :type num_perm: int (default = 0)
+        :param bands: the number of LSH bands
+        :type bands: int (default = 0)
+        :param lsh_hashes: the sorted hashes of each band, whose shape is (#bands, #documents)
+        :type lsh_hashes: Union[numpy.ndarray, None] (default = None)
+        :param lsh_docs: the document ids in the order of lsh_hashes
+        :type lsh_docs: Union[numpy.ndarray, None] (default = None)
+        """
+
+        self.column = column
+        self.nodes = nodes
+        self.doc_offsets = doc_offsets
+        self.doc_tokens = doc_tokens
+        self.posting_offsets = posting_offsets
+        self.postings = postings
+        self.token_hashes = token_hashes
+        self.token_hash_ids = token_hash_ids
+        self.vocab = vocab
+        self.num_perm = num_perm
+        self.bands = bands
+        self.lsh_hashes = lsh_hashes
+        self.lsh_docs = lsh_docs
+
+    @property
+    def n_docs(self):
+        return len(self.nodes)
+
+    @property
+    def n_tokens(self):
+        return len(self.posting_offsets) - 1
+
+    @staticmethod
+    def build(rows, column="words", num_perm=0, bands=0):
+        """ Build a SimilarityIndex from rows of eventualities
+
+        :param rows: rows that contain "_id" and the column
+        :type rows: Iterable[Dict[str, object]]
+        :param column: the column of tokens, e.g., "words"
+        :type column: str (default = "words")
+        :param num_perm: the number of MinHash permutations, 0 for no LSH
+        :type num_perm: int (default = 0)
+        :param bands: the number of LSH bands, which must divide num_perm
+        :type bands: int (default = 0)
+        :return: the built SimilarityIndex
+        :rtype: aser.database.search.SimilarityIndex
+        """
+
+        if num_perm and (bands <= 0 or num_perm % bands != 0):
+            raise ValueError("Error: the number of bands must divide the number of permutations.")
+
+        digests = bytearray()
+        doc_offsets = array("q", [0])
+        doc_tokens = array("i")
+        token2id = dict()
+        for row in rows:
+            digest = IdSet._to_digest(row["_id"])
+            if digest is None:
+                raise ValueError("Error: the search index only supports SHA1 eids.")
+            digests += digest
+            for token in get_search_tokens(row[column]):
+                token_id = token2id.get(token, None)
+                if token_id is None:
+                    token_id = token2id[token] = len(token2id)
+                doc_tokens.append(token_id)
+            doc_offsets.append(len(doc_tokens))
+        nodes = np.frombuffer(bytes(digests), dtype=DIGEST_DTYPE)
+        doc_offsets = np.array(doc_offsets, dtype=np.int64)
+        doc_tokens = np.array(doc_tokens, dtype=np.int32)
+        n_docs, n_tokens = len(nodes), len(token2id)
+
+        # rare tokens have small ids so that prefixes of sorted tokens are rare
+        df = np.bincount(doc_tokens, minlength=n_tokens)
+        rank = np.argsort(df, kind="stable")
+        old2new = np.empty(n_tokens, dtype=np.int32)
+        old2new[rank] = np.arange(n_tokens, dtype=np.int32)
+        doc_tokens = old2new[doc_tokens]
+        doc_ids = np.repeat(np.arange(n_docs, dtype=_get_index_dtype(n_docs)), np.diff(doc_offsets))
+        order = np.lexsort((doc_tokens, doc_ids))
+        doc_tokens = doc_tokens[order]
+        vocab = list(token2id.keys())
+        vocab = ColumnarStrings.build([vocab[x] for x in rank.tolist()])
+
+        # postings are sorted by tokens and then by documents
+        order = np.argsort(doc_tokens, kind="stable")
+        postings = doc_ids[order]
+        posting_offsets = np.zeros(n_tokens + 1, dtype=np.int64)
+        np.cumsum(df[rank], out=posting_offsets[1:])
+
+        hashes = np.array([hash_key(x) for x in vocab], dtype=np.uint64)
+        token_hash_ids = np.argsort(hashes, kind="stable").astype(np.int32)
+        token_hashes = hashes[token_hash_ids]
+
+        lsh_hashes, lsh_docs = None, None
+        if num_perm:
+            signatures = _compute_minhash(hashes[doc_tokens], doc_offsets, num_perm)
+            band_hashes = _compute_band_hashes(signatures, bands)
+            lsh_docs = np.argsort(band_hashes, axis=1, kind="stable").astype(_get_index_dtype(n_docs))
+            lsh_hashes = np.take_along_axis(band_hashes, lsh_docs, axis=1)
+
+        return SimilarityIndex(
+            column, nodes, doc_offsets, doc_tokens, posting_offsets, postings, token_hashes, token_hash_ids, vocab,
+            num_perm, bands, lsh_hashes, lsh_docs
+        )
+
+    def get_token_id(self, token):
+        """ Get the id of a token
+
+        :param token: the token
+        :type token: str
+        :return: the token id, or -1 if the token does not exist
+        :rtype: int
+        """
+
+        h = np.uint64(hash_key(token))
+        st, end = self.token_hashes.searchsorted(h, side="left"), self.token_hashes.searchsorted(h, side="right")
+        # hash collisions are verified by tokens
+        for token_id in self.token_hash_ids[st:end].tolist():
+            if self.vocab[token_id] == token:
+                return token_id
+        return -1
+
+    def _get_candidates_by_prefix(self, token_ids, n_query_tokens, threshold):
+        # a document whose Jaccard similarity is at least `threshold` shares at least one token
+        # with the first |q| - ceil(threshold * |q|) + 1 rarest query tokens, where unknown tokens are the rarest
+        if threshold > 0.0:
+            n_prefix = n_query_tokens - int(math.ceil(threshold * n_query_tokens - SIZE_FILTER_EPS)) + 1
+        else:
+            n_prefix = n_query_tokens
+        n_unknown = n_query_tokens - len(token_ids)
+        prefix = token_ids[:max(n_prefix - n_unknown, 0)]
+        if len(prefix) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(
+            np.concatenate([self.postings[self.posting_offsets[x]:self.posting_offsets[x + 1]] for x in prefix.tolist()])
+        )
+
+    def _get_candidates_by_lsh(self, query_hashes):
+        signatures = _compute_minhash(
+            query_hashes, np.array([0, len(query_hashes)], dtype=np.int64), self.num_perm
+        )
+        band_hashes = _compute_band_hashes(signatures, self.bands)[:, 0]
+        candidates = []
+        for band in range(self.bands):
+            hashes = self.lsh_hashes[band]
+            st = hashes.searchsorted(band_hashes[band], side="left")
+            end = hashes.searchsorted(band_hashes[band], side="right")
+            candidates.append(self.lsh_docs[band][st:end])
+        return np.unique(np.concatenate(candidates))
+
+    def search(self, words, threshold=0.8, top_n=None, approximate=False):
+        """ Search documents whose Jaccard similarities with the words are at least the threshold
+
+        :param words: a word list or words connected by " "
+        :type words: Union[List[str], str]
+        :param threshold: the minimum Jaccard similarity
+        :type threshold: float (default = 0.8)
+        :param top_n: how many documents to return, default `None` for all documents
+        :type top_n: Union[int, None] (default = None)
+        :param approximate: whether to generate candidates by MinHash LSH buckets, which may miss some documents
+        :type approximate: bool (default = False)
+        :return: the positions of documents and their similarities, sorted in a descending order of similarities
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray]
+        """
+
+        tokens = get_search_tokens(words)
+        empty = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+        if len(tokens) == 0:
+            return empty
+        token_ids = np.array(sorted([x for x in map(self.get_token_id, tokens) if x != -1]), dtype=np.int64)
+        n_query_tokens = len(tokens)
+
+        if approximate:
+            if not self.num_perm:
+                raise ValueError("Error: the search index is built without MinHash signatures.")
+            candidates = self._get_candidates_by_lsh(np.array([hash_key(x) for x in tokens], dtype=np.uint64))
+        else:
+            candidates = self._get_candidates_by_prefix(token_ids, n_query_tokens, threshold)
+        if len(candidates) == 0:
+            return empty
+
+        # size filtering: threshold * |q| <= |d| <= |q| / threshold
+        starts = self.doc_offsets[candidates]
+        lens = self.doc_offsets[candidates + 1] - starts
+        mask = lens > 0
+        if threshold > 0.0:
+            mask &= (lens >= threshold * n_query_tokens - SIZE_FILTER_EPS)
+            mask &= (lens <= n_query_tokens / threshold + SIZE_FILTER_EPS)
+        candidates, starts, lens = candidates[mask], starts[mask], lens[mask]
+        if len(candidates) == 0:
+            return empty
+
+        # verify all candidates at once, where unknown query tokens get new ids so that they are in the union
+        total = int(lens.sum())
+        seg_offsets = np.zeros(len(lens) + 1, dtype=np.int64)
+        np.cumsum(lens, out=seg_offsets[1:])
+        positions = np.repeat(starts - seg_offsets[:-1], lens) + np.arange(total, dtype=np.int64)
+        query_ids = np.concatenate(
+            [token_ids, np.arange(self.n_tokens, self.n_tokens + n_query_tokens - len(token_ids), dtype=np.int64)]
+        )
+        similarities = batch_compute_overlap(query_ids, seg_offsets, self.doc_tokens[positions])
+
+        mask = (similarities >= threshold) & (similarities > 0)
+        candidates, similarities = candidates[mask], similarities[mask]
+        if top_n and top_n < len(candidates):
+            top = np.argpartition(-similarities, top_n - 1)[:top_n]
+            candidates, similarities = candidates[top], similarities[top]
+        order = np.lexsort((candidates, -similarities))
+        return candidates[order], similarities[order]
+
+    def get_eid(self, position):
+        return self.nodes[position].ljust(DIGEST_SIZE, b"\x00").hex()
+
+    def save(self, index_path, meta=None):
+        """ Save the SimilarityIndex as `index_path`.*.npy and `index_path`.json
+
+        :param index_path: the path prefix to save
+        :type index_path: str
+        :param meta: other information to save, e.g., the database signature
+        :type meta: Union[Dict[str, object], None] (default = None)
+        """
+
+        arrays = OrderedDict(
+            [
+                ("nodes", self.nodes), ("doc_offsets", self.doc_offsets), ("doc_tokens", self.doc_tokens),
+                ("posting_offsets", self.posting_offsets), ("postings", self.postings),
+                ("token_hashes", self.token_hashes), ("token_hash_ids", self.token_hash_ids),
+                ("vocab_offsets", self.vocab.offsets), ("vocab_data", self.vocab.data)
+            ]
+        )
+        if self.num_perm:
+            arrays["lsh_hashes"] = self.lsh_hashes
+            arrays["lsh_docs"] = self.lsh_docs
+        meta = dict(meta) if meta else dict()
+        meta.update(
+            {
+                "version": COLUMNAR_FORMAT_VERSION,
+                "column": self.column,
+                "n_docs": self.n_docs,
+                "n_tokens": self.n_tokens,
+                "num_perm": self.num_perm,
+                "bands": self.bands
+            }
+        )
+        _save_arrays(index_path, arrays, meta)
+
+    @staticmethod
+    def load(index_path, meta=None):
+        """ Load a SimilarityIndex from `index_path`.*.npy and `index_path`.json by memory mapping
+
+        :param index_path: the path prefix to load
+        :type index_path: str
+        :param meta: the information that must match the saved one, e.g., the database signature
+        :type meta: Union[Dict[str, object], None] (default = None)
+        :return: the loaded SimilarityIndex, or None if it does not exist or does not match
+        :rtype: Union[aser.database.search.SimilarityIndex, None]
+        """
+
+        saved_meta, arrays = _load_arrays(index_path, SimilarityIndex.ARRAY_NAMES)
+        if saved_meta is None:
+            return None
+        if meta:
+            for k, v in meta.items():
+                if saved_meta.get(k, None) != v:
+                    return None
+        if saved_meta["num_perm"]:
+            _, lsh_arrays = _load_arrays(index_path, SimilarityIndex.LSH_ARRAY_NAMES)
+            if lsh_arrays is None:
+                return None
+            arrays.update(lsh_arrays)
+        index = SimilarityIndex(
+            saved_meta["column"], *[arrays[name] for name in SimilarityIndex.ARRAY_NAMES[:7]],
+            ColumnarStrings(arrays["vocab_offsets"], arrays["vocab_data"]), saved_meta["num_perm"],
+            saved_meta["bands"], arrays.get("lsh_hashes", None), arrays.get("lsh_docs", None)
+        )
+        if index.n_docs != saved_meta["n_docs"] or index.n_tokens != saved_meta["n_tokens"]:
+            return None
+        return index
+
+
+def build_similarity_index(conn, db_path, table_name, column="words", num_perm=0, bands=0, index_name="search"):
+    """ Build a SimilarityIndex from an eventuality table and save it next to a SQLite database
+
+    :param conn: the database connection
+    :type conn: aser.database.db_connection.BaseDBConnection
+    :param db_path: the SQLite database path, or None for other databases
+    :type db_path: Union[str, None]
+    :param table_name: the eventuality table name
+    :type table_name: str
+    :param column: the column of tokens, e.g., "words"
+    :type column: str (default = "words")
+    :param num_perm: the number of MinHash permutations, 0 for no LSH
+    :type num_perm: int (default = 0)
+    :param bands: the number of LSH bands, which must divide num_perm
+    :type bands: int (default = 0)
+    :param index_name: the index name, which is saved as `db_path`.`index_name`.*.npy
+    :type index_name: str (default = "search")
+    :return: the SimilarityIndex
+    :rtype: aser.database.search.SimilarityIndex
+    """
+
+    similarity_index = SimilarityIndex.build(
+        conn.iter_columns(table_name, ["_id", column]), column, num_perm, bands
+    )
+    signature = get_file_signature(db_path)
+    if signature:
+        try:
+            similarity_index.save(db_path + "." + index_name, signature)
+        except OSError:
+            pass  # e.g., read-only directories
+    return similarity_index
+
+
+def load_similarity_index(db_path, index_name="search"):
+    """ Load a SimilarityIndex saved next to a SQLite database if it is up to date
+
+    :param db_path: the SQLite database path, or None for other databases
+    :type db_path: Union[str, None]
+    :param index_name: the index name, which is saved as `db_path`.`index_name`.*.npy
+    :type index_name: str (default = "search")
+    :return: the SimilarityIndex, or None if it does not exist or is out of date
+    :rtype: Union[aser.database.search.SimilarityIndex, None]
+    """
+
+    signature = get_file_signature(db_path)
+    if signature:
+        return SimilarityIndex.load(db_path + "." + index_name, signature)
+    return None
+
+
+def normalize_prefix(prefix):
+    """ Normalize a typed prefix to match words connected by " ",
+    where a trailing whitespace is kept because it ends the last word
+
+    :param prefix: the typed prefix, e.g., "i  be hun"
+    :type prefix: str
+    :return: the normalized prefix
+    :rtype: str
+    """
+
+    words = prefix.split()
+    if len(words) == 0:
+        return ""
+    return " ".join(words) + (" " if prefix[-1].isspace() else "")
+
+
+class PrefixIndex(object):
+    """ Sorted-string index of eventualities for autocompletion, where surface strings (e.g., words and skeleton_words)
+    are sorted by UTF-8 bytes so that the completions of a prefix are a contiguous range found by binary search,
+    and the most frequent completions are gathered from the blocks of the range with the highest maximum frequencies
+
+    """
+
+    ARRAY_NAMES = [
+        "nodes", "string_offsets", "entry_docs", "entry_frequencies", "block_maxima", "block_orders", "vocab_offsets",
+        "vocab_data"
+    ]
+
+    def __init__(
+        self, columns, nodes, string_offsets, entry_docs, entry_frequencies, block_maxima, block_orders, vocab,
+        block_size=PREFIX_BLOCK_SIZE
+    ):
+        """
+
+        :param columns: the columns of surface strings, e.g., ["words", "skeleton_words"]
+        :type columns: List[str]
+        :param nodes: the digests of eids of documents
+        :type nodes: numpy.ndarray
+        :param string_offsets: the offsets of entries of each string
+        :type string_offsets: numpy.ndarray
+        :param entry_docs: the document ids of entries sorted by strings
+        :type entry_docs: numpy.ndarray
+        :param entry_frequencies: the frequencies of entries
+        :type entry_frequencies: numpy.ndarray
+        :param block_maxima: the maximum frequency of each full block of entries
+        :type block_maxima: numpy.ndarray
+        :param block_orders: the entry ids of each block sorted by frequencies in a descending order
+        :type block_orders: numpy.ndarray
+        :param vocab: the sorted unique strings
+        :type vocab: aser.database.columnar.ColumnarStrings
+        :param block_size: the number of entries of each block
+        :type block_size: int (default = 64)
+        """
+
+        self.columns = columns
+        self.nodes = nodes
+        self.string_offsets = string_offsets
+        self.entry_docs = entry_docs
+        self.entry_frequencies = entry_frequencies
+        self.block_maxima = block_maxima
+        self.block_orders = block_orders
+        self.vocab = vocab
+        self.block_size = block_size
+
+    @property
+    def n_docs(self):
+        return len(self.nodes)
+
+    @property
+    def n_entries(self):
+        return len(self.entry_docs)
+
+    @staticmethod
+    def build(rows, columns=PREFIX_COLUMNS, block_size=PREFIX_BLOCK_SIZE):
+        """ Build a PrefixIndex from rows of eventualities
+
+        :param rows: rows that contain "_id", "frequency", and the columns
+        :type rows: Iterable[Dict[str, object]]
+        :param columns: the columns of surface strings
+        :type columns: List[str] (default = ["words", "skeleton_words"])
+        :param block_size: the number of entries of each block
+        :type block_size: int (default = 64)
+        :return: the built PrefixIndex
+        :rtype: aser.database.search.PrefixIndex
+        """
+
+        digests = bytearray()
+        frequencies = array("d")
+        entry_docs = array("q")
+        entry_strings = array("q")
+        string2id = dict()
+        for doc_id, row in enumerate(rows):
+            digest = IdSet._to_digest(row["_id"])
+            if digest is None:
+                raise ValueError("Error: the prefix index only supports SHA1 eids.")
+            digests += digest
+            frequencies.append(row["frequency"])
+            # a string is indexed once even if it is in several columns
+            for string in OrderedDict.fromkeys([row[c] for c in columns]):
+                string_id = string2id.get(string, None)
+                if string_id is None:
+                    string_id = string2id[string] = len(string2id)
+                entry_docs.append(doc_id)
+                entry_strings.append(string_id)
+        nodes = np.frombuffer(bytes(digests), dtype=DIGEST_DTYPE)
+        n_docs, n_strings = len(nodes), len(string2id)
+        doc_dtype = _get_index_dtype(n_docs)
+
+        # the code point order of strings is the same as the UTF-8 byte order
+        strings = sorted(string2id.keys())
+        old2new = np.empty(n_strings, dtype=np.int64)
+        old2new[np.array([string2id[x] for x in strings], dtype=np.int64)] = np.arange(n_strings, dtype=np.int64)
+        entry_strings = old2new[np.array(entry_strings, dtype=np.int64)]
+        order = np.argsort(entry_strings, kind="stable")
+        entry_docs = np.array(entry_docs, dtype=doc_dtype)[order]
+        entry_frequencies = np.array(frequencies, dtype=np.float64)[entry_docs]
+        string_offsets = np.zeros(n_strings + 1, dtype=np.int64)
+        np.cumsum(np.bincount(entry_strings, minlength=n_strings), out=string_offsets[1:])
+
+        # entries of each block are sorted by frequencies in a descending order and then by positions
+        n_entries = len(entry_docs)
+        entry_ids = np.arange(n_entries, dtype=_get_index_dtype(n_entries))
+        block_orders = entry_ids[np.lexsort((entry_ids, -entry_frequencies, entry_ids // block_size))]
+        n_blocks = n_entries // block_size
+        block_maxima = entry_frequencies[block_orders[:n_blocks * block_size:block_size]]
+
+        return PrefixIndex(
+            list(columns), nodes, string_offsets, entry_docs, entry_frequencies, block_maxima, block_orders,
+            ColumnarStrings.build(strings), block_size
+        )
+
+    def _bisect(self, prefix, right=False):
+        # the first string whose leading bytes are not less than (or greater than) the prefix
+        offsets, data = self.vocab.offsets, self.vocab.data
+        lo, hi = 0, len(self.vocab)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            st = int(offsets[mid])
+            head = data[st:min(int(offsets[mid + 1]), st + len(prefix))].tobytes()
+            if head < prefix or (right and head == prefix):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def get_entry_range(self, prefix):
+        """ Get the range of entries whose strings start with a prefix
+
+        :param prefix: the prefix
+        :type prefix: str
+        :return: the first entry and the entry after the last one
+        :rtype: Tuple[int, int]
+        """
+
+        prefix = prefix.encode("utf-8")
+        st, end = self._bisect(prefix), self._bisect(prefix, right=True)
+        return int(self.string_offsets[st]), int(self.string_offsets[end])
+
+    def complete(self, prefix, top_n=10):
+        """ Find the most frequent documents whose strings start with a prefix
+
+        :param prefix: the prefix, e.g., "i be hun"
+        :type prefix: str
+        :param top_n: how many documents to return, default `None` for all documents
+        :type top_n: Union[int, None] (default = 10)
+        :return: the positions of documents and their frequencies, sorted by frequencies in a descending order
+            (ties are sorted by strings)
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray]
+        """
+
+        st, end = self.get_entry_range(normalize_prefix(prefix))
+        if top_n is not None and top_n <= 0:
+            end = st
+        # a document has at most one entry per column
+        k = top_n * len(self.columns) if top_n is not None else None
+        block_st = -(-st // self.block_size)
+        block_end = end // self.block_size
+        if k is None or end - st <= k or block_st >= block_end:
+            candidates = np.arange(st, end)
+        else:
+            # the top-k entries are in the k blocks with the highest maxima (ties are broken by positions)
+            maxima = self.block_maxima[block_st:block_end]
+            if len(maxima) > k:
+                kth = np.partition(maxima, len(maxima) - k)[len(maxima) - k]
+                above = np.flatnonzero(maxima > kth)
+                blocks = np.concatenate([above, np.flatnonzero(maxima == kth)[:k - len(above)]]) + block_st
+            else:
+                blocks = np.arange(block_st, block_end)
+            width = min(k, self.block_size)
+            candidates = np.concatenate(
+                [
+                    np.arange(st, block_st * self.block_size),
+                    self.block_orders[(blocks[:, None] * self.block_size + np.arange(width)).ravel()],
+                    np.arange(block_end * self.block_size, end)
+                ]
+            )
+        frequencies = self.entry_frequencies[candidates]
+        order = np.lexsort((candidates, -frequencies))
+        docs, frequencies = self.entry_docs[candidates[order]], frequencies[order]
+        # keep the first entry of each document
+        _, first = np.unique(docs, return_index=True)
+        first.sort()
+        return docs[first][:top_n], frequencies[first][:top_n]
+
+    def get_eid(self, position):
+        return self.nodes[position].ljust(DIGEST_SIZE, b"\x00").hex()
+
+    def save(self, index_path, meta=None):
+        """ Save the PrefixIndex as `index_path`.*.npy and `index_path`.json
+
+        :param index_path: the path prefix to save
+        :type index_path: str
+        :param meta: other information to save, e.g., the database signature
+        :type meta: Union[Dict[str, object], None] (default = None)
+        """
+
+        arrays = OrderedDict(
+            [
+                ("nodes", self.nodes), ("string_offsets", self.string_offsets), ("entry_docs", self.entry_docs),
+                ("entry_frequencies", self.entry_frequencies), ("block_maxima", self.block_maxima),
+                ("block_orders", self.block_orders), ("vocab_offsets", self.vocab.offsets),
+                ("vocab_data", self.vocab.data)
+            ]
+        )
+        meta = dict(meta) if meta else dict()
+        meta.update(
+            {
+                "version": COLUMNAR_FORMAT_VERSION,
+                "columns": self.columns,
+                "n_docs": self.n_docs,
+                "n_entries": self.n_entries,
+                "block_size": self.block_size
+            }
+        )
+        _save_arrays(index_path, arrays, meta)
+
+    @staticmethod
+    def load(index_path, meta=None):
+        """ Load a PrefixIndex from `index_path`.*.npy and `index_path`.json by memory mapping
+
+        :param index_path: the path prefix to load
+        :type index_path: str
+        :param meta: the information that must match the saved one, e.g., the database signature
+        :type meta: Union[Dict[str, object], None] (default = None)
+        :return: the loaded PrefixIndex, or None if it does not exist or does not match
+        :rtype: Union[aser.database.search.PrefixIndex, None]
+        """
+
+        saved_meta, arrays = _load_arrays(index_path, PrefixIndex.ARRAY_NAMES)
+        if saved_meta is None:
+            return None
+        if meta:
+            for k, v in meta.items():
+                if saved_meta.get(k, None) != v:
+                    return None
+        index = PrefixIndex(
+            saved_meta["columns"], *[arrays[name] for name in PrefixIndex.ARRAY_NAMES[:6]],
+            ColumnarStrings(arrays["vocab_offsets"], arrays["vocab_data"]), saved_meta["block_size"]
+        )
+        if index.n_docs != saved_meta["n_docs"] or index.n_entries != saved_meta["n_entries"]:
+            return None
+        return index
+
+
+def build_prefix_index(conn, db_path, table_name, columns=PREFIX_COLUMNS, index_name="prefix"):
+    """ Build a PrefixIndex from an eventuality table and save it next to a SQLite database
+
+    :param conn: the database connection
+    :type conn: aser.database.db_connection.BaseDBConnection
+    :param db_path: the SQLite database path, or None for other databases
+    :type db_path: Union[str, None]
+    :param table_name: the eventuality table name
+    :type table_name: str
+    :param columns: the columns of surface strings
+    :type columns: List[str] (default = ["words", "skeleton_words"])
+    :param index_name: the index name, which is saved as `db_path`.`index_name`.*.npy
+    :type index_name: str (default = "prefix")
+    :return: the PrefixIndex
+    :rtype: aser.database.search.PrefixIndex
+    """
+
+    prefix_index = PrefixIndex.build(conn.iter_columns(table_name, ["_id", "frequency"] + list(columns)), columns)
+    signature = get_file_signature(db_path)
+    if signature:
+        try:
+            prefix_index.save(db_path + "." + index_name, signature)
+        except OSError:
+            pass  # e.g., read-only directories
+    return prefix_index
+
+
+def load_prefix_index(db_path, index_name="prefix"):
+    """ Load a PrefixIndex saved next to a SQLite database if it is up to date
+
+    :param db_path: the SQLite database path, or None for other databases
+    :type db_path: Union[str, None]
+    :param index_name: the index name, which is saved as `db_path`.`index_name`.*.npy
+    :type index_name: str (default = "prefix")
+    :return: the PrefixIndex, or None if it does not exist or is out of date
+    :rtype: Union[aser.database.search.PrefixIndex, None]
+    """
+
+    signature = get_file_signature(db_path)
+    if signature:
+        return PrefixIndex.load(db_path + "." + index_name, signature)
+    return None
@@ -0,0 +1,646 @@
+import random
+import zlib
+import numpy as np
+from collections import OrderedDict
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor
+from ..eventuality import Eventuality
+from ..relation import Relation, relation_senses
+from ..database.kg_connection import ASERKGConnection, FULLTEXT_FREQUENCY_WEIGHT, _sort_related_pairs
+from ..database.ranking import RANKING_SIZE
+from ..database.traversal import get_frontier_edges, expand, find_paths, MAX_DEGREE
+from ..database.utils import compute_overlaps, rank_top_k
+
+
+def get_shard_index(_id, n_shards):
+    """ Get the shard of an id, where SHA1 ids are routed by their leading 32 bits and other ids by CRC32
+
+    :param _id: the id (e.g., eid)
+    :type _id: str
+    :param n_shards: the number of shards
+    :type n_shards: int
+    :return: the shard index
+    :rtype: int
+    """
+
+    try:
+        return int(_id[:8], 16) % n_shards
+    except ValueError:
+        return zlib.crc32(_id.encode("utf-8")) % n_shards
+
+
+def _get_eid(eventuality):
+    if isinstance(eventuality, Eventuality):
+        return eventuality.eid
+    elif isinstance(eventuality, dict):
+        return eventuality["eid"]
+    elif isinstance(eventuality, str):
+        return eventuality
+    else:
+        raise ValueError("Error: eventuality should a instance of Eventuality, or eid.")
+
+
+def _get_value(x, column):
+    if isinstance(x, dict):
+        return x[column]
+    if isinstance(x, Relation) and column in relation_senses:
+        return x.relations.get(column, 0.0)
+    return getattr(x, column)
+
+
+def _get_id(x):
+    if isinstance(x, dict):
+        return x.get("_id", "")
+    if isinstance(x, Relation):
+        return x.rid
+    return getattr(x, "eid", "")
+
+
+def _merge_sorted_results(results, order_bys=None, reverse=False, top_n=None):
+    merged = [x for result in results for x in result]
+    if order_bys:
+        # ties are broken by ids in an ascending order, which is the same as each shard
+        merged.sort(key=_get_id)
+        merged.sort(key=lambda x: [_get_value(x, c) for c in order_bys], reverse=reverse)
+    if top_n:
+        merged = merged[:top_n]
+    return merged
+
+
+def _get_related_relations(conn, eid, top_k=None, senses=None):
+    # relations are sorted by the total weight in an ascending order
+    if conn.adjacency_index is not None:
+        related_relations = [
+            Relation(eid, tid, relations)
+            for tid, relations in conn.adjacency_index.get_neighbors(eid, "out", top_k, senses)
+        ]
+        related_relations.reverse()
+        return related_relations
+    related_relations = conn._get_ranked_relations(eid, top_k, senses)
+    if related_relations is not None:
+        return related_relations
+    related_relations = conn.get_relations_by_keys(bys=["hid"], keys=[eid])
+    return [x[1] for x in _sort_related_pairs([(None, r) for r in related_relations], top_k, senses)]
+
+
+class ShardedEdges(object):
+    """ Frontier edges of a sharded KG, which are fetched from shards in parallel
+    (traversal functions fetch edges from `adjacency_index.get_edges`)
+
+    """
+    def __init__(self, sharded_conn):
+        """
+
+        :param sharded_conn: the sharded KG connection
+        :type sharded_conn: aser.database.sharded_kg_connection.ShardedASERKGConnection
+        """
+
+        self.sharded_conn = sharded_conn
+
+    def get_edges(self, ids, direction="out"):
+        """ Get all edges of multiple nodes from shards
+
+        :param ids: the node ids (i.e., eids)
+        :type ids: List[str]
+        :param direction: "out" for outgoing edges, "in" for incoming edges
+        :type direction: str (default = "out")
+        :return: positions of source nodes in `ids`, ids of neighbors, and sense weights of edges
+        :rtype: Tuple[numpy.ndarray, List[str], numpy.ndarray]
+        """
+
+        if direction == "out":
+            # outgoing edges are stored with their heads
+            shard2positions = self.sharded_conn._group_by_shard(ids)
+        elif direction == "in":
+            shard2positions = OrderedDict([(i, list(range(len(ids)))) for i in range(self.sharded_conn.n_shards)])
+        else:
+            raise ValueError("Error: only support out/in directions.")
+        shard2edges = self.sharded_conn._map_shards(
+            lambda conn, positions: get_frontier_edges(conn, [ids[p] for p in positions], direction), shard2positions
+        )
+        sources, neighbor_ids, weights = [], [], []
+        for i, (shard_sources, shard_neighbor_ids, shard_weights) in shard2edges.items():
+            sources.append(np.array(shard2positions[i], dtype=np.int64)[shard_sources])
+            neighbor_ids.extend(shard_neighbor_ids)
+            weights.append(shard_weights)
+        if len(sources) == 0:
+            return np.zeros(0, dtype=np.int64), [], np.zeros((0, len(relation_senses)), dtype=np.float64)
+        return np.concatenate(sources), neighbor_ids, np.concatenate(weights, axis=0)
+
+
+class ShardedASERKGConnection(object):
+    """ KG connection over hash-sharded SQLite files, where eventualities are routed by eids,
+    relations are routed by hids (so that relations are stored with their heads),
+    and each shard is served by a dedicated thread
+
+    """
+    def __init__(self, db_paths, **kwargs):
+        """
+
+        :param db_paths: the database paths of shards, whose order must be kept across connections
+        :type db_paths: List[str]
+        :param kwargs: the parameters of `aser.database.kg_connection.ASERKGConnection` for every shard, e.g., mode
+        :type kwargs: Dict[str, object]
+        """
+
+        if len(db_paths) == 0:
+            raise ValueError("Error: at least one shard is required.")
+        self.db_paths = list(db_paths)
+        self.n_shards = len(self.db_paths)
+        # each shard is only used by its own thread so that SQLite connections are not shared across threads
+        self._executors = [ThreadPoolExecutor(max_workers=1) for _ in range(self.n_shards)]
+        futures = [
+            executor.submit(ASERKGConnection, db_path, **kwargs)
+            for executor, db_path in zip(self._executors, self.db_paths)
+        ]
+        self.shards = [future.result() for future in futures]
+        self.mode = self.shards[0].mode
+        self.grain = self.shards[0].grain
+        self.adjacency_index = ShardedEdges(self)
+
+    def _group_by_shard(self, ids):
+        shard2positions = OrderedDict()
+        for idx, _id in enumerate(ids):
+            shard_idx = get_shard_index(_id, self.n_shards)
+            if shard_idx not in shard2positions:
+                shard2positions[shard_idx] = [idx]
+            else:
+                shard2positions[shard_idx].append(idx)
+        return shard2positions
+
+    def _map_shards(self, func, shard2args=None):
+        """ Call `func(shard, args)` on shards in parallel
+
+        :param func: the function to call
+        :type func: Callable
+        :param shard2args: a dictionary from shard indices to arguments (a single argument is not packed),
+            default `None` to call `func(shard)` on all shards
+        :type shard2args: Union[Dict[int, object], None] (default = None)
+        :return: a dictionary from shard indices to results
+        :rtype: Dict[int, object]
+        """
+
+        if shard2args is None:
+            futures = [(i, self._executors[i].submit(func, self.shards[i])) for i in range(self.n_shards)]
+        else:
+            futures = [(i, self._executors[i].submit(func, self.shards[i], args)) for i, args in shard2args.items()]
+        return OrderedDict([(i, future.result()) for i, future in futures])
+
+    def _map_routed(self, func, ids, items):
+        """ Route items to shards by ids, call `func(shard, shard_items)` in parallel, and merge results in order
+        """
+
+        shard2positions = self._group_by_shard(ids)
+        shard2results = self._map_shards(
+            func, OrderedDict([(i, [items[p] for p in positions]) for i, positions in shard2positions.items()])
+        )
+        results = [None] * len(items)
+        for i, positions in shard2positions.items():
+            for p, result in zip(positions, shard2results[i]):
+                results[p] = result
+        return results
+
+    def create_indices(self):
+        """ Create missing secondary indices of all shards
+
+        """
+
+        self._map_shards(lambda conn: conn.create_indices())
+
+    def build_adjacency_index(self):
+        """ Build the CSR adjacency index of relations of each shard
+
+        :return: the sharded edges
+        :rtype: aser.database.sharded_kg_connection.ShardedEdges
+        """
+
+        self._map_shards(lambda conn: conn.build_adjacency_index())
+        return self.adjacency_index
+
+    def build_rankings(self, size=RANKING_SIZE):
+        """ Build the materialized rankings of each shard, where eventualities are ranked within their own shards
+        and merged by `get_eventualities_by_keys`, and tails are ranked in the shard of their heads
+
+        :param size: the ranking size, i.e., the largest top_n/top_k served by rankings
+        :type size: int (default = 100)
+        :return: the number of rankings of each key column of all shards
+        :rtype: Dict[str, int]
+        """
+
+        n_rankings = dict()
+        for shard_n_rankings in self._map_shards(lambda conn: conn.build_rankings(size)).values():
+            for k, v in shard_n_rankings.items():
+                n_rankings[k] = n_rankings.get(k, 0) + v
+        return n_rankings
+
+    def get_cache_stats(self):
+        """ Get the hit/miss/eviction statistics of caches of all shards in the "cache" mode
+
+        :return: a dictionary from cache names (prefixed by shard indices) to statistics
+        :rtype: Dict[str, Dict[str, Union[int, float]]]
+        """
+
+        stats = OrderedDict()
+        for i, shard_stats in self._map_shards(lambda conn: conn.get_cache_stats()).items():
+            for name, cache_stats in shard_stats.items():
+                stats["%d.%s" % (i, name)] = cache_stats
+        return stats
+
+    def reset_cache_stats(self):
+        """ Reset the hit/miss/eviction statistics of caches of all shards in the "cache" mode
+
+        """
+
+        self._map_shards(lambda conn: conn.reset_cache_stats())
+
+    def close(self):
+        """ Close all shards safely
+
+        """
+
+        if self.shards:
+            self._map_shards(lambda conn: conn.close())
+            self.shards = []
+            for executor in self._executors:
+                executor.shutdown()
+            self._executors = []
+
+    """
+    KG (Eventualities)
+    """
+
+    def get_eventuality_columns(self, columns):
+        """ Get column information from eventualities of all shards
+
+        :param columns: the columns to retrieve
+        :type columns: List[str]
+        :return: a list of retrieved rows
+        :rtype: List[Dict[str, object]]
+        """
+
+        return _merge_sorted_results(self._map_shards(lambda conn: conn.get_eventuality_columns(columns)).values())
+
+    def insert_eventuality(self, eventuality):
+        """ Insert/Update an eventuality into the shard of its eid
+
+        :param eventuality: an eventuality to insert/update
+        :type eventuality: aser.eventuality.Eventuality
+        :return: the inserted/updated eventuality
+        :rtype: aser.eventuality.Eventuality
+        """
+
+        return self.insert_eventualities([eventuality])[0]
+
+    def insert_eventualities(self, eventualities):
+        """ Insert/Update eventualities into shards in parallel
+
+        :param eventualities: eventualities to insert/update
+        :type eventualities: List[aser.eventuality.Eventuality]
+        :return: the inserted/updated eventualities
+        :rtype: List[aser.eventuality.Eventuality]
+        """
+
+        return self._map_routed(
+            lambda conn, x: conn.insert_eventualities(x), [e.eid for e in eventualities], eventualities
+        )
+
+    def get_exact_match_eventuality(self, eventuality):
+        """ Retrieve an exact matched eventuality from its shard
+
+        :param eventuality: an eventuality that contains the eid
+        :type eventuality: Union[aser.eventuality.Eventuality, Dict[str, object], str]
+        :return: the exact matched eventuality
+        :rtype: aser.eventuality.Eventuality
+        """
+
+        return self.get_exact_match_eventualities([eventuality])[0]
+
+    def get_exact_match_eventualities(self, eventualities, columns=None):
+        """ Retrieve multiple exact matched eventualities from shards in parallel
+
+        :param eventualities: eventualities
+        :type eventualities: Union[List[aser.eventuality.Eventuality], List[Dict[str, object]], List[str]]
+        :param columns: the columns to retrieve as rows without building eventualities, default `None` for eventualities
+        :type columns: Union[List[str], None] (default = None)
+        :return: the exact matched eventualities (or rows if columns are given)
+        :rtype: Union[List[aser.eventuality.Eventuality], List[Dict[str, object]]]
+        """
+
+        eids = [_get_eid(eventuality) for eventuality in eventualities]
+        return self._map_routed(lambda conn, x: conn.get_exact_match_eventualities(x, columns), eids, eids)
+
+    def get_eventualities_by_keys(self, bys, keys, order_bys=None, reverse=False, top_n=None, columns=None):
+        """ Retrieve multiple eventualities by keys from all shards in parallel
+
+        :param bys: the given columns to match
+        :type bys: List[str]
+        :param keys: the given values to match
+        :type keys: List[str]
+        :param order_bys: the columns whose value are used to sort rows
+        :type order_bys: List[str]
+        :param reverse: whether to sort in a reversed order
+        :type reverse: bool
+        :param top_n: how many eventualities to return, default `None` for all eventualities
+        :type top_n: int
+        :param columns: the columns to retrieve as rows without building eventualities, default `None` for eventualities
+        :type columns: Union[List[str], None] (default = None)
+        :return: the partially matched eventualities (or rows if columns are given)
+        :rtype: Union[List[aser.eventuality.Eventuality], List[Dict[str, object]]]
+        """
+
+        # each shard gets its own lists because unknown columns are popped in place
+        return _merge_sorted_results(
+            self._map_shards(
+                lambda conn: conn.get_eventualities_by_keys(list(bys), list(keys), order_bys, reverse, top_n, columns)
+            ).values(), order_bys, reverse, top_n
+        )
+
+    def get_partial_match_eventualities(self, eventuality, bys, top_n=None, threshold=0.8, sort=True):
+        """ Retrieve multiple partial matched eventualities by a given eventuality and properties from all shards
+
+        :param eventuality: the given eventuality to match
+        :type eventuality: aser.eventuality.Eventuality
+        :param bys: the given properties to match
+        :type bys: List[str]
+        :param top_n: how many eventualities to return, default `None` for all eventualities
+        :type top_n: Union[int, None] (default = None)
+        :param threshold: the minimum similarity
+        :type threshold: float (default = 0.8)
+        :param sort: whether to sort
+        :type sort: bool (default = True)
+        :return: the partially matched eventualities with similarities if sort is True, otherwise eventualities
+        :rtype: Union[List[Tuple[float, aser.eventuality.Eventuality]], List[aser.eventuality.Eventuality]]
+        """
+
+        # exact match by skeleton_words, skeleton_words_clean or verbs, and compute similarity according type
+        for by in bys:
+            key_match_eventualities = self.get_eventualities_by_keys([by], [" ".join(getattr(eventuality, by))])
+            if len(key_match_eventualities) == 0:
+                continue
+            if not sort:
+                if top_n and len(key_match_eventualities) > top_n:
+                    return random.sample(key_match_eventualities, top_n)
+                else:
+                    return key_match_eventualities
+            # sort by (similarity, frequency, idx)
+            similarities = compute_overlaps(
+                getattr(eventuality, self.grain), [getattr(x, self.grain) for x in key_match_eventualities]
+            )
+            indices = rank_top_k(similarities, [x.frequency for x in key_match_eventualities], top_n, threshold)
+            return list(zip(similarities[indices].tolist(), [key_match_eventualities[idx] for idx in indices]))
+        return []
+
+    def search_eventualities(
+        self, query, top_n=10, patterns=None, match_all=False, frequency_weight=FULLTEXT_FREQUENCY_WEIGHT
+    ):
+        """ Retrieve eventualities whose words contain the query terms from all shards,
+        where BM25 scores are computed by the statistics of each shard
+
+        :param query: the query terms, or terms connected by whitespaces, e.g., "umbrella rain"
+        :type query: Union[str, List[str]]
+        :param top_n: how many eventualities to return, default `None` for all matched eventualities
+        :type top_n: Union[int, None] (default = 10)
+        :param patterns: only return eventualities of these patterns, default `None` for all patterns
+        :type patterns: Union[List[str], None] (default = None)
+        :param match_all: whether eventualities must contain all terms, otherwise any term
+        :type match_all: bool (default = False)
+        :param frequency_weight: the weight of the frequency prior, 0.0 for the pure BM25
+        :type frequency_weight: float (default = 0.1)
+        :return: the matched eventualities with scores, sorted by scores in a descending order
+        :rtype: List[Tuple[float, aser.eventuality.Eventuality]]
+        """
+
+        results = list(
+            chain.from_iterable(
+                self._map_shards(
+                    lambda conn: conn.search_eventualities(query, top_n, patterns, match_all, frequency_weight)
+                ).values()
+            )
+        )
+        results.sort(key=lambda x: x[0], reverse=True)
+        return results[:top_n] if top_n else results
+
+    def complete_eventualities(self, prefix, top_n=10):
+        """ Retrieve the most frequent eventualities whose words or skeleton_words start with a typed prefix
+        from all shards, where each shard completes the prefix by its own prefix index
+
+        :param prefix: the typed prefix, e.g., "i be hun"
+        :type prefix: str
+        :param top_n: how many eventualities to return, default `None` for all completed eventualities
+        :type top_n: Union[int, None] (default = 10)
+        :return: the completed eventualities, sorted by frequencies in a descending order
+        :rtype: List[aser.eventuality.Eventuality]
+        """
+
+        return _merge_sorted_results(
+            self._map_shards(lambda conn: conn.complete_eventualities(prefix, top_n)).values(), ["frequency"], True,
+            top_n
+        )
+
+    """
+    KG (Relations)
+    """
+
+    def get_relation_columns(self, columns):
+        """ Get column information from relations of all shards
+
+        :param columns: the columns to retrieve
+        :type columns: List[str]
+        :return: a list of retrieved rows
+        :rtype: List[Dict[str, object]]
+        """
+
+        return _merge_sorted_results(self._map_shards(lambda conn: conn.get_relation_columns(columns)).values())
+
+    def insert_relation(self, relation):
+        """ Insert/Update a relation into the shard of its hid
+
+        :param relation: a relation to insert/update
+        :type relation: aser.relation.Relation
+        :return: the inserted/updated relation
+        :rtype: aser.relation.Relation
+        """
+
+        return self.insert_relations([relation])[0]
+
+    def insert_relations(self, relations):
+        """ Insert/Update relations into shards in parallel
+
+        :param relations: relations to insert/update
+        :type relations: List[aser.relation.Relation]
+        :return: the inserted/updated relations
+        :rtype: List[aser.relation.Relation]
+        """
+
+        return self._map_routed(lambda conn, x: conn.insert_relations(x), [r.hid for r in relations], relations)
+
+    def get_exact_match_relation(self, relation):
+        """ Retrieve an exact matched relation from shards
+
+        :param relation: a relation that contains the rid or an eventuality pair that contains two eids
+        :type relation: Union[aser.relation.Relation, Dict[str, object], str, Tuple[aser.eventuality.Eventuality, aser.eventuality.Eventuality], Tuple[str, str]]
+        :return: the exact matched relation
+        :rtype: aser.relation.Relation
+        """
+
+        return self.get_exact_match_relations([relation])[0]
+
+    def get_exact_match_relations(self, relations):
+        """ Retrieve exact matched relations from all shards in parallel
+        (rids do not carry hids, so that every shard checks its own rid set)
+
+        :param relations: a relations that contain the rids or eventuality pairs each of which contains two eids
+        :type relations: Union[List[aser.relation.Relation], List[Dict[str, object]], List[str], List[Tuple[aser.eventuality.Eventuality, aser.eventuality.Eventuality]], List[Tuple[str, str]]]
+        :return: the exact matched relations
+        :rtype: List[aser.relation.Relation]
+        """
+
+        exact_match_relations = [None] * len(relations)
+        for shard_relations in self._map_shards(lambda conn: conn.get_exact_match_relations(relations)).values():
+            for idx, relation in enumerate(shard_relations):
+                if relation is not None:
+                    exact_match_relations[idx] = relation
+        return exact_match_relations
+
+    def get_relations_by_keys(self, bys, keys, order_bys=None, reverse=False, top_n=None):
+        """ Retrieve multiple relations by keys from all shards in parallel
+
+        :param bys: the given columns to match
+        :type bys: List[str]
+        :param keys: the given values to match
+        :type keys: List[str]
+        :param order_bys: the columns whose value are used to sort rows
+        :type order_bys: List[str]
+        :param reverse: whether to sort in a reversed order
+        :type reverse: bool
+        :param top_n: how many relations to return, default `None` for all relations
+        :type top_n: int
+        :return: the partially matched relations
+        :rtype: List[aser.relation.Relation]
+        """
+
+        if "hid" in bys:
+            # relations of a head are stored in one shard
+            shard_idx = get_shard_index(keys[bys.index("hid")], self.n_shards)
+            return self._executors[shard_idx].submit(
+                self.shards[shard_idx].get_relations_by_keys, bys, keys, order_bys, reverse, top_n
+            ).result()
+        return _merge_sorted_results(
+            self._map_shards(
+                lambda conn: conn.get_relations_by_keys(list(bys), list(keys), order_bys, reverse, top_n)
+            ).values(), order_bys, reverse, top_n
+        )
+
+    """
+    Additional APIs
+    """
+
+    def get_related_eventualities(self, eventuality, top_k=None, senses=None):
+        """ Retrieve related (connected) eventualities, where relations come from the shard of the head
+        and tails come from their own shards
+
+        :param eventuality: an eventuality that contains the eid
+        :type eventuality: Union[aser.eventuality.Eventuality, Dict[str, object], str]
+        :param top_k: how many related eventualities with the heaviest relations to return, default `None` for all
+        :type top_k: Union[int, None] (default = None)
+        :param senses: only return eventualities connected by these relation senses, default `None` for all senses
+        :type senses: Union[List[str], None] (default = None)
+        :return: the related eventualities, sorted by the total weight of relations in an ascending order
+        :rtype: List[Tuple[aser.eventuality.Eventuality, aser.relation.Relation]]
+        """
+
+        if self.mode in ["insert", "upsert"]:
+            return []
+        eid = _get_eid(eventuality)
+        shard_idx = get_shard_index(eid, self.n_shards)
+        related_relations = self._executors[shard_idx].submit(
+            _get_related_relations, self.shards[shard_idx], eid, top_k, senses
+        ).result()
+        t_eventualities = self.get_exact_match_eventualities([x.tid for x in related_relations])
+        return list(zip(t_eventualities, related_relations))
+
+    def get_predecessor_eventualities(self, eventuality, top_k=None, senses=None):
+        """ Retrieve predecessor eventualities (i.e., heads of relations whose tails are the given eventuality) from all shards
+        (suggestion: consider to use `get_batch_predecessor_eventualities` if you want to retrieve predecessors of multiple eventualities)
+
+        :param eventuality: an eventuality that contains the eid
+        :type eventuality: Union[aser.eventuality.Eventuality, Dict[str, object], str]
+        :param top_k: how many predecessor eventualities with the heaviest relations to return, default `None` for all
+        :type top_k: Union[int, None] (default = None)
+        :param senses: only return eventualities connected by these relation senses, default `None` for all senses
+        :type senses: Union[List[str], None] (default = None)
+        :return: the predecessor eventualities, sorted by the total weight of relations in an ascending order
+        :rtype: List[Tuple[aser.eventuality.Eventuality, aser.relation.Relation]]
+        """
+
+        return self.get_batch_predecessor_eventualities([eventuality], top_k, senses)[0]
+
+    def get_batch_predecessor_eventualities(self, eventualities, top_k=None, senses=None):
+        """ Retrieve predecessor eventualities of multiple eventualities from all shards in parallel
+        (heads are stored with their relations, so that each shard returns complete pairs)
+
+        :param eventualities: eventualities that contain eids
+        :type eventualities: List[Union[aser.eventuality.Eventuality, Dict[str, object], str]]
+        :param top_k: how many predecessor eventualities with the heaviest relations to return for each eventuality, default `None` for all
+        :type top_k: Union[int, None] (default = None)
+        :param senses: only return eventualities connected by these relation senses, default `None` for all senses
+        :type senses: Union[List[str], None] (default = None)
+        :return: the predecessor eventualities of each eventuality, sorted by the total weight of relations in an ascending order
+        :rtype: List[List[Tuple[aser.eventuality.Eventuality, aser.relation.Relation]]]
+        """
+
+        eids = [_get_eid(eventuality) for eventuality in eventualities]
+        results = [[] for _ in range(len(eids))]
+        for shard_results in self._map_shards(
+            lambda conn: conn.get_batch_predecessor_eventualities(eids, top_k, senses)
+        ).values():
+            for idx, pairs in enumerate(shard_results):
+                results[idx].extend(pairs)
+        return [_sort_related_pairs(pairs, top_k, senses) for pairs in results]
+
+    def expand(self, seeds, hops=1, senses=None, top_k_per_hop=None, min_weight=0.0, direction="out"):
+        """ Expand seed eventualities into a subgraph hop by hop, where each hop fetches edges from shards in parallel
+
+        :param seeds: the eventualities to start from
+        :type seeds: List[Union[aser.eventuality.Eventuality, Dict[str, object], str]]
+        :param hops: the number of hops
+        :type hops: int (default = 1)
+        :param senses: only follow relations with these senses and weight them by these senses, default `None` for all senses
+        :type senses: Union[List[str], None] (default = None)
+        :param top_k_per_hop: how many heaviest relations of each frontier eventuality to follow at each hop, default `None` for all
+        :type top_k_per_hop: Union[int, None] (default = None)
+        :param min_weight: relations whose weights are less than this value are pruned
+        :type min_weight: float (default = 0.0)
+        :param direction: "out" to follow heads to tails, "in" to follow tails to heads, "both" for both
+        :type direction: str (default = "out")
+        :return: the expanded subgraph, whose ids are eids
+        :rtype: aser.database.traversal.ASERSubgraph
+        """
+
+        eids = [_get_eid(eventuality) for eventuality in seeds]
+        if self.mode in ["insert", "upsert"]:
+            hops = 0
+        return expand(self, eids, hops, senses, top_k_per_hop, min_weight, direction)
+
+    def find_paths(self, eventuality1, eventuality2, max_hops=3, senses=None, k=1, max_degree=MAX_DEGREE):
+        """ Find the top-k weighted shortest paths between two eventualities across shards
+
+        :param eventuality1: the source eventuality
+        :type eventuality1: Union[aser.eventuality.Eventuality, Dict[str, object], str]
+        :param eventuality2: the target eventuality
+        :type eventuality2: Union[aser.eventuality.Eventuality, Dict[str, object], str]
+        :param max_hops: the maximum number of relations in a path
+        :type max_hops: int (default = 3)
+        :param senses: only follow relations with these senses and weight them by these senses, default `None` for all senses
+        :type senses: Union[List[str], None] (default = None)
+        :param k: how many paths to return
+        :type k: int (default = 1)
+        :param max_degree: how many heaviest relations of each eventuality to follow
+        :type max_degree: Union[int, None] (default = 256)
+        :return: the paths sorted by the total weight in a descending order, where each path is a relation chain
+        :rtype: List[List[aser.relation.Relation]]
+        """
+
+        if self.mode in ["insert", "upsert"]:
+            return []
+        return find_paths(self, _get_eid(eventuality1), _get_eid(eventuality2), max_hops, senses, k, max_degree)
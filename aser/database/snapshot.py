@@ -0,0 +1,201 @@
+import os
+from ..relation import relation_senses
+from ..database.columnar import ColumnarKG, ColumnarConceptKG, ColumnarConceptView, ColumnarPairView, \
+    ColumnarRelationView, ColumnarEdgeView
+from ..database.index import IdSet
+from ..database.search import SimilarityIndex, PrefixIndex
+from ..database.kg_connection import ASERKGConnection, ASERConceptConnection
+
+KG_SNAPSHOT_NAME = "KG"
+CONCEPT_SNAPSHOT_NAME = "Concept"
+SNAPSHOT_ID_COLUMNS = ["_id", "hid", "tid", "cid", "eid"]
+
+
+def export_kg_snapshot(db_path, snapshot_path, grain="words"):
+    """ Export a KG database (and its similarity index) to an immutable snapshot directory,
+    which can be memory-mapped by `ASERKGSnapshot`
+
+    :param db_path: the path of KG.db
+    :type db_path: str
+    :param snapshot_path: the snapshot directory
+    :type snapshot_path: str
+    :param grain: the grain to build key indices, "words", "skeleton_words", "verbs", or None
+    :type grain: Union[str, None] (default = "words")
+    :return: the exported column-oriented KG
+    :rtype: aser.database.columnar.ColumnarKG
+    """
+
+    if not os.path.exists(snapshot_path):
+        os.makedirs(snapshot_path)
+    conn = ASERKGConnection(db_path, mode="columnar", grain=grain, read_only=True)
+    columnar_kg = conn.columnar_kg
+    columnar_kg.save(os.path.join(snapshot_path, KG_SNAPSHOT_NAME))
+    similarity_index = conn.similarity_index or conn.build_similarity_index()
+    similarity_index.save(os.path.join(snapshot_path, KG_SNAPSHOT_NAME + ".search"))
+    prefix_index = conn.prefix_index or conn.build_prefix_index()
+    prefix_index.save(os.path.join(snapshot_path, KG_SNAPSHOT_NAME + ".prefix"))
+    conn.close()
+    return columnar_kg
+
+
+def export_concept_snapshot(db_path, snapshot_path):
+    """ Export a concept database to an immutable snapshot directory,
+    which can be memory-mapped by `ASERConceptSnapshot`
+
+    :param db_path: the path of concept.db
+    :type db_path: str
+    :param snapshot_path: the snapshot directory
+    :type snapshot_path: str
+    :return: the exported column-oriented concept KG
+    :rtype: aser.database.columnar.ColumnarConceptKG
+    """
+
+    if not os.path.exists(snapshot_path):
+        os.makedirs(snapshot_path)
+    conn = ASERConceptConnection(db_path, mode="cache", read_only=True)
+    columnar_concept_kg = ColumnarConceptKG.build(
+        conn._conn.iter_columns(conn.concept_table_name, ["_id", "info"]),
+        conn._conn.iter_columns(conn.concept_instance_pair_table_name, ["cid", "eid", "pattern", "score"]),
+        conn._conn.iter_columns(conn.relation_table_name, conn.relation_columns), relation_senses
+    )
+    columnar_concept_kg.save(os.path.join(snapshot_path, CONCEPT_SNAPSHOT_NAME))
+    conn.close()
+    return columnar_concept_kg
+
+
+class SnapshotDBConnection(object):
+    """ Placeholder of the database connection of snapshots, where all rows are in columns
+    so that rows of ids that are not in columns do not exist
+
+    """
+    def close(self):
+        pass
+
+    def has_table(self, table_name):
+        # snapshots do not contain materialized rankings
+        return False
+
+    def iter_select_rows(self, table_name, _ids, columns):
+        for _ in _ids:
+            yield None
+
+    def get_rows_by_keys(self, table_name, bys, keys, columns, order_bys=None, reverse=False, top_n=None):
+        if all([by in SNAPSHOT_ID_COLUMNS for by in bys]):
+            return []
+        raise ValueError("Error: snapshots only support queries by ids and key indices.")
+
+    def get_rows_by_key_values(self, table_name, by, values, columns):
+        if by in SNAPSHOT_ID_COLUMNS:
+            return []
+        raise ValueError("Error: snapshots only support queries by ids and key indices.")
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        raise ValueError("Error: snapshots are read-only and do not support %s." % (name))
+
+
+class ASERKGSnapshot(ASERKGConnection):
+    """ Read-only KG served from a memory-mapped snapshot directory exported by `export_kg_snapshot`,
+    which is opened without loading or sorting and is shared by processes through the page cache
+
+    """
+    def __init__(self, snapshot_path, lazy=True):
+        """
+
+        :param snapshot_path: the snapshot directory
+        :type snapshot_path: str
+        :param lazy: whether to decode the info of retrieved eventualities only when it is first accessed
+        :type lazy: bool (default = True)
+        """
+
+        self._conn = SnapshotDBConnection()
+        self._db_path = None
+        self.mode = "columnar"
+        self.read_only = True
+        self.fulltext = False
+        self.info_format = "binary"
+        self.lazy = lazy
+        self.key_format = "text"
+        self.relation_format = "dense"
+        self.grain = None
+        self._init_attributes()
+        self.relation_weight_columns = relation_senses
+
+        self.columnar_kg = ColumnarKG.load(os.path.join(snapshot_path, KG_SNAPSHOT_NAME))
+        if self.columnar_kg is None:
+            raise ValueError("Error: %s does not contain a KG snapshot." % (snapshot_path))
+        for k in ["verbs", "skeleton_words", "words"]:
+            if k in self.columnar_kg.key_indices:
+                self.grain = k
+        self.partial2eids_cache = {k: None for k in self.columnar_kg.key_indices}
+        self.partial2rids_cache = {"hid": None, "tid": None}
+        self._init_columnar_caches()
+        self.similarity_index = SimilarityIndex.load(os.path.join(snapshot_path, KG_SNAPSHOT_NAME + ".search"))
+        self.prefix_index = PrefixIndex.load(os.path.join(snapshot_path, KG_SNAPSHOT_NAME + ".prefix"))
+
+
+class ASERConceptSnapshot(ASERConceptConnection):
+    """ Read-only concept KG served from a memory-mapped snapshot directory exported by `export_concept_snapshot`,
+    which is opened without loading or sorting and is shared by processes through the page cache
+
+    """
+    def __init__(self, snapshot_path):
+        """
+
+        :param snapshot_path: the snapshot directory
+        :type snapshot_path: str
+        """
+
+        self._conn = SnapshotDBConnection()
+        self._db_path = None
+        # all contents are in columns, which behaves as the memory mode
+        self.mode = "memory"
+        self.read_only = True
+        self.key_format = "text"
+        self.relation_format = "dense"
+        self._init_attributes()
+        self.relation_weight_columns = relation_senses
+
+        self.columnar_concept_kg = ColumnarConceptKG.load(os.path.join(snapshot_path, CONCEPT_SNAPSHOT_NAME))
+        if self.columnar_concept_kg is None:
+            raise ValueError("Error: %s does not contain a concept snapshot." % (snapshot_path))
+        # caches are views of columns
+        self.cids = IdSet(self.columnar_concept_kg.sorted_cid_digests)
+        self.eids = IdSet(self.columnar_concept_kg.instance_eids)
+        self.rids = IdSet(self.columnar_concept_kg.sorted_rid_digests)
+        self.cid2concept_cache = ColumnarConceptView(self.columnar_concept_kg, self._convert_row_to_concept)
+        self.cid2eid_pattern_scores = ColumnarPairView(self.columnar_concept_kg, "cid")
+        self.rid2relation_cache = ColumnarRelationView(self.columnar_concept_kg)
+        self.eid2cid_scores = ColumnarPairView(self.columnar_concept_kg, "eid")
+        self.partial2rids_cache = {
+            "hid": ColumnarEdgeView(self.columnar_concept_kg, "out"),
+            "tid": ColumnarEdgeView(self.columnar_concept_kg, "in")
+        }
+        self.adjacency_index = self.columnar_concept_kg.adjacency_index
+
+    def close(self):
+        """ Close the ASERConceptSnapshot safely
+
+        """
+
+        super(ASERConceptSnapshot, self).close()
+        self.columnar_concept_kg = None
+
+    def insert_concept(self, concept):
+        raise ValueError("Error: snapshots are read-only.")
+
+    def insert_concepts(self, concepts):
+        raise ValueError("Error: snapshots are read-only.")
+
+    def insert_relation(self, relation):
+        raise ValueError("Error: snapshots are read-only.")
+
+    def insert_relations(self, relations):
+        raise ValueError("Error: snapshots are read-only.")
+
+    def insert_concept_instance_pair(self, concept_instance_pair):
+        raise ValueError("Error: snapshots are read-only.")
+
+    def insert_concept_instance_pairs(self, concept_instance_pairs):
+        raise ValueError("Error: snapshots are read-only.")
@@ -0,0 +1,306 @@
+import heapq
+import numpy as np
+from ..relation import Relation, relation_senses
+from ..database.codec import get_relation_weights
+
+MAX_DEGREE = 256
+
+
+class ASERSubgraph(object):
+    """ Compact subgraph returned by multi-hop expansion, where nodes are stored as an id list with hop distances
+    and edges are stored as arrays of node positions with sense weights
+
+    """
+    def __init__(self, ids, hops, heads, tails, weights, senses=relation_senses):
+        """
+
+        :param ids: the node ids (i.e., eids or cids)
+        :type ids: List[str]
+        :param hops: the hop distance of each node from the seeds
+        :type hops: numpy.ndarray
+        :param heads: the positions of head nodes of edges in `ids`
+        :type heads: numpy.ndarray
+        :param tails: the positions of tail nodes of edges in `ids`
+        :type tails: numpy.ndarray
+        :param weights: the sense weights of edges, whose shape is (#edges, #senses)
+        :type weights: numpy.ndarray
+        :param senses: the relation senses of weight columns
+        :type senses: List[str] (default = relation_senses)
+        """
+
+        self.ids = ids
+        self.hops = hops
+        self.heads = heads
+        self.tails = tails
+        self.weights = weights
+        self.senses = senses
+
+    @property
+    def n_nodes(self):
+        return len(self.ids)
+
+    @property
+    def n_edges(self):
+        return len(self.heads)
+
+    def get_relations(self):
+        """ Convert edges to relations
+
+        :return: the relations of this subgraph
+        :rtype: List[aser.relation.Relation]
+        """
+
+        relations = []
+        for h, t, weight in zip(self.heads.tolist(), self.tails.tolist(), self.weights.tolist()):
+            relations.append(Relation(self.ids[h], self.ids[t], {r: w for r, w in zip(self.senses, weight) if w > 0.0}))
+        return relations
+
+
+def get_frontier_edges(conn, frontier, direction="out"):
+    """ Get all edges of a frontier by one adjacency-index slice, in-memory lookups, or one bulk query
+
+    :param conn: a KG connection
+    :type conn: Union[aser.database.kg_connection.ASERKGConnection, aser.database.kg_connection.ASERConceptConnection]
+    :param frontier: the node ids to expand
+    :type frontier: List[str]
+    :param direction: "out" for outgoing edges, "in" for incoming edges
+    :type direction: str (default = "out")
+    :return: positions of source nodes in `frontier`, ids of neighbors, and sense weights of edges
+    :rtype: Tuple[numpy.ndarray, List[str], numpy.ndarray]
+    """
+
+    if direction not in ["out", "in"]:
+        raise ValueError("Error: only support out/in directions.")
+    if len(frontier) == 0:
+        return np.zeros(0, dtype=np.int64), [], np.zeros((0, len(relation_senses)), dtype=np.float64)
+    if conn.adjacency_index is not None:
+        return conn.adjacency_index.get_edges(frontier, direction)
+
+    by, other = ("hid", "tid") if direction == "out" else ("tid", "hid")
+    sources, neighbor_ids, weights = [], [], []
+    if conn.mode == "memory":
+        for idx, _id in enumerate(frontier):
+            for rid in conn.partial2rids_cache[by].get(_id, list()):
+                relation = conn.rid2relation_cache[rid]
+                sources.append(idx)
+                neighbor_ids.append(getattr(relation, other))
+                weights.append([relation.relations.get(r, 0.0) for r in relation_senses])
+    else:
+        id2idx = {_id: idx for idx, _id in enumerate(frontier)}
+        for row in conn._conn.get_rows_by_key_values(
+            conn.relation_table_name, by, frontier, [by, other] + conn.relation_weight_columns
+        ):
+            sources.append(id2idx[row[by]])
+            neighbor_ids.append(row[other])
+            weights.append(get_relation_weights(row))
+    return (
+        np.array(sources, dtype=np.int64), neighbor_ids,
+        np.array(weights, dtype=np.float64).reshape(len(sources), len(relation_senses))
+    )
+
+
+def select_edges(sources, weights, sense_indices, require_senses=False, min_weight=0.0, top_k=None):
+    """ Select edges by weights, and keep the `top_k` heaviest edges of each source node
+
+    :param sources: the source node of each edge
+    :type sources: numpy.ndarray
+    :param weights: the sense weights of edges, whose shape is (#edges, #senses)
+    :type weights: numpy.ndarray
+    :param sense_indices: the columns of senses to score edges
+    :type sense_indices: List[int]
+    :param require_senses: whether edges must have positive weights of these senses
+    :type require_senses: bool (default = False)
+    :param min_weight: edges whose scores are less than this value are pruned
+    :type min_weight: float (default = 0.0)
+    :param top_k: how many heaviest edges of each source node to keep, default `None` for all
+    :type top_k: Union[int, None] (default = None)
+    :return: the positions of selected edges sorted by sources and then by scores in a descending order, and scores of all edges
+    :rtype: Tuple[numpy.ndarray, numpy.ndarray]
+    """
+
+    scores = weights[:, sense_indices].sum(axis=1)
+    mask = scores >= min_weight
+    if require_senses:
+        mask &= scores > 0.0
+    selected = np.nonzero(mask)[0]
+    selected = selected[np.lexsort((-scores[selected], sources[selected]))]
+    if top_k is not None and len(selected) > 0:
+        selected_sources = sources[selected]
+        group_starts = np.r_[0, np.nonzero(np.diff(selected_sources))[0] + 1]
+        ranks = np.arange(len(selected)) - np.repeat(group_starts, np.diff(np.r_[group_starts, len(selected)]))
+        selected = selected[ranks < top_k]
+    return selected, scores
+
+
+def expand(conn, seeds, hops=1, senses=None, top_k_per_hop=None, min_weight=0.0, direction="out"):
+    """ Expand seeds hop by hop, where each hop fetches edges of the whole frontier in bulk
+
+    :param conn: a KG connection
+    :type conn: Union[aser.database.kg_connection.ASERKGConnection, aser.database.kg_connection.ASERConceptConnection]
+    :param seeds: the node ids to start from
+    :type seeds: List[str]
+    :param hops: the number of hops to expand
+    :type hops: int (default = 1)
+    :param senses: only follow edges with these relation senses and weight them by these senses, default `None` for all senses
+    :type senses: Union[List[str], None] (default = None)
+    :param top_k_per_hop: how many heaviest edges of each frontier node to follow at each hop, default `None` for all
+    :type top_k_per_hop: Union[int, None] (default = None)
+    :param min_weight: edges whose weights are less than this value are pruned
+    :type min_weight: float (default = 0.0)
+    :param direction: "out" to follow heads to tails, "in" to follow tails to heads, "both" for both
+    :type direction: str (default = "out")
+    :return: the expanded subgraph
+    :rtype: aser.database.traversal.ASERSubgraph
+    """
+
+    if direction == "both":
+        directions = ["out", "in"]
+    elif direction in ["out", "in"]:
+        directions = [direction]
+    else:
+        raise ValueError("Error: only support out/in/both directions.")
+    if senses is not None:
+        sense_indices = [relation_senses.index(r) for r in senses if r in relation_senses]
+    else:
+        sense_indices = list(range(len(relation_senses)))
+
+    ids = list()
+    id2idx = dict()
+    node_hops = list()
+    for _id in seeds:
+        if _id not in id2idx:
+            id2idx[_id] = len(ids)
+            ids.append(_id)
+            node_hops.append(0)
+    heads, tails, weights = [], [], []
+    visited_edges = set()
+    frontier = list(ids)
+    for hop in range(1, hops + 1):
+        if len(frontier) == 0:
+            break
+        next_frontier = list()
+        for d in directions:
+            sources, neighbor_ids, edge_weights = get_frontier_edges(conn, frontier, d)
+            selected, _ = select_edges(sources, edge_weights, sense_indices, senses is not None, min_weight, top_k_per_hop)
+            for edge_idx in selected.tolist():
+                source_id, neighbor_id = frontier[sources[edge_idx]], neighbor_ids[edge_idx]
+                h, t = (source_id, neighbor_id) if d == "out" else (neighbor_id, source_id)
+                if (h, t) in visited_edges:
+                    continue
+                visited_edges.add((h, t))
+                if neighbor_id not in id2idx:
+                    id2idx[neighbor_id] = len(ids)
+                    ids.append(neighbor_id)
+                    node_hops.append(hop)
+                    next_frontier.append(neighbor_id)
+                heads.append(id2idx[h])
+                tails.append(id2idx[t])
+                weights.append(edge_weights[edge_idx])
+        frontier = next_frontier
+
+    return ASERSubgraph(
+        ids,
+        np.array(node_hops, dtype=np.int32),
+        np.array(heads, dtype=np.int64),
+        np.array(tails, dtype=np.int64),
+        np.array(weights, dtype=np.float64).reshape(len(heads), len(relation_senses)),
+        relation_senses
+    )
+
+
+def find_paths(conn, source, target, max_hops=3, senses=None, k=1, max_degree=MAX_DEGREE):
+    """ Find the top-k weighted shortest paths from the source to the target by bidirectional search,
+    which alternately expands the smaller frontier (outgoing edges of the source side and incoming edges of the target side)
+    until two sides meet
+
+    :param conn: a KG connection
+    :type conn: Union[aser.database.kg_connection.ASERKGConnection, aser.database.kg_connection.ASERConceptConnection]
+    :param source: the source node id
+    :type source: str
+    :param target: the target node id
+    :type target: str
+    :param max_hops: the maximum number of relations in a path
+    :type max_hops: int (default = 3)
+    :param senses: only follow edges with these relation senses and weight them by these senses, default `None` for all senses
+    :type senses: Union[List[str], None] (default = None)
+    :param k: how many paths to return
+    :type k: int (default = 1)
+    :param max_degree: how many heaviest edges of each node to follow, which bounds the memory on hub nodes
+    :type max_degree: Union[int, None] (default = 256)
+    :return: the paths sorted by the total weight in a descending order, where each path is a relation chain
+    :rtype: List[List[aser.relation.Relation]]
+    """
+
+    if source == target or k <= 0:
+        return []
+    if senses is not None:
+        sense_indices = [relation_senses.index(r) for r in senses if r in relation_senses]
+    else:
+        sense_indices = list(range(len(relation_senses)))
+
+    # each side records the depth of nodes and the edges from the previous level,
+    # i.e., (parent, score, weights) where the parent is closer to the source (or target)
+    sides = [
+        {"direction": "out", "frontier": [source], "level": 0, "depths": {source: 0}, "parents": {source: []}},
+        {"direction": "in", "frontier": [target], "level": 0, "depths": {target: 0}, "parents": {target: []}},
+    ]
+    meets = []
+    for _ in range(max_hops):
+        if len(sides[0]["frontier"]) == 0 or len(sides[1]["frontier"]) == 0:
+            break
+        side_idx = 0 if len(sides[0]["frontier"]) <= len(sides[1]["frontier"]) else 1
+        side, other = sides[side_idx], sides[1 - side_idx]
+        frontier = side["frontier"]
+        sources, neighbor_ids, weights = get_frontier_edges(conn, frontier, side["direction"])
+        selected, scores = select_edges(sources, weights, sense_indices, senses is not None, 0.0, max_degree)
+        side["level"] += 1
+        next_frontier = []
+        for edge_idx in selected.tolist():
+            neighbor_id = neighbor_ids[edge_idx]
+            depth = side["depths"].get(neighbor_id, None)
+            if depth is None:
+                side["depths"][neighbor_id] = side["level"]
+                side["parents"][neighbor_id] = []
+                next_frontier.append(neighbor_id)
+            elif depth != side["level"]:
+                continue
+            side["parents"][neighbor_id].append(
+                (frontier[sources[edge_idx]], float(scores[edge_idx]), weights[edge_idx])
+            )
+        side["frontier"] = next_frontier
+        meets = [x for x in next_frontier if x in other["depths"]]
+        if len(meets) > 0:
+            break
+
+    # the k best partial paths of each node by dynamic programming over levels
+    def get_best_paths(side, node, memo):
+        if node in memo:
+            return memo[node]
+        if len(side["parents"][node]) == 0:
+            memo[node] = [(0.0, [])]
+            return memo[node]
+        candidates = []
+        for parent, score, weight in side["parents"][node]:
+            for parent_score, parent_path in get_best_paths(side, parent, memo):
+                # edges are stored from the source to the meeting node or from the meeting node to the target
+                if side["direction"] == "out":
+                    candidates.append((parent_score + score, parent_path + [(parent, node, weight)]))
+                else:
+                    candidates.append((parent_score + score, [(node, parent, weight)] + parent_path))
+        memo[node] = heapq.nlargest(k, candidates, key=lambda x: x[0])
+        return memo[node]
+
+    paths = []
+    forward_memo, backward_memo = dict(), dict()
+    for node in meets:
+        for forward_score, forward_path in get_best_paths(sides[0], node, forward_memo):
+            for backward_score, backward_path in get_best_paths(sides[1], node, backward_memo):
+                path = forward_path + backward_path
+                nodes = [source] + [t for h, t, w in path]
+                if len(set(nodes)) == len(nodes):
+                    paths.append((forward_score + backward_score, path))
+    paths = heapq.nlargest(k, paths, key=lambda x: x[0])
+    return [
+        [Relation(h, t, {r: w for r, w in zip(relation_senses, weight.tolist()) if w > 0.0}) for h, t, weight in path]
+        for score, path in paths
+    ]
@@ -1,3 +1,5 @@
+import numpy as np
+from itertools import chain
 from ..extract.utils import PRONOUN_SET
 
 
@@ -16,3 +18,155 @@ def compute_overlap(w1, w2):
     Jaccard = len(w1_words & w2_words) / len(w1_words | w2_words)
     return Jaccard
 
+
+OVERLAP_METHODS = ["jaccard", "simpson", "weighted"]
+
+
+def encode_token_lists(token_lists, token2id=None, ignore_tokens=None):
+    """ Encode token lists as a sparse token-id matrix in the CSR layout,
+    where the tokens of the i-th list are `token_ids[offsets[i]:offsets[i+1]]`
+
+    :param token_lists: token lists, e.g., words of eventualities
+    :type token_lists: List[List[object]]
+    :param token2id: the token vocabulary to extend, default `None` for a new one
+    :type token2id: Union[Dict[object, int], None] (default = None)
+    :param ignore_tokens: tokens to drop, e.g., `PRONOUN_SET`
+    :type ignore_tokens: Union[Set[object], None] (default = None)
+    :return: the offsets, the token ids, and the token vocabulary
+    :rtype: Tuple[numpy.ndarray, numpy.ndarray, Dict[object, int]]
+    """
+
+    if token2id is None:
+        token2id = dict()
+    offsets = np.zeros((len(token_lists) + 1, ), dtype=np.int64)
+    np.cumsum([len(tokens) for tokens in token_lists], out=offsets[1:])
+    # setdefault evaluates len(token2id) before inserting, which is the id of a new token
+    token_ids = np.array(
+        [token2id.setdefault(token, len(token2id)) for token in chain.from_iterable(token_lists)], dtype=np.int64
+    )
+    if ignore_tokens:
+        ignore_ids = [token2id[token] for token in ignore_tokens if token in token2id]
+        if len(ignore_ids) > 0:
+            kept = ~np.isin(token_ids, ignore_ids)
+            rows = np.repeat(np.arange(len(token_lists), dtype=np.int64), np.diff(offsets))
+            np.cumsum(np.bincount(rows[kept], minlength=len(token_lists)), out=offsets[1:])
+            token_ids = token_ids[kept]
+    return offsets, token_ids, token2id
+
+
+def batch_compute_overlap(query_ids, offsets, token_ids, method="jaccard", weights=None):
+    """ Compute the overlap between one token set and N token sets at once,
+    where duplicate tokens are counted once as `compute_overlap`
+
+    :param query_ids: the token ids of the query
+    :type query_ids: Union[List[int], numpy.ndarray]
+    :param offsets: the offsets of the N candidates in the CSR layout
+    :type offsets: numpy.ndarray
+    :param token_ids: the token ids of the N candidates in the CSR layout
+    :type token_ids: numpy.ndarray
+    :param method: "jaccard" (|A & B| / |A | B|), "simpson" (|A & B| / min(|A|, |B|)),
+        or "weighted" (the weighted Jaccard)
+    :type method: str (default = "jaccard")
+    :param weights: the token weights indexed by token ids for "weighted", default `None` for 1.0
+    :type weights: Union[numpy.ndarray, None] (default = None)
+    :return: the N similarities, NaN if the similarity is undefined (e.g., both sets are empty)
+    :rtype: numpy.ndarray
+    """
+
+    if method not in OVERLAP_METHODS:
+        raise NotImplementedError("Error: batch_compute_overlap only supports %s." % (", ".join(OVERLAP_METHODS)))
+    n = len(offsets) - 1
+    query_ids = np.unique(np.asarray(query_ids, dtype=np.int64))
+    token_ids = np.asarray(token_ids, dtype=np.int64)
+    rows = np.repeat(np.arange(n, dtype=np.int64), np.diff(offsets))
+    # (row, token) pairs are deduplicated so that candidates behave as sets
+    vocab_size = int(max(token_ids.max() if len(token_ids) else 0, query_ids.max() if len(query_ids) else 0)) + 1
+    pairs = rows * vocab_size + token_ids
+    # pairs are almost sorted by rows, where sorting is much faster than np.unique
+    pairs.sort()
+    if len(pairs) > 1:
+        pairs = pairs[np.concatenate([[True], pairs[1:] != pairs[:-1]])]
+    rows, token_ids = pairs // vocab_size, pairs % vocab_size
+    in_query = np.isin(token_ids, query_ids)
+
+    if method == "weighted":
+        if weights is None:
+            weights = np.ones((vocab_size, ), dtype=np.float64)
+        token_weights = weights[token_ids]
+        query_size = float(weights[query_ids].sum())
+        sizes = np.bincount(rows, weights=token_weights, minlength=n)
+        intersections = np.bincount(rows, weights=token_weights * in_query, minlength=n)
+    else:
+        query_size = float(len(query_ids))
+        sizes = np.bincount(rows, minlength=n).astype(np.float64)
+        intersections = np.bincount(rows, weights=in_query, minlength=n)
+
+    if method == "simpson":
+        denominators = np.minimum(sizes, query_size)
+    else:
+        denominators = sizes + query_size - intersections
+    with np.errstate(divide="ignore", invalid="ignore"):
+        similarities = intersections / denominators
+    similarities[denominators <= 0] = np.nan
+    return similarities
+
+
+def compute_overlaps(w, ws, method="jaccard", weights=None, ignore_tokens=PRONOUN_SET):
+    """ Compute the overlap between one word list and N word lists at once,
+    which is the batch version of `compute_overlap` by default
+
+    :param w: one word list
+    :type w: List[str]
+    :param ws: the other N word lists
+    :type ws: List[List[str]]
+    :param method: "jaccard", "simpson", or "weighted"
+    :type method: str (default = "jaccard")
+    :param weights: the token weights for "weighted", default `None` for 1.0
+    :type weights: Union[Dict[str, float], None] (default = None)
+    :param ignore_tokens: tokens to drop before computing similarities
+    :type ignore_tokens: Union[Set[str], None] (default = PRONOUN_SET)
+    :return: the N similarities, NaN if the similarity is undefined
+    :rtype: numpy.ndarray
+    """
+
+    offsets, query_ids, token2id = encode_token_lists([w], ignore_tokens=ignore_tokens)
+    offsets, token_ids, token2id = encode_token_lists(ws, token2id=token2id, ignore_tokens=ignore_tokens)
+    token_weights = None
+    if weights is not None:
+        token_weights = np.ones((len(token2id), ), dtype=np.float64)
+        for token, token_id in token2id.items():
+            token_weights[token_id] = weights.get(token, 1.0)
+    return batch_compute_overlap(query_ids, offsets, token_ids, method=method, weights=token_weights)
+
+
+def rank_top_k(similarities, frequencies=None, top_n=None, threshold=0.0):
+    """ Rank candidates by (similarity, frequency, index) in the descending order,
+    where only the top_n candidates are sorted after an `argpartition`-based selection
+
+    :param similarities: the similarities of candidates
+    :type similarities: numpy.ndarray
+    :param frequencies: the frequencies of candidates to break ties, default `None` for no frequencies
+    :type frequencies: Union[numpy.ndarray, None] (default = None)
+    :param top_n: how many candidates to return, default `None` for all candidates
+    :type top_n: Union[int, None] (default = None)
+    :param threshold: the minimum similarity
+    :type threshold: float (default = 0.0)
+    :return: the indices of ranked candidates
+    :rtype: numpy.ndarray
+    """
+
+    similarities = np.asarray(similarities, dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        indices = np.flatnonzero(similarities >= threshold)
+    if top_n and len(indices) > top_n:
+        # keep all candidates that tie with the top_n-th similarity, and then break ties by frequencies and indices
+        kth = len(indices) - top_n
+        kth_similarity = np.partition(similarities[indices], kth)[kth]
+        indices = indices[similarities[indices] >= kth_similarity]
+    keys = [-indices, -similarities[indices]]
+    if frequencies is not None:
+        keys.insert(1, -np.asarray(frequencies, dtype=np.float64)[indices])
+    indices = indices[np.lexsort(keys)]
+    if top_n:
+        indices = indices[:top_n]
+    return indices
@@ -1,3 +1,4 @@
+import numpy as np
 from itertools import chain
 from copy import deepcopy
 from .discourse_parser import ConnectiveExtractor, ArgumentPositionClassifier, \
@@ -5,6 +6,7 @@ from .discourse_parser import ConnectiveExtractor, ArgumentPositionClassifier, \
 from .rule import SEED_CONNECTIVE_DICT
 from .utils import EMPTY_SENT_PARSED_RESULT
 from ..relation import Relation, relation_senses
+from ..database.utils import compute_overlaps
 
 
 class BaseRelationExtractor(object):
@@ -368,13 +370,7 @@ class DiscourseRelationExtractor(BaseRelationExtractor):
         threshold = kw.get("threshold", 0.8)
         if threshold < 0.0 or threshold > 1.0:
             raise ValueError("Error: threshold should be between 0.0 and 1.0.")
-        if similarity == "simpson":
-            similarity_func = self._match_argument_eventuality_by_Simpson
-        elif similarity == "jaccard":
-            similarity_func = self._match_argument_eventuality_by_Jaccard
-        elif similarity == "discourse":
-            similarity_func = self._match_argument_eventuality_by_dependencies
-        else:
+        if similarity not in ["simpson", "jaccard", "discourse"]:
             raise NotImplementedError("Error: extract_from_parsed_result only supports Simpson or Jaccard.")
 
         syntax_tree_cache = kw.get("syntax_tree_cache", dict())
@@ -430,10 +426,14 @@ class DiscourseRelationExtractor(BaseRelationExtractor):
                     arg1_sent_idx]
                 sent_parsed_result2, sent_eventualities2 = parsed_result[arg2_sent_idx], para_eventualities[
                     arg2_sent_idx]
-                arg1_eventualities = [e for e in sent_eventualities1 if \
-                    similarity_func(sent_parsed_result1, arg1, e, threshold=threshold, conn_indices=conn_indices)]
-                arg2_eventualities = [e for e in sent_eventualities2 if \
-                    similarity_func(sent_parsed_result2, arg2, e, threshold=threshold, conn_indices=conn_indices)]
+                arg1_eventualities = self._match_argument_eventualities(
+                    sent_parsed_result1, arg1, sent_eventualities1, similarity,
+                    threshold=threshold, conn_indices=conn_indices
+                )
+                arg2_eventualities = self._match_argument_eventualities(
+                    sent_parsed_result2, arg2, sent_eventualities2, similarity,
+                    threshold=threshold, conn_indices=conn_indices
+                )
                 cnt = 0.0
                 if len(arg1_eventualities) > 0 and len(arg2_eventualities) > 0:
                     cnt = 1.0 / (len(arg1_eventualities) * len(arg2_eventualities))
@@ -470,49 +470,55 @@ class DiscourseRelationExtractor(BaseRelationExtractor):
 
 
     @staticmethod
-    def _match_argument_eventuality_by_Simpson(sent_parsed_result, argument, eventuality, **kw):
-        threshold = kw.get("threshold", 0.8)
-        match = False
-        if eventuality.raw_sent_mapping:
-            argument_indices = set(argument["indices"])
-            eventuality_indices = set(eventuality.raw_sent_mapping.values())
-            try:
-                Simpson = len(argument_indices &
-                              eventuality_indices) / min(len(argument_indices), len(eventuality_indices))
-                match = Simpson >= threshold
-            except ZeroDivisionError:
-                match = False
+    def _match_argument_eventualities(sent_parsed_result, argument, eventualities, similarity, **kw):
+        if similarity in ["simpson", "jaccard"]:
+            matches = DiscourseRelationExtractor._match_argument_eventualities_by_overlap(
+                sent_parsed_result, argument, eventualities, method=similarity, **kw
+            )
         else:
-            argument_tokens = set([sent_parsed_result["lemmas"][idx].lower() for idx in argument["indices"]])
-            eventuality_tokens = set(eventuality.words)
-            try:
-                Simpson = len(argument_tokens & eventuality_tokens) / min(len(argument_tokens), len(eventuality_tokens))
-                match = Simpson >= threshold
-            except ZeroDivisionError:
-                match = False
-        return match
+            matches = [
+                DiscourseRelationExtractor._match_argument_eventuality_by_dependencies(
+                    sent_parsed_result, argument, e, **kw
+                ) for e in eventualities
+            ]
+        return [e for e, match in zip(eventualities, matches) if match]
 
     @staticmethod
-    def _match_argument_eventuality_by_Jaccard(sent_parsed_result, argument, eventuality, **kw):
+    def _match_argument_eventualities_by_overlap(sent_parsed_result, argument, eventualities, method="simpson", **kw):
         threshold = kw.get("threshold", 0.8)
-        match = False
-        if eventuality.raw_sent_mapping:
-            argument_indices = set(argument["indices"])
-            eventuality_indices = set(eventuality.raw_sent_mapping.values())
-            try:
-                Jaccard = len(argument_indices & eventuality_indices) / len(argument_indices | eventuality_indices)
-                match = Jaccard >= threshold
-            except ZeroDivisionError:
-                match = False
-        else:
-            argument_tokens = set([sent_parsed_result["lemmas"][idx].lower() for idx in argument["indices"]])
-            eventuality_tokens = set(eventuality.words)
-            try:
-                Jaccard = len(argument_tokens & eventuality_tokens) / len(argument_tokens | eventuality_tokens)
-                match = Jaccard >= threshold
-            except ZeroDivisionError:
-                match = False
-        return match
+        matches = [False] * len(eventualities)
+        # eventualities with raw_sent_mapping are matched by token indices, others are matched by lemmas
+        argument_tokens = [sent_parsed_result["lemmas"][idx].lower() for idx in argument["indices"]]
+        groups = [
+            (argument["indices"], [i for i, e in enumerate(eventualities) if e.raw_sent_mapping],
+             lambda e: list(e.raw_sent_mapping.values())),
+            (argument_tokens, [i for i, e in enumerate(eventualities) if not e.raw_sent_mapping],
+             lambda e: e.words)
+        ]
+        for query, group, get_tokens in groups:
+            if len(group) == 0:
+                continue
+            similarities = compute_overlaps(
+                query, [get_tokens(eventualities[i]) for i in group], method=method, ignore_tokens=None
+            )
+            # undefined similarities (NaN) never match
+            with np.errstate(invalid="ignore"):
+                group_matches = (similarities >= threshold).tolist()
+            for i, match in zip(group, group_matches):
+                matches[i] = match
+        return matches
+
+    @staticmethod
+    def _match_argument_eventuality_by_Simpson(sent_parsed_result, argument, eventuality, **kw):
+        return DiscourseRelationExtractor._match_argument_eventualities_by_overlap(
+            sent_parsed_result, argument, [eventuality], method="simpson", **kw
+        )[0]
+
+    @staticmethod
+    def _match_argument_eventuality_by_Jaccard(sent_parsed_result, argument, eventuality, **kw):
+        return DiscourseRelationExtractor._match_argument_eventualities_by_overlap(
+            sent_parsed_result, argument, [eventuality], method="jaccard", **kw
+        )[0]
 
     @staticmethod
     def _match_argument_eventuality_by_dependencies(sent_parsed_result, argument, eventuality, **kw):
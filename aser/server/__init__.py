@@ -12,6 +12,7 @@ from collections import OrderedDict
 from multiprocessing import Process
 from ..concept import ASERConcept
 from ..conceptualize.aser_conceptualizer import SeedRuleASERConceptualizer, ProbaseASERConceptualizer
+from ..database.db_connection import enable_wal
 from ..database.kg_connection import ASERKGConnection, ASERConceptConnection
 from ..eventuality import Eventuality
 from ..extract.aser_extractor import SeedRuleASERExtractor, DiscourseASERExtractor
@@ -46,6 +47,23 @@ def is_port_occupied(ip="127.0.0.1", port=80):
         return False
 
 
+def get_db_paths(opt):
+    """ Get paths of KG files to serve
+
+    :param opt: the namespace that includes parameters
+    :type opt: argparse.Namespace
+    :return: the paths of KG files
+    :rtype: List[str]
+    """
+
+    db_paths = []
+    if opt.aser_kg_dir:
+        db_paths.append(os.path.join(opt.aser_kg_dir, "KG.db"))
+    if opt.concept_kg_dir:
+        db_paths.append(os.path.join(opt.concept_kg_dir, "concept.db"))
+    return db_paths
+
+
 def sockets_ipc_bind(socket):
     """
 
@@ -74,8 +92,9 @@ class ASERServer(object):
         self.port = opt.port
         self.n_concurrent_back_socks = opt.n_concurrent_back_socks
         self.n_workers = opt.n_workers
+        self.n_db_workers = opt.n_db_workers
         self.aser_sink = None
-        self.aser_db = None
+        self.aser_dbs = []
         self.aser_workers = []
 
         self.run()
@@ -91,7 +110,8 @@ class ASERServer(object):
 
         """
         self.aser_sink.close()
-        self.aser_db.close()
+        for db in self.aser_dbs:
+            db.close()
         for worker in self.aser_workers:
             worker.close()
         for corenlp in self.corenlp_servers:
@@ -119,8 +139,14 @@ class ASERServer(object):
             db_senders.append(_socket)
             db_addr_list.append(addr)
 
-        self.aser_db = ASERDataBase(self.opt, db_addr_list, sink_receiver_addr)
-        self.aser_db.start()
+        if self.opt.db_access == "wal":
+            for db_path in get_db_paths(self.opt):
+                if not enable_wal(db_path):
+                    print("Fail to switch %s to the WAL mode" % (db_path))
+        # DB processes pull messages from the same sockets in turn
+        for i in range(self.n_db_workers):
+            self.aser_dbs.append(ASERDataBase(self.opt, i, db_addr_list, sink_receiver_addr))
+            self.aser_dbs[i].start()
 
         worker_senders = []
         worker_addr_list = []
@@ -170,15 +196,36 @@ class ASERDataBase(Process):
     """ Process to provide DB retrieval functions
 
     """
-    def __init__(self, opt, db_sender_addr_list, sink_addr):
+    def __init__(self, opt, db_id, db_sender_addr_list, sink_addr):
         super().__init__()
+        self.db_id = db_id
+        self.opt = opt
         self.db_sender_addr_list = db_sender_addr_list
         self.sink_addr = sink_addr
+        # SQLite connections cannot be shared across processes so that they are opened in `run`
+        self.kg_conn = None
+        self.concept_conn = None
+        # the loop exits when it is set so that connections are closed (and ids are saved) in `run`
+        self.is_stopped = multiprocessing.Event()
 
+    def connect(self):
+        """ Open read-only connections to the KG files
+
+        """
+        opt = self.opt
+        read_only = "immutable" if opt.db_access == "immutable" else True
         if opt.aser_kg_dir:
             print("Connect to the ASER KG...")
             st = time.time()
-            self.kg_conn = ASERKGConnection(db_path=os.path.join(opt.aser_kg_dir, "KG.db"), mode="cache")
+            self.kg_conn = ASERKGConnection(
+                db_path=os.path.join(opt.aser_kg_dir, "KG.db"),
+                mode="cache",
+                cache_policy=opt.cache_policy,
+                object_cache_size=opt.object_cache_size,
+                partial_cache_size=opt.partial_cache_size,
+                cache_size_by=opt.cache_size_by,
+                read_only=read_only
+            )
             print("Connect to the ASER KG finished in {:.4f} s".format(time.time() - st))
         else:
             print("Skip loading the ASER KG")
@@ -188,7 +235,13 @@ class ASERDataBase(Process):
             print("Connect to the ASER Concept KG...")
             st = time.time()
             self.concept_conn = ASERConceptConnection(
-                db_path=os.path.join(opt.concept_kg_dir, "concept.db"), mode="cache"
+                db_path=os.path.join(opt.concept_kg_dir, "concept.db"),
+                mode="cache",
+                cache_policy=opt.cache_policy,
+                object_cache_size=opt.object_cache_size,
+                partial_cache_size=opt.partial_cache_size,
+                cache_size_by=opt.cache_size_by,
+                read_only=read_only
             )
             print("Connect to the ASER Concept KG finished in {:.4f} s".format(time.time() - st))
         else:
@@ -196,22 +249,32 @@ class ASERDataBase(Process):
             self.concept_conn = None
 
     def run(self):
-        self._run()
-
-    def close(self):
-        """ Close the process safely
-
+        self.connect()
+        try:
+            self._run()
+        finally:
+            if self.kg_conn:
+                self.kg_conn.close()
+            if self.concept_conn:
+                self.concept_conn.close()
+
+    def close(self, timeout=10):
+        """ Close the process safely, which waits for the loop to close connections before terminating it
+
+        :param timeout: how many seconds to wait for the loop
+        :type timeout: float (default = 10)
         """
-        if self.kg_conn:
-            self.kg_conn.close()
-        if self.concept_conn:
-            self.concept_conn.close()
-        self.terminate()
-        self.join()
+
+        self.is_stopped.set()
+        self.join(timeout)
+        if self.is_alive():
+            self.terminate()
+            self.join()
 
     @zmqd.context()
     @zmqd.socket(zmq.PUSH)
     def _run(self, ctx, sink):
+        print("ASER DB %d started" % self.db_id)
         receiver_sockets = []
         poller = zmq.Poller()
         for db_sender_addr in self.db_sender_addr_list:
@@ -223,15 +286,16 @@ class ASERDataBase(Process):
 
         cnt = 0
         st = time.time()
-        while True:
+        while not self.is_stopped.is_set():
             try:
-                eventualities = dict(poller.poll())
+                # poll with a timeout to check whether the process is stopped
+                eventualities = dict(poller.poll(1000))
                 for sock_idx, sock in enumerate(receiver_sockets):
                     if sock in eventualities:
                         client_id, req_id, cmd, data = sock.recv_multipart()
                         print(
-                            "DB received msg ({}, {}, {}, {})".format(
-                                client_id.decode("utf-8"), req_id.decode("utf-8"), cmd.decode("utf-8"),
+                            "DB {} received msg ({}, {}, {}, {})".format(
+                                self.db_id, client_id.decode("utf-8"), req_id.decode("utf-8"), cmd.decode("utf-8"),
                                 data.decode("utf-8")
                             )
                         )
@@ -248,6 +312,16 @@ class ASERDataBase(Process):
                                 ret_data = self.handle_fetch_related_eventualities(data)
                             elif cmd == ASERCmd.fetch_related_concepts:
                                 ret_data = self.handle_fetch_related_concepts(data)
+                            elif cmd == ASERCmd.fetch_predecessor_eventualities:
+                                ret_data = self.handle_fetch_predecessor_eventualities(data)
+                            elif cmd == ASERCmd.fetch_predecessor_concepts:
+                                ret_data = self.handle_fetch_predecessor_concepts(data)
+                            elif cmd == ASERCmd.find_eventuality_paths:
+                                ret_data = self.handle_find_eventuality_paths(data)
+                            elif cmd == ASERCmd.search_eventualities:
+                                ret_data = self.handle_search_eventualities(data)
+                            elif cmd == ASERCmd.complete_eventualities:
+                                ret_data = self.handle_complete_eventualities(data)
                             else:
                                 raise ValueError("Error: %s cmd is invalid" % (cmd))
                         except BaseException as e:
@@ -315,6 +389,81 @@ class ASERDataBase(Process):
         ret_data = json.dumps(rst).encode("utf-8")
         return ret_data
 
+    def handle_fetch_predecessor_eventualities(self, data):
+        """ Fetch predecessor eventualities of the given eventualities
+
+        :param data: a json string of {"eids": List[str], "top_k": Union[int, None], "senses": Union[List[str], None]}
+        :type data: bytes
+        :return: predecessor eventualities associated with corresponding relations of each eventuality
+        :rtype: List[List[Tuple[aser.eventuality.Eventuality, aser.relation.Relation]]]
+        """
+
+        data = json.loads(data.decode("utf-8"))
+        batch_predecessor_eventualities = self.kg_conn.get_batch_predecessor_eventualities(
+            data["eids"], data.get("top_k", None), data.get("senses", None)
+        )
+
+        rst = [
+            [
+                (eventuality.encode(encoding=None), relation.encode(encoding=None))
+                for eventuality, relation in predecessor_eventualities
+            ] for predecessor_eventualities in batch_predecessor_eventualities
+        ]
+        ret_data = json.dumps(rst).encode("utf-8")
+        return ret_data
+
+    def handle_find_eventuality_paths(self, data):
+        """ Find the top-k weighted shortest paths between two eventualities
+
+        :param data: a json string of {"eid1": str, "eid2": str, "max_hops": int, "senses": Union[List[str], None], "k": int}
+        :type data: bytes
+        :return: the paths sorted by the total weight in a descending order, where each path is a relation chain
+        :rtype: List[List[aser.relation.Relation]]
+        """
+
+        data = json.loads(data.decode("utf-8"))
+        paths = self.kg_conn.find_paths(
+            data["eid1"], data["eid2"], data.get("max_hops", 3), data.get("senses", None), data.get("k", 1)
+        )
+
+        rst = [[relation.encode(encoding=None) for relation in path] for path in paths]
+        ret_data = json.dumps(rst).encode("utf-8")
+        return ret_data
+
+    def handle_search_eventualities(self, data):
+        """ Search eventualities whose words contain the query terms by BM25
+
+        :param data: a json string of {"query": str, "top_n": Union[int, None], "patterns": Union[List[str], None], "match_all": bool}
+        :type data: bytes
+        :return: the matched eventualities with scores, sorted by scores in a descending order
+        :rtype: List[Tuple[float, aser.eventuality.Eventuality]]
+        """
+
+        data = json.loads(data.decode("utf-8"))
+        results = self.kg_conn.search_eventualities(
+            data["query"], data.get("top_n", 10), data.get("patterns", None), data.get("match_all", False)
+        )
+
+        rst = [(score, eventuality.encode(encoding=None)) for score, eventuality in results]
+        ret_data = json.dumps(rst).encode("utf-8")
+        return ret_data
+
+    def handle_complete_eventualities(self, data):
+        """ Complete a typed prefix by the most frequent eventualities whose words or skeleton_words start with it
+
+        :param data: a json string of {"prefix": str, "top_n": Union[int, None]}
+        :type data: bytes
+        :return: the completed eventualities, sorted by frequencies in a descending order
+        :rtype: List[aser.eventuality.Eventuality]
+        """
+
+        data = json.loads(data.decode("utf-8"))
+        results = self.kg_conn.complete_eventualities(data["prefix"], data.get("top_n", 10))
+
+        rst = [eventuality.encode(encoding=None) for eventuality in results]
+        ret_data = json.dumps(rst).encode("utf-8")
+        return ret_data
+
     def handle_exact_match_concept(self, cid):
         """ Retrieve the extract match concept from DB
 
@@ -369,6 +518,27 @@ class ASERDataBase(Process):
         ret_data = json.dumps(rst).encode("utf-8")
         return ret_data
 
+    def handle_fetch_predecessor_concepts(self, data):
+        """ Fetch predecessor concepts of the given concepts
+
+        :param data: a json string of {"cids": List[str], "top_k": Union[int, None], "senses": Union[List[str], None]}
+        :type data: bytes
+        :return: predecessor concepts associated with corresponding relations of each concept
+        :rtype: List[List[Tuple[aser.concept.ASERConcept, aser.relation.Relation]]]
+        """
+
+        data = json.loads(data.decode("utf-8"))
+        batch_predecessor_concepts = self.concept_conn.get_batch_predecessor_concepts(
+            data["cids"], data.get("top_k", None), data.get("senses", None)
+        )
+
+        rst = [
+            [(concept.encode(encoding=None), relation.encode(encoding=None)) for concept, relation in predecessor_concepts]
+            for predecessor_concepts in batch_predecessor_concepts
+        ]
+        ret_data = json.dumps(rst).encode("utf-8")
+        return ret_data
+
 
 class ASERWorker(Process):
     """ Process to serve extraction and conceptualization functions
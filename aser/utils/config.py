@@ -10,9 +10,14 @@ class ASERCmd:
     exact_match_eventuality = b"__EXACT_MATCH_EVENTUALITY__"
     exact_match_eventuality_relation = b"__EXACT_MATCH_EVENTUALITY_RELATION__"
     fetch_related_eventualities = b"__FETCH_RELATED_EVENTUALITIES__"
+    fetch_predecessor_eventualities = b"__FETCH_PREDECESSOR_EVENTUALITIES__"
+    find_eventuality_paths = b"__FIND_EVENTUALITY_PATHS__"
+    search_eventualities = b"__SEARCH_EVENTUALITIES__"
+    complete_eventualities = b"__COMPLETE_EVENTUALITIES__"
     exact_match_concept = b"__EXACT_MATCH_CONCEPT__"
     exact_match_concept_relation = b"__EXACT_MATCH_CONCEPT_RELATION__"
     fetch_related_concepts = b"__FETCH_RELATED_CONCEPTS__"
+    fetch_predecessor_concepts = b"__FETCH_PREDECESSOR_CONCEPTS__"
     none = "__NONE__"
 
 
@@ -51,6 +56,20 @@ def get_server_args_parser():
                         help="ASER KG directory")
     parser.add_argument("-concept_kg_dir", type=str, default="",
                         help="concept KG directory")
+    parser.add_argument("-cache_policy", type=str, default="lru", choices=["lru", "clock"],
+                        help="the eviction policy of KG caches")
+    parser.add_argument("-object_cache_size", type=int, default=None,
+                        help="the budget of each object cache, default None for unbounded")
+    parser.add_argument("-partial_cache_size", type=int, default=None,
+                        help="the budget of each partial-key cache, default None for unbounded")
+    parser.add_argument("-cache_size_by", type=str, default="entries", choices=["entries", "bytes"],
+                        help="how to measure cache budgets, by entries or estimated bytes")
+    parser.add_argument("-n_db_workers", type=int, default=1,
+                        help="Number of DB processes that serve the same KG files in parallel")
+    parser.add_argument("-db_access", type=str, default="ro", choices=["ro", "wal", "immutable"],
+                        help="how DB processes open KG files, read-only (ro), read-only after switching "
+                             "files to the WAL mode so that a writer does not block readers (wal), "
+                             "or immutable without locks when no process writes files (immutable)")
 
     # Concept
     parser.add_argument("-concept_method", type=str, default="probase", choices=["probase", "seed"],
@@ -19,7 +19,8 @@ def init_logger(log_file=""):
     logger.handlers = [console_handler]
 
     if log_file and log_file != '':
-        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+        if os.path.dirname(log_file):
+            os.makedirs(os.path.dirname(log_file), exist_ok=True)
         file_handler = logging.FileHandler(log_file)
         file_handler.setFormatter(log_format)
         logger.addHandler(file_handler)
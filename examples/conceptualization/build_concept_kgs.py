@@ -11,13 +11,13 @@ from aser.database.kg_connection import CHUNKSIZE
 from aser.database.kg_connection import EVENTUALITY_TABLE_NAME, EVENTUALITY_COLUMNS, EVENTUALITY_COLUMN_TYPES
 from aser.database.kg_connection import RELATION_TABLE_NAME, RELATION_COLUMNS, RELATION_COLUMN_TYPES
 from aser.conceptualize.aser_conceptualizer import ProbaseASERConceptualizer
-from aser.eventuality import Eventuality
+from aser.database.codec import decode_eventuality_info
 from aser.relation import Relation, relation_senses
 from aser.utils.logging import init_logger, close_logger
 
 
 def convert_row_to_eventuality(row):
-    eventuality = Eventuality().decode(row["info"])
+    eventuality = decode_eventuality_info(row["info"])
     eventuality.eid = row["_id"]
     eventuality.frequency = row["frequency"]
     eventuality.pattern = row["pattern"]
@@ -79,6 +79,10 @@ if __name__ == "__main__":
     parser.add_argument("-kg_path", type=str)
     parser.add_argument("-filtered_kg_dir", type=str)
     parser.add_argument("-log_path", type=str, default="filter_kg.log")
+    parser.add_argument(
+        "-probase_path", type=str, default="/home/xliucr/probase/data-concept-instance-relations-demo.txt"
+    )
+    parser.add_argument("-probase_topk", type=int, default=5)
 
     args = parser.parse_args()
 
@@ -96,34 +100,34 @@ if __name__ == "__main__":
     rrows = []
 
     efreqs = dict()
-    for erow in kg_conn.get_columns(EVENTUALITY_TABLE_NAME, EVENTUALITY_COLUMNS):
+    for erow in kg_conn.iter_columns(EVENTUALITY_TABLE_NAME, EVENTUALITY_COLUMNS):
         efreqs[erow["_id"]] = erow["frequency"]
         erows.append(erow)
     logger.info("%d unique eventualities" % (len(erows)))
 
     rfreqs = dict()
-    for rrow in kg_conn.get_columns(RELATION_TABLE_NAME, RELATION_COLUMNS):
+    for rrow in kg_conn.iter_columns(RELATION_TABLE_NAME, RELATION_COLUMNS):
         rfreqs[rrow["_id"]] = sum([rrow.get(r, 0.0) for r in relation_senses])
         rrows.append(rrow)
     logger.info("%d unique relations" % (len(rrows)))
 
     kg_conn.close()
 
-    aser_conceptualizer = ProbaseASERConceptualizer(
-        probase_path="/home/xliucr/probase/data-concept-instance-relations-demo.txt", probase_topk=5
-    )
+    aser_conceptualizer = ProbaseASERConceptualizer(probase_path=args.probase_path, probase_topk=args.probase_topk)
 
     for threadshold in [50, 30, 20, 10, 5, 3]:
         st = time.time()
-        logger.info("threadshold", threadshold)
+        logger.info("threadshold %d" % (threadshold))
         new_erows = list(filter(lambda erow: erow["frequency"] >= threadshold, erows))
         new_eids = set([erow["_id"] for erow in new_erows])
         new_rrows = list(filter(lambda rrow: rrow["hid"] in new_eids and rrow["tid"] in new_eids, rrows))
-        logger.info("\t# eventualities", sum([erow["frequency"] for erow in new_erows]))
-        logger.info("\t# unique eventualities", len(new_erows))
-        logger.info("\t# relations", sum([rfreqs[rrow["_id"]] for rrow in new_rrows]))
-        logger.info("\t# unique relations", len(new_rrows))
+        logger.info("\t# eventualities %.1f" % (sum([erow["frequency"] for erow in new_erows])))
+        logger.info("\t# unique eventualities %d" % (len(new_erows)))
+        logger.info("\t# relations %.1f" % (sum([rfreqs[rrow["_id"]] for rrow in new_rrows])))
+        logger.info("\t# unique relations %d" % (len(new_rrows)))
 
+        if not os.path.exists(os.path.join(args.filtered_kg_dir, str(threadshold))):
+            os.mkdir(os.path.join(args.filtered_kg_dir, str(threadshold)))
         if not os.path.exists(os.path.join(args.filtered_kg_dir, str(threadshold), "KG.db")):
             new_kg_conn = SqliteDBConnection(os.path.join(args.filtered_kg_dir, str(threadshold), "KG.db"), CHUNKSIZE)
             for table_name, columns, column_types in zip(
@@ -144,8 +148,8 @@ if __name__ == "__main__":
 
         cid2concept, concept_instance_pairs, cid_to_filter_score = \
             build_concept_instance_table(aser_conceptualizer, new_erows)
-        logger.info("\t# unique concepts", len(cid2concept))
-        logger.info("\t# unique concept-event relations", len(concept_instance_pairs))
+        logger.info("\t# unique concepts %d" % (len(cid2concept)))
+        logger.info("\t# unique concept-event relations %d" % (len(concept_instance_pairs)))
 
         concept_conn = ASERConceptConnection(
             os.path.join(args.filtered_kg_dir, str(threadshold), "concept.db"), mode="memory"
@@ -158,7 +162,7 @@ if __name__ == "__main__":
         concept_conn.insert_concept_instance_pairs(concept_instance_pairs)
 
         rid2relation = build_concept_relation_table(concept_conn, new_rrows)
-        logger.info("\t# unique concept-concept relations", len(rid2relation))
+        logger.info("\t# unique concept-concept relations %d" % (len(rid2relation)))
 
         with open(os.path.join(args.filtered_kg_dir, str(threadshold), "concept_rids.txt"), "w") as f:
             for rid, relation in rid2relation.items():
@@ -167,7 +171,7 @@ if __name__ == "__main__":
         concept_conn.insert_relations(rid2relation.values())
         concept_conn.close()
 
-        logger.info("\t", time.time() - st)
+        logger.info("\t{:.4f} s".format(time.time() - st))
         del new_erows
         del new_rrows
         del new_eids
@@ -0,0 +1,46 @@
+import argparse
+import os
+import time
+from aser.database.snapshot import export_kg_snapshot, export_concept_snapshot
+from aser.utils.logging import init_logger, close_logger
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-kg_path", type=str, default="", help="the path to KG.db")
+    parser.add_argument("-concept_kg_path", type=str, default="", help="the path to concept.db")
+    parser.add_argument("-snapshot_path", type=str, required=True, help="the directory of the memory-mapped snapshot")
+    parser.add_argument("-grain", type=str, default="words", choices=["verbs", "skeleton_words", "words"])
+    parser.add_argument("-log_path", type=str, default="export_snapshot.log")
+
+    args = parser.parse_args()
+
+    logger = init_logger(log_file=args.log_path)
+
+    if not os.path.exists(args.snapshot_path):
+        os.mkdir(args.snapshot_path)
+
+    if args.kg_path:
+        logger.info("Exporting %s..." % (args.kg_path))
+        st = time.time()
+        columnar_kg = export_kg_snapshot(args.kg_path, args.snapshot_path, args.grain)
+        logger.info(
+            "Exported %d eventualities and %d relations in {:.4f} s".format(time.time() - st) %
+            (columnar_kg.n_eventualities, columnar_kg.n_relations)
+        )
+
+    if args.concept_kg_path:
+        logger.info("Exporting %s..." % (args.concept_kg_path))
+        st = time.time()
+        columnar_concept_kg = export_concept_snapshot(args.concept_kg_path, args.snapshot_path)
+        logger.info(
+            "Exported %d concepts, %d concept-instance pairs, and %d relations in {:.4f} s".format(time.time() - st) %
+            (
+                columnar_concept_kg.n_concepts, columnar_concept_kg.n_concept_instance_pairs,
+                columnar_concept_kg.n_relations
+            )
+        )
+
+    logger.info("Done.")
+    close_logger(logger)
@@ -9,13 +9,13 @@ from aser.database.db_connection import SqliteDBConnection, MongoDBConnection
 from aser.database.kg_connection import CHUNKSIZE
 from aser.database.kg_connection import EVENTUALITY_TABLE_NAME, EVENTUALITY_COLUMNS, EVENTUALITY_COLUMN_TYPES
 from aser.database.kg_connection import RELATION_TABLE_NAME, RELATION_COLUMNS, RELATION_COLUMN_TYPES
-from aser.eventuality import Eventuality
+from aser.database.codec import decode_eventuality_info
 from aser.relation import Relation, relation_senses
 from aser.utils.logging import init_logger, close_logger
 
 
 def convert_row_to_eventuality(row):
-    eventuality = Eventuality().decode(row["info"])
+    eventuality = decode_eventuality_info(row["info"])
     eventuality.eid = row["_id"]
     eventuality.frequency = row["frequency"]
     eventuality.pattern = row["pattern"]
@@ -50,13 +50,13 @@ if __name__ == "__main__":
     rrows = []
 
     efreqs = dict()
-    for erow in kg_conn.get_columns(EVENTUALITY_TABLE_NAME, EVENTUALITY_COLUMNS):
+    for erow in kg_conn.iter_columns(EVENTUALITY_TABLE_NAME, EVENTUALITY_COLUMNS):
         efreqs[erow["_id"]] = erow["frequency"]
         erows.append(erow)
     logger.info("%d unique eventualities" % (len(erows)))
 
     rfreqs = dict()
-    for rrow in kg_conn.get_columns(RELATION_TABLE_NAME, RELATION_COLUMNS):
+    for rrow in kg_conn.iter_columns(RELATION_TABLE_NAME, RELATION_COLUMNS):
         rfreqs[rrow["_id"]] = sum([rrow.get(r, 0.0) for r in relation_senses])
         rrows.append(rrow)
     logger.info("%d unique relations" % (len(rrows)))
@@ -65,15 +65,17 @@ if __name__ == "__main__":
 
     for threadshold in [50, 30, 20, 10, 5, 3]:
         st = time.time()
-        logger.info("threadshold", threadshold)
+        logger.info("threadshold %d" % (threadshold))
         new_erows = list(filter(lambda erow: erow["frequency"] >= threadshold, erows))
         new_eids = set([erow["_id"] for erow in new_erows])
         new_rrows = list(filter(lambda rrow: rrow["hid"] in new_eids and rrow["tid"] in new_eids, rrows))
-        logger.info("\t# eventualities", sum([erow["frequency"] for erow in new_erows]))
-        logger.info("\t# unique eventualities", len(new_erows))
-        logger.info("\t# relations", sum([rfreqs[rrow["_id"]] for rrow in new_rrows]))
-        logger.info("\t# unique relations", len(new_rrows))
+        logger.info("\t# eventualities %.1f" % (sum([erow["frequency"] for erow in new_erows])))
+        logger.info("\t# unique eventualities %d" % (len(new_erows)))
+        logger.info("\t# relations %.1f" % (sum([rfreqs[rrow["_id"]] for rrow in new_rrows])))
+        logger.info("\t# unique relations %d" % (len(new_rrows)))
 
+        if not os.path.exists(os.path.join(args.filtered_kg_dir, str(threadshold))):
+            os.mkdir(os.path.join(args.filtered_kg_dir, str(threadshold)))
         if not os.path.exists(os.path.join(args.filtered_kg_dir, str(threadshold), "KG.db")):
             new_kg_conn = SqliteDBConnection(os.path.join(args.filtered_kg_dir, str(threadshold), "KG.db"), CHUNKSIZE)
             for table_name, columns, column_types in zip(
@@ -92,7 +94,7 @@ if __name__ == "__main__":
             new_kg_conn.insert_rows(RELATION_TABLE_NAME, new_rrows)
             new_kg_conn.close()
 
-        logger.info("\t", time.time() - st)
+        logger.info("\t{:.4f} s".format(time.time() - st))
         del new_erows
         del new_rrows
         del new_eids
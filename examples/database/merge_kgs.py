@@ -146,14 +146,14 @@ if __name__ == "__main__":
     eid2row = dict()
     eventuality_counter = Counter()
     filtered_eids = list()
-    for row in merged_conn.get_columns(EVENTUALITY_TABLE_NAME, EVENTUALITY_COLUMNS):
+    for row in merged_conn.iter_columns(EVENTUALITY_TABLE_NAME, EVENTUALITY_COLUMNS):
         eventuality_counter[row["_id"]] += row["frequency"]
         eid2row[row["_id"]] = row
 
     rid2row = dict()
     relation_counter = Counter()
     filtered_rids = list()
-    for row in merged_conn.get_columns(RELATION_TABLE_NAME, RELATION_COLUMNS):
+    for row in merged_conn.iter_columns(RELATION_TABLE_NAME, RELATION_COLUMNS):
         relation_counter[row["_id"]] += sum([row.get(r, 0.0) for r in relation_senses])
         rid2row[row["_id"]] = row
 
@@ -168,7 +168,7 @@ if __name__ == "__main__":
             raise NotImplementedError
 
         logger.info("Retrieving rows from %s.%s..." % (filename, EVENTUALITY_TABLE_NAME))
-        for row in conn.get_columns(EVENTUALITY_TABLE_NAME, EVENTUALITY_COLUMNS):
+        for row in conn.iter_columns(EVENTUALITY_TABLE_NAME, EVENTUALITY_COLUMNS):
             eventuality_counter[row["_id"]] += row["frequency"]
             if row["_id"] not in eid2row:
                 eid2row[row["_id"]] = row
@@ -176,7 +176,7 @@ if __name__ == "__main__":
                 eid2row[row["_id"]]["frequency"] += row["frequency"]
 
         logger.info("Retrieving rows from %s.%s..." % (filename, RELATION_TABLE_NAME))
-        for row in conn.get_columns(RELATION_TABLE_NAME, RELATION_COLUMNS):
+        for row in conn.iter_columns(RELATION_TABLE_NAME, RELATION_COLUMNS):
             if row["_id"] not in rid2sids:
                 continue
             freq = sum([row.get(r, 0.0) for r in relation_senses])
@@ -0,0 +1,162 @@
+import argparse
+import os
+import time
+from collections import OrderedDict
+from aser.database.db_connection import SqliteDBConnection, MongoDBConnection
+from aser.database.kg_connection import CHUNKSIZE
+from aser.database.kg_connection import EVENTUALITY_TABLE_NAME, EVENTUALITY_INDICES
+from aser.database.kg_connection import RELATION_TABLE_NAME, RELATION_COLUMNS, RELATION_COLUMN_TYPES, RELATION_INDICES
+from aser.database.kg_connection import SPARSE_RELATION_COLUMNS, SPARSE_RELATION_COLUMN_TYPES, SPARSE_RELATION_INDICES
+from aser.database.kg_connection import RELATION_ID_COLUMNS, INTEGER_KEY_SCHEMA_VERSION
+from aser.database.kg_connection import CONCEPT_TABLE_NAME, CONCEPT_INDICES
+from aser.database.kg_connection import CONCEPTINSTANCEPAIR_TABLE_NAME, CONCEPTINSTANCEPAIR_INDICES
+from aser.database.codec import encode_eventuality_info, decode_eventuality_info, get_eventuality_info_format
+from aser.database.codec import encode_relation_senses, get_relation_weights
+from aser.relation import relation_senses
+from aser.utils.logging import init_logger, close_logger
+
+
+def connect(db, db_path):
+    if db == "sqlite":
+        return SqliteDBConnection(db_path, CHUNKSIZE)
+    elif db == "mongodb":
+        return MongoDBConnection(db_path, CHUNKSIZE)
+    else:
+        raise NotImplementedError
+
+
+def create_indices(conn, table_names, table_indices, logger):
+    for table_name, indices in zip(table_names, table_indices):
+        for index_columns in indices:
+            logger.info("Creating the index on %s(%s)..." % (table_name, ",".join(index_columns)))
+            st = time.time()
+            conn.create_index(table_name, index_columns)
+            logger.info("Finished in {:.4f} s".format(time.time() - st))
+
+
+def convert_eventuality_info(conn, info_format, logger):
+    logger.info("Converting the eventuality info into the %s format..." % (info_format))
+    st = time.time()
+    # rows are updated in place so that ids are collected before the update
+    eids = [x[0] for x in conn.iter_columns(EVENTUALITY_TABLE_NAME, ["_id"], row_format="tuple")]
+    update_op = conn.get_update_op(["info"], "=")
+    n_converted = 0
+    for idx in range(0, len(eids), CHUNKSIZE):
+        rows = []
+        for row in conn.select_rows(EVENTUALITY_TABLE_NAME, eids[idx:idx + CHUNKSIZE], ["_id", "info"]):
+            if row is None or get_eventuality_info_format(row["info"]) == info_format:
+                continue
+            eventuality = decode_eventuality_info(row["info"])
+            rows.append({"_id": row["_id"], "info": encode_eventuality_info(eventuality, info_format)})
+        conn.update_rows(EVENTUALITY_TABLE_NAME, rows, update_op, ["info"])
+        n_converted += len(rows)
+    logger.info("Converted %d/%d eventualities in {:.4f} s".format(time.time() - st) % (n_converted, len(eids)))
+
+
+def convert_relation_format(conn, relation_format, logger):
+    if not isinstance(conn, SqliteDBConnection):
+        logger.warning("Sparse relations are only supported by SQLite.")
+        return
+    columns = conn.get_table_columns(RELATION_TABLE_NAME)
+    if ("senses" in columns) == (relation_format == "sparse"):
+        logger.info("Relations are already in the %s format." % (relation_format))
+        return
+    logger.info("Converting relations into the %s format..." % (relation_format))
+    st = time.time()
+    if relation_format == "sparse":
+        new_columns, new_column_types, new_indices = \
+            SPARSE_RELATION_COLUMNS, SPARSE_RELATION_COLUMN_TYPES, SPARSE_RELATION_INDICES
+    else:
+        new_columns, new_column_types, new_indices = RELATION_COLUMNS, RELATION_COLUMN_TYPES, RELATION_INDICES
+    new_table_name = RELATION_TABLE_NAME + "_" + relation_format
+    if conn.get_pragma("user_version") == INTEGER_KEY_SCHEMA_VERSION:
+        new_column_types = ["INTEGER PRIMARY KEY", "INTEGER", "INTEGER"] + new_column_types[3:]
+        conn.set_id_columns(RELATION_TABLE_NAME, RELATION_ID_COLUMNS)
+        conn.set_id_columns(new_table_name, RELATION_ID_COLUMNS)
+    conn.create_table(new_table_name, new_columns, new_column_types)
+
+    rows, n_converted = [], 0
+    for row in conn.iter_columns(RELATION_TABLE_NAME, columns):
+        weights = get_relation_weights(row)
+        new_row = OrderedDict([("_id", row["_id"]), ("hid", row["hid"]), ("tid", row["tid"])])
+        if relation_format == "sparse":
+            new_row["total_weight"] = sum(weights)
+            new_row["senses"] = encode_relation_senses(dict(zip(relation_senses, weights)))
+        else:
+            new_row.update(zip(relation_senses, weights))
+        rows.append(new_row)
+        n_converted += 1
+        if len(rows) >= CHUNKSIZE:
+            conn.insert_rows(new_table_name, rows)
+            rows = []
+    conn.insert_rows(new_table_name, rows)
+    conn._conn.execute("DROP TABLE %s;" % (RELATION_TABLE_NAME))
+    conn._conn.execute("ALTER TABLE %s RENAME TO %s;" % (new_table_name, RELATION_TABLE_NAME))
+    conn._conn.commit()
+    for index_columns in new_indices:
+        conn.create_index(RELATION_TABLE_NAME, index_columns)
+    logger.info("Converted %d relations in {:.4f} s".format(time.time() - st) % (n_converted))
+
+
+def vacuum(conn, logger):
+    if isinstance(conn, SqliteDBConnection):
+        logger.info("Vacuuming the database...")
+        st = time.time()
+        conn._conn.execute("VACUUM;")
+        logger.info("Finished in {:.4f} s".format(time.time() - st))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-db", type=str, default="sqlite", choices=["sqlite", "mongodb"])
+    parser.add_argument("-kg_path", type=str, default="", help="the path to KG.db")
+    parser.add_argument("-concept_kg_path", type=str, default="", help="the path to concept.db")
+    parser.add_argument("-create_indices", action="store_true", help="backfill secondary indices on key columns")
+    parser.add_argument(
+        "-info_format", type=str, default="", choices=["", "binary", "json"],
+        help="rewrite the eventuality info in this format"
+    )
+    parser.add_argument(
+        "-relation_format", type=str, default="", choices=["", "dense", "sparse"],
+        help="rewrite relations in this format (sparse: packed senses with an indexed total weight)"
+    )
+    parser.add_argument("-vacuum", action="store_true", help="vacuum SQLite databases to reclaim free pages")
+    parser.add_argument("-log_path", type=str, default="migrate_kg.log")
+
+    args = parser.parse_args()
+
+    logger = init_logger(log_file=args.log_path)
+
+    if args.kg_path:
+        logger.info("Connecting %s" % (args.kg_path))
+        conn = connect(args.db, args.kg_path)
+        if args.create_indices:
+            create_indices(
+                conn, [EVENTUALITY_TABLE_NAME, RELATION_TABLE_NAME], [EVENTUALITY_INDICES, RELATION_INDICES], logger
+            )
+        if args.info_format:
+            convert_eventuality_info(conn, args.info_format, logger)
+        if args.relation_format:
+            convert_relation_format(conn, args.relation_format, logger)
+        if args.vacuum:
+            vacuum(conn, logger)
+        conn.close()
+
+    if args.concept_kg_path:
+        logger.info("Connecting %s" % (args.concept_kg_path))
+        conn = connect(args.db, args.concept_kg_path)
+        if args.create_indices:
+            create_indices(
+                conn, [CONCEPT_TABLE_NAME, CONCEPTINSTANCEPAIR_TABLE_NAME, RELATION_TABLE_NAME],
+                [CONCEPT_INDICES, CONCEPTINSTANCEPAIR_INDICES, RELATION_INDICES], logger
+            )
+        if args.relation_format:
+            convert_relation_format(conn, args.relation_format, logger)
+        if args.vacuum:
+            vacuum(conn, logger)
+        conn.close()
+
+    logger.info("Done.")
+    close_logger(logger)
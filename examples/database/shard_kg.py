@@ -0,0 +1,78 @@
+import argparse
+import os
+import time
+from aser.database.db_connection import SqliteDBConnection
+from aser.database.kg_connection import CHUNKSIZE, EVENTUALITY_TABLE_NAME, EVENTUALITY_COLUMNS, RELATION_TABLE_NAME
+from aser.database.kg_connection import EVENTUALITY_ID_COLUMNS, RELATION_ID_COLUMNS, INTEGER_KEY_SCHEMA_VERSION
+from aser.database.sharded_kg_connection import ShardedASERKGConnection
+from aser.database.codec import decode_eventuality_info, get_relation_weights
+from aser.relation import Relation, relation_senses
+from aser.utils.logging import init_logger, close_logger
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-kg_path", type=str, help="the path to KG.db")
+    parser.add_argument("-shard_kg_path", type=str, help="the directory of shards KG_0.db, KG_1.db, ...")
+    parser.add_argument("-n_shards", type=int, default=4)
+    parser.add_argument("-key_format", type=str, default=None, choices=["text", "integer"])
+    parser.add_argument("-relation_format", type=str, default=None, choices=["dense", "sparse"])
+    parser.add_argument("-log_path", type=str, default="shard_kg.log")
+
+    args = parser.parse_args()
+
+    logger = init_logger(log_file=args.log_path)
+
+    if not os.path.exists(args.shard_kg_path):
+        os.mkdir(args.shard_kg_path)
+
+    logger.info("Connecting %s" % (args.kg_path))
+    conn = SqliteDBConnection(args.kg_path, CHUNKSIZE)
+    if conn.get_pragma("user_version") == INTEGER_KEY_SCHEMA_VERSION:
+        conn.set_id_columns(EVENTUALITY_TABLE_NAME, EVENTUALITY_ID_COLUMNS)
+        conn.set_id_columns(RELATION_TABLE_NAME, RELATION_ID_COLUMNS)
+    db_paths = [os.path.join(args.shard_kg_path, "KG_%d.db" % (i)) for i in range(args.n_shards)]
+    sharded_conn = ShardedASERKGConnection(
+        db_paths, mode="insert", key_format=args.key_format, relation_format=args.relation_format
+    )
+
+    logger.info("Sharding %s..." % (EVENTUALITY_TABLE_NAME))
+    st = time.time()
+    eventualities = []
+    n_eventualities = 0
+    for row in conn.iter_columns(EVENTUALITY_TABLE_NAME, EVENTUALITY_COLUMNS):
+        eventuality = decode_eventuality_info(row["info"])
+        eventuality.eid = row["_id"]
+        eventuality.frequency = row["frequency"]
+        eventuality.pattern = row["pattern"]
+        eventualities.append(eventuality)
+        if len(eventualities) >= CHUNKSIZE:
+            sharded_conn.insert_eventualities(eventualities)
+            n_eventualities += len(eventualities)
+            eventualities = []
+    sharded_conn.insert_eventualities(eventualities)
+    n_eventualities += len(eventualities)
+    logger.info("Sharded %d eventualities in {:.4f} s".format(time.time() - st) % (n_eventualities))
+
+    logger.info("Sharding %s..." % (RELATION_TABLE_NAME))
+    st = time.time()
+    columns = conn.get_table_columns(RELATION_TABLE_NAME)
+    relations = []
+    n_relations = 0
+    columns = ["hid", "tid"] + [c for c in columns if c not in ["_id", "hid", "tid"]]
+    for row in conn.iter_columns(RELATION_TABLE_NAME, columns):
+        weights = get_relation_weights(row)
+        relations.append(Relation(row["hid"], row["tid"], {r: w for r, w in zip(relation_senses, weights) if w > 0.0}))
+        if len(relations) >= CHUNKSIZE:
+            sharded_conn.insert_relations(relations)
+            n_relations += len(relations)
+            relations = []
+    sharded_conn.insert_relations(relations)
+    n_relations += len(relations)
+    logger.info("Sharded %d relations in {:.4f} s".format(time.time() - st) % (n_relations))
+
+    conn.close()
+    sharded_conn.close()
+    logger.info("Done.")
+    close_logger(logger)
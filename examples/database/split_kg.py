@@ -51,11 +51,11 @@ if __name__ == "__main__":
 
     eid2row, hid2rows, tids = dict(), defaultdict(list), list()
     logger.info("Retrieving rows from %s.%s..." % (args.kg_path, EVENTUALITY_TABLE_NAME))
-    for row in conn.get_columns(EVENTUALITY_TABLE_NAME, EVENTUALITY_COLUMNS):
+    for row in conn.iter_columns(EVENTUALITY_TABLE_NAME, EVENTUALITY_COLUMNS):
         eid2row[row["_id"]] = row
 
     logger.info("Retrieving rows from %s.%s..." % (args.kg_path, RELATION_TABLE_NAME))
-    for row in conn.get_columns(RELATION_TABLE_NAME, RELATION_COLUMNS):
+    for row in conn.iter_columns(RELATION_TABLE_NAME, RELATION_COLUMNS):
         hid2rows[row["hid"]].append(row)
         tids.append(row["tid"])
     conn.close()
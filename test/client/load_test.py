@@ -0,0 +1,121 @@
+import argparse
+import os
+import random
+import shutil
+import signal
+import tempfile
+import time
+from multiprocessing import Pool, Process
+import numpy as np
+from aser.client import ASERClient
+from aser.eventuality import Eventuality
+from aser.relation import Relation
+from aser.database.kg_connection import ASERKGConnection
+from aser.server import ASERServer
+from aser.utils.config import get_server_args_parser
+
+
+def build_eventuality(i):
+    words = ["i", "v%d" % (i % 1000), "o%d" % (i)]
+    parsed_result = {
+        "lemmas": words,
+        "pos_tags": ["PRP", "VBP", "NN"],
+        "ners": ["O"] * len(words),
+        "mentions": []
+    }
+    dependencies = [(1, "nsubj", 0), (1, "dobj", 2)]
+    return Eventuality("s-v-o", dependencies, dependencies, parsed_result)
+
+
+def build_kg(kg_dir, n_eventualities, n_relations):
+    eventualities = [build_eventuality(i) for i in range(n_eventualities)]
+    eids = [e.eid for e in eventualities]
+    relations = dict()
+    while len(relations) < n_relations:
+        hid, tid = random.sample(eids, 2)
+        relations[(hid, tid)] = Relation(hid, tid, {"Precedence": float(random.randint(1, 10))})
+    conn = ASERKGConnection(os.path.join(kg_dir, "KG.db"), mode="insert")
+    conn.insert_eventualities(eventualities)
+    conn.insert_relations(list(relations.values()))
+    conn.close()
+    return eids
+
+
+def run_server(args):
+    # a new session so that the DB and sink processes are killed with the server
+    os.setsid()
+    ASERServer(args)
+
+
+def run_client(port, port_out, eids, n_iter, slow_ratio, batch_size, seed):
+    random.seed(seed)
+    client = ASERClient(port=port, port_out=port_out)
+    latencies = []
+    for _ in range(n_iter):
+        if random.random() < slow_ratio:
+            client.fetch_batch_predecessor_eventualities(random.sample(eids, batch_size))
+        else:
+            st = time.time()
+            client.fetch_related_eventualities(random.choice(eids))
+            latencies.append((time.time() - st) * 1000)
+    client.close()
+    return latencies
+
+
+def load_test(args, kg_dir, eids, n_db_workers):
+    server_args = get_server_args_parser().parse_args([
+        "-n_workers", "0",
+        "-port", str(args.port),
+        "-port_out", str(args.port_out),
+        "-aser_kg_dir", kg_dir,
+        "-n_db_workers", str(n_db_workers),
+        "-db_access", args.db_access
+    ])
+    server = Process(target=run_server, args=(server_args, ))
+    server.start()
+    try:
+        # wait for DB processes to open connections
+        time.sleep(args.warmup)
+        pool = Pool(args.n_clients)
+        results = [
+            pool.apply_async(
+                run_client,
+                args=(args.port, args.port_out, eids, args.n_iter, args.slow_ratio, args.batch_size, seed)
+            ) for seed in range(args.n_clients)
+        ]
+        pool.close()
+        pool.join()
+        latencies = np.concatenate([r.get() for r in results])
+        print(
+            "`fetch_related_eventualities` with {} DB workers: p50 {:.2f} ms, p99 {:.2f} ms over {} calls".format(
+                n_db_workers, np.percentile(latencies, 50), np.percentile(latencies, 99), len(latencies)
+            )
+        )
+    finally:
+        os.killpg(server.pid, signal.SIGTERM)
+        server.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n_eventualities", type=int, default=20000, help="the number of eventualities")
+    parser.add_argument("-n_relations", type=int, default=60000, help="the number of relations")
+    parser.add_argument("-n_db_workers", type=int, nargs="+", default=[1, 2, 4], help="the numbers of DB workers")
+    parser.add_argument("-db_access", type=str, default="ro", choices=["ro", "wal", "immutable"])
+    parser.add_argument("-n_clients", type=int, default=8, help="the number of client processes")
+    parser.add_argument("-n_iter", type=int, default=200, help="the number of requests of each client")
+    parser.add_argument("-slow_ratio", type=float, default=0.05, help="the ratio of slow batch-predecessor requests")
+    parser.add_argument("-batch_size", type=int, default=1000, help="the number of eids of a slow request")
+    parser.add_argument("-warmup", type=float, default=5.0, help="seconds to wait for the server")
+    parser.add_argument("-port", type=int, default=20097)
+    parser.add_argument("-port_out", type=int, default=20098)
+    args = parser.parse_args()
+
+    random.seed(0)
+    kg_dir = tempfile.mkdtemp()
+    try:
+        eids = build_kg(kg_dir, args.n_eventualities, args.n_relations)
+        for n_db_workers in args.n_db_workers:
+            load_test(args, kg_dir, eids, n_db_workers)
+    finally:
+        shutil.rmtree(kg_dir)
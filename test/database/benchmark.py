@@ -0,0 +1,74 @@
+import argparse
+import hashlib
+import os
+import random
+import shutil
+import tempfile
+import time
+from collections import OrderedDict
+from aser.database.db_connection import SqliteDBConnection
+from aser.database.kg_connection import CHUNKSIZE
+from aser.database.kg_connection import EVENTUALITY_TABLE_NAME, EVENTUALITY_COLUMNS, EVENTUALITY_COLUMN_TYPES
+
+
+def generate_rows(n):
+    for i in range(n):
+        yield OrderedDict(
+            [
+                ("_id", hashlib.sha1(str(i).encode("utf-8")).hexdigest()),
+                ("frequency", 1.0),
+                ("pattern", "s-v"),
+                ("verbs", "v%d" % (i % 1000)),
+                ("skeleton_words", "i v%d" % (i % 1000)),
+                ("words", "i v%d" % (i)),
+                ("info", b"{}"),
+            ]
+        )
+
+
+def benchmark_select_rows(conn, _ids):
+    st = time.time()
+    rows = conn.select_rows(EVENTUALITY_TABLE_NAME, _ids, EVENTUALITY_COLUMNS)
+    duration = time.time() - st
+    assert len(rows) == len(_ids)
+    print("`select_rows`: {:.4f} s for {} ids ({:.0f} ids/s)".format(duration, len(_ids), len(_ids) / duration))
+
+
+def benchmark_update_rows(conn, _ids):
+    rows = [{"_id": _id, "frequency": float(idx % 100 + 1)} for idx, _id in enumerate(_ids)]
+    update_op = conn.get_update_op(["frequency"], "+")
+    st = time.time()
+    conn.update_rows(EVENTUALITY_TABLE_NAME, rows, update_op, ["frequency"])
+    duration = time.time() - st
+    print("`update_rows`: {:.4f} s for {} ids ({:.0f} ids/s)".format(duration, len(_ids), len(_ids) / duration))
+
+
+def benchmark_upsert_rows(conn, _ids):
+    # half of the rows exist and the other half are new
+    rows = list(generate_rows(len(_ids) // 2 + len(_ids)))[len(_ids) // 2:]
+    upsert_op = conn.get_upsert_op(["frequency"], "+")
+    st = time.time()
+    conn.upsert_rows(EVENTUALITY_TABLE_NAME, rows, upsert_op, ["frequency"])
+    duration = time.time() - st
+    print("`upsert_rows`: {:.4f} s for {} ids ({:.0f} ids/s)".format(duration, len(rows), len(rows) / duration))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=1000000, help="the number of rows and ids")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        conn = SqliteDBConnection(os.path.join(tmp_dir, "KG.db"), CHUNKSIZE)
+        conn.create_table(EVENTUALITY_TABLE_NAME, EVENTUALITY_COLUMNS, EVENTUALITY_COLUMN_TYPES)
+        conn.insert_rows(EVENTUALITY_TABLE_NAME, list(generate_rows(args.n)))
+
+        _ids = [row["_id"] for row in generate_rows(args.n)]
+        random.shuffle(_ids)
+        benchmark_select_rows(conn, _ids)
+        benchmark_update_rows(conn, _ids)
+        benchmark_upsert_rows(conn, _ids)
+        conn.close()
+    finally:
+        shutil.rmtree(tmp_dir)
@@ -0,0 +1,1317 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+from collections import Counter, OrderedDict
+import numpy as np
+from aser.concept import ASERConcept
+from aser.eventuality import Eventuality
+from aser.relation import Relation
+from aser.database.db_connection import SqliteDBConnection, enable_wal
+from aser.database.kg_connection import ASERKGConnection, ASERConceptConnection, _sort_related_pairs
+from aser.database.kg_writer import ASERKGWriter
+from aser.database.sharded_kg_connection import ShardedASERKGConnection, get_shard_index
+from aser.database.snapshot import export_kg_snapshot, export_concept_snapshot, ASERKGSnapshot, ASERConceptSnapshot
+from aser.database.index import IdSet, AdjacencyIndex
+from aser.database.ranking import RANKING_TABLE_NAME, load_ranking_sizes
+from aser.database.search import PrefixIndex, normalize_prefix
+from aser.database.codec import encode_eventuality_info, decode_eventuality_info, get_eventuality_info_format
+from aser.database.codec import LazyEventuality
+from aser.database.utils import compute_overlap, compute_overlaps, encode_token_lists, batch_compute_overlap, rank_top_k
+from aser.extract.relation_extractor import DiscourseRelationExtractor
+
+
+def build_eventuality(words, pos_tags, dependencies):
+    parsed_result = {
+        "lemmas": words,
+        "pos_tags": pos_tags,
+        "ners": ["O"] * len(words),
+        "mentions": []
+    }
+    return Eventuality("s-v", dependencies, dependencies, parsed_result)
+
+
+def build_eventualities():
+    return [
+        build_eventuality(["I", "be", "hungry"], ["PRP", "VBP", "JJ"], [(1, "nsubj", 0), (1, "acomp", 2)]),
+        build_eventuality(["I", "eat", "food"], ["PRP", "VBP", "NN"], [(1, "nsubj", 0), (1, "dobj", 2)]),
+        build_eventuality(["I", "go", "kitchen"], ["PRP", "VBP", "NN"], [(1, "nsubj", 0), (1, "dobj", 2)]),
+        build_eventuality(["he", "be", "hungry"], ["PRP", "VBZ", "JJ"], [(1, "nsubj", 0), (1, "acomp", 2)]),
+    ]
+
+
+def build_relations(eventualities):
+    return [
+        Relation(eventualities[0].eid, eventualities[1].eid, {"Result": 2.0, "Co_Occurrence": 1.0}),
+        Relation(eventualities[0].eid, eventualities[2].eid, {"Precedence": 1.0}),
+        Relation(eventualities[2].eid, eventualities[1].eid, {"Precedence": 3.0}),
+        Relation(eventualities[3].eid, eventualities[1].eid, {"Reason": 1.0}),
+    ]
+
+
+def build_kg(db_path):
+    eventualities = build_eventualities()
+    relations = build_relations(eventualities)
+    conn = ASERKGConnection(db_path, mode="insert")
+    conn.insert_eventualities(eventualities)
+    conn.insert_relations(relations)
+    conn.close()
+    return eventualities, relations
+
+
+def test_indices():
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(tmp_dir, "KG.db")
+        eventualities, relations = build_kg(db_path)
+        conn = ASERKGConnection(db_path, mode="cache")
+        for table_name, column in [("Eventualities", "verbs"), ("Relations", "hid"), ("Relations", "tid")]:
+            plan = list(conn._conn._conn.execute(
+                "EXPLAIN QUERY PLAN SELECT _id FROM %s WHERE %s=?;" % (table_name, column), ["x"]
+            ))
+            assert "USING INDEX" in plan[0][-1] or "USING COVERING INDEX" in plan[0][-1], plan
+
+        related_eventualities = conn.get_related_eventualities(eventualities[0])
+        assert set([e.eid for e, _ in related_eventualities]) == {eventualities[1].eid, eventualities[2].eid}
+        conn.close()
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_upsert():
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        eventualities, relations = build_kg(os.path.join(tmp_dir, "KG.db"))
+        # insert twice by updates
+        conn = ASERKGConnection(os.path.join(tmp_dir, "KG.db"), mode="insert")
+        conn.insert_eventualities(eventualities)
+        conn.insert_relations(relations)
+        conn.close()
+        # insert twice by upserts, where the second batch contains duplicates
+        conn = ASERKGConnection(os.path.join(tmp_dir, "KG_upsert.db"), mode="upsert")
+        assert len(conn.eids) == 0 and len(conn.rids) == 0
+        conn.insert_eventualities(eventualities)
+        conn.insert_relations(relations)
+        conn.insert_eventualities(eventualities[:2])
+        conn.insert_eventualities(eventualities[2:])
+        conn.insert_relation(relations[0])
+        conn.insert_relations(relations[1:])
+        conn.close()
+
+        expected = ASERKGConnection(os.path.join(tmp_dir, "KG.db"), mode="memory")
+        actual = ASERKGConnection(os.path.join(tmp_dir, "KG_upsert.db"), mode="memory")
+        assert set(expected.eids) == set(actual.eids) and set(expected.rids) == set(actual.rids)
+        for eid in expected.eids:
+            assert expected.eid2eventuality_cache[eid].frequency == actual.eid2eventuality_cache[eid].frequency == 2.0
+        for rid in expected.rids:
+            assert expected.rid2relation_cache[rid].relations == actual.rid2relation_cache[rid].relations
+        expected.close()
+        actual.close()
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_bulk_lookups():
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(tmp_dir, "KG.db")
+        eventualities, relations = build_kg(db_path)
+        eids = [e.eid for e in eventualities]
+        # rows are returned in the request order across chunks, including duplicates and missing ids
+        _ids = [eids[2], "none", eids[0], eids[2], eids[3], eids[1], "none"]
+        for use_json_each in [True, False]:
+            conn = SqliteDBConnection(db_path, 2)
+            conn._use_json_each = use_json_each
+            rows = list(conn.iter_select_rows("Eventualities", _ids, ["_id", "frequency"]))
+            assert [row["_id"] if row else None for row in rows] == [x if x != "none" else None for x in _ids]
+            assert conn.select_rows("Eventualities", _ids, ["_id", "frequency"]) == rows
+            conn.close()
+
+        # repeated ids are updated once per row by executemany
+        conn = SqliteDBConnection(db_path, 2)
+        update_op = conn.get_update_op(["frequency"], "+")
+        conn.update_rows(
+            "Eventualities", [{"_id": eids[0], "frequency": 1.0}, {"_id": eids[0], "frequency": 2.0},
+                              {"_id": eids[1], "frequency": 1.0}], update_op, ["frequency"]
+        )
+        rows = conn.select_rows("Eventualities", [eids[0], eids[1], eids[2]], ["frequency"])
+        assert [row["frequency"] for row in rows] == [4.0, 2.0, 1.0]
+        conn.close()
+
+        # exact-match lookups do not shift results after unknown ids
+        conn = ASERKGConnection(db_path, mode="cache")
+        results = conn.get_exact_match_eventualities(["none", eids[1], "none", eids[0]])
+        assert [e.eid if e else None for e in results] == [None, eids[1], None, eids[0]]
+        results = conn.get_exact_match_relations(["none", relations[1].rid, relations[0].rid])
+        assert [r.rid if r else None for r in results] == [None, relations[1].rid, relations[0].rid]
+        conn.close()
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_writer():
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        eventualities, relations = build_kg(os.path.join(tmp_dir, "KG.db"))
+        conn = ASERKGConnection(os.path.join(tmp_dir, "KG.db"), mode="insert")
+        journal_mode, synchronous = conn._conn.get_pragma("journal_mode"), conn._conn.get_pragma("synchronous")
+        with ASERKGWriter(conn, max_rows=3) as writer:
+            assert conn._conn.get_pragma("journal_mode") == "wal"
+            for eventuality_pair in zip(build_eventualities(), build_eventualities()):
+                writer.insert_eventualities(eventuality_pair)
+            writer.insert_relations(build_relations(eventualities))
+            writer.insert_relations(build_relations(eventualities))
+        assert len(writer) == 0
+        assert conn._conn.get_pragma("journal_mode") == journal_mode
+        assert conn._conn.get_pragma("synchronous") == synchronous
+        conn.close()
+
+        conn = ASERKGConnection(os.path.join(tmp_dir, "KG.db"), mode="memory")
+        for eid in conn.eids:
+            assert conn.eid2eventuality_cache[eid].frequency == 3.0
+        for relation in relations:
+            assert conn.rid2relation_cache[relation.rid].relations == {r: 3 * cnt for r, cnt in relation.relations.items()}
+        conn.close()
+
+        # a failed flush is rolled back and can be retried without counting objects twice
+        extra = build_eventuality(["they", "be", "hungry"], ["PRP", "VBP", "JJ"], [(1, "nsubj", 0), (1, "acomp", 2)])
+        conn = ASERKGConnection(os.path.join(tmp_dir, "KG.db"), mode="insert")
+        writer = ASERKGWriter(conn, pragmas=None)
+        writer.insert_eventualities([eventualities[0], extra])
+        writer.insert_relations([Relation(eventualities[0].eid, extra.eid, {"Result": 1.0}), relations[0]])
+        insert_relations = conn.insert_relations
+
+        def fail(relations):
+            insert_relations(relations)
+            raise RuntimeError("injected failure")
+
+        conn.insert_relations = fail
+        try:
+            writer.flush()
+            assert False
+        except RuntimeError:
+            pass
+        assert len(writer) == 4
+        assert extra.eid not in conn.eids
+        assert conn._conn.select_row(conn.eventuality_table_name, extra.eid, ["_id"]) is None
+        assert conn._conn.select_row(conn.eventuality_table_name, eventualities[0].eid, ["frequency"])["frequency"] == 3.0
+        conn.insert_relations = insert_relations
+        writer.close()
+        assert len(writer) == 0
+        conn.close()
+        conn = ASERKGConnection(os.path.join(tmp_dir, "KG.db"), mode="memory")
+        assert conn.eid2eventuality_cache[eventualities[0].eid].frequency == 4.0
+        assert conn.eid2eventuality_cache[extra.eid].frequency == 1.0
+        assert conn.rid2relation_cache[relations[0].rid].relations == \
+            {r: 4 * cnt for r, cnt in relations[0].relations.items()}
+        assert conn.get_exact_match_relation((eventualities[0].eid, extra.eid)).relations == {"Result": 1.0}
+        conn.close()
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_cache():
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(tmp_dir, "KG.db")
+        eventualities, relations = build_kg(db_path)
+        for cache_policy in ["lru", "clock"]:
+            conn = ASERKGConnection(
+                db_path, mode="cache", grain="verbs", cache_policy=cache_policy, object_cache_size=2, partial_cache_size=1
+            )
+            for _ in range(2):
+                for eventuality in eventualities:
+                    related_eventualities = conn.get_related_eventualities(eventuality)
+                    assert set([r.rid for _, r in related_eventualities]) == \
+                        set([r.rid for r in relations if r.hid == eventuality.eid])
+                    assert all([e.eid == r.tid for e, r in related_eventualities])
+                    key_match_eventualities = conn.get_eventualities_by_keys(["verbs"], [" ".join(eventuality.verbs)])
+                    assert eventuality.eid in set([e.eid for e in key_match_eventualities])
+            stats = conn.get_cache_stats()
+            assert stats["eid2eventuality_cache"]["entries"] <= 2 and stats["eid2eventuality_cache"]["evictions"] > 0
+            assert stats["partial2rids_cache.hid"]["entries"] <= 1 and stats["partial2rids_cache.hid"]["misses"] > 0
+            conn.reset_cache_stats()
+            assert conn.get_cache_stats()["eid2eventuality_cache"]["hits"] == 0
+            conn.close()
+
+        conn = ASERKGConnection(db_path, mode="cache", object_cache_size=4096, cache_size_by="bytes")
+        conn.get_exact_match_eventualities([e.eid for e in eventualities])
+        assert 0 < conn.get_cache_stats()["eid2eventuality_cache"]["nbytes"] <= 4096
+        conn.close()
+
+        # relations evicted from caches are updated rather than inserted again
+        eids = [e.eid for e in eventualities]
+        new_relations = [Relation(eids[3], eids[2], {"Result": 1.0}), Relation(eids[3], eids[0], {"Result": 1.0})]
+        conn = ASERKGConnection(db_path, mode="cache", object_cache_size=1)
+        for relation in new_relations + new_relations[:1]:
+            conn.insert_relation(relation)
+        assert conn.get_exact_match_relation(new_relations[0].rid).relations == {"Result": 2.0}
+        conn.close()
+        concepts = [ASERConcept(["__PERSON__0", "be", "hungry"], [[eids[0], "s-v", 1.0]]),
+                    ASERConcept(["__PERSON__0", "eat", "food"], [[eids[1], "s-v-o", 1.0]])]
+        conn = ASERConceptConnection(os.path.join(tmp_dir, "concept.db"), mode="cache", object_cache_size=1)
+        conn.insert_concepts(concepts)
+        new_relations = [Relation(concepts[0].cid, concepts[1].cid, {"Result": 1.0}),
+                         Relation(concepts[1].cid, concepts[0].cid, {"Result": 1.0})]
+        for relation in new_relations + new_relations[:1]:
+            conn.insert_relation(relation)
+        assert conn.get_exact_match_relation(new_relations[0].rid).relations == {"Result": 2.0}
+        conn.close()
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_id_set():
+    eids = [e.eid for e in build_eventualities()]
+    id_set = IdSet.from_ids(eids[:2])
+    id_set.add(eids[2])
+    id_set.add("not a sha1")
+    assert all([eid in id_set for eid in eids[:3]]) and eids[3] not in id_set and "not a sha1" in id_set
+    assert len(id_set) == 4 and set(id_set) == set(eids[:3] + ["not a sha1"])
+    id_set.enable_bloom_filter()
+    assert all([eid in id_set for eid in eids[:3]]) and eids[3] not in id_set
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(tmp_dir, "KG.db")
+        eventualities, relations = build_kg(db_path)
+        assert os.path.exists(db_path + ".eids.npy") and os.path.exists(db_path + ".rids.npy")
+        # persisted id sets are memory-mapped
+        conn = ASERKGConnection(db_path, mode="cache")
+        assert isinstance(conn.eids._digests, np.memmap)
+        assert set(conn.eids) == set([e.eid for e in eventualities])
+        conn.close()
+        # persisted id sets are rebuilt after other connections insert rows
+        conn = ASERKGConnection(db_path, mode="upsert")
+        conn.insert_eventuality(build_eventuality(["she", "sleep"], ["PRP", "VBZ"], [(1, "nsubj", 0)]))
+        conn.close()
+        conn = ASERKGConnection(db_path, mode="cache")
+        assert not isinstance(conn.eids._digests, np.memmap) and len(conn.eids) == len(eventualities) + 1
+        conn.close()
+        # ids added by a connection are persisted if no other writer has inserted rows
+        extras = [
+            build_eventuality(["she", "eat", "food"], ["PRP", "VBZ", "NN"], [(1, "nsubj", 0), (1, "dobj", 2)]),
+            build_eventuality(["she", "go", "kitchen"], ["PRP", "VBZ", "NN"], [(1, "nsubj", 0), (1, "dobj", 2)])
+        ]
+        conn = ASERKGConnection(db_path, mode="insert")
+        conn.insert_eventuality(extras[0])
+        conn.close()
+        conn = ASERKGConnection(db_path, mode="cache")
+        assert isinstance(conn.eids._digests, np.memmap) and extras[0].eid in conn.eids
+        conn.close()
+        # sets are not persisted with rows inserted by other writers in the meantime
+        conn = ASERKGConnection(db_path, mode="insert")
+        other_conn = ASERKGConnection(db_path, mode="upsert")
+        other_conn.insert_eventuality(extras[1])
+        other_conn.close()
+        conn.insert_eventuality(eventualities[0])
+        conn.insert_eventuality(build_eventuality(["she", "run"], ["PRP", "VBZ"], [(1, "nsubj", 0)]))
+        conn.close()
+        conn = ASERKGConnection(db_path, mode="cache")
+        assert extras[1].eid in conn.eids and len(conn.eids) == len(eventualities) + 4
+        conn.close()
+        assert not [x for x in os.listdir(tmp_dir) if x.endswith(".tmp")]
+
+        # read-only connections never write files next to the database
+        db_path = os.path.join(tmp_dir, "KG_read_only.db")
+        build_kg(db_path)
+        for x in os.listdir(tmp_dir):
+            if x.startswith("KG_read_only.db."):
+                os.remove(os.path.join(tmp_dir, x))
+        conn = ASERKGConnection(db_path, mode="cache", read_only=True)
+        assert len(conn.eids) == len(eventualities)
+        conn.close()
+        assert [x for x in os.listdir(tmp_dir) if x.startswith("KG_read_only.db")] == ["KG_read_only.db"]
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_adjacency_index():
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(tmp_dir, "KG.db")
+        eventualities, relations = build_kg(db_path)
+        eids = [e.eid for e in eventualities]
+        conn = ASERKGConnection(db_path, mode="cache")
+        expected = [(e.eid, r.relations) for e, r in conn.get_related_eventualities(eids[0])]
+        expected_result = [(e.eid, r.relations) for e, r in conn.get_related_eventualities(eids[0], senses=["Result"])]
+        expected_top = [(e.eid, r.relations) for e, r in conn.get_related_eventualities(eids[0], top_k=1)]
+        assert [x[0] for x in expected] == [eids[2], eids[1]] and [x[0] for x in expected_top] == [eids[1]]
+        assert [x[0] for x in expected_result] == [eids[1]]
+        adjacency_index = conn.build_adjacency_index()
+        assert adjacency_index.n_nodes == 4 and adjacency_index.n_edges == 4
+        assert [(e.eid, r.relations) for e, r in conn.get_related_eventualities(eids[0])] == expected
+        assert [(e.eid, r.relations) for e, r in conn.get_related_eventualities(eids[0], senses=["Result"])] == expected_result
+        assert [(e.eid, r.relations) for e, r in conn.get_related_eventualities(eids[0], top_k=1)] == expected_top
+        # incoming edges are sorted by the total weight in a descending order, and ties are broken by ids
+        in_neighbors = [x[0] for x in adjacency_index.get_neighbors(eids[1], "in")]
+        assert in_neighbors == sorted([eids[0], eids[2]]) + [eids[3]]
+        assert adjacency_index.get_neighbors(eids[3], "in") == [] and adjacency_index.get_neighbors("none") == []
+        conn.close()
+        # saved indices are memory-mapped by later connections
+        conn = ASERKGConnection(db_path, mode="memory")
+        assert isinstance(conn.adjacency_index, AdjacencyIndex)
+        assert isinstance(conn.adjacency_index.out_neighbors, np.memmap)
+        assert [(e.eid, r.relations) for e, r in conn.get_related_eventualities(eids[0])] == expected
+        conn.close()
+        # out-of-date indices are ignored
+        conn = ASERKGConnection(db_path, mode="insert")
+        conn.insert_relation(Relation(eids[0], eids[3], {"Contrast": 1.0}))
+        conn.close()
+        conn = ASERKGConnection(db_path, mode="cache")
+        assert conn.adjacency_index is None and len(conn.get_related_eventualities(eids[0])) == 3
+        conn.close()
+        conn = ASERKGConnection(db_path, mode="memory")
+        assert len(conn.get_related_eventualities(eids[0], top_k=4)) == 3
+        conn.close()
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    # top_k larger than the number of pairs keeps all pairs
+    pairs = [(None, r) for r in build_relations(build_eventualities())]
+    assert [x[1].rid for x in _sort_related_pairs(pairs, top_k=5)] == [x[1].rid for x in _sort_related_pairs(pairs)]
+    assert len(_sort_related_pairs(pairs, top_k=3)) == 3 and _sort_related_pairs(pairs, top_k=0) == []
+    # weights are stored as float64 without losing precision
+    index = AdjacencyIndex.build([eids[0]], [eids[1]], [[0.1, 0.2]], ["Precedence", "Result"])
+    assert index.get_neighbors(eids[0]) == [(eids[1], {"Precedence": 0.1, "Result": 0.2})]
+
+
+def test_predecessors():
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(tmp_dir, "KG.db")
+        eventualities, relations = build_kg(db_path)
+        eids = [e.eid for e in eventualities]
+        for mode in ["cache", "memory"]:
+            conn = ASERKGConnection(db_path, mode=mode)
+            predecessors = conn.get_predecessor_eventualities(eids[1])
+            assert [r.hid for e, r in predecessors][-1] in [eids[0], eids[2]]
+            assert set([e.eid for e, r in predecessors]) == {eids[0], eids[2], eids[3]}
+            assert [e.eid for e, r in conn.get_predecessor_eventualities(eids[1], senses=["Reason"])] == [eids[3]]
+            assert len(conn.get_predecessor_eventualities(eids[1], top_k=2)) == 2
+            batch_predecessors = conn.get_batch_predecessor_eventualities([eids[2], eids[0], eids[2]])
+            assert [[e.eid for e, r in x] for x in batch_predecessors] == [[eids[0]], [], [eids[0]]]
+            if mode == "cache":
+                assert eids[1] in conn.partial2rids_cache["tid"]
+                assert [e.eid for e, r in conn.get_predecessor_eventualities(eids[2])] == [eids[0]]
+                assert conn.get_cache_stats()["partial2rids_cache.tid"]["hits"] > 0
+            conn.build_adjacency_index()
+            assert [(e.eid, r.relations) for e, r in conn.get_predecessor_eventualities(eids[1], senses=["Reason"])] == \
+                [(eids[3], {"Reason": 1.0})]
+            assert set([e.eid for e, r in conn.get_predecessor_eventualities(eids[1])]) == {eids[0], eids[2], eids[3]}
+            conn.close()
+            os.remove(db_path + ".adjacency.json")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_expand():
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(tmp_dir, "KG.db")
+        eventualities, relations = build_kg(db_path)
+        eids = [e.eid for e in eventualities]
+        for mode in ["cache", "memory", "adjacency"]:
+            conn = ASERKGConnection(db_path, mode="memory" if mode == "memory" else "cache")
+            if mode == "adjacency":
+                conn.build_adjacency_index()
+            subgraph = conn.expand([eids[0]], hops=2)
+            assert subgraph.ids[0] == eids[0] and set(subgraph.ids) == set(eids[:3])
+            assert subgraph.hops.tolist() == [0, 1, 1] and subgraph.n_edges == 3
+            assert set([r.rid for r in subgraph.get_relations()]) == set([r.rid for r in relations[:3]])
+            # the heaviest relation of each node is kept at each hop
+            subgraph = conn.expand([eids[0]], hops=2, top_k_per_hop=1)
+            assert subgraph.ids == [eids[0], eids[1]] and subgraph.n_edges == 1
+            subgraph = conn.expand([eids[0], eids[3]], hops=1, senses=["Reason", "Precedence"])
+            assert set(subgraph.ids) == set(eids) and subgraph.n_edges == 2
+            subgraph = conn.expand([eids[1]], hops=2, direction="in", min_weight=2.0)
+            assert subgraph.ids == [eids[1], eids[0], eids[2]] or subgraph.ids == [eids[1], eids[2], eids[0]]
+            assert conn.expand([eids[1]], hops=3, direction="both").n_edges == 4
+            conn.close()
+            if mode == "adjacency":
+                os.remove(db_path + ".adjacency.json")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_find_paths():
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(tmp_dir, "KG.db")
+        eventualities, relations = build_kg(db_path)
+        eids = [e.eid for e in eventualities]
+        for mode in ["cache", "memory", "adjacency"]:
+            conn = ASERKGConnection(db_path, mode="memory" if mode == "memory" else "cache")
+            if mode == "adjacency":
+                conn.build_adjacency_index()
+            paths = conn.find_paths(eids[0], eids[1], max_hops=2, k=2)
+            assert [[r.rid for r in path] for path in paths] == [[relations[0].rid]]
+            paths = conn.find_paths(eids[0], eids[1], max_hops=2, senses=["Precedence"], k=2)
+            assert [[r.rid for r in path] for path in paths] == [[relations[1].rid, relations[2].rid]]
+            assert paths[0][1].relations == {"Precedence": 3.0}
+            assert conn.find_paths(eids[0], eids[1], max_hops=1, senses=["Precedence"]) == []
+            assert conn.find_paths(eids[1], eids[0], max_hops=3) == []
+            assert conn.find_paths(eids[0], eids[3], max_hops=3) == []
+            conn.close()
+            if mode == "adjacency":
+                os.remove(db_path + ".adjacency.json")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_info_format():
+    eventualities = build_eventualities()
+    eventualities[0]._mentions = {
+        (0, 1): {"start": 0, "end": 1, "text": "i", "ner": "PERSON", "link": None, "entity": None}
+    }
+    eventualities[1]._ners[0] = Counter({"O": 1.0, "PERSON": 2.0})
+    eventualities[1]._mentions = {(0, 1): {"start": 0, "end": 1, "text": "i", "ner": "PERSON", "link": {"id": 1}}}
+    for eventuality in eventualities:
+        binary_info = encode_eventuality_info(eventuality, "binary")
+        json_info = encode_eventuality_info(eventuality, "json")
+        assert get_eventuality_info_format(binary_info) == "binary" and get_eventuality_info_format(json_info) == "json"
+        assert len(binary_info) < len(json_info)
+        x, y = decode_eventuality_info(binary_info), decode_eventuality_info(json_info)
+        assert str(x) == str(y) and x.mentions == y.mentions and x.phrases == y.phrases
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        # rows in both formats can be read
+        db_path = os.path.join(tmp_dir, "KG.db")
+        conn = ASERKGConnection(db_path, mode="insert", info_format="json")
+        conn.insert_eventualities(eventualities[:2])
+        conn.close()
+        conn = ASERKGConnection(db_path, mode="insert")
+        conn.insert_eventualities(eventualities[2:])
+        conn.close()
+        conn = ASERKGConnection(db_path, mode="memory")
+        assert [str(x) for x in conn.get_exact_match_eventualities([e.eid for e in eventualities])] == \
+            [str(e) for e in eventualities]
+        conn.close()
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_lazy():
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(tmp_dir, "KG.db")
+        eventualities, relations = build_kg(db_path)
+        eids = [e.eid for e in eventualities]
+        conn = ASERKGConnection(db_path, mode="memory", grain="words")
+        assert all([isinstance(e, LazyEventuality) for e in conn.eid2eventuality_cache.values()])
+        assert not any([e.is_materialized for e in conn.eid2eventuality_cache.values()])
+        x = conn.get_eventualities_by_keys(["words"], ["i be hungry"])[0]
+        assert x.eid == eids[0] and x.words == ["i", "be", "hungry"] and not x.is_materialized
+        assert x.dependencies == eventualities[0].dependencies and x.is_materialized
+        assert str(conn.get_exact_match_eventuality(eids[1])) == str(eventualities[1])
+        conn.close()
+
+        conn = ASERKGConnection(db_path, mode="cache", lazy=False)
+        assert not isinstance(conn.get_exact_match_eventuality(eids[0]), LazyEventuality)
+        # only the given columns are retrieved
+        rows = conn.get_eventualities_by_keys(["verbs"], ["be"], order_bys=["words"], columns=["_id", "frequency"])
+        assert [row["_id"] for row in rows] == [eids[3], eids[0]] and list(rows[0].keys()) == ["_id", "frequency"]
+        rows = conn.get_exact_match_eventualities([eids[0], "none"], columns=["words"])
+        assert rows == [{"words": "i be hungry"}, None]
+        conn.close()
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_columnar():
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(tmp_dir, "KG.db")
+        eventualities, relations = build_kg(db_path)
+        eids = [e.eid for e in eventualities]
+        memory_conn = ASERKGConnection(db_path, mode="memory", grain="words")
+        conn = ASERKGConnection(db_path, mode="columnar", grain="words")
+        assert len(conn.eids) == 4 and len(conn.rids) == 4 and eids[0] in conn.eids and "none" not in conn.eids
+        # eventualities and relations are built when they are accessed
+        x = conn.get_exact_match_eventuality(eids[0])
+        assert isinstance(x, LazyEventuality) and str(x) == str(eventualities[0]) and x.frequency == 1.0
+        assert conn.get_exact_match_eventuality("none") is None
+        assert [str(e) for e in conn.get_exact_match_eventualities(eids)] == [str(e) for e in eventualities]
+        assert conn.get_exact_match_relation((eids[0], eids[1])).relations == relations[0].relations
+        assert [r.rid for r in conn.get_exact_match_relations([r.rid for r in relations])] == [r.rid for r in relations]
+        for bys, keys in [(["verbs"], ["be"]), (["skeleton_words"], ["i eat food"]), (["words"], ["he be hungry"]),
+                          (["verbs"], ["none"])]:
+            assert [e.eid for e in conn.get_eventualities_by_keys(bys, keys)] == \
+                [e.eid for e in memory_conn.get_eventualities_by_keys(bys, keys)]
+        assert [(s, e.eid) for s, e in conn.get_partial_match_eventualities(eventualities[0], ["verbs"], threshold=0.0)] == \
+            [(s, e.eid) for s, e in memory_conn.get_partial_match_eventualities(eventualities[0], ["verbs"], threshold=0.0)]
+        assert [(e.eid, r.relations) for e, r in conn.get_related_eventualities(eids[0])] == \
+            [(e.eid, r.relations) for e, r in memory_conn.get_related_eventualities(eids[0])]
+        assert [(e.eid, r.relations) for e, r in conn.get_predecessor_eventualities(eids[1])] == \
+            [(e.eid, r.relations) for e, r in memory_conn.get_predecessor_eventualities(eids[1])]
+        assert conn.expand([eids[0]], hops=2).n_edges == memory_conn.expand([eids[0]], hops=2).n_edges
+        assert set(conn.partial2rids_cache["tid"][eids[1]]) == set(memory_conn.partial2rids_cache["tid"][eids[1]])
+        assert set(conn.partial2eids_cache["verbs"].keys()) == set(memory_conn.partial2eids_cache["verbs"].keys())
+        # the columnar mode is read-only
+        try:
+            conn.insert_eventuality(eventualities[0])
+            assert False
+        except ValueError:
+            pass
+        conn.close()
+        memory_conn.close()
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_integer_keys():
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        eventualities, relations = build_kg(os.path.join(tmp_dir, "KG.db"))
+        eids = [e.eid for e in eventualities]
+        db_path = os.path.join(tmp_dir, "KG_integer.db")
+        conn = ASERKGConnection(db_path, mode="insert", key_format="integer")
+        conn.insert_eventualities(eventualities)
+        conn.insert_relations(relations)
+        # updates and upserts are resolved by integer keys
+        conn.insert_eventuality(eventualities[0])
+        conn.insert_relations(relations[:1])
+        conn.close()
+        conn = ASERKGConnection(db_path, mode="upsert")
+        assert conn.key_format == "integer"
+        conn.insert_eventualities(eventualities[1:2])
+        conn.close()
+        # ids are stored as integers
+        conn = ASERKGConnection(db_path, mode="cache")
+        assert [x[0] for x in conn._conn._conn.execute("SELECT typeof(hid) FROM Relations;")] == ["integer"] * 4
+        assert conn.get_exact_match_eventuality(eids[0]).frequency == 2.0
+        assert conn.get_exact_match_eventuality(eids[1]).frequency == 2.0
+        assert conn.get_exact_match_relation(relations[0]).relations == {"Result": 4.0, "Co_Occurrence": 2.0}
+        assert conn.get_exact_match_eventuality("none") is None
+        assert [e.eid for e in conn.get_eventualities_by_keys(["verbs"], ["be"], order_bys=["words"])] == \
+            [eids[3], eids[0]]
+        assert [(e.eid, r.hid, r.tid) for e, r in conn.get_related_eventualities(eids[0])] == \
+            [(eids[2], eids[0], eids[2]), (eids[1], eids[0], eids[1])]
+        assert set([e.eid for e, r in conn.get_predecessor_eventualities(eids[1])]) == {eids[0], eids[2], eids[3]}
+        assert [len(r) for r in conn.get_batch_predecessor_eventualities([eids[1], eids[2], "none"])] == [3, 1, 0]
+        conn.close()
+        for mode in ["memory", "columnar"]:
+            conn = ASERKGConnection(db_path, mode=mode, grain="words")
+            assert set(conn.eids) == set(eids) and set(conn.rids) == set([r.rid for r in relations])
+            assert [e.eid for e in conn.get_eventualities_by_keys(["words"], ["i eat food"])] == [eids[1]]
+            conn.close()
+        # eids registered by relations get smaller keys than existing eventualities, but persisted ids are refreshed
+        stale_path = os.path.join(tmp_dir, "KG_stale.db")
+        conn = ASERKGConnection(stale_path, mode="insert", key_format="integer")
+        conn.insert_relations(relations[3:])
+        conn.insert_eventualities(eventualities[:3])
+        conn.close()
+        conn = ASERKGConnection(stale_path, mode="upsert")
+        conn.insert_eventualities(eventualities[3:])
+        conn.close()
+        conn = ASERKGConnection(stale_path, mode="cache")
+        assert set(conn.eids) == set(eids)
+        conn.close()
+        # the key format of a database cannot be changed
+        for path, key_format in [(db_path, "text"), (os.path.join(tmp_dir, "KG.db"), "integer")]:
+            try:
+                ASERKGConnection(path, mode="cache", key_format=key_format)
+                assert False
+            except ValueError:
+                pass
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_sparse_relations():
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        eventualities, relations = build_kg(os.path.join(tmp_dir, "KG.db"))
+        eids = [e.eid for e in eventualities]
+        db_path = os.path.join(tmp_dir, "KG_sparse.db")
+        conn = ASERKGConnection(db_path, mode="insert", relation_format="sparse")
+        conn.insert_eventualities(eventualities)
+        conn.insert_relations(relations)
+        conn.insert_relations([Relation(eids[0], eids[1], {"Result": 1.0, "Reason": 1.0})])
+        conn.close()
+        conn = ASERKGConnection(db_path, mode="upsert")
+        assert conn.relation_format == "sparse"
+        conn.insert_relations([relations[1], relations[1]])
+        conn.close()
+
+        conn = ASERKGConnection(db_path, mode="cache")
+        assert conn.get_exact_match_relation(relations[0]).relations == \
+            {"Result": 3.0, "Co_Occurrence": 1.0, "Reason": 1.0}
+        assert conn.get_exact_match_relation(relations[1]).relations == {"Precedence": 3.0}
+        rows = conn._conn.get_rows_by_keys("Relations", ["hid"], [eids[0]], ["tid", "total_weight"])
+        assert sorted([(row["tid"], row["total_weight"]) for row in rows]) == sorted([(eids[1], 5.0), (eids[2], 3.0)])
+        # the heaviest relations are scanned from the index
+        plan = list(conn._conn._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT _id FROM Relations WHERE hid=? ORDER BY total_weight DESC LIMIT 1;", ["x"]
+        ))
+        assert "USING INDEX" in plan[0][-1] and "TEMP B-TREE" not in " ".join([x[-1] for x in plan]), plan
+        assert [e.eid for e, r in conn.get_related_eventualities(eids[0], top_k=1)] == [eids[1]]
+        assert [e.eid for e, r in conn.get_related_eventualities(eids[0])] == [eids[2], eids[1]]
+        assert [e.eid for e, r in conn.get_predecessor_eventualities(eids[1])] == [eids[3], eids[2], eids[0]]
+        assert conn.expand([eids[0]], hops=2, senses=["Precedence"]).n_edges == 2
+        assert conn.build_adjacency_index().get_neighbors(eids[0], top_k=1)[0][1]["Result"] == 3.0
+        conn.close()
+        conn = ASERKGConnection(db_path, mode="columnar")
+        assert conn.get_exact_match_relation(relations[1]).relations == {"Precedence": 3.0}
+        conn.close()
+        try:
+            ASERKGConnection(db_path, mode="cache", relation_format="dense")
+            assert False
+        except ValueError:
+            pass
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_neighbors():
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        for key_format, relation_format in [("text", "dense"), ("integer", "sparse")]:
+            db_path = os.path.join(tmp_dir, "KG_%s_%s.db" % (key_format, relation_format))
+            eventualities = build_eventualities()
+            relations = build_relations(eventualities)
+            eids = [e.eid for e in eventualities]
+            conn = ASERKGConnection(db_path, mode="insert", key_format=key_format, relation_format=relation_format)
+            conn.insert_eventualities(eventualities)
+            conn.insert_relations(relations)
+            conn.close()
+
+            conn = ASERKGConnection(db_path, mode="cache")
+            rows = conn._conn.get_neighbors(
+                "Relations", "Eventualities", eids[0], ["_id", "tid"], ["_id", "frequency"],
+                conn.relation_weight_columns if relation_format == "dense" else ["total_weight"], 1
+            )
+            assert [(r["tid"], e["_id"], e["frequency"]) for r, e in rows] == [(eids[1], eids[1], 1.0)]
+            memory_conn = ASERKGConnection(db_path, mode="memory")
+            for top_k, senses in [(1, None), (None, ["Precedence"]), (1, ["Result"]), (None, None), (1, None)]:
+                pairs = conn.get_related_eventualities(eids[0], top_k=top_k, senses=senses)
+                expected = memory_conn.get_related_eventualities(eids[0], top_k=top_k, senses=senses)
+                assert [(e.eid, r.relations) for e, r in pairs] == [(e.eid, r.relations) for e, r in expected]
+            # only complete neighbor lists are cached
+            assert len(conn.partial2rids_cache["hid"][eids[0]]) == 2
+            assert eids[1] in conn.eid2eventuality_cache
+            memory_conn.close()
+            conn.close()
+
+            # ties are broken by tails in the same way by SQL, sorting in memory, and the adjacency index
+            conn = ASERKGConnection(db_path, mode="insert")
+            conn.insert_relations([Relation(eids[0], eids[3], {"Precedence": 3.0})])
+            conn.close()
+            expected = [(eids[2], 1.0)] + sorted([(eids[1], 3.0), (eids[3], 3.0)], reverse=True)
+            for mode in ["cache", "memory", "columnar"]:
+                conn = ASERKGConnection(db_path, mode=mode)
+                for top_k in [1, 2, None]:
+                    pairs = conn.get_related_eventualities(eids[0], top_k=top_k)
+                    assert [(e.eid, sum(r.relations.values())) for e, r in pairs] == expected[-top_k if top_k else 0:]
+                conn.close()
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_iter_columns():
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        for key_format in ["text", "integer"]:
+            db_path = os.path.join(tmp_dir, "KG_%s.db" % (key_format))
+            eventualities = build_eventualities()
+            relations = build_relations(eventualities)
+            conn = ASERKGConnection(db_path, mode="insert", key_format=key_format)
+            conn.insert_eventualities(eventualities)
+            conn.insert_relations(relations)
+            conn.close()
+
+            conn = ASERKGConnection(db_path, mode="cache")
+            rows = conn._conn.iter_columns("Eventualities", ["_id", "frequency"], batch_size=3)
+            assert not isinstance(rows, list)
+            assert sorted([row["_id"] for row in rows]) == sorted([e.eid for e in eventualities])
+            rows = list(conn._conn.iter_columns("Relations", ["_id", "Precedence"], "Precedence>?", [0.0], 1, "tuple"))
+            assert sorted(rows) == sorted([(relations[1].rid, 1.0), (relations[2].rid, 3.0)])
+            batches = list(conn._conn.iter_columns("Eventualities", ["_id", "frequency", "info"], batch_size=3,
+                                                   row_format="numpy"))
+            assert [len(batch) for batch in batches] == [3, 1]
+            assert batches[0].frequency.dtype == np.float64 and batches[0]._id[0] in conn.eids
+            assert decode_eventuality_info(batches[0].info[0]).words
+            try:
+                list(conn._conn.iter_columns("Eventualities", ["_id"], row_format="json"))
+                assert False
+            except ValueError:
+                pass
+            conn.close()
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_read_only():
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(tmp_dir, "KG.db")
+        eventualities, relations = build_kg(db_path)
+        eids = [e.eid for e in eventualities]
+        assert enable_wal(db_path)
+        # wrong paths are not created as empty databases
+        assert not enable_wal(os.path.join(tmp_dir, "none.db")) and not os.path.exists(os.path.join(tmp_dir, "none.db"))
+        for read_only in [True, "immutable"]:
+            conn = ASERKGConnection(db_path, mode="cache", read_only=read_only)
+            assert conn._conn.get_pragma("query_only") == 1
+            assert [e.eid for e, r in conn.get_related_eventualities(eids[0])] == [eids[2], eids[1]]
+            # the fallback without json_each must not write to the database
+            conn._conn._use_json_each = False
+            missing_eids = ["%040x" % (i) for i in range(1200)]
+            rows = conn._conn.select_rows("Eventualities", missing_eids + eids[::-1], ["_id"])
+            assert rows[:1200] == [None] * 1200 and [x["_id"] for x in rows[1200:]] == eids[::-1]
+            try:
+                conn._conn.insert_row("Eventualities", OrderedDict([(c, None) for c in conn.eventuality_columns]))
+                assert False
+            except sqlite3.Error:
+                pass
+            conn.close()
+        try:
+            ASERKGConnection(db_path, mode="insert", read_only=True)
+            assert False
+        except ValueError:
+            pass
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_sharded():
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        eventualities, relations = build_kg(os.path.join(tmp_dir, "KG.db"))
+        eids = [e.eid for e in eventualities]
+        db_paths = [os.path.join(tmp_dir, "KG_%d.db" % (i)) for i in range(3)]
+        conn = ShardedASERKGConnection(db_paths, mode="insert")
+        conn.insert_eventualities(eventualities)
+        conn.insert_relations(relations)
+        conn.close()
+        # eventualities are routed by eids and relations are routed by hids
+        for i, db_path in enumerate(db_paths):
+            shard = ASERKGConnection(db_path, mode="memory")
+            assert all(get_shard_index(eid, 3) == i for eid in shard.eids)
+            assert all(get_shard_index(shard.rid2relation_cache[rid].hid, 3) == i for rid in shard.rids)
+            shard.close()
+
+        single_conn = ASERKGConnection(os.path.join(tmp_dir, "KG.db"), mode="cache")
+        for mode in ["cache", "memory"]:
+            conn = ShardedASERKGConnection(db_paths, mode=mode)
+            assert [e.eid for e in conn.get_exact_match_eventualities(eids[::-1])] == eids[::-1]
+            assert [r.rid for r in conn.get_exact_match_relations([r.rid for r in relations])] == [r.rid for r in relations]
+            for eid in eids:
+                for top_k, senses in [(None, None), (1, None), (None, ["Precedence"])]:
+                    assert [(e.eid, r.rid) for e, r in conn.get_related_eventualities(eid, top_k, senses)] == \
+                        [(e.eid, r.rid) for e, r in single_conn.get_related_eventualities(eid, top_k, senses)]
+            assert [[(e.eid, r.rid) for e, r in pairs] for pairs in conn.get_batch_predecessor_eventualities(eids, 2)] == \
+                [[(e.eid, r.rid) for e, r in pairs] for pairs in single_conn.get_batch_predecessor_eventualities(eids, 2)]
+            # unknown columns are dropped by every shard without changing the given lists
+            bys, keys = ["none", "verbs"], ["none", "be"]
+            assert sorted(e.eid for e in conn.get_eventualities_by_keys(bys, keys)) == \
+                sorted(e.eid for e in single_conn.get_eventualities_by_keys(list(bys), list(keys)))
+            assert bys == ["none", "verbs"] and keys == ["none", "be"]
+            bys, keys = ["none", "tid"], ["none", eids[1]]
+            assert sorted(r.rid for r in conn.get_relations_by_keys(bys, keys)) == \
+                sorted(r.rid for r in single_conn.get_relations_by_keys(list(bys), list(keys)))
+            assert bys == ["none", "tid"] and keys == ["none", eids[1]]
+            assert conn.expand([eids[0]], hops=2).n_edges == 3
+            assert conn.expand([eids[1]], hops=1, direction="in").n_edges == 3
+            assert [[r.rid for r in path] for path in conn.find_paths(eids[0], eids[1], max_hops=2, k=2)] == \
+                [[r.rid for r in path] for path in single_conn.find_paths(eids[0], eids[1], max_hops=2, k=2)]
+            conn.close()
+        single_conn.close()
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_snapshot():
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(tmp_dir, "KG.db")
+        snapshot_path = os.path.join(tmp_dir, "snapshot")
+        eventualities, relations = build_kg(db_path)
+        eids = [e.eid for e in eventualities]
+        export_kg_snapshot(db_path, snapshot_path)
+        memory_conn = ASERKGConnection(db_path, mode="memory", grain="words")
+        conn = ASERKGSnapshot(snapshot_path)
+        # columns are memory-mapped rather than loaded
+        assert isinstance(conn.columnar_kg.eid_digests.base, np.memmap) and conn.eids._digests is conn.columnar_kg.sorted_eid_digests
+        assert [str(e) for e in conn.get_exact_match_eventualities(eids)] == [str(e) for e in eventualities]
+        assert conn.get_exact_match_eventuality(eids[3]).frequency == 1.0
+        assert [r.rid for r in conn.get_exact_match_relations([r.rid for r in relations])] == [r.rid for r in relations]
+        for bys, keys in [(["verbs"], ["be"]), (["skeleton_words"], ["i eat food"]), (["words"], ["none"])]:
+            assert [e.eid for e in conn.get_eventualities_by_keys(bys, keys)] == \
+                [e.eid for e in memory_conn.get_eventualities_by_keys(bys, keys)]
+        assert [(s, e.eid) for s, e in conn.get_partial_match_eventualities(eventualities[0], ["verbs"], threshold=0.0)] == \
+            [(s, e.eid) for s, e in memory_conn.get_partial_match_eventualities(eventualities[0], ["verbs"], threshold=0.0)]
+        assert [(e.eid, r.relations) for e, r in conn.get_related_eventualities(eids[0])] == \
+            [(e.eid, r.relations) for e, r in memory_conn.get_related_eventualities(eids[0])]
+        assert [(e.eid, r.rid) for e, r in conn.get_predecessor_eventualities(eids[1])] == \
+            [(e.eid, r.rid) for e, r in memory_conn.get_predecessor_eventualities(eids[1])]
+        assert conn.expand([eids[0]], hops=2).n_edges == 3
+        assert [e.eid for s, e in conn.search_similar_eventualities("i be hungry", 0.5)] == [eids[0], eids[3]]
+        assert [e.eid for e in conn.complete_eventualities("i ")] == [eids[0], eids[1], eids[2]]
+        for method, args in [(conn.insert_eventuality, [eventualities[0]]), (conn.get_eventuality_columns, [["_id"]]),
+                             (conn.get_eventualities_by_keys, [["pattern"], ["s-v"]])]:
+            try:
+                method(*args)
+                assert False
+            except ValueError:
+                pass
+        conn.close()
+        memory_conn.close()
+
+        db_path = os.path.join(tmp_dir, "concept.db")
+        concepts = [ASERConcept(["__PERSON__0", "be", "hungry"], [[eids[0], "s-v", 1.0], [eids[3], "s-v", 1.0]]),
+                    ASERConcept(["__PERSON__0", "eat", "food"], [[eids[1], "s-v-o", 1.0]])]
+        conn = ASERConceptConnection(db_path, mode="insert")
+        conn.insert_concepts(concepts)
+        conn.insert_concept_instance_pairs(
+            [(concepts[0], eventualities[0], 0.5), (concepts[0], eventualities[3], 0.5), (concepts[1], eventualities[1], 1.0)]
+        )
+        conn.insert_relations([Relation(concepts[0].cid, concepts[1].cid, {"Result": 2.0})])
+        conn.close()
+        export_concept_snapshot(db_path, snapshot_path)
+        memory_conn = ASERConceptConnection(db_path, mode="memory")
+        conn = ASERConceptSnapshot(snapshot_path)
+        cids = [c.cid for c in concepts]
+        assert [str(c) for c in conn.get_exact_match_concepts(cids + ["none"]) if c] == [str(c) for c in concepts]
+        assert conn.get_concept_given_str("__PERSON__0 eat food").instances == concepts[1].instances
+        for cid in cids:
+            assert sorted(conn.get_eventualities_given_concept(cid)) == \
+                sorted(memory_conn.get_eventualities_given_concept(cid))
+        assert [(c.cid, s) for c, s in conn.get_concepts_given_eventuality(eids[3])] == [(cids[0], 0.5)]
+        assert conn.get_concepts_given_eventuality(eids[2]) == []
+        assert [(c.cid, r.relations) for c, r in conn.get_related_concepts(cids[0])] == [(cids[1], {"Result": 2.0})]
+        assert [c.cid for c, r in conn.get_predecessor_concepts(cids[1])] == [cids[0]]
+        try:
+            conn.insert_relation(Relation(cids[1], cids[0], {"Result": 1.0}))
+            assert False
+        except ValueError:
+            pass
+        conn.close()
+        memory_conn.close()
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_similarity_search():
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(tmp_dir, "KG.db")
+        eventualities, relations = build_kg(db_path)
+        extra = [
+            build_eventuality(["I", "be", "very", "hungry"], ["PRP", "VBP", "RB", "JJ"], [(1, "nsubj", 0), (1, "acomp", 3), (3, "advmod", 2)]),
+            build_eventuality(["I", "eat", "hot", "food"], ["PRP", "VBP", "JJ", "NN"], [(1, "nsubj", 0), (1, "dobj", 3), (3, "amod", 2)]),
+            build_eventuality(["they", "be", "hungry"], ["PRP", "VBP", "JJ"], [(1, "nsubj", 0), (1, "acomp", 2)]),
+        ]
+        conn = ASERKGConnection(db_path, mode="insert")
+        conn.insert_eventualities(extra)
+        conn.close()
+        eventualities = eventualities + extra
+        conn = ASERKGConnection(db_path, mode="memory", grain="words")
+        assert extra[0].words == ["i", "be", "very", "hungry"]
+        # keys of eventualities are not necessary to be the same
+        assert [e.eid for s, e in conn.get_partial_match_eventualities(extra[0], ["words"], threshold=0.5)] == [extra[0].eid]
+        for query in eventualities:
+            for threshold in [0.3, 0.5, 0.8]:
+                expected = sorted(
+                    [(compute_overlap(query.words, e.words), e.eid) for e in eventualities
+                     if compute_overlap(query.words, e.words) >= threshold], key=lambda x: (-x[0], x[1])
+                )
+                results = conn.search_similar_eventualities(query, threshold)
+                assert sorted([(s, e.eid) for s, e in results], key=lambda x: (-x[0], x[1])) == expected
+                assert [s for s, e in results] == sorted([s for s, e in results], reverse=True)
+                assert len(conn.search_similar_eventualities(query, threshold, top_n=1)) == min(1, len(expected))
+        assert conn.search_similar_eventualities("he", 0.5) == []
+        assert conn.search_similar_eventualities("be hungry unknown", 0.6)[0][0] == 2 / 3
+        conn.close()
+        # the index is persisted next to the database
+        assert os.path.exists(db_path + ".search.json")
+        conn = ASERKGConnection(db_path, mode="cache")
+        assert conn.similarity_index is not None
+        try:
+            conn.search_similar_eventualities("be hungry", 0.5, approximate=True)
+            assert False
+        except ValueError:
+            pass
+        conn.build_similarity_index(num_perm=64, bands=32)
+        assert set(e.eid for s, e in conn.search_similar_eventualities("be hungry", 1.0, approximate=True)) == \
+            {eventualities[0].eid, eventualities[3].eid, extra[2].eid}
+        conn.close()
+        # read-only connections never build the index
+        conn = ASERKGConnection(db_path, mode="cache", read_only=True)
+        assert len(conn.search_similar_eventualities("be hungry", 1.0)) == 3
+        conn.close()
+        conn = ASERKGConnection(db_path, mode="insert")
+        conn.insert_eventuality(eventualities[0])
+        conn.close()
+        conn = ASERKGConnection(db_path, mode="cache", read_only=True)
+        try:
+            conn.search_similar_eventualities("be hungry", 1.0)
+            assert False
+        except ValueError:
+            pass
+        conn.close()
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_batch_overlap():
+    rng = np.random.RandomState(0)
+    vocab = ["i", "he", "be", "eat", "food", "hungry", "go", "kitchen", "very", "hot"]
+    query = ["i", "be", "very", "hungry"]
+    candidates = [[vocab[x] for x in rng.randint(0, len(vocab), size=rng.randint(1, 6))] for _ in range(200)]
+    candidates = [c for c in candidates if set(c) - {"i", "he"}]
+    similarities = compute_overlaps(query, candidates)
+    assert np.allclose(similarities, [compute_overlap(query, c) for c in candidates])
+    # Simpson and weighted overlaps count duplicate tokens once
+    offsets, token_ids, token2id = encode_token_lists([["a", "b", "b"], ["c"], []])
+    query_ids = [token2id["a"], token2id["c"], token2id["c"]]
+    assert batch_compute_overlap(query_ids, offsets, token_ids, method="simpson")[:2].tolist() == [0.5, 1.0]
+    assert np.isnan(batch_compute_overlap(query_ids, offsets, token_ids, method="simpson")[2])
+    weights = np.array([3.0, 1.0, 1.0])
+    assert batch_compute_overlap(query_ids, offsets, token_ids, method="weighted", weights=weights).tolist() == \
+        [0.6, 0.25, 0.0]
+    assert np.isnan(compute_overlaps(["he"], [["i"]])[0])
+    # ranks are the same as the heap of (similarity, frequency, idx)
+    similarities = rng.randint(0, 4, size=100) / 4
+    frequencies = rng.randint(0, 3, size=100).astype(np.float64)
+    for top_n in [None, 1, 5, 30, 200]:
+        expected = sorted(
+            [(s, f, idx) for idx, (s, f) in enumerate(zip(similarities, frequencies)) if s >= 0.5], reverse=True
+        )[:top_n]
+        assert rank_top_k(similarities, frequencies, top_n, 0.5).tolist() == [x[-1] for x in expected]
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(tmp_dir, "KG.db")
+        eventualities, relations = build_kg(db_path)
+        extra = [
+            build_eventuality(["I", "be", "very", "hungry"], ["PRP", "VBP", "RB", "JJ"], [(1, "nsubj", 0), (1, "acomp", 3), (3, "advmod", 2)]),
+            build_eventuality(["they", "be", "hungry"], ["PRP", "VBP", "JJ"], [(1, "nsubj", 0), (1, "acomp", 2)]),
+            build_eventuality(["food", "be", "hot"], ["NN", "VBZ", "JJ"], [(1, "nsubj", 0), (1, "acomp", 2)]),
+        ]
+        extra[1].frequency = 2.0
+        conn = ASERKGConnection(db_path, mode="insert")
+        conn.insert_eventualities(extra)
+        conn.close()
+        eventualities = eventualities + extra
+        hub = [e for e in eventualities if e.verbs == ["be"]]
+        for mode in ["memory", "columnar"]:
+            conn = ASERKGConnection(db_path, mode=mode, grain="words")
+            for top_n in [None, 1, 2]:
+                for threshold in [0.0, 0.5, 1.0]:
+                    expected = sorted(
+                        [(compute_overlap(extra[0].words, e.words), e.frequency, idx, e.eid) for idx, e in enumerate(hub)
+                         if compute_overlap(extra[0].words, e.words) >= threshold], reverse=True
+                    )[:top_n]
+                    results = conn.get_partial_match_eventualities(extra[0], ["verbs"], top_n=top_n, threshold=threshold)
+                    assert [(s, e.eid) for s, e in results] == [(x[0], x[-1]) for x in expected]
+            assert len(conn.get_partial_match_eventualities(extra[0], ["verbs"], top_n=2, sort=False)) == 2
+            conn.close()
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    # the argument matchers of the discourse relation extractor share the batch scorers
+    sent_parsed_result = {"lemmas": ["I", "be", "hungry", "so", "I", "eat", "food"]}
+    argument = {"indices": [4, 5, 6]}
+    matched = build_eventuality(["I", "eat", "food"], ["PRP", "VBP", "NN"], [(1, "nsubj", 0), (1, "dobj", 2)])
+    matched.raw_sent_mapping = {0: 4, 1: 5, 2: 6}
+    unmatched = build_eventualities()[0]
+    unmatched.raw_sent_mapping = None
+    for method in ["Simpson", "Jaccard"]:
+        match_func = getattr(DiscourseRelationExtractor, "_match_argument_eventuality_by_" + method)
+        assert match_func(sent_parsed_result, argument, matched, threshold=1.0)
+        assert not match_func(sent_parsed_result, argument, unmatched, threshold=0.5)
+        # Simpson is undefined for empty arguments
+        assert match_func(sent_parsed_result, {"indices": []}, matched, threshold=0.0) == (method == "Jaccard")
+        assert DiscourseRelationExtractor._match_argument_eventualities(
+            sent_parsed_result, argument, [unmatched, matched], method.lower(), threshold=0.8
+        ) == [matched]
+
+
+def test_fulltext_search():
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(tmp_dir, "KG.db")
+        eventualities, relations = build_kg(db_path)
+        eids = [e.eid for e in eventualities]
+        # the index cannot be built by read-only connections
+        conn = ASERKGConnection(db_path, mode="cache", read_only=True)
+        try:
+            conn.search_eventualities("hungry")
+            assert False
+        except ValueError:
+            pass
+        conn.close()
+        # the index is built for existing rows at the first call
+        conn = ASERKGConnection(db_path, mode="cache")
+        assert set(e.eid for s, e in conn.search_eventualities("hungry")) == {eids[0], eids[3]}
+        assert set(e.eid for s, e in conn.search_eventualities("eat kitchen")) == {eids[1], eids[2]}
+        assert conn.search_eventualities("eat kitchen", match_all=True) == []
+        assert [e.eid for s, e in conn.search_eventualities("i eat food", top_n=1)] == [eids[1]]
+        assert conn.search_eventualities("hungry", patterns=["s-v-o"]) == []
+        assert len(conn.search_eventualities("hungry", patterns=["s-v"])) == 2
+        # FTS5 operators in queries are treated as terms
+        assert conn.search_eventualities('NOT hungry" OR') != []
+        assert conn.search_eventualities("") == []
+        conn.close()
+
+        extra = build_eventuality(["they", "be", "hungry"], ["PRP", "VBP", "JJ"], [(1, "nsubj", 0), (1, "acomp", 2)])
+        # inserts and upserts of any connection update the index incrementally
+        conn = ASERKGConnection(db_path, mode="upsert")
+        conn.insert_eventualities([extra, eventualities[3], eventualities[3]])
+        conn.close()
+        conn = ASERKGConnection(db_path, mode="memory", read_only=True)
+        results = conn.search_eventualities("be hungry", top_n=None)
+        assert [e.eid for s, e in results] == [eids[3], eids[0], extra.eid]
+        assert [s for s, e in results] == sorted([s for s, e in results], reverse=True)
+        assert results[0][1].frequency == 3.0
+        # the pure BM25 ties
+        assert len(set(s for s, e in conn.search_eventualities("be hungry", frequency_weight=0.0))) == 1
+        conn.close()
+
+        # the index can be maintained from new databases, including ones with integer keys
+        db_path = os.path.join(tmp_dir, "KG_integer.db")
+        conn = ASERKGConnection(db_path, mode="insert", key_format="integer", fulltext=True)
+        conn.insert_eventualities(eventualities)
+        conn.close()
+        conn = ASERKGConnection(db_path, mode="cache")
+        assert [e.eid for s, e in conn.search_eventualities("kitchen")] == [eids[2]]
+        conn.close()
+
+        db_paths = [os.path.join(tmp_dir, "KG_%d.db" % (i)) for i in range(2)]
+        conn = ShardedASERKGConnection(db_paths, mode="insert", fulltext=True)
+        conn.insert_eventualities(eventualities)
+        conn.close()
+        conn = ShardedASERKGConnection(db_paths, mode="cache")
+        assert set(e.eid for s, e in conn.search_eventualities("hungry")) == {eids[0], eids[3]}
+        assert len(conn.search_eventualities("i", top_n=2)) == 2
+        conn.close()
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_rankings():
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(tmp_dir, "KG.db")
+        eventualities, relations = build_kg(db_path)
+        eids = [e.eid for e in eventualities]
+        # connections opened before rankings are built refresh rankings as well
+        stale_conn = ASERKGConnection(db_path, mode="insert")
+        conn = ASERKGConnection(db_path, mode="insert")
+        assert conn.build_rankings(size=2) == {"verbs": 3, "skeleton_words": 4, "hid": 3}
+        conn.close()
+        for _ in range(5):
+            stale_conn.insert_eventuality(eventualities[1])
+        assert stale_conn._get_ranking("verbs", "eat", None) == [(6.0, eids[1])]
+        stale_conn.close()
+        conn = ASERKGConnection(db_path, mode="insert")
+        conn.build_rankings(size=2)
+        conn.close()
+
+        conn = ASERKGConnection(db_path, mode="cache")
+        assert load_ranking_sizes(conn._conn, ["verbs", "skeleton_words", "hid", "tid"]) == \
+            {"verbs": 2, "skeleton_words": 2, "hid": 2}
+        # ties are broken by ids in an ascending order
+        assert conn._get_ranking("verbs", "be", 2) == sorted([(1.0, eids[0]), (1.0, eids[3])], key=lambda x: x[1])
+        results = conn.get_eventualities_by_keys(["verbs"], ["be"], ["frequency"], True, None, ["_id"])
+        assert [row["_id"] for row in results] == [eid for s, eid in conn._get_ranking("verbs", "be", 2)]
+        results = conn.get_eventualities_by_keys(["verbs"], ["be"], order_bys=["frequency"], reverse=True)
+        assert [e.eid for e in results] == [eid for s, eid in conn._get_ranking("verbs", "be", 2)]
+        # rankings of 2 rows cannot tell whether there are more rows
+        assert conn._get_ranking("verbs", "be", None) is None
+        assert conn._get_ranking("verbs", "be", 3) is None
+        assert conn._get_ranking("verbs", "eat", None) == [(6.0, eids[1])]
+        assert conn._get_ranking("verbs", "sleep", None) == []
+        # inserts refresh rankings by current frequencies and weights
+        conn.insert_eventuality(eventualities[3])
+        results = conn.get_eventualities_by_keys(["verbs"], ["be"], order_bys=["frequency"], reverse=True, top_n=1)
+        assert [(e.eid, e.frequency) for e in results] == [(eids[3], 2.0)]
+        results = conn.get_eventualities_by_keys(["verbs"], ["be"], order_bys=["frequency"], reverse=True)
+        assert [e.eid for e in results] == [eids[3], eids[0]]
+        assert [e.eid for e in conn.get_eventualities_by_keys(["verbs"], ["sleep"], ["frequency"], True, 1)] == []
+        assert [x[0].eid for x in conn.get_related_eventualities(eids[0], top_k=1)] == [eids[1]]
+        conn.insert_relations([Relation(eids[0], eids[2], {"Precedence": 5.0})])
+        results = conn.get_related_eventualities(eids[0], top_k=2)
+        assert [(x[0].eid, sum(x[1].relations.values())) for x in results] == [(eids[1], 3.0), (eids[2], 6.0)]
+        assert [x[0].eid for x in conn.get_related_eventualities(eids[0], top_k=1)] == [eids[2]]
+        assert conn.get_related_eventualities(eids[0], top_k=0) == []
+        assert [x[0].eid for x in conn.get_related_eventualities(eids[3])] == [eids[1]]
+        conn.close()
+        # rankings are only read on cache misses and sizes are not reloaded per insert
+        conn = ASERKGConnection(db_path, mode="cache", grain="verbs")
+        statements = []
+        conn._conn._conn.set_trace_callback(statements.append)
+        results = conn.get_eventualities_by_keys(["verbs"], ["be"], order_bys=["frequency"], reverse=True, top_n=1)
+        assert [e.eid for e in results] == [eids[3]] and any(RANKING_TABLE_NAME in x for x in statements)
+        conn.get_eventualities_by_keys(["verbs"], ["be"])
+        conn.get_related_eventualities(eids[0])
+        del statements[:]
+        results = conn.get_eventualities_by_keys(["verbs"], ["be"], order_bys=["frequency"], reverse=True, top_n=1)
+        assert [e.eid for e in results] == [eids[3]]
+        assert [x[0].eid for x in conn.get_related_eventualities(eids[0], top_k=1)] == [eids[2]]
+        assert not any(RANKING_TABLE_NAME in x for x in statements)
+        conn.insert_eventuality(eventualities[1])
+        assert not any("sqlite_master" in x for x in statements)
+        conn.close()
+
+        # upserts refresh rankings as well
+        extra = build_eventuality(["they", "be", "hungry"], ["PRP", "VBP", "JJ"], [(1, "nsubj", 0), (1, "acomp", 2)])
+        conn = ASERKGConnection(db_path, mode="upsert")
+        conn.insert_eventualities([extra, extra, extra])
+        conn.close()
+        conn = ASERKGConnection(db_path, mode="memory", grain="verbs", read_only=True)
+        # memory connections never read the database
+        statements = []
+        conn._conn._conn.set_trace_callback(statements.append)
+        results = conn.get_eventualities_by_keys(["verbs"], ["be"], order_bys=["frequency"], reverse=True, top_n=2)
+        assert [(e.eid, e.frequency) for e in results] == [(extra.eid, 3.0), (eids[3], 2.0)]
+        assert [x[0].eid for x in conn.get_related_eventualities(eids[0], top_k=1)] == [eids[2]]
+        assert statements == []
+        # queries that rankings cannot serve are answered as before
+        results = conn.get_eventualities_by_keys(["verbs"], ["be"], order_bys=["frequency"], reverse=True)
+        assert [e.eid for e in results] == [extra.eid, eids[3], eids[0]]
+        conn.close()
+
+        # rankings work with integer keys and shards
+        db_path = os.path.join(tmp_dir, "KG_integer.db")
+        conn = ASERKGConnection(db_path, mode="insert", key_format="integer")
+        conn.insert_eventualities(eventualities)
+        conn.insert_relations(relations)
+        conn.build_rankings()
+        conn.insert_relations([Relation(eids[0], eids[2], {"Precedence": 5.0})])
+        conn.close()
+        conn = ASERKGConnection(db_path, mode="cache")
+        assert [x[0].eid for x in conn.get_related_eventualities(eids[0])] == [eids[1], eids[2]]
+        assert [e.eid for e in conn.get_eventualities_by_keys(["verbs"], ["go"], ["frequency"], True)] == [eids[2]]
+        conn.close()
+
+        db_paths = [os.path.join(tmp_dir, "KG_%d.db" % (i)) for i in range(2)]
+        conn = ShardedASERKGConnection(db_paths, mode="insert")
+        conn.insert_eventualities(eventualities)
+        conn.insert_relations(relations)
+        assert set(conn.build_rankings()) == {"verbs", "skeleton_words", "hid"}
+        conn.insert_eventuality(eventualities[0])
+        conn.close()
+        conn = ShardedASERKGConnection(db_paths, mode="cache")
+        results = conn.get_eventualities_by_keys(["verbs"], ["be"], order_bys=["frequency"], reverse=True, top_n=1)
+        assert [e.eid for e in results] == [eids[0]]
+        assert [x[0].eid for x in conn.get_related_eventualities(eids[0], top_k=1)] == [eids[1]]
+        conn.close()
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_prefix_completion():
+    # completions by blocks are the same as the sorted reference, including ties
+    rng = np.random.RandomState(0)
+    words = ["i", "be", "hungry", "eat", "food", "go", "kitchen", "\u00e9t\u00e9", "\u4f60"]
+    rows = []
+    for idx in range(500):
+        row = {"_id": hashlib.sha1(str(idx).encode("utf-8")).hexdigest(), "frequency": float(rng.randint(1, 6))}
+        row["words"] = " ".join(rng.choice(words, rng.randint(1, 4)))
+        row["skeleton_words"] = " ".join(row["words"].split(" ")[-2:])
+        rows.append(row)
+    for block_size in [1, 4, 64]:
+        index = PrefixIndex.build(rows, block_size=block_size)
+        for prefix in ["", "i", "i ", "be", "be hun", "eat  food ", "\u00e9", "\u4f60", "sleep"]:
+            normalized = normalize_prefix(prefix)
+            expected = []
+            for idx, row in enumerate(rows):
+                matched = [row[c] for c in ["words", "skeleton_words"] if row[c].startswith(normalized)]
+                if matched:
+                    expected.append((-row["frequency"], min(matched), idx))
+            expected = [(idx, -f) for f, _, idx in sorted(expected)]
+            for top_n in [None, 0, 1, 3, 10]:
+                positions, frequencies = index.complete(prefix, top_n)
+                assert list(zip(positions.tolist(), frequencies.tolist())) == expected[:top_n]
+    assert normalize_prefix("  i  be hun") == "i be hun"
+    assert normalize_prefix("i be\t") == "i be "
+    assert normalize_prefix(" ") == ""
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(tmp_dir, "KG.db")
+        eventualities, relations = build_kg(db_path)
+        extra = build_eventuality(
+            ["i", "be", "hungry", "now"], ["PRP", "VBP", "JJ", "RB"], [(1, "nsubj", 0), (1, "acomp", 2), (1, "advmod", 3)]
+        )
+        conn = ASERKGConnection(db_path, mode="insert")
+        conn.insert_eventuality(extra)
+        conn.insert_eventuality(extra)
+        assert conn.complete_eventualities("i be") == []
+        conn.close()
+        conn = ASERKGConnection(db_path, mode="cache")
+        # the index is built at the first call
+        assert [e.eid for e in conn.complete_eventualities("i be hun")] == [extra.eid, eventualities[0].eid]
+        assert [e.eid for e in conn.complete_eventualities("i be hun", top_n=1)] == [extra.eid]
+        assert [e.eid for e in conn.complete_eventualities("i be hungry ")] == [extra.eid]
+        assert len(conn.complete_eventualities("", top_n=None)) == 5
+        assert conn.complete_eventualities("i be sleepy") == []
+        conn.close()
+        # the index is persisted next to the database and invalidated by inserts
+        assert os.path.exists(db_path + ".prefix.json")
+        conn = ASERKGConnection(db_path, mode="memory")
+        assert conn.prefix_index is not None
+        conn.close()
+        conn = ASERKGConnection(db_path, mode="cache")
+        conn.insert_eventualities([eventualities[2]] * 3)
+        assert conn.prefix_index is None
+        assert [e.eid for e in conn.complete_eventualities("i", top_n=2)] == [eventualities[2].eid, extra.eid]
+        conn.close()
+        # read-only connections never build the index
+        conn = ASERKGConnection(db_path, mode="cache", read_only=True)
+        assert [e.eid for e in conn.complete_eventualities("i", top_n=1)] == [eventualities[2].eid]
+        conn.close()
+        conn = ASERKGConnection(db_path, mode="insert")
+        conn.insert_eventuality(extra)
+        conn.close()
+        conn = ASERKGConnection(db_path, mode="cache", read_only=True)
+        try:
+            conn.complete_eventualities("i")
+            assert False
+        except ValueError:
+            pass
+        conn.close()
+
+        db_paths = [os.path.join(tmp_dir, "KG_%d.db" % (i)) for i in range(2)]
+        conn = ShardedASERKGConnection(db_paths, mode="insert")
+        conn.insert_eventualities(eventualities + [extra])
+        conn.insert_eventuality(extra)
+        conn.close()
+        conn = ShardedASERKGConnection(db_paths, mode="cache")
+        assert [e.eid for e in conn.complete_eventualities("i ", top_n=1)] == [extra.eid]
+        assert set(e.eid for e in conn.complete_eventualities("i ")) == set(e.eid for e in eventualities[:3] + [extra])
+        conn.close()
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    test_indices()
+    test_upsert()
+    test_bulk_lookups()
+    test_writer()
+    test_cache()
+    test_id_set()
+    test_adjacency_index()
+    test_predecessors()
+    test_expand()
+    test_find_paths()
+    test_info_format()
+    test_lazy()
+    test_columnar()
+    test_integer_keys()
+    test_sparse_relations()
+    test_neighbors()
+    test_iter_columns()
+    test_read_only()
+    test_sharded()
+    test_snapshot()
+    test_similarity_search()
+    test_batch_overlap()
+    test_fulltext_search()
+    test_rankings()
+    test_prefix_completion()